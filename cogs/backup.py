@@ -1,15 +1,34 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import datetime
+import heapq
+import io
 import os
-import shutil
 import asyncio
+import tempfile
 from zoneinfo import ZoneInfo
-from typing import Optional
-from utils.config import GUILDS_DATA_DIR, BASE_DIR
+from typing import Dict, List, Optional, Tuple
+from utils.config import GUILDS_DATA_DIR
+from utils.backup_engine import BackupEngine, Snapshot
+from utils.log_storage import LogStorage, LOGS_DELTA_FILENAME
+from utils.wrapped_store import WrappedStore, WRAPPED_DB_FILENAME
 
 GERMAN_TZ = ZoneInfo("Europe/Berlin")
 MAX_FILE_SIZE_MB = 8  # Discord free tier limit
+# Nach so vielen inkrementellen Läufen wird wieder ein vollständiges Archiv hochgeladen
+DEFAULT_FULL_BACKUP_EVERY = 7
+# Begleitdateien von SQLite, die nie direkt gesichert werden
+SQLITE_SIDE_FILES = {
+    "logs.db-journal", "logs.db-wal", "logs.db-shm", LOGS_DELTA_FILENAME,
+    "wrapped.db-journal", "wrapped.db-wal", "wrapped.db-shm",
+}
+
+# Backups mit gleicher Uhrzeit werden über dieses Fenster verteilt (fester Versatz pro Guild)
+BACKUP_JITTER_SECONDS = 15 * 60
+# Anzahl gleichzeitig laufender Backups
+BACKUP_WORKERS = 3
+# Wartezeit bis zum nächsten Versuch, wenn ein Backup fehlgeschlagen ist
+BACKUP_RETRY_SECONDS = 30 * 60
 
 
 class BackupCog(commands.Cog, name="Backup"):
@@ -17,14 +36,26 @@ class BackupCog(commands.Cog, name="Backup"):
 
     def __init__(self, bot):
         self.bot = bot
+        self.engine = BackupEngine()
+        self._guild_locks: Dict[int, asyncio.Lock] = {}
+        self._last_garbage_collection: Optional[datetime.date] = None
+        # Heap aus (Fälligkeit, guild_id, Generation); veraltete Einträge werden beim Entnehmen übersprungen
+        self._schedule: List[Tuple[float, int, int]] = []
+        self._schedule_generation: Dict[int, int] = {}
+        self._schedule_changed = asyncio.Event()
+        self._job_queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
 
     async def cog_load(self):
         """Wird aufgerufen, wenn das Cog geladen wird."""
-        self.backup_check_loop.start()
+        self._tasks.append(self.bot.loop.create_task(self._run_scheduler()))
+        self._tasks.extend(self.bot.loop.create_task(self._backup_worker()) for _ in range(BACKUP_WORKERS))
 
     async def cog_unload(self):
         """Wird aufgerufen, wenn das Cog entladen wird."""
-        self.backup_check_loop.cancel()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
 
     # --- Data Access Methods ---
 
@@ -36,73 +67,157 @@ class BackupCog(commands.Cog, name="Backup"):
         """Speichert die Backup-Konfiguration für einen Server."""
         self.bot.data.save_guild_data(guild_id, "backup", data)
 
-    # --- Main Backup Loop ---
+    # --- Scheduler ---
 
-    @tasks.loop(minutes=1)
-    async def backup_check_loop(self):
-        """Prüft jede Minute, ob Backups ausgeführt werden müssen."""
-        try:
-            now = datetime.datetime.now(GERMAN_TZ)
-
-            for guild in self.bot.guilds:
-                try:
-                    # Prüfe, ob Backup-Modul aktiviert ist
-                    guild_config = self.bot.data.get_server_config(guild.id)
-                    if "Backup" not in guild_config.get('enabled_cogs', []):
-                        continue
-
-                    backup_config = self._get_backup_config(guild.id)
-                    if not backup_config.get('enabled'):
-                        continue
-
-                    # Prüfe, ob jetzt Backup durchgeführt werden sollte
-                    if self._should_backup_now(backup_config, now):
-                        await self._perform_backup(guild, backup_config)
-
-                except Exception as e:
-                    print(f"[Backup] Fehler bei Guild {guild.id}: {e}")
-
-        except Exception as e:
-            print(f"[Backup] Fehler in backup_check_loop: {e}")
-
-    @backup_check_loop.before_loop
-    async def before_backup_check_loop(self):
-        """Warte bis der Bot ready ist."""
-        await self.bot.wait_until_ready()
-
-    # --- Time Checking Logic ---
-
-    def _should_backup_now(self, config: dict, now: datetime.datetime) -> bool:
+    def _compute_next_run(self, guild_id: int, config: dict, now: datetime.datetime) -> Optional[datetime.datetime]:
         """
-        Prüft, ob ein Backup zu diesem Zeitpunkt durchgeführt werden sollte.
+        Berechnet den nächsten Backup-Zeitpunkt einer Guild.
+
+        Fällig ist der erste Tag nach last_backup + backup_frequency_days zur konfigurierten
+        Uhrzeit. Liegt dieser Zeitpunkt in der Vergangenheit (z.B. nach Ausfallzeit),
+        wird das Backup sofort nachgeholt.
 
         Returns:
-            True, wenn jetzt ein Backup laufen sollte
+            Zeitpunkt (inkl. festem Versatz pro Guild) oder None, wenn Backups deaktiviert sind
         """
+        if not config.get('enabled'):
+            return None
+
         # Hole konfigurierte Zeit (z.B. "03:00")
         backup_time_str = config.get('backup_time', '03:00')
         try:
             hour, minute = map(int, backup_time_str.split(':'))
+            run_time = datetime.time(hour, minute)
         except (ValueError, AttributeError):
-            return False
+            return None
 
-        # Prüfe, ob aktuelle Zeit passt (innerhalb 1-Minuten Fenster)
-        if now.hour != hour or now.minute != minute:
-            return False
+        jitter = datetime.timedelta(seconds=guild_id % BACKUP_JITTER_SECONDS)
 
-        # Prüfe Häufigkeit (Tage seit letztem Backup)
+        last_backup = None
         last_backup_str = config.get('last_backup_timestamp')
-        if not last_backup_str:
-            return True  # Noch nie gebackupt
+        if last_backup_str:
+            try:
+                last_backup = datetime.datetime.fromisoformat(last_backup_str)
+                if last_backup.tzinfo is None:
+                    last_backup = last_backup.replace(tzinfo=GERMAN_TZ)
+            except (ValueError, TypeError):
+                last_backup = None
+
+        if last_backup is None:
+            # Noch nie gebackupt: nächstes Vorkommen der Uhrzeit
+            due = datetime.datetime.combine(now.date(), run_time, tzinfo=GERMAN_TZ) + jitter
+            if due <= now:
+                due += datetime.timedelta(days=1)
+            return due
+
+        frequency_days = max(1, int(config.get('backup_frequency_days', 1)))
+        due_date = last_backup.astimezone(GERMAN_TZ).date() + datetime.timedelta(days=frequency_days)
+        due = datetime.datetime.combine(due_date, run_time, tzinfo=GERMAN_TZ) + jitter
+        # Verpasstes Fenster: sofort nachholen (mit Versatz, damit nicht alle gleichzeitig starten)
+        return max(due, now + datetime.timedelta(seconds=guild_id % 60))
+
+    def _schedule_at(self, guild_id: int, due: Optional[datetime.datetime]):
+        """Plant eine Guild (neu) ein. Frühere Einträge derselben Guild werden ungültig."""
+        generation = self._schedule_generation.get(guild_id, 0) + 1
+        self._schedule_generation[guild_id] = generation
+        if due is not None:
+            heapq.heappush(self._schedule, (due.timestamp(), guild_id, generation))
+        self._schedule_changed.set()
+
+    def reschedule(self, guild_id: int):
+        """Berechnet den nächsten Lauf einer Guild aus ihrer aktuellen Konfiguration."""
+        config = self._get_backup_config(guild_id)
+        self._schedule_at(guild_id, self._compute_next_run(guild_id, config, datetime.datetime.now(GERMAN_TZ)))
+
+    async def _run_scheduler(self):
+        """Schläft bis zum frühesten fälligen Backup; ohne anstehende Backups entsteht keine Last."""
+        await self.bot.wait_until_ready()
+        for guild in self.bot.guilds:
+            try:
+                self.reschedule(guild.id)
+            except Exception as e:
+                print(f"[Backup] Fehler beim Planen für Guild {guild.id}: {e}")
 
-        try:
-            last_backup = datetime.datetime.fromisoformat(last_backup_str)
-            frequency_days = config.get('backup_frequency_days', 1)
-            days_since_backup = (now - last_backup).days
+        while True:
+            self._schedule_changed.clear()
+            now = datetime.datetime.now(GERMAN_TZ).timestamp()
+
+            while self._schedule and self._schedule[0][0] <= now:
+                _, guild_id, generation = heapq.heappop(self._schedule)
+                if self._schedule_generation.get(guild_id) == generation:
+                    self._job_queue.put_nowait((guild_id, generation))
+
+            timeout = self._schedule[0][0] - now if self._schedule else None
+            try:
+                await asyncio.wait_for(self._schedule_changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _backup_worker(self):
+        """Arbeitet fällige Backups ab; höchstens BACKUP_WORKERS laufen gleichzeitig."""
+        while True:
+            guild_id, generation = await self._job_queue.get()
+            try:
+                await self._run_scheduled_backup(guild_id, generation)
+            except Exception as e:
+                print(f"[Backup] Fehler bei Guild {guild_id}: {e}")
+                self._schedule_at(guild_id, datetime.datetime.now(GERMAN_TZ) + datetime.timedelta(seconds=BACKUP_RETRY_SECONDS))
+            finally:
+                self._job_queue.task_done()
+
+    async def _run_scheduled_backup(self, guild_id: int, generation: int):
+        if self._schedule_generation.get(guild_id) != generation:
+            # Inzwischen neu geplant, der neuere Eintrag übernimmt
+            return
+
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            self._schedule_at(guild_id, None)
+            return
+
+        backup_config = self._get_backup_config(guild_id)
+        now = datetime.datetime.now(GERMAN_TZ)
+        due = self._compute_next_run(guild_id, backup_config, now)
+        if due is None:
+            self._schedule_at(guild_id, None)
+            return
+        # Der Heap-Eintrag selbst war fällig. Neu berechnet wird nur, um ein zwischenzeitliches
+        # manuelles Backup zu erkennen; ohne bisheriges Backup läge der nächste Termin sonst
+        # immer schon morgen und das erste Backup (oder sein Retry) würde täglich verschoben.
+        if backup_config.get('last_backup_timestamp') and due > now + datetime.timedelta(minutes=1):
+            self._schedule_at(guild_id, due)
+            return
+
+        # Prüfe, ob Backup-Modul aktiviert ist
+        guild_config = self.bot.data.get_server_config(guild_id)
+        if "Backup" not in guild_config.get('enabled_cogs', []):
+            self._schedule_at(guild_id, now + datetime.timedelta(days=1))
+            return
 
-            return days_since_backup >= frequency_days
-        except (ValueError, TypeError):
-            return True  # Invalides Format, führe Backup durch
+        await self._perform_backup(guild, backup_config)
+
+        if backup_config.get('last_backup_timestamp') and datetime.datetime.fromisoformat(backup_config['last_backup_timestamp']) >= now:
+            self.reschedule(guild_id)
+        else:
+            self._schedule_at(guild_id, now + datetime.timedelta(seconds=BACKUP_RETRY_SECONDS))
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        self.reschedule(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self._schedule_at(guild.id, None)
+
+    def invalidate_guild_cache(self, guild_id: Optional[int] = None):
+        """Plant nach einer Wiederherstellung neu, da sich die Backup-Konfiguration geändert haben kann."""
+        guild_ids = [g.id for g in self.bot.guilds] if guild_id is None else [guild_id]
+        for gid in guild_ids:
+            self.reschedule(gid)
+
+    async def web_on_toggle(self, guild_id: int):
+        """Wird aufgerufen, wenn das Modul im Dashboard (de)aktiviert wird."""
+        self.reschedule(guild_id)
 
     # --- Backup Execution ---
 
@@ -185,10 +300,9 @@ class BackupCog(commands.Cog, name="Backup"):
         """
         Führt ein Backup für einen Server durch.
 
-        1. Erstellt ZIP-Datei der Server-Daten
-        2. Prüft Dateigröße
-        3. Sendet ZIP zu Discord-Channel oder Dashboard-Forum-Post
-        4. Aktualisiert last_backup_timestamp
+        1. Erstellt einen inkrementellen Backup-Stand (Worker-Thread)
+        2. Sendet das ZIP der geänderten Dateien in Teilen direkt aus dem Speicher
+        3. Aktualisiert last_backup_timestamp
         """
         try:
             use_dashboard = config.get('use_dashboard_forum', False) or (config.get('destination_type') == 'dashboard_forum')
@@ -208,92 +322,39 @@ class BackupCog(commands.Cog, name="Backup"):
                 print(f"[Backup] Ungültiges Backup-Ziel für Guild {guild.id}")
                 return
 
-            # Erstelle Backup-ZIP
-            backup_file_path = await self._create_backup_zip(guild.id)
-
-            if not backup_file_path:
-                try:
-                    await channel.send("❌ **Backup fehlgeschlagen**: Konnte ZIP-Datei nicht erstellen.")
-                except (discord.Forbidden, AttributeError):
-                    pass
-                return
+            lock = self._guild_locks.setdefault(guild.id, asyncio.Lock())
+            async with lock:
+                snapshot = await self._create_snapshot(guild.id, config)
 
-            # Dateigröße und Splitting
-            try:
-                file_size_bytes = os.path.getsize(backup_file_path)
-            except OSError:
-                if os.path.exists(backup_file_path):
-                    os.remove(backup_file_path)
-                return
+                if snapshot is None:
+                    try:
+                        await channel.send("❌ **Backup fehlgeschlagen**: Konnte Backup-Stand nicht erstellen.")
+                    except (discord.Forbidden, AttributeError):
+                        pass
+                    return
 
-            MAX_FILE_SIZE_BYTES = int(MAX_FILE_SIZE_MB * 1024 * 1024)
-            parts = []
-            
-            if file_size_bytes > MAX_FILE_SIZE_BYTES:
-                part_num = 1
-                with open(backup_file_path, 'rb') as f:
-                    while True:
-                        chunk = f.read(MAX_FILE_SIZE_BYTES)
-                        if not chunk:
-                            break
-                        part_file = f"{backup_file_path}.part{part_num}"
-                        with open(part_file, 'wb') as p:
-                            p.write(chunk)
-                        parts.append(part_file)
-                        part_num += 1
-            else:
-                parts = [backup_file_path]
+                try:
+                    if snapshot.archive:
+                        if not await self._upload_snapshot(guild, channel, snapshot):
+                            return
+                    else:
+                        print(f"[Backup] Keine Änderungen für Guild {guild.id} seit dem letzten Backup")
 
-            # Sende zu Discord
-            timestamp = datetime.datetime.now(GERMAN_TZ).strftime('%d.%m.%Y %H:%M Uhr')
-            filename_base = f"{guild.name}_Backup_{datetime.datetime.now(GERMAN_TZ).strftime('%Y%m%d_%H%M%S')}.zip"
+                    # Erst nach erfolgreichem Upload wird der Stand zur Basis für das nächste Backup
+                    await asyncio.to_thread(self.engine.commit, guild.id, snapshot)
+                    await asyncio.to_thread(self.engine.prune, guild.id)
+                finally:
+                    # Nicht übernommene Stände freigeben, sonst wartet die Garbage Collection ewig
+                    self.engine.discard(snapshot)
 
-            try:
-                for i, part_path in enumerate(parts):
-                    part_filename = filename_base if len(parts) == 1 else f"{filename_base}.part{i+1}"
-                    
-                    with open(part_path, 'rb') as f:
-                        discord_file = discord.File(f, filename=part_filename)
-                        
-                        if len(parts) == 1:
-                            title = "✅ Server-Backup erstellt"
-                            desc = f"Automatisches Backup vom {timestamp}"
-                        else:
-                            title = f"✅ Server-Backup erstellt (Teil {i+1}/{len(parts)})"
-                            desc = f"Teil {i+1} des automatischen Backups vom {timestamp}"
-                            
-                        embed = discord.Embed(
-                            title=title,
-                            description=desc,
-                            color=discord.Color.green()
-                        )
-                        part_size_mb = os.path.getsize(part_path) / (1024 * 1024)
-                        embed.add_field(name="Dateigröße", value=f"{part_size_mb:.2f} MB", inline=True)
-                        embed.add_field(name="Server", value=f"{guild.name}", inline=True)
-                        embed.set_footer(text=f"Guild ID: {guild.id}")
-
-                        await channel.send(embed=embed, file=discord_file)
-                        
-            except discord.Forbidden:
-                print(f"[Backup] Keine Berechtigung, in Ziel-Kanal/Thread {channel.id} zu schreiben")
-            except discord.HTTPException as e:
-                print(f"[Backup] HTTP-Fehler beim Upload: {e}")
-            finally:
-                # Cleanup: Lösche temp-Dateien
-                if os.path.exists(backup_file_path):
-                    try:
-                        os.remove(backup_file_path)
-                    except OSError:
-                        pass
-                for part_path in parts:
-                    if part_path != backup_file_path and os.path.exists(part_path):
-                        try:
-                            os.remove(part_path)
-                        except OSError:
-                            pass
+            await self._collect_garbage_daily()
 
             # Aktualisiere last_backup_timestamp
             config['last_backup_timestamp'] = datetime.datetime.now(GERMAN_TZ).isoformat()
+            config['last_manifest_id'] = snapshot.manifest['id']
+            config['runs_since_full_backup'] = 0 if snapshot.is_full else config.get('runs_since_full_backup', 0) + 1
+            if snapshot.manifest.get('logs_max_id') is not None:
+                config['logs_backup_max_id'] = snapshot.manifest['logs_max_id']
             self._save_backup_config(guild.id, config)
 
             print(f"[Backup] Successfully backed up guild {guild.id} ({guild.name})")
@@ -301,17 +362,15 @@ class BackupCog(commands.Cog, name="Backup"):
         except Exception as e:
             print(f"[Backup] Fehler beim Backup der Guild {guild.id}: {e}")
 
-    # --- ZIP Creation ---
+    # --- Snapshot Creation & Upload ---
 
-    async def _create_backup_zip(self, guild_id: int) -> Optional[str]:
+    async def _create_snapshot(self, guild_id: int, config: dict) -> Optional[Snapshot]:
         """
-        Erstellt eine ZIP-Datei der Guild-Daten.
-
-        Args:
-            guild_id: Discord Guild ID
+        Erstellt einen inkrementellen Backup-Stand der Guild-Daten in einem Worker-Thread.
+        Regelmäßig (backup_full_every) wird ein vollständiges Archiv erzwungen.
 
         Returns:
-            Pfad zur ZIP-Datei oder None bei Fehler
+            Snapshot oder None bei Fehler
         """
         try:
             guild_data_dir = os.path.join(GUILDS_DATA_DIR, str(guild_id))
@@ -321,28 +380,127 @@ class BackupCog(commands.Cog, name="Backup"):
                 print(f"[Backup] Kein Datenverzeichnis für Guild {guild_id}")
                 return None
 
-            # Erstelle temp Verzeichnis für Backups
-            temp_backup_dir = os.path.join(BASE_DIR, 'temp_backups')
-            os.makedirs(temp_backup_dir, exist_ok=True)
+            full_every = config.get('backup_full_every', DEFAULT_FULL_BACKUP_EVERY)
+            full = config.get('runs_since_full_backup', 0) + 1 >= full_every
 
-            # Erstelle unique temp-Datei Pfad
-            timestamp = datetime.datetime.now(GERMAN_TZ).strftime('%Y%m%d_%H%M%S_%f')
-            zip_path = os.path.join(temp_backup_dir, f"backup_{guild_id}_{timestamp}")
-
-            # Erstelle ZIP-Archiv (shutil.make_archive fügt .zip automatisch hinzu)
-            shutil.make_archive(
-                zip_path,                    # Basis-Name (ohne .zip)
-                'zip',                       # Format
-                root_dir=guild_data_dir,     # Verzeichnis zum Zipen
-                base_dir='.'                 # Inhalt zipen, nicht den Ordner
-            )
-
-            return f"{zip_path}.zip"
+            return await asyncio.to_thread(self._build_snapshot, guild_id, guild_data_dir, full, config)
 
         except Exception as e:
-            print(f"[Backup] Fehler beim Erstellen der ZIP für Guild {guild_id}: {e}")
+            print(f"[Backup] Fehler beim Erstellen des Backup-Stands für Guild {guild_id}: {e}")
             return None
 
+    async def _collect_garbage_daily(self):
+        """
+        Entfernt nicht mehr referenzierte Blöcke höchstens einmal täglich.
+        Läuft erst nach commit/prune; die Engine wartet dabei auf offene Stände anderer Guilds.
+        """
+        today = datetime.datetime.now(GERMAN_TZ).date()
+        if self._last_garbage_collection == today:
+            return
+        self._last_garbage_collection = today
+        removed = await asyncio.to_thread(self.engine.collect_garbage)
+        if removed is None:
+            # Andere Backups liefen noch: beim nächsten Lauf erneut versuchen
+            self._last_garbage_collection = None
+        elif removed:
+            print(f"[Backup] {removed} nicht mehr benötigte Blöcke entfernt")
+
+    def _get_log_storage(self) -> LogStorage:
+        logging_cog = self.bot.get_cog("Logging")
+        if logging_cog and hasattr(logging_cog, 'log_storage'):
+            return logging_cog.log_storage
+        return LogStorage()
+
+    def _get_wrapped_store(self) -> WrappedStore:
+        wrapped_cog = self.bot.get_cog("Wrapped")
+        if wrapped_cog and hasattr(wrapped_cog, 'store'):
+            return wrapped_cog.store
+        return WrappedStore(self.bot.data)
+
+    def _build_snapshot(self, guild_id: int, guild_data_dir: str, full: bool, config: dict) -> Snapshot:
+        """
+        Blockierender Teil des Backups (läuft im Worker-Thread).
+
+        logs.db und wrapped.db werden nie direkt gelesen, sondern über die SQLite-Backup-API konsistent kopiert.
+        Mit logs_backup_mode='delta' enthalten inkrementelle Läufe nur die neuen Log-Einträge
+        seit dem letzten Backup (logs_delta.db).
+        """
+        exclude = set(SQLITE_SIDE_FILES)
+        extra_files = {}
+        logs_max_id = None
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            if os.path.exists(os.path.join(guild_data_dir, "logs.db")):
+                log_storage = self._get_log_storage()
+                exclude.add("logs.db")
+                since_id = config.get('logs_backup_max_id')
+
+                if config.get('logs_backup_mode') == 'delta' and not full and since_id is not None:
+                    delta_path = os.path.join(temp_dir, LOGS_DELTA_FILENAME)
+                    result = log_storage.export_delta(guild_id, since_id, delta_path)
+                    if result['rows']:
+                        extra_files[LOGS_DELTA_FILENAME] = delta_path
+                    logs_max_id = result['max_id']
+                else:
+                    snapshot_path = os.path.join(temp_dir, "logs.db")
+                    logs_max_id = log_storage.create_snapshot(guild_id, snapshot_path)
+                    extra_files["logs.db"] = snapshot_path
+
+            if os.path.exists(os.path.join(guild_data_dir, WRAPPED_DB_FILENAME)):
+                exclude.add(WRAPPED_DB_FILENAME)
+                wrapped_path = os.path.join(temp_dir, WRAPPED_DB_FILENAME)
+                self._get_wrapped_store().create_snapshot(guild_id, wrapped_path)
+                extra_files[WRAPPED_DB_FILENAME] = wrapped_path
+
+            # Das Archiv wird aus dem Blockspeicher gebaut, die temporären Dateien werden danach nicht mehr gebraucht
+            snapshot = self.engine.create_snapshot(guild_id, guild_data_dir, full, extra_files, exclude)
+
+        snapshot.manifest['logs_max_id'] = logs_max_id
+        return snapshot
+
+    async def _upload_snapshot(self, guild: discord.Guild, channel, snapshot: Snapshot) -> bool:
+        """Lädt das Archiv in Teilen hoch, ohne Zwischendateien auf der Festplatte."""
+        max_part_size = int(MAX_FILE_SIZE_MB * 1024 * 1024)
+        archive = memoryview(snapshot.archive)
+        part_count = max(1, -(-len(archive) // max_part_size))
+
+        now = datetime.datetime.now(GERMAN_TZ)
+        timestamp = now.strftime('%d.%m.%Y %H:%M Uhr')
+        kind = "vollständig" if snapshot.is_full else "inkrementell"
+        filename_base = f"{guild.name}_Backup_{now.strftime('%Y%m%d_%H%M%S')}.zip"
+
+        try:
+            for i in range(part_count):
+                part = archive[i * max_part_size:(i + 1) * max_part_size]
+                part_filename = filename_base if part_count == 1 else f"{filename_base}.part{i+1}"
+                discord_file = discord.File(io.BytesIO(part), filename=part_filename)
+
+                if part_count == 1:
+                    title = "✅ Server-Backup erstellt"
+                    desc = f"Automatisches Backup vom {timestamp} ({kind})"
+                else:
+                    title = f"✅ Server-Backup erstellt (Teil {i+1}/{part_count})"
+                    desc = f"Teil {i+1} des automatischen Backups vom {timestamp} ({kind})"
+
+                embed = discord.Embed(
+                    title=title,
+                    description=desc,
+                    color=discord.Color.green()
+                )
+                embed.add_field(name="Dateigröße", value=f"{len(part) / (1024 * 1024):.2f} MB", inline=True)
+                embed.add_field(name="Server", value=f"{guild.name}", inline=True)
+                embed.add_field(name="Dateien", value=f"{len(snapshot.changed_files)}/{snapshot.total_files} im Archiv", inline=True)
+                embed.set_footer(text=f"Guild ID: {guild.id} • Stand: {snapshot.manifest['id']}")
+
+                await channel.send(embed=embed, file=discord_file)
+
+            return True
+        except discord.Forbidden:
+            print(f"[Backup] Keine Berechtigung, in Ziel-Kanal/Thread {channel.id} zu schreiben")
+        except discord.HTTPException as e:
+            print(f"[Backup] HTTP-Fehler beim Upload: {e}")
+        return False
+
     # --- Discord Commands ---
 
     @commands.command(name="backup")
@@ -395,6 +553,7 @@ class BackupCog(commands.Cog, name="Backup"):
         backup_config = self._get_backup_config(guild_id)
         backup_config.update(config_data)
         self._save_backup_config(guild_id, backup_config)
+        self.reschedule(guild_id)
 
         msg = "Backup-Einstellungen erfolgreich gespeichert."
         if config_data.get('use_dashboard_forum'):
@@ -6,7 +6,7 @@ from discord import app_commands, Interaction, ButtonStyle, Embed, Color, TextCh
 import datetime
 import asyncio
 import traceback
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Set
 from zoneinfo import ZoneInfo
 
 GERMAN_TZ = ZoneInfo("Europe/Berlin")
@@ -26,6 +26,55 @@ def validate_birthday_format(date_str):
     except (ValueError, TypeError):
         return False
 
+MONTH_NAMES = {
+    1: "Januar", 2: "Februar", 3: "März", 4: "April", 5: "Mai", 6: "Juni",
+    7: "Juli", 8: "August", 9: "September", 10: "Oktober", 11: "November", 12: "Dezember"
+}
+
+class BirthdayIndex:
+    """
+    Geburtstage einer Guild, indiziert nach MM-DD.
+    Die Daten werden nur beim Eintragen geparst, nicht bei jeder Abfrage.
+    """
+    def __init__(self, birthdays: dict):
+        self.by_date: Dict[str, Set[int]] = {}
+        self.entries: Dict[int, Tuple[int, int, Optional[int]]] = {}
+        for user_id, bday_data in birthdays.items():
+            try:
+                self.set(int(user_id), bday_data)
+            except (ValueError, TypeError):
+                continue
+
+    def set(self, user_id: int, bday_data) -> None:
+        # Neues und altes Format unterstützen
+        if isinstance(bday_data, dict):
+            date_str, year = bday_data.get("date"), bday_data.get("year")
+        else:
+            date_str, year = bday_data, None
+        self.remove(user_id)
+        if not validate_birthday_format(date_str):
+            return
+        month, day = (int(part) for part in date_str.split('-'))
+        self.entries[user_id] = (month, day, year)
+        self.by_date.setdefault(date_str, set()).add(user_id)
+
+    def remove(self, user_id: int) -> None:
+        entry = self.entries.pop(user_id, None)
+        if entry:
+            date_str = f"{entry[0]:02d}-{entry[1]:02d}"
+            users = self.by_date.get(date_str)
+            if users:
+                users.discard(user_id)
+                if not users:
+                    del self.by_date[date_str]
+
+    def on_date(self, date_str: str) -> Set[int]:
+        return self.by_date.get(date_str, set())
+
+    def sorted_entries(self) -> List[Tuple[int, int, int, Optional[int]]]:
+        """(Monat, Tag, user_id, Jahr), sortiert nach Monat und Tag."""
+        return sorted((month, day, user_id, year) for user_id, (month, day, year) in self.entries.items())
+
 # --- UI-Elemente (Modal & Views) ---
 class BirthdayInputModal(Modal, title='Geburtstag hinzufügen/ändern'):
     day_input = TextInput(label='Tag', placeholder='z.B. 25', style=TextStyle.short, required=True, min_length=1, max_length=2)
@@ -46,24 +95,14 @@ class BirthdayInputModal(Modal, title='Geburtstag hinzufügen/ändern'):
 
             datetime.datetime(year if year else 2000, month, day) # Validierung
 
-            guild_id = interaction.guild.id
-            user_id_str = str(interaction.user.id)
-            
-            # Using DataManager
-            data = self.bot.data.get_guild_data(guild_id, "birthday")
-            birthdays = data.setdefault("birthdays", {})
-            
-            birthday_data = {"date": f"{month:02d}-{day:02d}"}
-            if year:
-                birthday_data["year"] = year
-
-            birthdays[user_id_str] = birthday_data
-            self.bot.data.save_guild_data(guild_id, "birthday", data)
+            cog = self.bot.get_cog('Geburtstage')
+            if not cog:
+                await interaction.followup.send("Das Geburtstags-Modul ist nicht geladen.", ephemeral=True)
+                return
+            await cog.set_birthday(interaction.guild, interaction.user.id, month, day, year, update_list=False)
 
             await interaction.followup.send(f"Dein Geburtstag wurde gespeichert!", ephemeral=True)
-            cog = self.bot.get_cog('Geburtstage')
-            if cog:
-                await cog.update_birthday_list_message(interaction.guild)
+            await cog.update_birthday_list_message(interaction.guild)
         except ValueError:
             await interaction.followup.send("Ungültiges Datum. Bitte prüfe deine Eingabe.", ephemeral=True)
         except Exception as e:
@@ -81,18 +120,10 @@ class BirthdayListView(View):
 
     @discord.ui.button(label='🗑️ Meinen Geburtstag löschen', style=ButtonStyle.danger, custom_id='remove_birthday_button_persistent')
     async def remove_birthday(self, interaction: Interaction, button: Button):
-        guild_id = interaction.guild.id
-        user_id_str = str(interaction.user.id)
-        
-        data = self.bot.data.get_guild_data(guild_id, "birthday")
-        birthdays = data.get("birthdays", {})
-        
-        if birthdays.pop(user_id_str, None):
-            self.bot.data.save_guild_data(guild_id, "birthday", data)
+        cog = self.bot.get_cog('Geburtstage')
+        if cog and await cog.remove_birthday(interaction.guild, interaction.user.id, update_list=False):
             await interaction.response.send_message("Dein Geburtstag wurde entfernt.", ephemeral=True)
-            cog = self.bot.get_cog('Geburtstage')
-            if cog:
-                await cog.update_birthday_list_message(interaction.guild)
+            await cog.update_birthday_list_message(interaction.guild)
         else:
             await interaction.response.send_message("Kein Geburtstag für dich gefunden.", ephemeral=True)
 
@@ -100,11 +131,62 @@ class BirthdayListView(View):
 class BirthdayCog(commands.Cog, name="Geburtstage"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._indexes: Dict[int, BirthdayIndex] = {}
+        self._list_embeds: Dict[int, Embed] = {}
         self.check_birthdays_task.start()
 
     def cog_unload(self):
         self.check_birthdays_task.cancel()
 
+    # --- Index & Datenzugriff ---
+    def invalidate_guild_cache(self, guild_id: Optional[int] = None):
+        """Verwirft Index und Listen-Embed (z.B. nach einer Wiederherstellung)."""
+        if guild_id is None:
+            self._indexes.clear()
+            self._list_embeds.clear()
+        else:
+            self._indexes.pop(guild_id, None)
+            self._list_embeds.pop(guild_id, None)
+
+    def _get_index(self, guild_id: int) -> BirthdayIndex:
+        index = self._indexes.get(guild_id)
+        if index is None:
+            config = self.bot.data.get_guild_data(guild_id, "birthday")
+            index = BirthdayIndex(config.get("birthdays", {}))
+            self._indexes[guild_id] = index
+        return index
+
+    def _invalidate_list(self, guild_id: int):
+        self._list_embeds.pop(guild_id, None)
+
+    async def set_birthday(self, guild: discord.Guild, user_id: int, month: int, day: int, year: Optional[int], update_list: bool = True):
+        """Speichert einen Geburtstag und hält Index und Listen-Cache aktuell."""
+        config = self.bot.data.get_guild_data(guild.id, "birthday")
+        birthdays = config.setdefault("birthdays", {})
+
+        birthday_data = {"date": f"{month:02d}-{day:02d}"}
+        if year:
+            birthday_data["year"] = year
+        birthdays[str(user_id)] = birthday_data
+        self.bot.data.save_guild_data(guild.id, "birthday", config)
+
+        self._get_index(guild.id).set(user_id, birthday_data)
+        self._invalidate_list(guild.id)
+        if update_list:
+            await self.update_birthday_list_message(guild)
+
+    async def remove_birthday(self, guild: discord.Guild, user_id: int, update_list: bool = True) -> bool:
+        config = self.bot.data.get_guild_data(guild.id, "birthday")
+        if not config.get("birthdays", {}).pop(str(user_id), None):
+            return False
+        self.bot.data.save_guild_data(guild.id, "birthday", config)
+
+        self._get_index(guild.id).remove(user_id)
+        self._invalidate_list(guild.id)
+        if update_list:
+            await self.update_birthday_list_message(guild)
+        return True
+
     # --- Task für tägliche Checks ---
     @tasks.loop(time=datetime.time(hour=0, minute=1, second=0, tzinfo=GERMAN_TZ))
     async def check_birthdays_task(self):
@@ -113,27 +195,49 @@ class BirthdayCog(commands.Cog, name="Geburtstage"):
         print(f"[{get_adjusted_time()}] Starte täglichen Geburtstags-Check...")
 
         for guild in self.bot.guilds:
+            index = self._get_index(guild.id)
+            todays_ids = index.on_date(today_str)
             config = self.bot.data.get_guild_data(guild.id, "birthday")
-            birthdays = config.get("birthdays", {})
-            role = guild.get_role(config.get("role_id", 0))
+            role = guild.get_role(config.get("role_id") or 0)
+            role_holders = config.get("role_holders")
+            if role_holders is None:
+                # Einmalige Übernahme aus älteren Daten ohne gemerkte Rolleninhaber
+                role_holders = [m.id for m in role.members] if role else []
+                # Sofort merken (auch leer), sonst wiederholt sich der Scan jede Nacht
+                config["role_holders"] = role_holders
+                self.bot.data.save_guild_data(guild.id, "birthday", config)
+            if not todays_ids and not role_holders:
+                continue
+
+            new_holders = []
 
-            # Rollen von gestern entfernen
+            # Rollen von gestern entfernen - nur bei den gemerkten Rolleninhabern
             if role:
-                for member in guild.members:
-                    if role in member.roles and birthdays.get(str(member.id), {}).get("date") != today_str:
+                for user_id in role_holders:
+                    if user_id in todays_ids:
+                        new_holders.append(user_id)
+                        continue
+                    member = guild.get_member(user_id)
+                    if member and role in member.roles:
                         try: await member.remove_roles(role, reason="Geburtstag vorbei")
                         except (discord.Forbidden, discord.HTTPException): pass
 
-            # Heutige Geburtstagskinder finden
+            # Heutige Geburtstagskinder
             todays_birthdays_members = []
-            for user_id, bday_data in birthdays.items():
-                if bday_data.get("date") == today_str:
-                    member = guild.get_member(int(user_id))
-                    if member:
-                        todays_birthdays_members.append(member)
-                        if role:
-                            try: await member.add_roles(role, reason="Herzlichen Glückwunsch!")
-                            except (discord.Forbidden, discord.HTTPException): pass
+            for user_id in todays_ids:
+                member = guild.get_member(user_id)
+                if not member:
+                    continue
+                todays_birthdays_members.append(member)
+                if role and user_id not in new_holders:
+                    try:
+                        await member.add_roles(role, reason="Herzlichen Glückwunsch!")
+                        new_holders.append(user_id)
+                    except (discord.Forbidden, discord.HTTPException): pass
+
+            if new_holders != role_holders:
+                config["role_holders"] = new_holders
+                self.bot.data.save_guild_data(guild.id, "birthday", config)
             
             # Ankündigung senden
             announcement_channel_id = config.get("announcement_channel_id")
@@ -147,84 +251,71 @@ class BirthdayCog(commands.Cog, name="Geburtstage"):
         
         print(f"[{get_adjusted_time()}] Täglicher Geburtstags-Check beendet.")
 
-    # --- Kernfunktion zum Aktualisieren der Liste ---
-    async def update_birthday_list_message(self, guild: discord.Guild):
-        config = self.bot.data.get_guild_data(guild.id, "birthday")
-        channel_id = config.get("list_channel_id")
-        message_id = config.get("list_message_id")
-
-        if not channel_id or not message_id: return
-
-        try:
-            channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
-            message = await channel.fetch_message(message_id)
-        except (NotFound, Forbidden, HTTPException):
-            return
-
+    def _build_list_embed(self, guild: discord.Guild) -> Embed:
+        """Baut das Listen-Embed aus dem Index. Ehemalige Mitglieder werden dabei entfernt."""
         embed = Embed(title=f"🎂 Geburtstagsliste - {guild.name}", color=Color.gold())
-        
+        index = self._get_index(guild.id)
+
         all_birthdays = []
-        birthdays_data = config.get("birthdays", {})
         users_to_remove = []  # Track users that no longer exist
-        
-        for user_id, bday_data in birthdays_data.items():
-            member = guild.get_member(int(user_id))
+        for month, day, user_id, year in index.sorted_entries():
+            member = guild.get_member(user_id)
             if not member:
-                # User no longer on server or account deleted - mark for removal
                 users_to_remove.append(user_id)
                 continue
-                
-            try:
-                # Handle new and old format of bday_data
-                date_str = None
-                year = None
-                if isinstance(bday_data, dict):
-                    date_str = bday_data.get("date")
-                    year = bday_data.get("year")
-                elif isinstance(bday_data, str): # Old format compatibility
-                    date_str = bday_data
-                
-                if not date_str or not validate_birthday_format(date_str):
-                    continue
+            all_birthdays.append((month, day, member, year))
 
-                dt_obj = datetime.datetime.strptime(date_str, "%m-%d")
-                all_birthdays.append((dt_obj.month, dt_obj.day, member, year))
-            except (ValueError, KeyError, AttributeError):
-                continue
-        
         # Clean up users that no longer exist
         if users_to_remove:
+            config = self.bot.data.get_guild_data(guild.id, "birthday")
+            birthdays_data = config.get("birthdays", {})
             for user_id in users_to_remove:
-                del birthdays_data[user_id]
+                birthdays_data.pop(str(user_id), None)
+                index.remove(user_id)
             self.bot.data.save_guild_data(guild.id, "birthday", config)
             print(f"[Birthday] Cleaned up {len(users_to_remove)} non-existent users from {guild.name}")
-        
-        all_birthdays.sort(key=lambda x: (x[0], x[1]))  # Sort by month and day only
 
         if not all_birthdays:
             embed.description = "Noch keine Geburtstage eingetragen!"
         else:
-            months = {
-                1: "Januar", 2: "Februar", 3: "März", 4: "April", 5: "Mai", 6: "Juni",
-                7: "Juli", 8: "August", 9: "September", 10: "Oktober", 11: "November", 12: "Dezember"
-            }
             current_month = -1
             month_lines = []
             for month, day, member, year in all_birthdays:
                 if month != current_month:
                     if month_lines:
-                        embed.add_field(name=f"📅 {months[current_month]}", value="\n".join(month_lines), inline=False)
+                        embed.add_field(name=f"📅 {MONTH_NAMES[current_month]}", value="\n".join(month_lines), inline=False)
                     current_month = month
                     month_lines = []
                 year_str = f" ({year})" if year else ""
-                month_name = months.get(month, "Unbekannt")
+                month_name = MONTH_NAMES.get(month, "Unbekannt")
                 line = f"{member.mention} → {day:02d}. {month_name}{year_str}"
                 month_lines.append(line)
             
             if month_lines:
-                embed.add_field(name=f"📅 {months[current_month]}", value="\n".join(month_lines), inline=False)
+                embed.add_field(name=f"📅 {MONTH_NAMES[current_month]}", value="\n".join(month_lines), inline=False)
 
         embed.set_footer(text=f"Zuletzt aktualisiert: {get_adjusted_time().strftime('%d.%m.%Y %H:%M:%S %Z')}")
+        return embed
+
+    # --- Kernfunktion zum Aktualisieren der Liste ---
+    async def update_birthday_list_message(self, guild: discord.Guild):
+        config = self.bot.data.get_guild_data(guild.id, "birthday")
+        channel_id = config.get("list_channel_id")
+        message_id = config.get("list_message_id")
+
+        if not channel_id or not message_id: return
+
+        try:
+            channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+            message = await channel.fetch_message(message_id)
+        except (NotFound, Forbidden, HTTPException):
+            return
+
+        # Embed nur neu bauen, wenn sich Einträge geändert haben
+        embed = self._list_embeds.get(guild.id)
+        if embed is None:
+            embed = self._build_list_embed(guild)
+            self._list_embeds[guild.id] = embed
         
         try:
             await message.edit(content=None, embed=embed, view=BirthdayListView(self.bot))
@@ -278,6 +369,7 @@ class BirthdayCog(commands.Cog, name="Geburtstage"):
             config['role_id'] = None
 
         self.bot.data.save_guild_data(guild_id, "birthday", config)
+        self._invalidate_list(guild_id)
         if list_ch_id:
             await self.update_birthday_list_message(guild)
         return True, "Geburtstags-Einstellungen erfolgreich gespeichert."
@@ -293,46 +385,22 @@ class BirthdayCog(commands.Cog, name="Geburtstage"):
         except ValueError:
             return False, "Ungültiges Datum."
             
-        config = self.bot.data.get_guild_data(guild_id, "birthday")
-        birthdays = config.setdefault("birthdays", {})
-        
-        birthdays[str(user_id)] = {"date": f"{month:02d}-{day:02d}"}
-        if year:
-            birthdays[str(user_id)]["year"] = year
-
-        self.bot.data.save_guild_data(guild_id, "birthday", config)
-        await self.update_birthday_list_message(guild)
+        await self.set_birthday(guild, user_id, month, day, year)
         return True, f"Geburtstag für {member.display_name} hinzugefügt."
 
     async def web_remove_birthday(self, guild_id: int, user_id: int) -> Tuple[bool, str]:
         guild = self.bot.get_guild(guild_id)
         if not guild: return False, "Server nicht gefunden."
         
-        config = self.bot.data.get_guild_data(guild_id, "birthday")
-        birthdays = config.get("birthdays", {})
-        
-        if birthdays.pop(str(user_id), None):
-            self.bot.data.save_guild_data(guild_id, "birthday", config)
-            await self.update_birthday_list_message(guild)
+        if await self.remove_birthday(guild, user_id):
             return True, f"Geburtstag für Benutzer-ID {user_id} entfernt."
         return False, "Kein Geburtstag für diesen Benutzer gefunden."
 
     @commands.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
         """Entfernt den Geburtstag eines Users, wenn er den Server verlässt."""
-        guild_id = member.guild.id
-        user_id_str = str(member.id)
-        
-        config = self.bot.data.get_guild_data(guild_id, "birthday")
-        birthdays = config.get("birthdays", {})
-        
-        if user_id_str in birthdays:
-            del birthdays[user_id_str]
-            self.bot.data.save_guild_data(guild_id, "birthday", config)
-            print(f"[Birthday] User {member} (ID: {user_id_str}) hat den Server {member.guild.name} verlassen. Geburtstag entfernt.")
-            
-            # Liste aktualisieren
-            await self.update_birthday_list_message(member.guild)
+        if await self.remove_birthday(member.guild, member.id):
+            print(f"[Birthday] User {member} (ID: {member.id}) hat den Server {member.guild.name} verlassen. Geburtstag entfernt.")
 
 async def setup(bot: commands.Bot):
     bot.add_view(BirthdayListView(bot))
@@ -1,10 +1,11 @@
 import discord
 from discord.ext import commands
-import random
+import asyncio
 import json
 from datetime import datetime, timezone
 from typing import Optional, Tuple, Dict, List
 import hashlib
+from utils.contexto_vectors import WordVectorStore
 
 class ContextoCog(commands.Cog, name="Contexto"):
     def __init__(self, bot: commands.Bot):
@@ -22,6 +23,13 @@ class ContextoCog(commands.Cog, name="Contexto"):
             "TECHNIK": ["COMPUTER", "HANDY", "INTERNET", "STROM", "RADIO"],
             "GEBÄUDE": ["HAUS", "SCHULE", "KÜCHE", "FENSTER", "TÜR"]
         }
+        # Echte Wortvektoren (data/contexto), sonst Rückfall auf die Heuristik oben
+        self.vectors = WordVectorStore()
+        if self.vectors.load():
+            print(f"Contexto: {len(self.vectors.vocab)} Wortvektoren geladen.")
+        else:
+            print("Contexto: Keine Wortvektoren gefunden, nutze einfache Ähnlichkeit.")
+        self._rank_table_tasks: Dict[str, asyncio.Future] = {}
 
     def get_contexto_config(self, guild_id: int):
         return self.bot.data.get_guild_data(guild_id, "contexto_game") or {}
@@ -73,13 +81,39 @@ class ContextoCog(commands.Cog, name="Contexto"):
         rank = int(5000 * (1 - min(score, 1.0) * 0.95)) + 2
         
         # Ein bisschen Rauschen basierend auf dem Wort-Hash für Konsistenz
-        noise = int(hashlib.mdsafe(guess.encode()).hexdigest(), 16) % 50
+        noise = int(hashlib.md5(guess.encode()).hexdigest(), 16) % 50
         return max(2, rank + noise)
 
     def _get_daily_word(self):
         seed = datetime.now(timezone.utc).strftime("%Y%m%d")
-        random.seed(seed)
-        return random.choice(self.words).upper()
+        if self.vectors.available:
+            return self.vectors.daily_target(seed)
+        digest = hashlib.sha256(seed.encode()).digest()
+        return self.words[int.from_bytes(digest[:8], 'big') % len(self.words)].upper()
+
+    async def _get_rank_table(self, target: str) -> Dict[str, int]:
+        """
+        Liefert die Rangliste zum Zielwort. Die Berechnung läuft einmal pro Zielwort
+        in einem Thread, gleichzeitige Anfragen warten auf dasselbe Ergebnis.
+        """
+        future = self._rank_table_tasks.get(target)
+        if future is None:
+            future = self.bot.loop.run_in_executor(None, self.vectors.rank_table, target)
+            self._rank_table_tasks = {target: future}
+        try:
+            return await future
+        except Exception:
+            # Fehlgeschlagene Berechnung nicht cachen, der nächste Versuch rechnet neu
+            if self._rank_table_tasks.get(target) is future:
+                del self._rank_table_tasks[target]
+            raise
+
+    async def _get_rank(self, guess: str, target: str) -> Optional[int]:
+        """Rang des Rateversuchs, None wenn das Wort nicht im Vokabular ist."""
+        if self.vectors.available and target in self.vectors:
+            table = await self._get_rank_table(target)
+            return table.get(guess)
+        return self._calculate_similarity(guess, target)
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -114,12 +148,16 @@ class ContextoCog(commands.Cog, name="Contexto"):
 
         # Rang berechnen
         target = game_state["target"]
-        rank = self._calculate_similarity(content, target)
+        rank = await self._get_rank(content, target)
         
         # Nachricht löschen
         try: await message.delete()
         except: pass
 
+        if rank is None:
+            await message.channel.send(f"❓ {message.author.mention}, das Wort **{content}** kenne ich leider nicht.", delete_after=5)
+            return
+
         # Fortschrittsbalken oder Indikator
         indicator = "🔴" # Kalt
         if rank < 100: indicator = "🔥" # Heiß
@@ -146,8 +184,6 @@ class ContextoCog(commands.Cog, name="Contexto"):
         })
         # Sortiere guesses nach Rang für das Dashboard
         game_state["guesses"] = sorted(game_state["guesses"], key=lambda x: x["rank"])[:50]
-
-        await message.reply(msg)
         
         config["game_state"] = game_state
         self.save_contexto_config(message.guild.id, config)
@@ -159,7 +195,4 @@ class ContextoCog(commands.Cog, name="Contexto"):
         return True, "Contexto Kanal wurde aktualisiert."
 
 async def setup(bot: commands.Bot):
-    # Hilfsfunktion für Hash (wird in Python 3.11+ benötigt falls hashlib.md5 gesperrt ist)
-    if not hasattr(hashlib, 'mdsafe'):
-        hashlib.mdsafe = hashlib.md5
     await bot.add_cog(ContextoCog(bot))
@@ -2,7 +2,17 @@
 import discord
 from discord.ext import commands
 from discord import app_commands, Embed, Color, TextChannel, Member, User, Forbidden, HTTPException
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Dict, List
+import asyncio
+
+FANOUT_CONCURRENCY = 10        # Gleichzeitige Benachrichtigungen an andere Server
+FANOUT_MAX_ATTEMPTS = 3        # Versuche pro Server bei temporären Fehlern
+FANOUT_BACKOFF_SECONDS = 2     # Basis für exponentielles Backoff
+
+# Zustellstatus pro Server
+STATUS_DELIVERED = "delivered"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
 
 class GlobalBanView(discord.ui.View):
     """
@@ -80,6 +90,156 @@ class GlobalBanCog(commands.Cog, name="Global-Ban"):
     """
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # guild_id -> Log-Kanal-ID (oder None für temporäre Kanäle) aller Server mit aktivem Modul
+        self._subscribers: Optional[Dict[int, Optional[int]]] = None
+        # Server, die gelistete User beim Beitritt automatisch bannen
+        self._auto_enforce_guilds = set()
+
+    # --- Abonnenten-Liste ---
+
+    def _resolve_subscriber(self, guild_id: int) -> None:
+        """Aktualisiert den Eintrag eines einzelnen Servers in der Abonnenten-Liste."""
+        if self._subscribers is None:
+            return
+        guild_config = self.bot.data.get_server_config(guild_id)
+        if 'Global-Ban' not in guild_config.get('enabled_cogs', []) or not self.bot.get_guild(guild_id):
+            self._subscribers.pop(guild_id, None)
+            self._auto_enforce_guilds.discard(guild_id)
+            return
+        gb_config = self.bot.data.get_guild_data(guild_id, "global_ban")
+        self._subscribers[guild_id] = gb_config.get("log_channel_id")
+        if gb_config.get("auto_enforce"):
+            self._auto_enforce_guilds.add(guild_id)
+        else:
+            self._auto_enforce_guilds.discard(guild_id)
+
+    def _get_subscribers(self) -> Dict[int, Optional[int]]:
+        """Baut die Liste einmalig auf; danach wird sie nur noch bei Änderungen aktualisiert."""
+        if self._subscribers is None:
+            self._subscribers = {}
+            for guild in self.bot.guilds:
+                self._resolve_subscriber(guild.id)
+        return self._subscribers
+
+    def invalidate_guild_cache(self, guild_id: Optional[int] = None):
+        """Baut die Abonnenten-Liste neu auf (z.B. nach einer Wiederherstellung)."""
+        if guild_id is None:
+            self._subscribers = None
+            self._auto_enforce_guilds.clear()
+        else:
+            self._resolve_subscriber(guild_id)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        self._resolve_subscriber(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        if self._subscribers is not None:
+            self._subscribers.pop(guild.id, None)
+        self._auto_enforce_guilds.discard(guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: Member):
+        # O(1)-Prüfung gegen die globale Bannliste, keine Dateizugriffe im Normalfall
+        if member.id not in self.bot.global_bans:
+            return
+        self._get_subscribers()
+        if member.guild.id not in self._auto_enforce_guilds:
+            return
+
+        entry = self.bot.global_bans.get(member.id) or {}
+        source = entry.get('source_guild_name') or "unbekannt"
+        reason = entry.get('reason') or "kein Grund angegeben"
+        try:
+            await member.ban(reason=f"Global-Ban (automatisch). Ursprung: {source}. Grund: {reason}")
+        except (Forbidden, HTTPException) as e:
+            print(f"Global-Ban: Automatischer Bann von {member.id} in Guild {member.guild.id} fehlgeschlagen: {e}")
+
+    # --- Fan-out ---
+
+    async def _get_log_channel(self, guild: discord.Guild, log_channel_id: Optional[int], user: Member) -> Tuple[Optional[TextChannel], bool]:
+        """Gibt den Log-Kanal zurück oder erstellt einen temporären Kanal."""
+        if log_channel_id:
+            log_channel = guild.get_channel(log_channel_id)
+            if isinstance(log_channel, TextChannel):
+                return log_channel, False
+
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+        }
+        for role in guild.roles:
+            if role.permissions.administrator:
+                overwrites[role] = discord.PermissionOverwrite(read_messages=True)
+
+        log_channel = await guild.create_text_channel(
+            name=f"🚨-global-ban-{user.name.lower()}",
+            overwrites=overwrites,
+            reason=f"Global-Ban-Benachrichtigung für {user.name}"
+        )
+        return log_channel, True
+
+    async def _notify_guild(self, guild: discord.Guild, log_channel_id: Optional[int], user: Member, source_guild: discord.Guild, reason: str, initiator: discord.abc.User) -> str:
+        me = guild.me
+        if not me.guild_permissions.ban_members or not me.guild_permissions.manage_channels:
+            return STATUS_SKIPPED
+
+        embed = Embed(
+            title="🚨 Global-Ban-Benachrichtigung",
+            description=f"Der User **{user.name}** (`{user.id}`) wurde auf dem Server **{source_guild.name}** gebannt.",
+            color=Color.red(),
+            timestamp=discord.utils.utcnow()
+        )
+        embed.add_field(name="Grund", value=reason, inline=False)
+        embed.add_field(name="Aktion", value="Möchtest du diesen User auch von diesem Server bannen?", inline=False)
+        embed.set_thumbnail(url=user.display_avatar.url)
+        embed.set_footer(text=f"Ausgelöst von: {initiator.name}")
+
+        log_channel = None
+        is_temp_channel = False
+        for attempt in range(FANOUT_MAX_ATTEMPTS):
+            try:
+                if log_channel is None:
+                    log_channel, is_temp_channel = await self._get_log_channel(guild, log_channel_id, user)
+                view = GlobalBanView(self.bot, user.id, source_guild.name, reason, is_temp_channel)
+                await log_channel.send(embed=embed, view=view)
+                return STATUS_DELIVERED
+            except Forbidden:
+                break
+            except HTTPException:
+                if attempt + 1 < FANOUT_MAX_ATTEMPTS:
+                    await asyncio.sleep(FANOUT_BACKOFF_SECONDS * (2 ** attempt))
+
+        print(f"Failed to deliver global ban notification to guild {guild.id}")
+        if is_temp_channel and log_channel:
+            try: await log_channel.delete()
+            except (Forbidden, HTTPException): pass
+        return STATUS_FAILED
+
+    async def _fan_out(self, user: Member, source_guild: discord.Guild, reason: str, initiator: discord.abc.User) -> Dict[str, List[discord.Guild]]:
+        """Benachrichtigt alle abonnierten Server parallel mit begrenzter Gleichzeitigkeit."""
+        semaphore = asyncio.Semaphore(FANOUT_CONCURRENCY)
+
+        async def worker(guild: discord.Guild, log_channel_id: Optional[int]):
+            async with semaphore:
+                try:
+                    status = await self._notify_guild(guild, log_channel_id, user, source_guild, reason, initiator)
+                except Exception as e:
+                    print(f"Global-Ban fan-out error for guild {guild.id}: {e}")
+                    status = STATUS_FAILED
+                return guild, status
+
+        jobs = []
+        for guild_id, log_channel_id in list(self._get_subscribers().items()):
+            guild = self.bot.get_guild(guild_id)
+            if guild and guild_id != source_guild.id:
+                jobs.append(worker(guild, log_channel_id))
+
+        results = {STATUS_DELIVERED: [], STATUS_FAILED: [], STATUS_SKIPPED: []}
+        for guild, status in await asyncio.gather(*jobs):
+            results[status].append(guild)
+        return results
 
     @app_commands.command(name="globalban", description="Bannt einen User auf diesem und potenziell anderen Servern.")
     @app_commands.describe(user="Der zu bannende User", reason="Der Grund für den Bann.")
@@ -99,83 +259,76 @@ class GlobalBanCog(commands.Cog, name="Global-Ban"):
             await interaction.followup.send(f"Ein Fehler ist beim Bannen aufgetreten: {e}", ephemeral=True)
             return
 
+        self.bot.global_bans.add(
+            user.id,
+            user_name=user.name,
+            reason=reason,
+            source_guild_id=source_guild.id,
+            source_guild_name=source_guild.name,
+            banned_by=interaction.user.name
+        )
+
         await interaction.followup.send(f"✅ {user.mention} wurde auf diesem Server gebannt. Die Benachrichtigung wird an andere Server gesendet.", ephemeral=True)
 
-        # 2. Andere Server benachrichtigen
-        for guild in self.bot.guilds:
-            if guild.id == source_guild.id:
-                continue
-
-            guild_config = self.bot.data.get_server_config(guild.id)
-            is_enabled = 'Global-Ban' in guild_config.get('enabled_cogs', [])
-            if not is_enabled:
-                continue
-
-            me = guild.me
-            if not me.guild_permissions.ban_members or not me.guild_permissions.manage_channels:
-                continue
-
-            # Load Global Ban config
-            gb_config = self.bot.data.get_guild_data(guild.id, "global_ban")
-            log_channel_id = gb_config.get("log_channel_id")
-            log_channel = None
-            is_temp_channel = False
-
-            if log_channel_id:
-                log_channel = guild.get_channel(log_channel_id)
-                if not isinstance(log_channel, TextChannel):
-                    log_channel = None
-
-            if not log_channel:
-                is_temp_channel = True
-                overwrites = {
-                    guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                    guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
-                }
-                for role in guild.roles:
-                    if role.permissions.administrator:
-                        overwrites[role] = discord.PermissionOverwrite(read_messages=True)
-                
-                try:
-                    log_channel = await guild.create_text_channel(
-                        name=f"🚨-global-ban-{user.name.lower()}",
-                        overwrites=overwrites,
-                        reason=f"Global-Ban-Benachrichtigung für {user.name}"
-                    )
-                except (Forbidden, HTTPException):
-                    continue
-            
-            embed = Embed(
-                title="🚨 Global-Ban-Benachrichtigung",
-                description=f"Der User **{user.name}** (`{user.id}`) wurde auf dem Server **{source_guild.name}** gebannt.",
-                color=Color.red(),
-                timestamp=discord.utils.utcnow()
-            )
-            embed.add_field(name="Grund", value=reason, inline=False)
-            embed.add_field(name="Aktion", value="Möchtest du diesen User auch von diesem Server bannen?", inline=False)
-            embed.set_thumbnail(url=user.display_avatar.url)
-            embed.set_footer(text=f"Ausgelöst von: {interaction.user.name}")
+        # 2. Andere Server parallel benachrichtigen und Zustellstatus zurückmelden
+        results = await self._fan_out(user, source_guild, reason, interaction.user)
 
-            view = GlobalBanView(self.bot, user.id, source_guild.name, reason, is_temp_channel)
+        delivered = results[STATUS_DELIVERED]
+        failed = results[STATUS_FAILED]
+        skipped = results[STATUS_SKIPPED]
+        summary = f"📨 Global-Ban-Benachrichtigung zugestellt an **{len(delivered)}** Server."
+        if skipped:
+            summary += f"\n⏭️ {len(skipped)} Server übersprungen (fehlende Berechtigungen)."
+        if failed:
+            names = ", ".join(g.name for g in failed[:10])
+            if len(failed) > 10:
+                names += f" und {len(failed) - 10} weitere"
+            summary += f"\n⚠️ Fehlgeschlagen bei {len(failed)} Server(n): {names}"
+        try:
+            await interaction.followup.send(summary, ephemeral=True)
+        except HTTPException:
+            pass
 
-            try:
-                message = await log_channel.send(embed=embed, view=view)
-            except (Forbidden, HTTPException):
-                # Log the error for debugging purposes
-                print(f"Failed to send message to channel {log_channel.id} in guild {guild.id}")
-                if is_temp_channel:
-                    try: await log_channel.delete()
-                    except: pass
+    @app_commands.command(name="globalunban", description="Entfernt einen User aus der globalen Bannliste.")
+    @app_commands.describe(user_id="Die ID des Users")
+    @app_commands.checks.has_permissions(ban_members=True)
+    async def globalunban(self, interaction: discord.Interaction, user_id: str):
+        try:
+            target_id = int(user_id)
+        except ValueError:
+            await interaction.response.send_message("Ungültige User-ID.", ephemeral=True)
+            return
+
+        entry = self.bot.global_bans.get(target_id)
+        if not entry:
+            await interaction.response.send_message(f"ℹ️ `{target_id}` steht nicht auf der globalen Bannliste.", ephemeral=True)
+            return
+
+        # Nur der Server, der den Global-Ban ausgesprochen hat, oder der Bot-Owner darf ihn aufheben
+        if entry.get('source_guild_id') != interaction.guild_id and not await self.bot.is_owner(interaction.user):
+            source = entry.get('source_guild_name') or "einem anderen Server"
+            await interaction.response.send_message(
+                f"⛔ Dieser Global-Ban wurde von **{source}** ausgesprochen und kann nur dort aufgehoben werden.",
+                ephemeral=True
+            )
+            return
+
+        if self.bot.global_bans.remove(target_id):
+            await interaction.response.send_message(f"✅ `{target_id}` wurde aus der globalen Bannliste entfernt.", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"ℹ️ `{target_id}` steht nicht auf der globalen Bannliste.", ephemeral=True)
 
     # --- Web API Methoden ---
-    async def web_set_config(self, guild_id: int, channel_id: Optional[int]) -> Tuple[bool, str]:
+    async def web_set_config(self, guild_id: int, channel_id: Optional[int], auto_enforce: bool = False) -> Tuple[bool, str]:
         guild = self.bot.get_guild(guild_id)
         if not guild:
             return False, "Server nicht gefunden."
 
         config = self.bot.data.get_guild_data(guild_id, "global_ban")
         config['log_channel_id'] = channel_id
+        config['auto_enforce'] = auto_enforce
         self.bot.data.save_guild_data(guild_id, "global_ban", config)
+        self._resolve_subscriber(guild_id)
         
         if channel_id:
             channel = guild.get_channel(channel_id)
@@ -183,5 +336,9 @@ class GlobalBanCog(commands.Cog, name="Global-Ban"):
         else:
             return True, "Global-Ban-Log-Kanal wurde entfernt. Es werden nun temporäre Kanäle erstellt."
 
+    async def web_on_toggle(self, guild_id: int):
+        """Wird vom Dashboard aufgerufen, wenn das Modul aktiviert oder deaktiviert wird."""
+        self._resolve_subscriber(guild_id)
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(GlobalBanCog(bot))
\ No newline at end of file
@@ -2,10 +2,25 @@
 import discord
 from discord.ext import commands
 from discord import Embed, Color, Interaction, Member, Forbidden, HTTPException, TextChannel
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Dict, List
+from collections import deque, Counter
+import asyncio
 import datetime
+import time
 import re
 
+# Standardwerte für die Raid-Erkennung
+DEFAULT_RAID_JOIN_THRESHOLD = 10     # Joins innerhalb des Fensters, ab denen ein Raid erkannt wird
+DEFAULT_RAID_WINDOW_SECONDS = 15     # Größe des gleitenden Fensters
+DEFAULT_RAID_CLUSTER_THRESHOLD = 5   # Gleiche Merkmale (Name, Avatar, Erstellungszeit) im Fenster
+RAID_QUIET_SECONDS = 30              # Ruhezeit ohne Joins, nach der ein Raid als beendet gilt
+RAID_SUMMARY_MAX_LISTED = 20         # Maximal aufgelistete Accounts im Raid-Alarm
+ENFORCEMENT_WORKERS = 3              # Parallele Durchsetzungs-Worker
+ENFORCEMENT_QUEUE_SIZE = 2000        # Obergrenze für ausstehende Aktionen pro Guild
+ENFORCEMENT_PACING_SECONDS = 0.25    # Mindestabstand zwischen API-Aufrufen pro Worker
+
+_NAME_NORMALIZE_RE = re.compile(r'[\d_\-.\s]+')
+
 class GuardActionView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
@@ -100,11 +115,81 @@ class GuardActionView(discord.ui.View):
         except HTTPException as e:
             await interaction.response.send_message(f"Ein Fehler ist aufgetreten: {e}", ephemeral=True)
 
+class JoinRecord:
+    """Kompakter Eintrag im Join-Fenster einer Guild."""
+    __slots__ = ("member", "seen_at", "name_key", "avatar_key", "created_bucket")
+
+    def __init__(self, member: Member, seen_at: float):
+        self.member = member
+        self.seen_at = seen_at
+        self.name_key = _NAME_NORMALIZE_RE.sub('', member.name.lower())[:8] or None
+        self.avatar_key = member.avatar.key if member.avatar else None
+        # Accounts, die in derselben Stunde erstellt wurden, landen im selben Bucket
+        self.created_bucket = int(member.created_at.timestamp()) // 3600
+
+
+class RaidState:
+    """Laufender Raid einer Guild: gesammelte Accounts und Merkmale für den Sammelalarm."""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self.last_join = time.monotonic()
+        self.members: List[Member] = []
+        self.member_ids = set()
+        self.enforced = 0
+        self.failed = 0
+        # Ausstehende Aktionen nur dieses Raids, damit der Sammelalarm nicht auf andere Guilds wartet
+        self.pending = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.summary_task: Optional[asyncio.Task] = None
+
+    def add(self, member: Member):
+        if member.id in self.member_ids:
+            return
+        self.member_ids.add(member.id)
+        self.members.append(member)
+        self.last_join = time.monotonic()
+
+    def action_queued(self):
+        self.pending += 1
+        self.idle.clear()
+
+    def action_done(self):
+        self.pending -= 1
+        if self.pending <= 0:
+            self.pending = 0
+            self.idle.set()
+
+
 class GuardCog(commands.Cog, name="Guard"):
     """Cog zum Schutz vor verdächtig neuen Accounts."""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._config_cache: Dict[int, dict] = {}
+        self._join_windows: Dict[int, deque] = {}
+        self._raids: Dict[int, RaidState] = {}
+        # Ausstehende Aktionen pro Guild; die Worker gehen reihum über die Guilds in _ready_guilds,
+        # damit ein Raid in einer Guild die Durchsetzung in anderen nicht aufhält
+        self._pending_actions: Dict[int, deque] = {}
+        self._ready_guilds: asyncio.Queue = asyncio.Queue()
+        self._workers = [self.bot.loop.create_task(self._enforcement_worker()) for _ in range(ENFORCEMENT_WORKERS)]
         self.bot.loop.create_task(self._register_view())
+
+    def cog_unload(self):
+        for worker in self._workers:
+            worker.cancel()
+        for raid in self._raids.values():
+            if raid.summary_task:
+                raid.summary_task.cancel()
+    
+    def invalidate_guild_cache(self, guild_id: Optional[int] = None):
+        """Verwirft gecachte Konfigurationen (z.B. nach einer Wiederherstellung)."""
+        if guild_id is None:
+            self._config_cache.clear()
+        else:
+            self._config_cache.pop(guild_id, None)
     
     async def _register_view(self):
         """Registriert die persistente View nach dem Bot-Start."""
@@ -114,6 +199,216 @@ class GuardCog(commands.Cog, name="Guard"):
         except Exception as e:
             print(f"⚠️ Fehler beim Registrieren von GuardActionView: {e}")
 
+    def _get_config(self, guild_id: int) -> dict:
+        """Guard-Konfiguration aus dem Cache, wird bei web_set_config invalidiert."""
+        config = self._config_cache.get(guild_id)
+        if config is None:
+            config = self.bot.data.get_guild_data(guild_id, "guard")
+            self._config_cache[guild_id] = config
+        return config
+
+    # --- Join-Stream & Raid-Erkennung ---
+
+    def _record_join(self, member: Member, config: dict) -> Optional[str]:
+        """
+        Trägt den Join in das gleitende Fenster der Guild ein und prüft auf einen Burst.
+        Gibt den Grund zurück, falls ein Raid erkannt wurde, sonst None.
+        """
+        now = time.monotonic()
+        window_seconds = config.get("raid_window_seconds", DEFAULT_RAID_WINDOW_SECONDS)
+        join_threshold = config.get("raid_join_threshold", DEFAULT_RAID_JOIN_THRESHOLD)
+        cluster_threshold = config.get("raid_cluster_threshold", DEFAULT_RAID_CLUSTER_THRESHOLD)
+
+        window = self._join_windows.setdefault(member.guild.id, deque())
+        window.append(JoinRecord(member, now))
+        while window and now - window[0].seen_at > window_seconds:
+            window.popleft()
+
+        if join_threshold and len(window) >= join_threshold:
+            return f"{len(window)} Beitritte in {window_seconds} Sekunden"
+
+        if cluster_threshold and len(window) >= cluster_threshold:
+            checks = (
+                ("avatar_key", "gleicher Avatar"),
+                ("name_key", "ähnliche Namen"),
+                ("created_bucket", "gleiche Account-Erstellungszeit"),
+            )
+            for attr, label in checks:
+                counts = Counter(getattr(record, attr) for record in window)
+                counts.pop(None, None)
+                if counts:
+                    _, count = counts.most_common(1)[0]
+                    if count >= cluster_threshold:
+                        return f"{count} Accounts mit {label}"
+        return None
+
+    @staticmethod
+    def _is_new_account(member: Member, config: dict) -> bool:
+        account_age_days = config.get("account_age_days", 7)
+        age_delta = datetime.datetime.now(datetime.timezone.utc) - member.created_at
+        return age_delta.days < account_age_days
+
+    def _start_raid(self, guild_id: int, reason: str) -> RaidState:
+        raid = RaidState(reason)
+        self._raids[guild_id] = raid
+        # Alle Accounts aus dem aktuellen Fenster gehören zum Burst
+        for record in self._join_windows.get(guild_id, ()):
+            raid.add(record.member)
+        raid.summary_task = self.bot.loop.create_task(self._finish_raid(guild_id, raid))
+        print(f"🚨 Guard: Raid erkannt in Guild {guild_id} ({reason})")
+        return raid
+
+    async def _finish_raid(self, guild_id: int, raid: RaidState):
+        """Wartet, bis der Burst abgeklungen ist, und postet dann einen einzigen Sammelalarm."""
+        try:
+            while True:
+                remaining = RAID_QUIET_SECONDS - (time.monotonic() - raid.last_join)
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(remaining)
+            # Ausstehende Aktionen dieses Raids abarbeiten lassen, damit die Zahlen im Alarm stimmen
+            await raid.idle.wait()
+        except asyncio.CancelledError:
+            return
+        finally:
+            if self._raids.get(guild_id) is raid:
+                del self._raids[guild_id]
+
+        guild = self.bot.get_guild(guild_id)
+        if guild:
+            await self._send_raid_summary(guild, raid)
+
+    async def _send_raid_summary(self, guild: discord.Guild, raid: RaidState):
+        config = self._get_config(guild.id)
+        log_channel_id = config.get("log_channel_id")
+        channel = guild.get_channel(log_channel_id) if log_channel_id else None
+        if not isinstance(channel, TextChannel):
+            return
+
+        action = config.get("action_type", "none")
+        action_labels = {"kick": "Gekickt", "role": "Quarantäne-Rolle vergeben", "alert": "Nur Alarm"}
+        embed = Embed(
+            title="🚨 Raid erkannt",
+            description=f"**{len(raid.members)}** verdächtige Beitritte.\nAuslöser: {raid.reason}",
+            color=Color.red(),
+            timestamp=raid.started_at
+        )
+        embed.add_field(name="Aktion", value=action_labels.get(action, "Keine"))
+        if action in ("kick", "role"):
+            embed.add_field(name="Durchgesetzt", value=f"{raid.enforced} erfolgreich, {raid.failed} fehlgeschlagen")
+
+        listed = raid.members[:RAID_SUMMARY_MAX_LISTED]
+        lines = "\n".join(f"{m.mention} (`{m.id}`) – erstellt <t:{int(m.created_at.timestamp())}:R>" for m in listed)
+        if len(raid.members) > len(listed):
+            lines += f"\n… und {len(raid.members) - len(listed)} weitere"
+        embed.add_field(name="Accounts", value=lines[:1024] or "-", inline=False)
+        embed.set_footer(text="Ein Sammelalarm pro Raid")
+        try:
+            await channel.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+        except (Forbidden, HTTPException):
+            pass
+
+    # --- Durchsetzung ---
+
+    async def _enqueue_action(self, guild_id: int, member: Member, action: str, config: dict, raid: Optional[RaidState]):
+        actions = self._pending_actions.setdefault(guild_id, deque())
+        if len(actions) >= ENFORCEMENT_QUEUE_SIZE:
+            if raid:
+                raid.failed += 1
+            print(f"⚠️ Guard: Durchsetzungs-Warteschlange für Guild {guild_id} voll, Aktion für {member.id} verworfen.")
+            return
+        actions.append((member, action, config, raid))
+        if raid:
+            raid.action_queued()
+        if len(actions) == 1:
+            self._ready_guilds.put_nowait(guild_id)
+
+    async def _enforcement_worker(self):
+        """Arbeitet Guard-Aktionen mit begrenzter Parallelität und Pausen zwischen API-Aufrufen ab."""
+        while True:
+            guild_id = await self._ready_guilds.get()
+            actions = self._pending_actions.get(guild_id)
+            if not actions:
+                continue
+            member, action, config, raid = actions.popleft()
+            # Reihum: Guilds mit weiteren Aktionen stellen sich hinten wieder an
+            if actions:
+                self._ready_guilds.put_nowait(guild_id)
+            else:
+                del self._pending_actions[guild_id]
+            try:
+                success = await self._apply_action(member, action, config, in_raid=raid is not None)
+                if raid:
+                    if success:
+                        raid.enforced += 1
+                    else:
+                        raid.failed += 1
+            except Exception as e:
+                print(f"⚠️ Guard: Fehler bei der Durchsetzung für {member.id}: {e}")
+            finally:
+                if raid:
+                    raid.action_done()
+            await asyncio.sleep(ENFORCEMENT_PACING_SECONDS)
+
+    async def _call_with_rate_limit(self, coro_factory) -> bool:
+        for _ in range(3):
+            try:
+                await coro_factory()
+                return True
+            except Forbidden:
+                return False
+            except HTTPException as e:
+                if e.status == 429:
+                    retry_after = getattr(e, "retry_after", None) or 5
+                    await asyncio.sleep(retry_after)
+                    continue
+                return False
+        return False
+
+    async def _apply_action(self, member: Member, action: str, config: dict, in_raid: bool) -> bool:
+        account_age_days = config.get("account_age_days", 7)
+        reason = "Guard: Raid erkannt." if in_raid else f"Guard: Account ist jünger als {account_age_days} Tage."
+
+        if action == "kick":
+            # Während eines Raids keine DMs, sie würden nur Rate-Limits verbrauchen
+            if not in_raid:
+                kick_message = config.get("kick_message", "Dein Account ist zu neu, um diesem Server beizutreten.")
+                try:
+                    await member.send(kick_message)
+                except (Forbidden, HTTPException):
+                    pass
+            return await self._call_with_rate_limit(lambda: member.kick(reason=reason))
+
+        if action == "role":
+            role_id = config.get("role_id")
+            role = member.guild.get_role(role_id) if role_id else None
+            if not role:
+                return False
+            return await self._call_with_rate_limit(lambda: member.add_roles(role, reason=reason))
+
+        return False
+
+    async def _send_single_alert(self, member: Member, config: dict):
+        log_channel_id = config.get("log_channel_id")
+        if not log_channel_id:
+            return
+        channel = member.guild.get_channel(log_channel_id)
+        if isinstance(channel, TextChannel):
+            embed = Embed(
+                title="🚨 Neuer Account entdeckt",
+                description=f"Der Account von {member.mention} (`{member.id}`) ist verdächtig neu.",
+                color=Color.orange()
+            )
+            embed.add_field(name="Erstellt am", value=f"<t:{int(member.created_at.timestamp())}:F> (<t:{int(member.created_at.timestamp())}:R>)")
+            embed.add_field(name="Beigetreten am", value=f"<t:{int(member.joined_at.timestamp())}:F> (<t:{int(member.joined_at.timestamp())}:R>)")
+            embed.set_thumbnail(url=member.display_avatar.url)
+
+            view = GuardActionView()
+            try:
+                await channel.send(embed=embed, view=view)
+            except (Forbidden, HTTPException):
+                pass
+
     @commands.Cog.listener()
     async def on_member_join(self, member: Member):
         if member.bot:
@@ -123,61 +418,46 @@ class GuardCog(commands.Cog, name="Guard"):
         if "Guard" not in guild_server_config.get("enabled_cogs", []):
             return
 
-        config = self.bot.data.get_guild_data(member.guild.id, "guard")
+        config = self._get_config(member.guild.id)
         if not config or config.get("action_type", "none") == "none":
             return
 
-        account_age_days = config.get("account_age_days", 7)
-        account_creation_date = member.created_at
-        age_delta = datetime.datetime.now(datetime.timezone.utc) - account_creation_date
-        
-        if age_delta.days < account_age_days:
-            action = config.get("action_type")
-            
-            if action == "kick":
-                kick_message = config.get("kick_message", "Dein Account ist zu neu, um diesem Server beizutreten.")
-                try:
-                    await member.send(kick_message)
-                except (Forbidden, HTTPException):
-                    pass
-                try:
-                    await member.kick(reason=f"Guard: Account ist jünger als {account_age_days} Tage.")
-                except (Forbidden, HTTPException):
-                    pass
+        guild_id = member.guild.id
+        targets = [member]
+        raid = self._raids.get(guild_id)
+        if raid:
+            raid.add(member)
+        else:
+            reason = self._record_join(member, config)
+            if reason:
+                raid = self._start_raid(guild_id, reason)
+                # Beim Start des Raids zählen alle Accounts aus dem Fenster zum Burst
+                targets = list(raid.members)
 
-            elif action == "role":
-                role_id = config.get("role_id")
-                if role_id:
-                    role = member.guild.get_role(role_id)
-                    if role:
-                        try:
-                            await member.add_roles(role, reason=f"Guard: Account ist jünger als {account_age_days} Tage.")
-                        except (Forbidden, HTTPException):
-                            pass
-            
-            elif action == "alert":
-                log_channel_id = config.get("log_channel_id")
-                if log_channel_id:
-                    channel = member.guild.get_channel(log_channel_id)
-                    if isinstance(channel, TextChannel):
-                        embed = Embed(
-                            title="🚨 Neuer Account entdeckt",
-                            description=f"Der Account von {member.mention} (`{member.id}`) ist verdächtig neu.",
-                            color=Color.orange()
-                        )
-                        embed.add_field(name="Erstellt am", value=f"<t:{int(member.created_at.timestamp())}:F> (<t:{int(member.created_at.timestamp())}:R>)")
-                        embed.add_field(name="Beigetreten am", value=f"<t:{int(member.joined_at.timestamp())}:F> (<t:{int(member.joined_at.timestamp())}:R>)")
-                        embed.set_thumbnail(url=member.display_avatar.url)
-                        
-                        view = GuardActionView()
-                        try:
-                            await channel.send(embed=embed, view=view)
-                        except (Forbidden, HTTPException):
-                            pass
-
-    async def web_set_config(self, guild_id: int, action_type: str, account_age_days: int, kick_message: str, role_id: Optional[int], log_channel_id: Optional[int]) -> Tuple[bool, str]:
+        action = config.get("action_type")
+        if raid:
+            # Im Raid-Modus wird jeder Beitritt im Sammelalarm gelistet, durchgesetzt wird aber nur
+            # gegen neue Accounts - etablierte Mitglieder, die zufällig im Burst beitreten, bleiben verschont
+            if action in ("kick", "role"):
+                for target in targets:
+                    if self._is_new_account(target, config):
+                        await self._enqueue_action(guild_id, target, action, config, raid)
+            return
+
+        if not self._is_new_account(member, config):
+            return
+
+        if action in ("kick", "role"):
+            await self._enqueue_action(guild_id, member, action, config, None)
+        elif action == "alert":
+            await self._send_single_alert(member, config)
+
+    async def web_set_config(self, guild_id: int, action_type: str, account_age_days: int, kick_message: str, role_id: Optional[int], log_channel_id: Optional[int],
+                             raid_join_threshold: int = DEFAULT_RAID_JOIN_THRESHOLD, raid_window_seconds: int = DEFAULT_RAID_WINDOW_SECONDS) -> Tuple[bool, str]:
         if account_age_days < 0:
             return False, "Das Mindestalter des Accounts muss 0 oder größer sein."
+        if raid_join_threshold < 0 or raid_window_seconds < 1:
+            return False, "Ungültige Raid-Schutz-Einstellungen."
 
         config = self.bot.data.get_guild_data(guild_id, "guard")
         config['action_type'] = action_type
@@ -185,8 +465,11 @@ class GuardCog(commands.Cog, name="Guard"):
         config['kick_message'] = kick_message
         config['role_id'] = role_id
         config['log_channel_id'] = log_channel_id
+        config['raid_join_threshold'] = raid_join_threshold
+        config['raid_window_seconds'] = raid_window_seconds
         
         self.bot.data.save_guild_data(guild_id, "guard", config)
+        self._config_cache[guild_id] = config
         return True, "Guard-Einstellungen erfolgreich gespeichert."
 
 async def setup(bot: commands.Bot):
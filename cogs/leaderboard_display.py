@@ -3,7 +3,24 @@ import discord
 from discord.ext import commands, tasks
 from discord import ButtonStyle, Interaction
 from discord.ui import Button, View, Select
+import asyncio
 import datetime
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+from utils.leaderboard_service import board_title
+
+UPDATE_INTERVAL_MINUTES = 5
+# Edits einer Runde werden auf diesen Anteil des Intervalls verteilt
+EDIT_SPREAD_FRACTION = 0.8
+# Abstand zwischen zwei Edits (Sekunden)
+EDIT_MIN_SPACING = 1.0
+EDIT_MAX_SPACING = 10.0
+RATE_LIMIT_BACKOFF_SECONDS = 30
+# Ziel-Schlüssel für den Einzelkanal-Modus, im Forum-Modus ist es der Leaderboard-Typ
+SINGLE_TARGET = "single"
+
+PublishKey = Tuple[int, str]
 
 class LeaderboardView(View):
     """Interaktive View für Leaderboard-Anzeige mit Buttons."""
@@ -105,93 +122,17 @@ class LeaderboardView(View):
             return discord.Embed(title="Fehler", description="Server nicht gefunden", color=discord.Color.red())
         
         now = datetime.datetime.now()
-        current_month = now.strftime('%Y-%m')
-        
-        leaderboard = []
-        title = ""
-        description = ""
-        
-        if self.current_type == 'messages':
-            title = "🗨️ Meiste Nachrichten - Monatlich"
-            description = f"Aktivste Nutzer im {now.strftime('%B %Y')}"
-            monthly_stats = self.bot.data.get_guild_data(self.guild_id, "monthly_stats")
-            month_data = monthly_stats.get(current_month, {})
-            
-            for user_id_str, user_data in month_data.items():
-                if not user_id_str.isdigit():
-                    continue
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                msg_count = user_data.get('total_messages', 0)
-                if msg_count > 0:
-                    leaderboard.append({'member': member, 'value': msg_count, 'type': 'messages'})
-        
-        elif self.current_type == 'level':
-            title = "⭐ Höchstes Level - Allzeit"
-            description = "Nutzer mit dem höchsten Level"
-            users_data = self.bot.data.get_guild_data(self.guild_id, "level_users")
-            
-            for user_id_str, user_data in users_data.items():
-                if not user_id_str.isdigit():
-                    continue
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                leaderboard.append({
-                    'member': member,
-                    'value': user_data.get('level', 0),
-                    'xp': user_data.get('xp', 0),
-                    'type': 'level'
-                })
-        
-        elif self.current_type == 'streak_current':
-            title = "🔥 Längste aktive Streak"
-            description = "Aktuelle laufende Aktivitäts-Streaks"
-            guild_streaks = self.bot.data.get_guild_data(self.guild_id, "streaks")
-            
-            for user_id_str, data in guild_streaks.items():
-                if not user_id_str.isdigit():
-                    continue
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                current_streak = data.get('current_streak', 0)
-                if current_streak > 0:
-                    leaderboard.append({'member': member, 'value': current_streak, 'type': 'streak'})
-        
-        elif self.current_type == 'streak_alltime':
-            title = "🏆 Längste Streak (Allzeit)"
-            description = "Hall of Fame - Rekord-Streaks"
-            guild_streaks = self.bot.data.get_guild_data(self.guild_id, "streaks")
-            
-            for user_id_str, data in guild_streaks.items():
-                if not user_id_str.isdigit():
-                    continue
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                max_streak = data.get('max_streak_ever', 0)
-                current_streak = data.get('current_streak', 0)
-                
-                if max_streak > 0:
-                    # Check if the max streak is still running
-                    is_active = (current_streak == max_streak and current_streak > 0)
-                    leaderboard.append({
-                        'member': member,
-                        'value': max_streak,
-                        'type': 'streak_alltime',
-                        'is_active': is_active
-                    })
-
+        descriptions = {
+            'messages': f"Aktivste Nutzer im {now.strftime('%B %Y')}",
+            'level': "Nutzer mit dem höchsten Level",
+            'streak_current': "Aktuelle laufende Aktivitäts-Streaks",
+            'streak_alltime': "Hall of Fame - Rekord-Streaks",
+        }
+        title = board_title(self.current_type)
+        description = descriptions.get(self.current_type, "")
         
-        # Sort and limit (Sort by value, for level use XP as tie-breaker)
-        leaderboard.sort(key=lambda x: (x['value'], x.get('xp', 0)), reverse=True)
-        leaderboard = leaderboard[:15]  # Top 15 for better display
+        # Top 15 for better display
+        leaderboard = self.bot.leaderboards.get_top(guild, self.current_type, 15) if title else []
         
         # Create embed
         embed = discord.Embed(
@@ -214,16 +155,16 @@ class LeaderboardView(View):
             for idx, entry in enumerate(leaderboard, 1):
                 medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"`{idx}.`"
                 
-                if entry['type'] == 'messages':
-                    leaderboard_text += f"{medal} **{entry['member'].display_name}** - {entry['value']:,} Nachrichten\n"
-                elif entry['type'] == 'level':
-                    leaderboard_text += f"{medal} **{entry['member'].display_name}** - Level {entry['value']} ({entry['xp']:,} XP)\n"
-                elif entry['type'] == 'streak':
-                    leaderboard_text += f"{medal} **{entry['member'].display_name}** - {entry['value']} Tage\n"
-                elif entry['type'] == 'streak_alltime':
+                if self.current_type == 'messages':
+                    leaderboard_text += f"{medal} **{entry.member.display_name}** - {entry.value:,} Nachrichten\n"
+                elif self.current_type == 'level':
+                    leaderboard_text += f"{medal} **{entry.member.display_name}** - Level {entry.value} ({entry.xp:,} XP)\n"
+                elif self.current_type == 'streak_current':
+                    leaderboard_text += f"{medal} **{entry.member.display_name}** - {entry.value} Tage\n"
+                elif self.current_type == 'streak_alltime':
                     # Show if streak is still active or ended
-                    status = "🔥 Läuft" if entry.get('is_active', False) else "⏸️ Beendet"
-                    leaderboard_text += f"{medal} **{entry['member'].display_name}** - {entry['value']} Tage ({status})\n"
+                    status = "🔥 Läuft" if entry.is_active else "⏸️ Beendet"
+                    leaderboard_text += f"{medal} **{entry.member.display_name}** - {entry.value} Tage ({status})\n"
             
             embed.add_field(name="📊 Rangliste", value=leaderboard_text, inline=False)
         else:
@@ -243,15 +184,65 @@ class LeaderboardDisplayCog(commands.Cog, name="LeaderboardDisplay"):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Hash des zuletzt veröffentlichten Inhalts pro (guild_id, Ziel)
+        self._published_hashes: Dict[PublishKey, str] = {}
+        # Gecachte Handles pro (guild_id, Ziel): (message_id, Nachricht, Thread oder None)
+        self._handles: Dict[PublishKey, Tuple[int, discord.PartialMessage, Optional[discord.Thread]]] = {}
+        # Ausstehende Edits, pro Ziel nur der neueste Stand
+        self._pending: Dict[PublishKey, Tuple[Any, int, Optional[discord.Embed], Optional[View], Optional[str]]] = {}
+        self._publish_queue: asyncio.Queue = asyncio.Queue()
+        self._edit_spacing = EDIT_MIN_SPACING
+        self._publisher_task: Optional[asyncio.Task] = None
         self.update_leaderboards.start()
     
+    async def cog_load(self):
+        self._publisher_task = self.bot.loop.create_task(self._run_publisher())
+    
     def cog_unload(self):
         """Wird aufgerufen, wenn der Cog entladen wird."""
         self.update_leaderboards.cancel()
+        if self._publisher_task:
+            self._publisher_task.cancel()
+    
+    def invalidate_guild_cache(self, guild_id: Optional[int] = None):
+        """Verwirft Hashes, Handles und ausstehende Edits (None = alle Guilds)."""
+        for cache in (self._published_hashes, self._handles, self._pending):
+            for key in [k for k in cache if guild_id is None or k[0] == guild_id]:
+                del cache[key]
+    
+    @staticmethod
+    def _content_hash(embed: discord.Embed, extra: Any = None) -> str:
+        """Hash des sichtbaren Inhalts; der Zeitstempel zählt nicht als Änderung."""
+        data = embed.to_dict()
+        data.pop('timestamp', None)
+        payload = json.dumps([data, extra], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
     
-    @tasks.loop(minutes=5)
+    def _enqueue(self, key: PublishKey, channel, message_id: int, embed: Optional[discord.Embed],
+                 view: Optional[View], content_hash: Optional[str]):
+        if key not in self._pending:
+            self._publish_queue.put_nowait(key)
+        elif embed is None:
+            # Ein ausstehender Inhalts-Edit hält den Thread ohnehin aktiv
+            return
+        self._pending[key] = (channel, message_id, embed, view, content_hash)
+    
+    def _enqueue_if_changed(self, key: PublishKey, channel, message_id: int, embed: discord.Embed,
+                            view: Optional[View] = None, extra: Any = None) -> bool:
+        content_hash = self._content_hash(embed, extra)
+        cached = self._handles.get(key)
+        if self._published_hashes.get(key) == content_hash and cached and cached[0] == message_id:
+            # Unverändert; archivierte Threads trotzdem wieder aktivieren
+            thread = self._current_thread(cached[2])
+            if thread is not None and thread.archived:
+                self._enqueue(key, channel, message_id, None, None, None)
+            return False
+        self._enqueue(key, channel, message_id, embed, view, content_hash)
+        return True
+    
+    @tasks.loop(minutes=UPDATE_INTERVAL_MINUTES)
     async def update_leaderboards(self):
-        """Aktualisiert alle aktiven Leaderboard-Anzeigen alle 5 Minuten."""
+        """Rendert alle aktiven Leaderboards und stellt nur geänderte in die Edit-Queue."""
         await self.bot.wait_until_ready()
         
         for guild in self.bot.guilds:
@@ -270,7 +261,6 @@ class LeaderboardDisplayCog(commands.Cog, name="LeaderboardDisplay"):
                 enabled_types = leaderboard_config.get('enabled_types', ['messages', 'level', 'streak_current', 'streak_alltime'])
 
                 if display_mode == 'forum':
-                    # Forum mode: Update all threads
                     thread_ids = leaderboard_config.get('forum_thread_ids', {})
                     
                     for lb_type, thread_id in thread_ids.items():
@@ -278,33 +268,11 @@ class LeaderboardDisplayCog(commands.Cog, name="LeaderboardDisplay"):
                         if lb_type not in enabled_types:
                             continue
                         
-                        try:
-                            thread = channel.get_thread(thread_id)
-                            if not thread:
-                                # Try to fetch if not in cache
-                                thread = await channel.fetch_thread(thread_id)
-                            
-                            if thread:
-                                # Get the starter message
-                                starter_message = thread.starter_message
-                                if not starter_message:
-                                    starter_message = await thread.fetch_message(thread.id)
-                                
-                                # Create updated embed
-                                view = LeaderboardView(self.bot, guild.id, lb_type)
-                                embed = await view.create_leaderboard_embed(show_dropdown_instruction=False)
-                                
-                                # Update the message
-                                await starter_message.edit(embed=embed)
-                                
-                                # Keep thread active (unarchive if needed)
-                                if thread.archived:
-                                    await thread.edit(archived=False)
-                        except Exception as e:
-                            print(f"Error updating forum thread {lb_type} for guild {guild.id}: {e}")
+                        view = LeaderboardView(self.bot, guild.id, lb_type)
+                        embed = await view.create_leaderboard_embed(show_dropdown_instruction=False)
+                        self._enqueue_if_changed((guild.id, lb_type), channel, thread_id, embed)
                 
                 else:
-                    # Single channel mode: Update single message
                     message_id = leaderboard_config.get('leaderboard_message_id')
                     current_type = leaderboard_config.get('current_leaderboard_type', 'messages')
 
@@ -317,20 +285,101 @@ class LeaderboardDisplayCog(commands.Cog, name="LeaderboardDisplay"):
                     if not message_id:
                         continue
                     
-                    message = await channel.fetch_message(message_id)
                     view = LeaderboardView(self.bot, guild.id, current_type)
                     embed = await view.create_leaderboard_embed()
-                    await message.edit(embed=embed, view=view)
+                    # Die Auswahl im Dropdown hängt von den aktivierten Typen ab
+                    self._enqueue_if_changed((guild.id, SINGLE_TARGET), channel, message_id, embed, view,
+                                             extra=[current_type, sorted(enabled_types)])
                     
-            except discord.NotFound:
-                # Message/Thread was deleted, clear the config
-                if display_mode == 'forum':
-                    leaderboard_config['forum_thread_ids'] = {}
-                else:
-                    leaderboard_config['leaderboard_message_id'] = None
-                self.bot.data.save_guild_data(guild.id, "leaderboard_config", leaderboard_config)
             except Exception as e:
                 print(f"Error updating leaderboard for guild {guild.id}: {e}")
+            
+            # Andere Tasks zwischen den Guilds laufen lassen
+            await asyncio.sleep(0)
+        
+        # Die Edits dieser Runde gleichmäßig über das Intervall verteilen
+        window = UPDATE_INTERVAL_MINUTES * 60 * EDIT_SPREAD_FRACTION
+        self._edit_spacing = min(EDIT_MAX_SPACING, max(EDIT_MIN_SPACING, window / max(len(self._pending), 1)))
+    
+    async def _run_publisher(self):
+        """Arbeitet die Edit-Queue nacheinander mit Abstand ab."""
+        await self.bot.wait_until_ready()
+        while True:
+            key = await self._publish_queue.get()
+            job = self._pending.pop(key, None)
+            if job is None:
+                continue
+            try:
+                await self._publish(key, *job)
+            except discord.NotFound:
+                self._forget_target(key)
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    # Rate-Limit: Job erneut einreihen (sofern kein neuerer wartet) und pausieren
+                    if key not in self._pending:
+                        self._pending[key] = job
+                        self._publish_queue.put_nowait(key)
+                    await asyncio.sleep(RATE_LIMIT_BACKOFF_SECONDS)
+                    continue
+                print(f"Error publishing leaderboard {key[1]} for guild {key[0]}: {e}")
+            except Exception as e:
+                print(f"Error publishing leaderboard {key[1]} for guild {key[0]}: {e}")
+            await asyncio.sleep(self._edit_spacing)
+    
+    @staticmethod
+    def _current_thread(thread: Optional[discord.Thread]) -> Optional[discord.Thread]:
+        """Bevorzugt das vom Gateway aktuell gehaltene Thread-Objekt (archived wird dort gepflegt)."""
+        if thread is None:
+            return None
+        return thread.guild.get_thread(thread.id) or thread
+
+    async def _get_handle(self, key: PublishKey, channel, message_id: int):
+        """Nachricht (und Thread) aus dem Cache; REST-Aufrufe nur beim ersten Mal."""
+        cached = self._handles.get(key)
+        if cached and cached[0] == message_id:
+            return cached[1], cached[2]
+        
+        if key[1] == SINGLE_TARGET:
+            thread = None
+            message = channel.get_partial_message(message_id)
+        else:
+            # Im Forum ist die Starter-Nachricht die ID des Threads
+            thread = channel.guild.get_thread(message_id) or await channel.guild.fetch_channel(message_id)
+            message = thread.get_partial_message(message_id)
+        
+        self._handles[key] = (message_id, message, thread)
+        return message, thread
+    
+    async def _publish(self, key: PublishKey, channel, message_id: int, embed: Optional[discord.Embed],
+                       view: Optional[View], content_hash: Optional[str]):
+        message, thread = await self._get_handle(key, channel, message_id)
+        thread = self._current_thread(thread)
+        
+        # Keep thread active (unarchive if needed)
+        if thread is not None and thread.archived:
+            # edit() liefert ein neues Objekt; das alte bliebe archived und würde jede Runde erneut entarchiviert
+            thread = await thread.edit(archived=False)
+            self._handles[key] = (message_id, message, thread)
+        
+        if embed is None:
+            return
+        if view is not None:
+            await message.edit(embed=embed, view=view)
+        else:
+            await message.edit(embed=embed)
+        self._published_hashes[key] = content_hash
+    
+    def _forget_target(self, key: PublishKey):
+        """Message/Thread was deleted, clear the config."""
+        guild_id, target = key
+        self._handles.pop(key, None)
+        self._published_hashes.pop(key, None)
+        leaderboard_config = self.bot.data.get_guild_data(guild_id, "leaderboard_config")
+        if target == SINGLE_TARGET:
+            leaderboard_config['leaderboard_message_id'] = None
+        else:
+            leaderboard_config.get('forum_thread_ids', {}).pop(target, None)
+        self.bot.data.save_guild_data(guild_id, "leaderboard_config", leaderboard_config)
     
     @commands.Cog.listener()
     async def on_ready(self):
@@ -381,6 +430,8 @@ class LeaderboardDisplayCog(commands.Cog, name="LeaderboardDisplay"):
         
         leaderboard_config = self.bot.data.get_guild_data(guild_id, "leaderboard_config")
         display_mode = leaderboard_config.get('display_mode', 'single')
+        # Neue Nachrichten/Threads: gecachte Handles und Hashes gelten nicht mehr
+        self.invalidate_guild_cache(guild_id)
         
         if display_mode == 'forum':
             # Forum mode: Create separate threads for each leaderboard type
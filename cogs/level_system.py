@@ -515,33 +515,22 @@ class LevelSystemCog(commands.Cog, name="Level-System"):
         guild = self.bot.get_guild(guild_id)
         if not guild: return {"error": "Guild not found"}
 
-        guild_users_data = self._get_users_data(guild_id)
-        if not guild_users_data:
+        entries, total_users = self.bot.leaderboards.get_page(guild, 'level', page, per_page)
+        if not total_users:
             return {"data": [], "total": 0, "page": page, "pages": 0}
 
-        # Konvertiere in Liste und sortiere
-        sorted_users = sorted(guild_users_data.items(), key=lambda item: item[1].get("xp", 0), reverse=True)
-        total_users = len(sorted_users)
-        
-        start_index = (page - 1) * per_page
-        end_index = start_index + per_page
-        
-        page_items = sorted_users[start_index:end_index]
-        
         result_data = []
-        for rank_offset, (user_id_str, user_data) in enumerate(page_items):
-            member = guild.get_member(int(user_id_str))
-            
-            # Versuche Avatar URL zu holen, Fallback auf Default
-            avatar_url = str(member.display_avatar.url) if member else "https://cdn.discordapp.com/embed/avatars/0.png"
-            member_name = member.display_name if member else f"User {user_id_str}"
+        for entry in entries:
+            # Ehemalige Mitglieder bleiben gelistet, mit Default-Avatar
+            avatar_url = str(entry.member.display_avatar.url) if entry.member else "https://cdn.discordapp.com/embed/avatars/0.png"
+            member_name = entry.member.display_name if entry.member else f"User {entry.user_id}"
             
             result_data.append({
-                "rank": start_index + rank_offset + 1,
+                "rank": entry.rank,
                 "name": member_name,
                 "avatar_url": avatar_url,
-                "level": user_data.get("level", 0),
-                "xp": user_data.get("xp", 0)
+                "level": entry.value,
+                "xp": entry.xp
             })
 
         return {
@@ -1,12 +1,18 @@
 # -*- coding: utf-8 -*-
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands, Embed, Color, TextStyle, Interaction, ButtonStyle, TextChannel, Thread, Role
 from discord.ui import View, Button, Modal, TextInput, Select
-from typing import Optional, Tuple
+from typing import Dict, Optional, Set, Tuple
 import asyncio
+import copy
 from datetime import datetime
 
+# Wartezeit, in der mehrere Beitritte zu einer einzigen Bearbeitung der Lobby-Nachricht zusammengefasst werden
+LOBBY_RENDER_DELAY = 3.0
+# Intervall, in dem geänderte Suchen auf die Festplatte geschrieben werden
+FLUSH_INTERVAL_SECONDS = 10
+
 class LFGModal(Modal, title='Mitspieler-Suche'):
     """Modal zum Erstellen einer Mitspieler-Suche"""
     
@@ -288,20 +294,99 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.search_counter = {}  # guild_id -> counter
+        self._configs: Dict[int, dict] = {}
+        self._lobby_channel_ids: Set[int] = set()
+        self._searches: Dict[int, dict] = {}
+        self._forum_threads: Dict[int, dict] = {}
+        self._dirty: Set[Tuple[int, str]] = set()
+        self._pending_renders: Dict[Tuple[int, int], asyncio.Task] = {}
         self.bot.loop.create_task(self.restore_persistent_views())
-    
+        self.flush_loop.start()
+
+    def cog_unload(self):
+        self.flush_loop.cancel()
+        for task in self._pending_renders.values():
+            task.cancel()
+        self._pending_renders.clear()
+        self.flush()
+
+    # --- Zustand & Write-Behind-Persistenz ---
+
     def _get_lfg_config(self, guild_id: int):
-        return self.bot.data.get_guild_data(guild_id, "lfg_config")
-    
+        config = self._configs.get(guild_id)
+        if config is None:
+            config = self.bot.data.get_guild_data(guild_id, "lfg_config")
+            self._configs[guild_id] = config
+            self._index_lobby_channel(None, config.get('lobby_channel_id'))
+        return config
+
     def _save_lfg_config(self, guild_id: int, data):
+        old_config = self._configs.get(guild_id, {})
+        self._index_lobby_channel(old_config.get('lobby_channel_id'), data.get('lobby_channel_id'))
+        self._configs[guild_id] = data
         self.bot.data.save_guild_data(guild_id, "lfg_config", data)
-    
+
+    def _index_lobby_channel(self, old_channel_id: Optional[int], new_channel_id: Optional[int]):
+        """Hält das Set der Lobby-Kanäle aktuell, damit on_message ohne Dateizugriff filtern kann."""
+        if old_channel_id and old_channel_id != new_channel_id:
+            self._lobby_channel_ids.discard(old_channel_id)
+        if new_channel_id:
+            self._lobby_channel_ids.add(new_channel_id)
+
     def _get_searches_data(self, guild_id: int):
-        return self.bot.data.get_guild_data(guild_id, "lfg_searches")
-    
+        searches = self._searches.get(guild_id)
+        if searches is None:
+            searches = self.bot.data.get_guild_data(guild_id, "lfg_searches")
+            self._searches[guild_id] = searches
+        return searches
+
     def _save_searches_data(self, guild_id: int, data):
-        self.bot.data.save_guild_data(guild_id, "lfg_searches", data)
-    
+        self._searches[guild_id] = data
+        self._dirty.add((guild_id, "lfg_searches"))
+
+    def _get_forum_threads_data(self, guild_id: int):
+        forum_threads = self._forum_threads.get(guild_id)
+        if forum_threads is None:
+            forum_threads = self.bot.data.get_guild_data(guild_id, "lfg_forum_threads")
+            self._forum_threads[guild_id] = forum_threads
+        return forum_threads
+
+    def _save_forum_threads_data(self, guild_id: int, data):
+        self._forum_threads[guild_id] = data
+        self._dirty.add((guild_id, "lfg_forum_threads"))
+
+    def flush(self):
+        """Schreibt alle geänderten Suchen und Forum-Threads auf die Festplatte."""
+        dirty, self._dirty = self._dirty, set()
+        for guild_id, module in dirty:
+            source = self._searches if module == "lfg_searches" else self._forum_threads
+            data = source.get(guild_id)
+            if data is not None:
+                self.bot.data.save_guild_data(guild_id, module, data)
+
+    def invalidate_guild_cache(self, guild_id: Optional[int] = None):
+        """Verwirft den Zustand im Speicher ohne zu speichern (z.B. nach einer Wiederherstellung)."""
+        if guild_id is None:
+            guild_ids = set(self._configs) | set(self._searches) | set(self._forum_threads) | {g.id for g in self.bot.guilds}
+        else:
+            guild_ids = {guild_id}
+        for gid in guild_ids:
+            config = self._configs.pop(gid, None)
+            if config:
+                self._lobby_channel_ids.discard(config.get('lobby_channel_id'))
+            self._searches.pop(gid, None)
+            self._forum_threads.pop(gid, None)
+            self.search_counter.pop(gid, None)
+        self._dirty = {(gid, module) for gid, module in self._dirty if gid not in guild_ids}
+        for gid in guild_ids:
+            # Konfiguration sofort neu laden, damit on_message weiterhin ohne Dateizugriff filtert
+            self._get_lfg_config(gid)
+
+    @tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+    async def flush_loop(self):
+        if self._dirty:
+            self.flush()
+
     async def restore_persistent_views(self):
         """Restore persistent views after bot restart"""
         await self.bot.wait_until_ready()
@@ -321,7 +406,7 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
             # Restore forum views (forum mode)
             self.bot.add_view(LFGForumMainView(self, guild.id))
             
-            forum_threads = self.bot.data.get_guild_data(guild.id, "lfg_forum_threads")
+            forum_threads = self._get_forum_threads_data(guild.id)
             for thread_id, thread_data in forum_threads.items():
                 if thread_data.get('active'):
                     self.bot.add_view(LFGForumThreadView(
@@ -389,38 +474,7 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
             await role.delete()
             return False, "❌ Konnte privaten Thread nicht erstellen."
         
-        # Create embed
-        embed = Embed(
-            title=f"🎮 {game_name}",
-            color=Color.blue(),
-            timestamp=datetime.utcnow()
-        )
-        embed.add_field(name="Ersteller", value=creator.mention, inline=True)
-        
-        if team_size:
-            embed.add_field(name="Suche", value=f"{team_size} Spieler", inline=True)
-            embed.add_field(name="Frei", value=str(team_size), inline=True)
-        
-        if description:
-            embed.add_field(name="Beschreibung", value=description, inline=False)
-        
-        if duration:
-            embed.add_field(name="Zeitrahmen", value=duration, inline=True)
-        
-        embed.set_footer(text=f"ID: {search_id}")
-        
-        # Post in lobby
-        try:
-            view = LFGSearchView(self, search_id, creator.id)
-            lobby_message = await lobby_thread.send(embed=embed, view=view)
-        except:
-            await role.delete()
-            await private_thread.delete()
-            return False, "❌ Konnte Suche nicht posten."
-        
-        # Save search data
-        searches = self._get_searches_data(guild.id)
-        searches[str(search_id)] = {
+        search_data = {
             'active': True,
             'creator_id': creator.id,
             'game_name': game_name,
@@ -429,10 +483,25 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
             'duration': duration,
             'role_id': role.id,
             'thread_id': private_thread.id,
-            'lobby_message_id': lobby_message.id,
+            'lobby_message_id': None,
             'members': [creator.id],
             'created_at': datetime.utcnow().isoformat()
         }
+        embed = self._build_lobby_embed(search_id, search_data)
+        
+        # Post in lobby
+        try:
+            view = LFGSearchView(self, search_id, creator.id)
+            lobby_message = await lobby_channel.send(embed=embed, view=view)
+        except:
+            await role.delete()
+            await private_thread.delete()
+            return False, "❌ Konnte Suche nicht posten."
+        
+        # Save search data
+        search_data['lobby_message_id'] = lobby_message.id
+        searches = self._get_searches_data(guild.id)
+        searches[str(search_id)] = search_data
         self._save_searches_data(guild.id, searches)
         
         # Send welcome message in private thread
@@ -478,8 +547,8 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
         searches[str(search_id)] = search_data
         self._save_searches_data(guild.id, searches)
         
-        # Update lobby message
-        await self._update_lobby_message(guild, search_id, search_data)
+        # Update lobby message (gebündelt, falls viele gleichzeitig beitreten)
+        self._schedule_lobby_update(guild, search_id)
         
         # Notify in thread
         try:
@@ -503,6 +572,11 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
         searches[str(search_id)] = search_data
         self._save_searches_data(guild.id, searches)
         
+        # Ausstehende Aktualisierung der Lobby-Nachricht verwerfen
+        pending = self._pending_renders.pop((guild.id, search_id), None)
+        if pending:
+            pending.cancel()
+        
         # Delete role
         try:
             role = guild.get_role(search_data['role_id'])
@@ -523,9 +597,8 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
         # Delete lobby message
         try:
             config = self._get_lfg_config(guild.id)
-            lobby_channel = await self.bot.fetch_channel(config.get('lobby_channel_id'))
-            lobby_message = await lobby_channel.fetch_message(search_data['lobby_message_id'])
-            await lobby_message.delete()
+            lobby_channel = guild.get_channel(config.get('lobby_channel_id'))
+            await lobby_channel.get_partial_message(search_data['lobby_message_id']).delete()
         except:
             pass
         
@@ -552,7 +625,7 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
         max_searches = config.get('max_searches_per_user', 3)
         
         # Forum searches
-        forum_threads = self.bot.data.get_guild_data(guild.id, "lfg_forum_threads")
+        forum_threads = self._get_forum_threads_data(guild.id)
         user_forum_searches = [s for s in forum_threads.values() if s['creator_id'] == creator.id and s.get('active')]
         
         # Classic searches
@@ -629,7 +702,7 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
             pass
         
         # Save thread data
-        forum_threads = self.bot.data.get_guild_data(guild.id, "lfg_forum_threads")
+        forum_threads = self._get_forum_threads_data(guild.id)
         forum_threads[str(thread.id)] = {
             'creator_id': creator.id,
             'game_name': game_name,
@@ -640,14 +713,14 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
             'created_at': datetime.utcnow().isoformat(),
             'active': True
         }
-        self.bot.data.save_guild_data(guild.id, "lfg_forum_threads", forum_threads)
+        self._save_forum_threads_data(guild.id, forum_threads)
         
         return True, f"✅ Deine Suche wurde erstellt! {thread.mention}"
     
     async def join_forum_lfg(self, guild: discord.Guild, member: discord.Member, thread_id: int) -> Tuple[bool, str]:
         """Join a forum LFG thread"""
         
-        forum_threads = self.bot.data.get_guild_data(guild.id, "lfg_forum_threads")
+        forum_threads = self._get_forum_threads_data(guild.id)
         thread_data = forum_threads.get(str(thread_id))
         
         if not thread_data or not thread_data.get('active'):
@@ -664,7 +737,7 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
         # Add to members
         thread_data['members'].append(member.id)
         forum_threads[str(thread_id)] = thread_data
-        self.bot.data.save_guild_data(guild.id, "lfg_forum_threads", forum_threads)
+        self._save_forum_threads_data(guild.id, forum_threads)
         
         # Notify in thread
         try:
@@ -678,7 +751,7 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
     async def close_forum_lfg(self, guild: discord.Guild, thread_id: int) -> Tuple[bool, str]:
         """Close a forum LFG thread"""
         
-        forum_threads = self.bot.data.get_guild_data(guild.id, "lfg_forum_threads")
+        forum_threads = self._get_forum_threads_data(guild.id)
         thread_data = forum_threads.get(str(thread_id))
         
         if not thread_data:
@@ -687,7 +760,7 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
         # Mark as inactive
         thread_data['active'] = False
         forum_threads[str(thread_id)] = thread_data
-        self.bot.data.save_guild_data(guild.id, "lfg_forum_threads", forum_threads)
+        self._save_forum_threads_data(guild.id, forum_threads)
         
         # Archive thread
         try:
@@ -700,25 +773,58 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
         
         return True, "✅ Deine Suche wurde geschlossen."
     
-    async def _update_lobby_message(self, guild: discord.Guild, search_id: int, search_data: dict):
+    def _build_lobby_embed(self, search_id: int, search_data: dict) -> Embed:
+        """Rendert die Lobby-Nachricht einer Suche aus dem Zustand im Speicher"""
+        embed = Embed(
+            title=f"🎮 {search_data['game_name']}",
+            color=Color.blue(),
+            timestamp=datetime.fromisoformat(search_data['created_at'])
+        )
+        embed.add_field(name="Ersteller", value=f"<@{search_data['creator_id']}>", inline=True)
+        
+        team_size = search_data.get('team_size')
+        if team_size:
+            free_slots = team_size + 1 - len(search_data['members'])
+            embed.add_field(name="Suche", value=f"{team_size} Spieler", inline=True)
+            embed.add_field(name="Frei", value=str(max(0, free_slots)), inline=True)
+        
+        if search_data.get('description'):
+            embed.add_field(name="Beschreibung", value=search_data['description'], inline=False)
+        
+        if search_data.get('duration'):
+            embed.add_field(name="Zeitrahmen", value=search_data['duration'], inline=True)
+        
+        embed.set_footer(text=f"ID: {search_id}")
+        return embed
+    
+    def _schedule_lobby_update(self, guild: discord.Guild, search_id: int):
+        """Plant eine Aktualisierung der Lobby-Nachricht. Ist bereits eine geplant, wird sie mitgenutzt."""
+        key = (guild.id, search_id)
+        if key in self._pending_renders:
+            return
+        self._pending_renders[key] = self.bot.loop.create_task(self._update_lobby_message(guild, search_id))
+    
+    async def _update_lobby_message(self, guild: discord.Guild, search_id: int):
         """Update the lobby message with current member count"""
         
+        try:
+            await asyncio.sleep(LOBBY_RENDER_DELAY)
+        except asyncio.CancelledError:
+            return
+        # Ab hier zählen neue Beitritte für die nächste Bearbeitung
+        self._pending_renders.pop((guild.id, search_id), None)
+        
+        search_data = self._get_searches_data(guild.id).get(str(search_id))
+        if not search_data or not search_data.get('active') or not search_data.get('lobby_message_id'):
+            return
+        
         try:
             config = self._get_lfg_config(guild.id)
-            lobby_channel = await self.bot.fetch_channel(config.get('lobby_channel_id'))
-            lobby_message = await lobby_channel.fetch_message(search_data['lobby_message_id'])
-            
-            embed = lobby_message.embeds[0]
-            
-            # Update "Frei" field if team_size is set
-            if search_data.get('team_size'):
-                free_slots = search_data['team_size'] + 1 - len(search_data['members'])
-                for i, field in enumerate(embed.fields):
-                    if field.name == "Frei":
-                        embed.set_field_at(i, name="Frei", value=str(max(0, free_slots)), inline=True)
-                        break
-            
-            await lobby_message.edit(embed=embed)
+            lobby_channel = guild.get_channel(config.get('lobby_channel_id'))
+            if not lobby_channel:
+                return
+            lobby_message = lobby_channel.get_partial_message(search_data['lobby_message_id'])
+            await lobby_message.edit(embed=self._build_lobby_embed(search_id, search_data))
         except:
             pass
     
@@ -740,7 +846,8 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
         if not guild:
             return False, "Server nicht gefunden."
         
-        config = self._get_lfg_config(guild_id)
+        # Auf einer Kopie arbeiten: erst bei Erfolg speichern, Cache tauschen und Lobby-Index neu aufbauen
+        config = copy.deepcopy(self._get_lfg_config(guild_id))
         config['display_mode'] = display_mode
         
         # Set participation role
@@ -896,15 +1003,15 @@ class LFGCog(commands.Cog, name="Mitspieler-Suche"):
         if not message.guild:
             return
 
-        config = self._get_lfg_config(message.guild.id)
-        lobby_channel_id = config.get('lobby_channel_id')
-        
-        if lobby_channel_id and message.channel.id == lobby_channel_id:
-            if message.is_system():
-                try:
-                    await message.delete()
-                except:
-                    pass
+        # O(1)-Prüfung gegen das Set im Speicher, kein Dateizugriff pro Nachricht
+        if message.channel.id not in self._lobby_channel_ids:
+            return
+
+        if message.is_system():
+            try:
+                await message.delete()
+            except:
+                pass
 
     @commands.Cog.listener()
     async def on_member_update(self, before, after):
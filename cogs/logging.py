@@ -1,10 +1,34 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import Embed, Color
+import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from utils.log_storage import LogStorage
+from utils.log_writer import LogWriter
+from utils.log_retention import LogArchive, RetentionService
+from utils.log_delivery import LogDelivery
+
+# Sicherheitsnetz, falls config.json/logging.json außerhalb des Dashboards geändert werden (Sekunden)
+FILTER_CACHE_TTL = 60
+# Abstand zwischen zwei Aufräumläufen (Aufbewahrung, Archiv, Vacuum)
+RETENTION_INTERVAL_HOURS = 6
+
+
+class LogFilter:
+    """Gecachte Filter-Entscheidungsgrundlage einer Guild (Sets statt Listen für schnelle Lookups)."""
+    __slots__ = ('enabled', 'config', 'enabled_events', 'ignored_channels', 'ignored_users', 'loaded_at')
+
+    def __init__(self, enabled: bool, config: dict):
+        self.enabled = enabled
+        self.config = config
+        self.enabled_events = set(config.get("enabled_events", []))
+        self.ignored_channels = set(config.get("ignored_channels", []))
+        self.ignored_users = set(config.get("ignored_users", []))
+        self.loaded_at = time.monotonic()
+
 
 class LoggingCog(commands.Cog, name="Logging"):
     """Discord Audit Logging System"""
@@ -12,27 +36,91 @@ class LoggingCog(commands.Cog, name="Logging"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.log_storage = LogStorage()
+        # Listener legen Logs nur in die Warteschlange, geschrieben wird gebündelt im Writer-Thread
+        self.log_writer = LogWriter(self.log_storage)
+        self.log_archive = LogArchive()
+        self.retention = RetentionService(self.log_storage, self.log_archive)
+        self._filter_cache: Dict[int, LogFilter] = {}
+        # Embeds werden pro Guild gesammelt und gebündelt gesendet; Ziele (Kanal/Thread) werden gecacht
+        self.delivery = LogDelivery(self._resolve_log_destination, self._forget_log_destination)
+        self._log_destinations: Dict[int, discord.abc.Messageable] = {}
+        self.retention_loop.start()
+
+    async def cog_load(self):
+        self.log_writer.start()
+
+    def cog_unload(self):
+        # Läuft auch bei bot.close(): erst ausstehende Logs schreiben, dann die Datenbanken schließen
+        self.retention_loop.cancel()
+        self.delivery.stop()
+        self.log_writer.stop()
+        self.log_storage.close_all_connections()
+
+    def invalidate_guild_cache(self, guild_id: Optional[int] = None):
+        """Verwirft gecachte Filter-Konfigurationen (z.B. nach Dashboard-Änderungen oder einer Wiederherstellung)."""
+        if guild_id is None:
+            self._filter_cache.clear()
+            self._log_destinations.clear()
+        else:
+            self._filter_cache.pop(guild_id, None)
+            self._log_destinations.pop(guild_id, None)
+
+    def _get_filter(self, guild_id: int) -> LogFilter:
+        log_filter = self._filter_cache.get(guild_id)
+        if log_filter is None or time.monotonic() - log_filter.loaded_at > FILTER_CACHE_TTL:
+            guild_config = self.bot.data.get_server_config(guild_id)
+            enabled = 'Logging' in guild_config.get('enabled_cogs', [])
+            log_filter = LogFilter(enabled, self.bot.data.get_guild_data(guild_id, "logging"))
+            self._filter_cache[guild_id] = log_filter
+        return log_filter
+
+    def _get_config(self, guild_id: int) -> dict:
+        """Logging-Konfiguration aus dem Filter-Cache."""
+        return self._get_filter(guild_id).config
+
+    # ==================== RETENTION ====================
+
+    async def run_retention(self, guild_id: int) -> Dict[str, Any]:
+        """Setzt die Aufbewahrungsrichtlinie einer Guild im Worker-Thread durch."""
+        policy = RetentionService.policy_from_config(self._get_config(guild_id))
+        return await asyncio.to_thread(self.retention.run, guild_id, policy)
+
+    @tasks.loop(hours=RETENTION_INTERVAL_HOURS)
+    async def retention_loop(self):
+        for guild in self.bot.guilds:
+            if not self._get_filter(guild.id).enabled:
+                continue
+            try:
+                result = await self.run_retention(guild.id)
+                if result['deleted'] or result['compacted'] or result['archives_removed']:
+                    print(f"[Logging] Aufräumen Guild {guild.id}: {result['deleted']} gelöscht, "
+                          f"{result['archived']} archiviert, Vacuum: {result['compacted'] or '-'}")
+            except Exception as e:
+                print(f"[Logging] Fehler beim Aufräumen der Logs für Guild {guild.id}: {e}")
+
+    @retention_loop.before_loop
+    async def before_retention_loop(self):
+        await self.bot.wait_until_ready()
 
     def should_log_event(self, guild_id: int, event_type: str,
                         channel_id: Optional[int] = None,
                         user_id: Optional[int] = None) -> bool:
+        log_filter = self._get_filter(guild_id)
+
         # Check if logging module is enabled in server config
-        guild_config = self.bot.data.get_server_config(guild_id)
-        if 'Logging' not in guild_config.get('enabled_cogs', []):
+        if not log_filter.enabled:
             return False
 
-        config = self.bot.data.get_guild_data(guild_id, "logging")
-
         # Check if event type is enabled
-        if event_type not in config.get("enabled_events", []):
+        if event_type not in log_filter.enabled_events:
             return False
 
         # Check ignored channels
-        if channel_id and channel_id in config.get("ignored_channels", []):
+        if channel_id and channel_id in log_filter.ignored_channels:
             return False
 
         # Check ignored users
-        if user_id and user_id in config.get("ignored_users", []):
+        if user_id and user_id in log_filter.ignored_users:
             return False
 
         return True
@@ -99,6 +187,7 @@ class LoggingCog(commands.Cog, name="Logging"):
                 thread = thread_with_msg.thread
                 config['dashboard_log_thread_id'] = thread.id
                 self.bot.data.save_guild_data(guild.id, "logging", config)
+                self.invalidate_guild_cache(guild.id)
 
                 try:
                     await thread.edit(pinned=True, reason="Logging Thread im Dashboard gepinnt")
@@ -110,11 +199,14 @@ class LoggingCog(commands.Cog, name="Logging"):
             print(f"[Logging] Fehler in _get_or_create_dashboard_log_thread: {e}")
             return None
 
-    async def _send_log_embed(self, guild_id: int, embed: Embed) -> None:
-        """Send a log embed to the configured log channel or Dashboard Forum post."""
-        config = self.bot.data.get_guild_data(guild_id, "logging")
+    async def _resolve_log_destination(self, guild_id: int) -> Optional[discord.abc.Messageable]:
+        """Log-Kanal oder Dashboard-Forum-Post der Guild (gecacht bis zur nächsten Konfigurationsänderung)."""
+        channel = self._log_destinations.get(guild_id)
+        if channel is not None:
+            return channel
+
+        config = self._get_config(guild_id)
         use_dashboard = config.get('use_dashboard_forum', False) or (config.get('destination_type') == 'dashboard_forum')
-        channel = None
 
         if use_dashboard:
             guild = self.bot.get_guild(guild_id)
@@ -122,19 +214,22 @@ class LoggingCog(commands.Cog, name="Logging"):
                 channel = await self._get_or_create_dashboard_log_thread(guild, config)
             if not channel:
                 print(f"[Logging] Konnte Dashboard Log Thread für Guild {guild_id} nicht abrufen/erstellen.")
-                return
+                return None
         else:
             log_channel_id = config.get("log_channel_id")
             if log_channel_id:
                 channel = self.bot.get_channel(log_channel_id)
 
-        if not channel:
-            return
+        if channel is not None:
+            self._log_destinations[guild_id] = channel
+        return channel
 
-        try:
-            await channel.send(embed=embed)
-        except (discord.Forbidden, discord.HTTPException):
-            pass
+    def _forget_log_destination(self, guild_id: int) -> None:
+        self._log_destinations.pop(guild_id, None)
+
+    async def _send_log_embed(self, guild_id: int, embed: Embed) -> None:
+        """Queue a log embed for bundled delivery to the log channel or Dashboard Forum post."""
+        self.delivery.enqueue(guild_id, embed)
 
     # ==================== MESSAGE EVENTS ====================
 
@@ -161,7 +256,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(message.guild.id, {
+        self.log_writer.enqueue(message.guild.id, {
             'event_type': 'message_delete',
             'user_id': str(message.author.id),
             'user_name': message.author.name,
@@ -203,7 +298,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(before.guild.id, {
+        self.log_writer.enqueue(before.guild.id, {
             'event_type': 'message_edit',
             'user_id': str(before.author.id),
             'user_name': before.author.name,
@@ -238,7 +333,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'bulk_message_delete',
             'channel_id': str(messages[0].channel.id),
             'channel_name': messages[0].channel.name,
@@ -270,7 +365,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'member_join',
             'target_id': str(member.id),
             'target_name': member.name,
@@ -297,7 +392,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'member_verify',
             'target_id': str(member.id),
             'target_name': member.name,
@@ -326,7 +421,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'member_remove',
             'target_id': str(member.id),
             'target_name': member.name,
@@ -354,7 +449,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'member_ban',
             'target_id': str(user.id),
             'target_name': user.name,
@@ -381,7 +476,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'member_unban',
             'target_id': str(user.id),
             'target_name': user.name,
@@ -408,7 +503,7 @@ class LoggingCog(commands.Cog, name="Logging"):
             embed.add_field(name="Nachher", value=after.nick or "Keine", inline=True)
             embed.timestamp = datetime.utcnow()
 
-            self.log_storage.save_log(guild.id, {
+            self.log_writer.enqueue(guild.id, {
                 'event_type': 'member_update_nickname',
                 'target_id': str(after.id),
                 'target_name': after.name,
@@ -432,7 +527,7 @@ class LoggingCog(commands.Cog, name="Logging"):
                 embed.add_field(name="Rollen", value=roles_str, inline=False)
                 embed.timestamp = datetime.utcnow()
 
-                self.log_storage.save_log(guild.id, {
+                self.log_writer.enqueue(guild.id, {
                     'event_type': 'member_role_add',
                     'target_id': str(after.id),
                     'target_name': after.name,
@@ -452,7 +547,7 @@ class LoggingCog(commands.Cog, name="Logging"):
                 embed.add_field(name="Rollen", value=roles_str, inline=False)
                 embed.timestamp = datetime.utcnow()
 
-                self.log_storage.save_log(guild.id, {
+                self.log_writer.enqueue(guild.id, {
                     'event_type': 'member_role_remove',
                     'target_id': str(after.id),
                     'target_name': after.name,
@@ -480,7 +575,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'role_create',
             'target_id': str(role.id),
             'target_name': role.name,
@@ -510,7 +605,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'role_delete',
             'target_id': str(role.id),
             'target_name': role.name,
@@ -546,7 +641,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'role_update',
             'target_id': str(after.id),
             'target_name': after.name,
@@ -576,7 +671,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'channel_create',
             'target_id': str(channel.id),
             'target_name': channel.name,
@@ -603,7 +698,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'channel_delete',
             'target_id': str(channel.id),
             'target_name': channel.name,
@@ -636,7 +731,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'channel_update',
             'target_id': str(after.id),
             'target_name': after.name,
@@ -682,7 +777,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.timestamp = datetime.utcnow()
 
         # Save to database
-        self.log_storage.save_log(after.id, {
+        self.log_writer.enqueue(after.id, {
             'event_type': 'guild_update',
             'target_id': str(after.id),
             'target_name': after.name,
@@ -713,7 +808,7 @@ class LoggingCog(commands.Cog, name="Logging"):
             embed.add_field(name="Kanal", value=after.channel.name, inline=False)
             embed.timestamp = datetime.utcnow()
 
-            self.log_storage.save_log(guild.id, {
+            self.log_writer.enqueue(guild.id, {
                 'event_type': 'voice_join',
                 'target_id': str(member.id),
                 'target_name': member.name,
@@ -734,7 +829,7 @@ class LoggingCog(commands.Cog, name="Logging"):
             embed.add_field(name="Kanal", value=before.channel.name, inline=False)
             embed.timestamp = datetime.utcnow()
 
-            self.log_storage.save_log(guild.id, {
+            self.log_writer.enqueue(guild.id, {
                 'event_type': 'voice_leave',
                 'target_id': str(member.id),
                 'target_name': member.name,
@@ -756,7 +851,7 @@ class LoggingCog(commands.Cog, name="Logging"):
             embed.add_field(name="Zu", value=after.channel.name, inline=True)
             embed.timestamp = datetime.utcnow()
 
-            self.log_storage.save_log(guild.id, {
+            self.log_writer.enqueue(guild.id, {
                 'event_type': 'voice_move',
                 'target_id': str(member.id),
                 'target_name': member.name,
@@ -780,7 +875,7 @@ class LoggingCog(commands.Cog, name="Logging"):
                 embed.add_field(name="Kanal", value=after.channel.name if after.channel else "Kein Kanal", inline=False)
                 embed.timestamp = datetime.utcnow()
 
-                self.log_storage.save_log(guild.id, {
+                self.log_writer.enqueue(guild.id, {
                     'event_type': 'voice_mute' if after.self_mute else 'voice_unmute',
                     'target_id': str(member.id),
                     'target_name': member.name,
@@ -800,7 +895,7 @@ class LoggingCog(commands.Cog, name="Logging"):
                 embed.add_field(name="Kanal", value=after.channel.name if after.channel else "Kein Kanal", inline=False)
                 embed.timestamp = datetime.utcnow()
 
-                self.log_storage.save_log(guild.id, {
+                self.log_writer.enqueue(guild.id, {
                     'event_type': 'voice_deaf' if after.self_deaf else 'voice_undeaf',
                     'target_id': str(member.id),
                     'target_name': member.name,
@@ -828,7 +923,7 @@ class LoggingCog(commands.Cog, name="Logging"):
             embed.add_field(name="Emojis", value=emoji_names, inline=False)
             embed.timestamp = datetime.utcnow()
 
-            self.log_storage.save_log(guild.id, {
+            self.log_writer.enqueue(guild.id, {
                 'event_type': 'emoji_add',
                 'action': f'Added {len(added)} emoji(s)',
                 'extra_data': {'emoji_names': [e.name for e in added]}
@@ -844,7 +939,7 @@ class LoggingCog(commands.Cog, name="Logging"):
             embed.add_field(name="Emojis", value=emoji_names, inline=False)
             embed.timestamp = datetime.utcnow()
 
-            self.log_storage.save_log(guild.id, {
+            self.log_writer.enqueue(guild.id, {
                 'event_type': 'emoji_remove',
                 'action': f'Removed {len(removed)} emoji(s)',
                 'extra_data': {'emoji_names': [e.name for e in removed]}
@@ -868,7 +963,7 @@ class LoggingCog(commands.Cog, name="Logging"):
             embed.add_field(name="Sticker", value=sticker_names, inline=False)
             embed.timestamp = datetime.utcnow()
 
-            self.log_storage.save_log(guild.id, {
+            self.log_writer.enqueue(guild.id, {
                 'event_type': 'sticker_add',
                 'action': f'Added {len(added)} sticker(s)',
                 'extra_data': {'sticker_names': [s.name for s in added]}
@@ -884,7 +979,7 @@ class LoggingCog(commands.Cog, name="Logging"):
             embed.add_field(name="Sticker", value=sticker_names, inline=False)
             embed.timestamp = datetime.utcnow()
 
-            self.log_storage.save_log(guild.id, {
+            self.log_writer.enqueue(guild.id, {
                 'event_type': 'sticker_remove',
                 'action': f'Removed {len(removed)} sticker(s)',
                 'extra_data': {'sticker_names': [s.name for s in removed]}
@@ -907,7 +1002,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.add_field(name="Aktion", value="Webhook erstellt/gelöscht/geändert", inline=False)
         embed.timestamp = datetime.utcnow()
 
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'webhook_update',
             'channel_id': str(channel.id),
             'channel_name': channel.name,
@@ -932,7 +1027,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.add_field(name="Kanal", value=f"{invite.channel.mention if invite.channel else 'Unbekannt'}", inline=True)
         embed.timestamp = datetime.utcnow()
 
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'invite_create',
             'user_id': str(invite.inviter.id) if invite.inviter else None,
             'user_name': invite.inviter.name if invite.inviter else None,
@@ -957,7 +1052,7 @@ class LoggingCog(commands.Cog, name="Logging"):
         embed.add_field(name="Kanal", value=f"{invite.channel.mention if invite.channel else 'Unbekannt'}", inline=False)
         embed.timestamp = datetime.utcnow()
 
-        self.log_storage.save_log(guild.id, {
+        self.log_writer.enqueue(guild.id, {
             'event_type': 'invite_delete',
             'channel_id': str(invite.channel.id) if invite.channel else None,
             'channel_name': invite.channel.name if invite.channel else None,
@@ -1000,8 +1095,11 @@ class LoggingCog(commands.Cog, name="Logging"):
             config['ignored_channels'] = config_data.get('ignored_channels', [])
             config['ignored_users'] = config_data.get('ignored_users', [])
             config['retention_days'] = config_data.get('retention_days', 30)
+            config['archive_enabled'] = config_data.get('archive_enabled', False)
+            config['archive_months'] = config_data.get('archive_months', 12)
 
             self.bot.data.save_guild_data(guild_id, "logging", config)
+            self.invalidate_guild_cache(guild_id)
 
             msg = "Logging-Konfiguration gespeichert."
             if use_dashboard_forum:
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import discord
+from discord.ext import commands, tasks
+from typing import Optional, Set
+from utils.guild_snapshot import build_guild_snapshot
+
+# Geänderte Guilds werden gesammelt und in diesem Abstand veröffentlicht (Sekunden)
+SNAPSHOT_FLUSH_SECONDS = 15
+# Vollständige Aktualisierung aller Guilds (Mitgliederzahlen etc.)
+SNAPSHOT_FULL_REFRESH_MINUTES = 10
+
+
+class StateSnapshotCog(commands.Cog, name="State-Snapshot"):
+    """
+    Veröffentlicht pro Guild einen versionierten Stand (Kanäle, Rollen, Mitgliederzahlen,
+    aktivierte Module) über bot.snapshots. Lesende Dashboard-Routen nutzen diesen Stand
+    statt des Live-Bot-Objekts; Änderungen laufen weiterhin über den Bot.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._dirty: Set[int] = set()
+        self.flush_loop.start()
+        self.full_refresh_loop.start()
+
+    def cog_unload(self):
+        self.flush_loop.cancel()
+        self.full_refresh_loop.cancel()
+
+    def mark_dirty(self, guild_id: int):
+        self._dirty.add(guild_id)
+
+    def invalidate_guild_cache(self, guild_id: Optional[int] = None):
+        """Nach einer Wiederherstellung alle Stände neu schreiben."""
+        self.bot.snapshots.forget(guild_id)
+        if guild_id is None:
+            self._dirty.update(g.id for g in self.bot.guilds)
+        else:
+            self._dirty.add(guild_id)
+
+    async def _publish(self, guild_ids):
+        payloads = []
+        for guild_id in guild_ids:
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                continue
+            settings = self.bot.data.get_server_config(guild_id)
+            payloads.append((guild_id, build_guild_snapshot(guild, settings)))
+            # Andere Tasks zwischen den Guilds laufen lassen
+            await asyncio.sleep(0)
+
+        def write_all():
+            for guild_id, payload in payloads:
+                self.bot.snapshots.publish(guild_id, payload)
+
+        await asyncio.to_thread(write_all)
+
+    @tasks.loop(seconds=SNAPSHOT_FLUSH_SECONDS)
+    async def flush_loop(self):
+        if not self._dirty:
+            return
+        guild_ids, self._dirty = self._dirty, set()
+        try:
+            await self._publish(guild_ids)
+        except Exception as e:
+            print(f"[Snapshot] Fehler beim Veröffentlichen: {e}")
+
+    @tasks.loop(minutes=SNAPSHOT_FULL_REFRESH_MINUTES)
+    async def full_refresh_loop(self):
+        try:
+            await self._publish([g.id for g in self.bot.guilds])
+        except Exception as e:
+            print(f"[Snapshot] Fehler bei der Aktualisierung: {e}")
+
+    @flush_loop.before_loop
+    @full_refresh_loop.before_loop
+    async def before_loops(self):
+        await self.bot.wait_until_ready()
+
+    # --- Änderungen, die den Stand betreffen ---
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        self.mark_dirty(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self._dirty.discard(guild.id)
+        await asyncio.to_thread(self.bot.snapshots.remove, guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        self.mark_dirty(after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.mark_dirty(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.mark_dirty(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        self.mark_dirty(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        self.mark_dirty(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.mark_dirty(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        self.mark_dirty(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self.mark_dirty(member.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        self.mark_dirty(member.guild.id)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(StateSnapshotCog(bot))
@@ -1,7 +1,8 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import ui
 import asyncio
+from typing import Dict, Optional
 
 # --- UI Elemente (Modals, Dropdowns und Views) ---
 
@@ -65,41 +66,42 @@ class TransferOwnerSelect(ui.Select):
         if not new_owner:
             return await interaction.response.send_message("Benutzer nicht gefunden.", ephemeral=True)
 
-        # Set new owner permissions
-        await channel.set_permissions(new_owner, overwrite=self.cog.get_owner_overwrites())
-        # Reset old owner permissions
-        await channel.set_permissions(interaction.user, overwrite=None)
-        
+        # Rechte von altem und neuem Inhaber in einem einzigen API-Aufruf umstellen
+        await self.cog.transfer_owner_permissions(channel, interaction.user, new_owner)
         await self.cog.set_owner_for_channel(channel, new_owner)
 
         embed = create_control_embed(channel, new_owner)
         await interaction.response.edit_message(content=f"👑 Inhaberschaft an {new_owner.mention} übertragen!", embed=embed, view=None)
 
+class InviteUserSelect(ui.UserSelect):
+    """Native Benutzerauswahl von Discord - keine Schleife über alle Servermitglieder nötig."""
+    def __init__(self, channel: discord.VoiceChannel):
+        self.channel = channel
+        super().__init__(placeholder="Wähle Benutzer zum Einladen...", min_values=1, max_values=1)
+
+    async def callback(self, interaction: discord.Interaction):
+        member = self.values[0]
+        if not isinstance(member, discord.Member) or member.bot:
+            return await interaction.response.send_message("Benutzer nicht gefunden.", ephemeral=True)
+
+        await self.channel.set_permissions(member, connect=True, view_channel=True, reason=f"Eingeladen von {interaction.user}")
+        await interaction.response.send_message(f"{member.mention} wurde eingeladen und kann jetzt beitreten.", ephemeral=True)
+        await interaction.edit_original_response(view=None)
+
 class ManageUserSelect(ui.Select):
-    def __init__(self, channel: discord.VoiceChannel, action: str):
+    def __init__(self, channel: discord.VoiceChannel):
         self.channel = channel
-        self.action = action
-        
-        if action == "add":
-            placeholder = "Wähle Benutzer zum Einladen..."
-            current_members_ids = {m.id for m in channel.members}
-            overwritten_user_ids = {target.id for target in channel.overwrites if isinstance(target, discord.Member)}
-            eligible_users = [
-                m for m in channel.guild.members 
-                if not m.bot and m.id not in current_members_ids and m.id not in overwritten_user_ids
-            ]
-        else: # remove
-            placeholder = "Wähle Benutzer zum Entfernen..."
-            eligible_users = [
-                target for target, overwrite in channel.overwrites.items() 
-                if isinstance(target, discord.Member) and (overwrite.connect or overwrite.view_channel)
-            ]
+        # Nur die Overwrites des Kanals sind relevant, nicht alle Servermitglieder
+        eligible_users = [
+            target for target, overwrite in channel.overwrites.items() 
+            if isinstance(target, discord.Member) and (overwrite.connect or overwrite.view_channel)
+        ]
 
         options = [discord.SelectOption(label=user.display_name, value=str(user.id)) for user in eligible_users[:25]]
         if not options:
             options = [discord.SelectOption(label="Keine Benutzer verfügbar", value="none")]
             
-        super().__init__(placeholder=placeholder, min_values=1, max_values=1, options=options, disabled=len(options)==0 or options[0].value=="none")
+        super().__init__(placeholder="Wähle Benutzer zum Entfernen...", min_values=1, max_values=1, options=options, disabled=options[0].value=="none")
 
     async def callback(self, interaction: discord.Interaction):
         if self.values[0] == "none": return
@@ -108,13 +110,8 @@ class ManageUserSelect(ui.Select):
         if not member:
             return await interaction.response.send_message("Benutzer nicht gefunden.", ephemeral=True)
 
-        if self.action == "add":
-            await self.channel.set_permissions(member, connect=True, view_channel=True, reason=f"Eingeladen von {interaction.user}")
-            await interaction.response.send_message(f"{member.mention} wurde eingeladen und kann jetzt beitreten.", ephemeral=True)
-        else: # remove
-            await self.channel.set_permissions(member, overwrite=None, reason=f"Einladung entfernt von {interaction.user}")
-            await interaction.response.send_message(f"Die Einladung für {member.mention} wurde entfernt.", ephemeral=True)
-        
+        await self.channel.set_permissions(member, overwrite=None, reason=f"Einladung entfernt von {interaction.user}")
+        await interaction.response.send_message(f"Die Einladung für {member.mention} wurde entfernt.", ephemeral=True)
         await interaction.edit_original_response(view=None)
 
 
@@ -148,7 +145,10 @@ class ControlPanelView(ui.View):
         
         async def button_callback(interaction: discord.Interaction):
             view = ui.View(timeout=180)
-            view.add_item(ManageUserSelect(interaction.channel, action))
+            if action == "add":
+                view.add_item(InviteUserSelect(interaction.channel))
+            else:
+                view.add_item(ManageUserSelect(interaction.channel))
             await interaction.response.send_message("Wähle einen Benutzer:", view=view, ephemeral=True)
         
         button.callback = button_callback
@@ -212,10 +212,54 @@ class ControlPanelView(ui.View):
 
 # --- Haupt-Cog Klasse ---
 
+class TempChannelState:
+    """
+    Temp-Channel-Zustand einer Guild im Speicher.
+    Hält Inhaber in beide Richtungen indiziert und die IDs der Steuerungsnachrichten.
+    """
+    def __init__(self, data: dict):
+        self.config: dict = data.get('config', {})
+        self.owner_by_channel: Dict[int, int] = {}
+        self.channel_by_owner: Dict[int, int] = {}
+        self.control_messages: Dict[int, int] = {
+            int(channel_id): int(message_id) for channel_id, message_id in data.get('control_messages', {}).items()
+        }
+        for channel_id, owner_id in data.get('active_channels', {}).items():
+            self.set_owner(int(channel_id), int(owner_id))
+
+    def set_owner(self, channel_id: int, owner_id: int):
+        old_owner = self.owner_by_channel.get(channel_id)
+        if old_owner is not None and self.channel_by_owner.get(old_owner) == channel_id:
+            del self.channel_by_owner[old_owner]
+        self.owner_by_channel[channel_id] = owner_id
+        self.channel_by_owner[owner_id] = channel_id
+
+    def remove_channel(self, channel_id: int) -> bool:
+        owner_id = self.owner_by_channel.pop(channel_id, None)
+        self.control_messages.pop(channel_id, None)
+        if owner_id is not None and self.channel_by_owner.get(owner_id) == channel_id:
+            del self.channel_by_owner[owner_id]
+        return owner_id is not None
+
+    def to_dict(self) -> dict:
+        return {
+            'config': self.config,
+            'active_channels': {str(c): str(o) for c, o in self.owner_by_channel.items()},
+            'control_messages': {str(c): m for c, m in self.control_messages.items()},
+        }
+
+
 class TempChannel(commands.Cog, name="Temp-Channel"):
     def __init__(self, bot):
         self.bot = bot
+        self._states: Dict[int, TempChannelState] = {}
+        self._dirty_guilds = set()
         self.bot.loop.create_task(self.add_persistent_views())
+        self.flush_loop.start()
+
+    def cog_unload(self):
+        self.flush_loop.cancel()
+        self.flush()
 
     async def add_persistent_views(self):
         await self.bot.wait_until_ready()
@@ -227,66 +271,115 @@ class TempChannel(commands.Cog, name="Temp-Channel"):
             deafen_members=True, manage_permissions=True
         )
 
-    def get_guild_data(self, guild_id: int):
-        data = self.bot.data.get_guild_data(guild_id, "temp_channel")
-        data.setdefault('config', {})
-        data.setdefault('active_channels', {})
-        return data
-
-    def save_guild_data(self, guild_id: int, data: dict):
-        self.bot.data.save_guild_data(guild_id, "temp_channel", data)
+    # --- Zustand & Write-Behind-Persistenz ---
+
+    def get_state(self, guild_id: int) -> TempChannelState:
+        state = self._states.get(guild_id)
+        if state is None:
+            state = TempChannelState(self.bot.data.get_guild_data(guild_id, "temp_channel"))
+            self._states[guild_id] = state
+        return state
+
+    def _mark_dirty(self, guild_id: int):
+        self._dirty_guilds.add(guild_id)
+
+    def flush(self):
+        """Schreibt alle geänderten Guilds auf die Festplatte."""
+        dirty, self._dirty_guilds = self._dirty_guilds, set()
+        for guild_id in dirty:
+            state = self._states.get(guild_id)
+            if state:
+                self.bot.data.save_guild_data(guild_id, "temp_channel", state.to_dict())
+
+    def invalidate_guild_cache(self, guild_id: Optional[int] = None):
+        """Verwirft den Zustand im Speicher ohne zu speichern (z.B. nach einer Wiederherstellung)."""
+        if guild_id is None:
+            self._states.clear()
+            self._dirty_guilds.clear()
+        else:
+            self._states.pop(guild_id, None)
+            self._dirty_guilds.discard(guild_id)
+
+    @tasks.loop(seconds=10)
+    async def flush_loop(self):
+        if self._dirty_guilds:
+            self.flush()
 
     def get_owner_id_for_channel(self, guild_id: int, channel_id: int) -> int | None:
-        guild_data = self.get_guild_data(guild_id)
-        owner_id_str = guild_data['active_channels'].get(str(channel_id))
-        return int(owner_id_str) if owner_id_str else None
+        return self.get_state(guild_id).owner_by_channel.get(channel_id)
 
     async def set_owner_for_channel(self, channel: discord.VoiceChannel, owner: discord.Member):
-        guild_data = self.get_guild_data(channel.guild.id)
-        guild_data['active_channels'][str(channel.id)] = str(owner.id)
-        self.save_guild_data(channel.guild.id, guild_data)
+        self.get_state(channel.guild.id).set_owner(channel.id, owner.id)
+        self._mark_dirty(channel.guild.id)
+
+    async def transfer_owner_permissions(self, channel: discord.VoiceChannel, old_owner: discord.Member, new_owner: discord.Member):
+        overwrites = dict(channel.overwrites)
+        overwrites.pop(old_owner, None)
+        overwrites[new_owner] = self.get_owner_overwrites()
+        await channel.edit(overwrites=overwrites, reason=f"Inhaberwechsel zu {new_owner}")
 
     async def delete_channel(self, channel: discord.VoiceChannel):
-        guild_data = self.get_guild_data(channel.guild.id)
-        if str(channel.id) in guild_data['active_channels']:
-            del guild_data['active_channels'][str(channel.id)]
-            self.save_guild_data(channel.guild.id, guild_data)
+        if self.get_state(channel.guild.id).remove_channel(channel.id):
+            self._mark_dirty(channel.guild.id)
         try:
             await channel.delete(reason="Temporärer Kanal nicht mehr benötigt")
         except (discord.NotFound, discord.Forbidden): pass
 
+    async def _update_control_message(self, channel: discord.VoiceChannel, owner: discord.Member):
+        state = self.get_state(channel.guild.id)
+        message_id = state.control_messages.get(channel.id)
+        if message_id:
+            try:
+                await channel.get_partial_message(message_id).edit(embed=create_control_embed(channel, owner))
+                return
+            except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+                pass
+        # Fallback für Kanäle, deren Steuerungsnachricht noch nicht gespeichert wurde
+        async for msg in channel.history(limit=10):
+            if msg.author == self.bot.user and msg.embeds:
+                await msg.edit(embed=create_control_embed(channel, owner))
+                state.control_messages[channel.id] = msg.id
+                self._mark_dirty(channel.guild.id)
+                break
+
+    # --- Web API Methoden ---
+    async def web_set_config(self, guild_id: int, trigger_channel_id: Optional[int], channel_name_format: str):
+        state = self.get_state(guild_id)
+        state.config['trigger_channel_id'] = trigger_channel_id
+        state.config['channel_name_format'] = channel_name_format
+        self._mark_dirty(guild_id)
+        self.flush()
+        return True, "Temp-Channel Einstellungen erfolgreich gespeichert!"
+
     @commands.Cog.listener()
     async def on_ready(self):
         print("Temp-Channel Cog: Überprüfe persistente Kanäle...")
         await asyncio.sleep(5)
         
         for guild in self.bot.guilds:
-            guild_data = self.get_guild_data(guild.id)
-            active_channels = guild_data.get('active_channels', {}).copy()
-            for channel_id_str in active_channels:
-                try:
-                    channel = guild.get_channel(int(channel_id_str))
-                    if not channel or (isinstance(channel, discord.VoiceChannel) and len(channel.members) == 0):
-                        await self.delete_channel(channel)
-                except Exception:
-                    # Clean up invalid data if fetching channel fails hard (e.g. invalid ID)
-                    del guild_data['active_channels'][channel_id_str]
-                    self.save_guild_data(guild.id, guild_data)
+            state = self.get_state(guild.id)
+            for channel_id in list(state.owner_by_channel):
+                channel = guild.get_channel(channel_id)
+                if not channel:
+                    state.remove_channel(channel_id)
+                    self._mark_dirty(guild.id)
+                elif isinstance(channel, discord.VoiceChannel) and len(channel.members) == 0:
+                    await self.delete_channel(channel)
 
         print("Temp-Channel Cog: Überprüfung abgeschlossen.")
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
-        if member.bot: return
-        guild_data = self.get_guild_data(member.guild.id)
-        config = guild_data.get('config', {})
+        # Mute, Deafen, Stream usw. ändern den Kanal nicht - ohne I/O beenden
+        if member.bot or before.channel == after.channel: return
+        state = self.get_state(member.guild.id)
+        config = state.config
         trigger_channel_id = config.get('trigger_channel_id')
-        active_channels = guild_data.get('active_channels', {})
 
         # --- KANAL VERLASSEN ---
-        if before.channel and str(before.channel.id) in active_channels:
+        if before.channel and before.channel.id in state.owner_by_channel:
             channel = before.channel
-            owner_id = self.get_owner_id_for_channel(member.guild.id, channel.id)
+            owner_id = state.owner_by_channel.get(channel.id)
             if len(channel.members) == 0:
                 await asyncio.sleep(3)
                 if len(channel.members) == 0:
@@ -296,17 +389,13 @@ class TempChannel(commands.Cog, name="Temp-Channel"):
                 potential_new_owners = sorted([m for m in channel.members if not m.bot], key=lambda m: m.joined_at)
                 if potential_new_owners:
                     new_owner = potential_new_owners[0]
-                    await channel.set_permissions(member, overwrite=None)
-                    await channel.set_permissions(new_owner, overwrite=self.get_owner_overwrites())
+                    await self.transfer_owner_permissions(channel, member, new_owner)
                     await self.set_owner_for_channel(channel, new_owner)
-                    async for msg in channel.history(limit=10):
-                        if msg.author == self.bot.user and msg.embeds:
-                            await msg.edit(embed=create_control_embed(channel, new_owner))
-                            break
+                    await self._update_control_message(channel, new_owner)
 
         # --- KANAL ERSTELLEN ---
         if after.channel and trigger_channel_id and after.channel.id == trigger_channel_id:
-            if any(str(owner_id) == str(member.id) for owner_id in active_channels.values()): return
+            if member.id in state.channel_by_owner: return
             name_format = config.get("channel_name_format", "🔊 {user}'s Raum")
             channel_name = name_format.format(user=member.display_name)
             try:
@@ -321,6 +410,8 @@ class TempChannel(commands.Cog, name="Temp-Channel"):
                 embed = create_control_embed(new_channel, member)
                 # Need to update view with dynamic buttons after it's attached to a message
                 message = await new_channel.send(embed=embed, view=view)
+                state.control_messages[new_channel.id] = message.id
+                self._mark_dirty(member.guild.id)
                 view.message = message 
                 view._update_dynamic_buttons()
                 await message.edit(view=view)
@@ -328,4 +419,4 @@ class TempChannel(commands.Cog, name="Temp-Channel"):
                 print(f"Fehler beim Erstellen von Temp-Channel: {e}")
 
 async def setup(bot):
-    await bot.add_cog(TempChannel(bot))
\ No newline at end of file
+    await bot.add_cog(TempChannel(bot))
@@ -4,14 +4,19 @@ from discord import app_commands, Embed, Color, TextStyle, Interaction, ButtonSt
 import io
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict
+from collections import Counter
+import asyncio
 import json
 import os
 import random
 import string
+from utils import ticket_transcripts
 
 logger = logging.getLogger('TicketSystemCog')
 
+THREAD_ADD_CONCURRENCY = 5  # Gleichzeitige add_user-Aufrufe beim Befüllen des Konsolen-Threads
+
 # --- UI-Komponenten (Views & Modals) ---
 
 class TicketDetailModal(discord.ui.Modal):
@@ -156,9 +161,27 @@ class TicketControlPanelView(discord.ui.View):
     async def add_user(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.send_modal(AddUserToTicketModal(self.cog, self.ticket_id))
 
+class TicketStore:
+    """Tickets einer Guild im Speicher, mit Index der offenen Tickets pro Ersteller."""
+    def __init__(self, tickets: dict):
+        self.tickets = tickets
+        self.open_ids = set()
+        self.open_counts: Counter = Counter()
+        self.reindex()
+
+    def reindex(self):
+        self.open_ids.clear()
+        self.open_counts.clear()
+        for ticket_id_str, ticket_data in self.tickets.items():
+            if ticket_data.get('status') == 'offen':
+                self.open_ids.add(ticket_id_str)
+                self.open_counts[ticket_data.get('ersteller_id')] += 1
+
+
 class TicketSystemCog(commands.Cog, name="Ticket-System"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._stores: Dict[int, TicketStore] = {}
         self.bot.loop.create_task(self.restore_persistent_views())
 
     # --- Data Helpers ---
@@ -168,12 +191,32 @@ class TicketSystemCog(commands.Cog, name="Ticket-System"):
     def _save_ticket_config(self, guild_id: int, data):
         self.bot.data.save_guild_data(guild_id, "ticket_config", data)
 
+    def invalidate_guild_cache(self, guild_id: Optional[int] = None):
+        """Verwirft den Ticket-Index (z.B. nach einer Wiederherstellung)."""
+        if guild_id is None:
+            self._stores.clear()
+        else:
+            self._stores.pop(guild_id, None)
+
+    def _get_store(self, guild_id: int) -> TicketStore:
+        store = self._stores.get(guild_id)
+        if store is None:
+            store = TicketStore(self.bot.data.get_guild_data(guild_id, "tickets"))
+            self._stores[guild_id] = store
+        return store
+
     def _get_tickets_data(self, guild_id: int):
-        return self.bot.data.get_guild_data(guild_id, "tickets")
+        return self._get_store(guild_id).tickets
 
     def _save_tickets_data(self, guild_id: int, data):
+        store = self._get_store(guild_id)
+        store.tickets = data
+        store.reindex()
         self.bot.data.save_guild_data(guild_id, "tickets", data)
 
+    def count_open_tickets(self, guild_id: int, user_id: int) -> int:
+        return self._get_store(guild_id).open_counts.get(user_id, 0)
+
     async def restore_persistent_views(self):
         await self.bot.wait_until_ready()
         
@@ -182,14 +225,15 @@ class TicketSystemCog(commands.Cog, name="Ticket-System"):
             if 'ticket_channel' in config:
                 self.bot.add_view(TicketCreationView(self, guild.id))
 
-            tickets = self._get_tickets_data(guild.id)
-            for ticket_id_str, ticket_data in tickets.items():
-                if ticket_data.get('status') == 'offen':
-                    ticket_id = int(ticket_id_str)
-                    if ticket_data.get('initial_message_id'):
-                        self.bot.add_view(TicketClaimView(self, ticket_id))
-                    if ticket_data.get('control_panel_message_id'):
-                        self.bot.add_view(TicketControlPanelView(self, ticket_id))
+            # Nur offene Tickets aus dem Index, keine erneute Prüfung aller Einträge
+            store = self._get_store(guild.id)
+            for ticket_id_str in store.open_ids:
+                ticket_data = store.tickets[ticket_id_str]
+                ticket_id = int(ticket_id_str)
+                if ticket_data.get('initial_message_id'):
+                    self.bot.add_view(TicketClaimView(self, ticket_id))
+                if ticket_data.get('control_panel_message_id'):
+                    self.bot.add_view(TicketControlPanelView(self, ticket_id))
 
     async def log_action(self, guild: discord.Guild, embed: Embed):
         config = self._get_ticket_config(guild.id)
@@ -214,11 +258,7 @@ class TicketSystemCog(commands.Cog, name="Ticket-System"):
 
         # --- LIMIT PRÜFEN ---
         max_tickets_per_user = config.get('max_tickets_per_user', 1)
-        user_open_tickets = 0
-        for t in tickets.values():
-            if t.get('ersteller_id') == user.id and t.get('status') == 'offen':
-                user_open_tickets += 1
-        if user_open_tickets >= max_tickets_per_user:
+        if self.count_open_tickets(guild.id, user.id) >= max_tickets_per_user:
             await interaction.followup.send(
                 f"Du hast bereits das Maximum von {max_tickets_per_user} offenen Tickets.", ephemeral=True
             )
@@ -287,14 +327,7 @@ class TicketSystemCog(commands.Cog, name="Ticket-System"):
             invitable=False
         )
         # Nur Supporter/Admins zum Thread hinzufügen (NICHT den Ersteller!)
-        try:
-            for role_id in final_role_ids:
-                role = guild.get_role(role_id)
-                if role:
-                    for member in role.members:
-                        await thread.add_user(member)
-        except Exception:
-            pass  # Fehler beim Hinzufügen ignorieren
+        await self.provision_thread_members(thread, guild, final_role_ids, config.get('thread_provisioning', 'add'))
 
         # Control Panel und Claim-Button in den Thread posten
         claim_view = TicketClaimView(self, ticket_channel.id)
@@ -342,6 +375,47 @@ class TicketSystemCog(commands.Cog, name="Ticket-System"):
         except Exception:
             pass  # DM konnte nicht gesendet werden
 
+    async def provision_thread_members(self, thread: discord.Thread, guild: discord.Guild, role_ids: set, mode: str = 'add'):
+        """
+        Fügt die Support-Rollen dem privaten Konsolen-Thread hinzu.
+        'add' (Standard): Einzelne add_user-Aufrufe, begrenzt parallel.
+        'mention': Eine stumme Rollen-Erwähnung fügt alle Rollenmitglieder mit Zugriff in einem Aufruf hinzu.
+            Nur für Rollen, die der Bot erwähnen darf; alle anderen werden einzeln hinzugefügt.
+        """
+        roles = [role for role in (guild.get_role(role_id) for role_id in role_ids) if role]
+        if not roles:
+            return
+
+        if mode == 'mention':
+            # Nicht erwähnbare Rollen würden von Discord stillschweigend ignoriert
+            can_mention_all = guild.me.guild_permissions.mention_everyone
+            mentionable = [role for role in roles if role.mentionable or can_mention_all]
+            if mentionable:
+                try:
+                    msg = await thread.send(
+                        " ".join(role.mention for role in mentionable),
+                        allowed_mentions=discord.AllowedMentions(roles=True, users=False, everyone=False),
+                        silent=True
+                    )
+                    await msg.delete()
+                    roles = [role for role in roles if role not in mentionable]
+                except discord.HTTPException as e:
+                    logger.warning(f"Rollen-Erwähnung im Thread {thread.id} fehlgeschlagen, füge einzeln hinzu: {e}")
+            if not roles:
+                return
+
+        members = {member.id: member for role in roles for member in role.members if not member.bot}
+        semaphore = asyncio.Semaphore(THREAD_ADD_CONCURRENCY)
+
+        async def add(member: discord.Member):
+            async with semaphore:
+                try:
+                    await thread.add_user(member)
+                except discord.HTTPException:
+                    pass  # Fehler beim Hinzufügen ignorieren
+
+        await asyncio.gather(*(add(member) for member in members.values()))
+
     async def claim_ticket_logic(self, interaction: Interaction, ticket_id: int, button: discord.ui.Button):
         await interaction.response.defer()
         guild = interaction.guild
@@ -426,19 +500,22 @@ class TicketSystemCog(commands.Cog, name="Ticket-System"):
         await interaction.response.send_message("Schließe Ticket...", ephemeral=True)
         ticket_channel = interaction.guild.get_channel(ticket_id)
         if isinstance(ticket_channel, TextChannel):
-            transcript_file = await self.create_transcript(ticket_channel)
+            tickets = self._get_tickets_data(interaction.guild.id)
+            ticket_data = tickets.get(str(ticket_id))
+
+            writer = await self.create_transcript(ticket_channel, ticket_data, interaction.user)
             log_embed = Embed(title="Ticket geschlossen", description=f"Ticket {ticket_channel.name} (`{ticket_id}`) wurde von {interaction.user.mention} geschlossen.", color=Color.red())
+            if writer:
+                log_embed.add_field(name="Transkript", value=f"{writer.message_count} Nachrichten, {len(writer.attachments)} Anhänge")
             await self.log_action(interaction.guild, log_embed)
             
             config = self._get_ticket_config(interaction.guild.id)
-            if 'log_channel' in config:
+            if writer and 'log_channel' in config:
                 log_channel = interaction.guild.get_channel(config['log_channel'])
                 if isinstance(log_channel, TextChannel):
-                    await log_channel.send(file=transcript_file)
+                    await self.upload_transcript(log_channel, writer)
             
             # --- USER PER DM BENACHRICHTIGEN ---
-            tickets = self._get_tickets_data(interaction.guild.id)
-            ticket_data = tickets.get(str(ticket_id))
             if ticket_data:
                 ersteller_id = ticket_data.get("ersteller_id")
                 custom_ticket_id = ticket_data.get("custom_ticket_id")
@@ -474,17 +551,59 @@ class TicketSystemCog(commands.Cog, name="Ticket-System"):
                 del tickets[str(ticket_id)]
                 self._save_tickets_data(interaction.guild.id, tickets)
 
-    async def create_transcript(self, channel: TextChannel) -> Optional[discord.File]:
+    async def create_transcript(self, channel: TextChannel, ticket_data: Optional[dict] = None, closed_by: Optional[discord.abc.User] = None) -> Optional[ticket_transcripts.TranscriptWriter]:
+        """
+        Streamt den Verlauf seitenweise in einen inkrementellen Writer (JSONL.gz + HTML)
+        und trägt das Transkript in den durchsuchbaren Index der Guild ein.
+        """
+        try:
+            writer = await asyncio.to_thread(ticket_transcripts.TranscriptWriter, channel.guild.id, channel.id, channel.name)
+        except OSError as e:
+            logger.error(f"Transkript-Dateien für Kanal {channel.id} konnten nicht angelegt werden: {e}")
+            return None
+
         try:
-            messages = []
+            # Serialisiert wird im Loop, komprimiert und geschrieben gebündelt im Thread
+            batch = []
             async for message in channel.history(limit=None, oldest_first=True):
-                messages.append(f"[{message.created_at.strftime('%Y-%m-%d %H:%M:%S')}] {message.author.name}: {message.content}")
-            transcript_content = "\n".join(messages)
-            return discord.File(io.BytesIO(transcript_content.encode('utf-8')), filename=f"transcript-{channel.name}.txt")
+                batch.append(ticket_transcripts.serialize_message(message))
+                if len(batch) >= ticket_transcripts.WRITE_BATCH_SIZE:
+                    await asyncio.to_thread(writer.write_entries, batch)
+                    batch = []
+            if batch:
+                await asyncio.to_thread(writer.write_entries, batch)
+            await asyncio.to_thread(writer.close)
         except Exception as e:
             logger.error(f"Fehler bei der Transkripterstellung für Kanal {channel.id}: {e}")
+            await asyncio.to_thread(writer.abort)
             return None
 
+        ticket_data = ticket_data or {}
+        ticket_transcripts.add_to_index(self.bot.data, channel.guild.id, writer.index_entry(
+            custom_ticket_id=ticket_data.get('custom_ticket_id'),
+            reason=ticket_data.get('reason'),
+            ersteller_id=ticket_data.get('ersteller_id'),
+            bearbeiter_id=ticket_data.get('bearbeiter_id'),
+            closed_by_id=closed_by.id if closed_by else None,
+        ))
+        return writer
+
+    async def upload_transcript(self, log_channel: TextChannel, writer: ticket_transcripts.TranscriptWriter):
+        """Lädt das Transkript in Teilen hoch, die unter dem Upload-Limit des Servers liegen."""
+        chunk_size = max(log_channel.guild.filesize_limit - 512 * 1024, 1024 * 1024)
+        for path, label in ((writer.html_path, "html"), (writer.jsonl_path, "jsonl.gz")):
+            if not os.path.exists(path):
+                continue
+            parts = max(1, -(-os.path.getsize(path) // chunk_size))
+            for part, chunk in ticket_transcripts.iter_file_chunks(path, chunk_size):
+                suffix = f".part{part}" if parts > 1 else ""
+                filename = f"transcript-{writer.title}.{label}{suffix}"
+                try:
+                    await log_channel.send(file=discord.File(io.BytesIO(chunk), filename=filename))
+                except discord.HTTPException as e:
+                    logger.error(f"Transkript-Upload fehlgeschlagen ({filename}): {e}")
+                    return
+
     async def update_ticket_creation_panel(self, guild):
         config = self._get_ticket_config(guild.id)
         ticket_channel_id = config.get('ticket_channel')
@@ -1,55 +1,61 @@
 import discord
 from discord.ext import commands, tasks
 import json
-import random
 from datetime import datetime, timezone, timedelta
 import os
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Set, Tuple, List
+from utils.wordle_dictionary import WordleDictionary
 
 class WordleCog(commands.Cog, name="Wordle"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        # Eine Auswahl an deutschen 5-Buchstaben-Wörtern
-        self.words = [
-            "APFEL", "BIRNE", "STERN", "STURM", "RADIO", "TISCH", "STUHL", "LAMPE", "FEUER", "WASSER",
-            "PFUND", "STADT", "LANDS", "TRAUM", "GLÜCK", "ABEND", "MUSIK", "SPORT", "WAGEN", "BLUME",
-            "REISE", "PREIS", "STROM", "DRAHT", "KRAFT", "KLEID", "GLAST", "BLATT", "WOLKE", "REGEN",
-            "SONNE", "MONAT", "JAHRE", "GRUSS", "BRIEF", "MARKT", "KUNST", "SPIEL", "TRAIN", "VOGEL"
-        ]
+        # Wortliste einmalig laden (data/wordle/guesses.txt und answers.txt)
+        self.dictionary = WordleDictionary()
+        self._configs: Dict[int, dict] = {}
+        self._dirty_guilds: Set[int] = set()
+        self.flush_loop.start()
+
+    def cog_unload(self):
+        self.flush_loop.cancel()
+        self.flush()
         
     def get_wordle_config(self, guild_id: int):
-        return self.bot.data.get_guild_data(guild_id, "wordle_game") or {}
+        config = self._configs.get(guild_id)
+        if config is None:
+            config = self.bot.data.get_guild_data(guild_id, "wordle_game") or {}
+            self._configs[guild_id] = config
+        return config
 
     def save_wordle_config(self, guild_id: int, data: dict):
+        self._configs[guild_id] = data
+        self._dirty_guilds.discard(guild_id)
         self.bot.data.save_guild_data(guild_id, "wordle_game", data)
 
+    def flush(self):
+        """Schreibt den Spielstand aller geänderten Guilds auf die Festplatte."""
+        dirty, self._dirty_guilds = self._dirty_guilds, set()
+        for guild_id in dirty:
+            config = self._configs.get(guild_id)
+            if config is not None:
+                self.bot.data.save_guild_data(guild_id, "wordle_game", config)
+
+    def invalidate_guild_cache(self, guild_id: Optional[int] = None):
+        """Verwirft den Spielstand im Speicher ohne zu speichern (z.B. nach einer Wiederherstellung)."""
+        if guild_id is None:
+            self._configs.clear()
+            self._dirty_guilds.clear()
+        else:
+            self._configs.pop(guild_id, None)
+            self._dirty_guilds.discard(guild_id)
+
+    @tasks.loop(seconds=10)
+    async def flush_loop(self):
+        if self._dirty_guilds:
+            self.flush()
+
     def _get_daily_word(self):
         # Seed basiert auf dem heutigen Datum
-        seed = datetime.now(timezone.utc).strftime("%Y%m%d")
-        random.seed(seed)
-        return random.choice(self.words).upper()
-
-    def _get_status_emoji(self, guess: str, target: str) -> str:
-        result = []
-        target_list = list(target)
-        guess_list = list(guess)
-        res = ["⬛"] * 5
-        
-        # Erst volle Treffer (Grün)
-        for i in range(5):
-            if guess_list[i] == target_list[i]:
-                res[i] = "🟩"
-                target_list[i] = None
-                guess_list[i] = None
-        
-        # Dann Teil-Treffer (Gelb)
-        for i in range(5):
-            if guess_list[i] is not None:
-                if guess_list[i] in target_list:
-                    res[i] = "🟨"
-                    target_list[target_list.index(guess_list[i])] = None
-                    
-        return "".join(res)
+        return self.dictionary.daily_word(datetime.now(timezone.utc).strftime("%Y%m%d"))
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -66,6 +72,12 @@ class WordleCog(commands.Cog, name="Wordle"):
         if len(content) != 5 or not content.isalpha():
             return
 
+        if not self.dictionary.is_allowed(content):
+            try: await message.delete()
+            except: pass
+            await message.channel.send(f"❌ {message.author.mention}, **{content}** steht nicht im Wörterbuch!", delete_after=5)
+            return
+
         # Game-Status laden
         today_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
         game_state = config.get("game_state", {})
@@ -109,7 +121,7 @@ class WordleCog(commands.Cog, name="Wordle"):
         except: pass
 
         target = game_state["target"]
-        emoji_res = self._get_status_emoji(content, target)
+        emoji_res = self.dictionary.score(content, target)
         
         game_state["guesses"].append({
             "user_id": user_id,
@@ -149,9 +161,9 @@ class WordleCog(commands.Cog, name="Wordle"):
             new_msg = await message.channel.send(embed=embed)
             game_state["last_msg_id"] = new_msg.id
         
-        # Speichern
+        # Speichern (verzögert über flush_loop)
         config["game_state"] = game_state
-        self.save_wordle_config(message.guild.id, config)
+        self._dirty_guilds.add(message.guild.id)
 
     # Web-API Methoden
     async def web_set_config(self, guild_id: int, channel_id: Optional[int]) -> Tuple[bool, str]:
@@ -1,11 +1,16 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import datetime
 import typing
 import secrets
 import time
+from utils.wrapped_store import WrappedStore
+
+# So oft werden die gepufferten Zähler nach wrapped.db geschrieben (Sekunden)
+WRAPPED_FLUSH_INTERVAL = 30
 
 class WrappedView(discord.ui.View):
     def __init__(self, bot: commands.Bot, label="Mein Wrapped anzeigen"):
@@ -62,22 +67,42 @@ class WrappedCog(commands.Cog, name="Wrapped"):
     Funktionen müssen von einem Admin aktiviert werden.
     Unterscheidet zwischen "Datensammlung aktiv" und "Benutzer-Befehle aktiv".
     Features:
-    - Live Tracking (Nachrichten, Voice)
+    - Live Tracking (Nachrichten, Voice), gepuffert in WrappedStore (wrapped.db)
     - Snapshot System: Admins erstellen einen statischen Snapshot für den Jahresrückblick.
     """
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         # Temporärer Speicher für Voice-Join-Zeiten: {guild_id: {user_id: timestamp}}
         self.voice_sessions = {}
+        self.store = WrappedStore(self.bot.data)
         # View registrieren für Persistenz
         self.bot.add_view(WrappedView(self.bot))
+        self.flush_loop.start()
+
+    def cog_unload(self):
+        # Läuft auch bei bot.close(): gepufferte Zähler nicht verlieren
+        self.flush_loop.cancel()
+        self.store.flush()
+        self.store.close()
+
+    def invalidate_guild_cache(self, guild_id: typing.Optional[int] = None):
+        """Schließt wrapped.db (z.B. nach einer Wiederherstellung); beim nächsten Zugriff wird neu geöffnet."""
+        self.store.close(guild_id)
+
+    @tasks.loop(seconds=WRAPPED_FLUSH_INTERVAL)
+    async def flush_loop(self):
+        await asyncio.to_thread(self.store.flush)
+
+    @flush_loop.before_loop
+    async def before_flush_loop(self):
+        await self.bot.wait_until_ready()
 
     def _get_live_data(self, guild_id: int, year: int) -> dict:
-        """Hole die aktuell laufenden (live) Daten."""
+        """Hole die Jahresdatei (enthält nur noch die Config, die Zähler liegen in wrapped.db)."""
         return self.bot.data.get_guild_data(guild_id, f"wrapped_{year}")
 
     def _save_live_data(self, guild_id: int, year: int, data: dict):
-        """Speichere die live Daten."""
+        """Speichere die Jahresdatei."""
         self.bot.data.save_guild_data(guild_id, f"wrapped_{year}", data)
 
     def _get_snapshot_data(self, guild_id: int, year: int) -> dict:
@@ -116,26 +141,6 @@ class WrappedCog(commands.Cog, name="Wrapped"):
         if self.qualified_name not in server_config.get('enabled_cogs', []):
             return
 
-        year = datetime.datetime.now().year
-        data = self._get_live_data(message.guild.id, year)
-
-        # 1. Server Stats
-        server_stats = data.setdefault("server", {
-            "total_messages": 0,
-            "top_emojis": {},
-            "active_channels": {},
-            "total_voice_minutes": 0
-        })
-        server_stats.setdefault("total_messages", 0)
-        server_stats.setdefault("top_emojis", {})
-        server_stats.setdefault("active_channels", {})
-        server_stats.setdefault("total_voice_minutes", 0)
-
-        server_stats["total_messages"] += 1
-
-        cid = str(message.channel.id)
-        server_stats["active_channels"][cid] = server_stats["active_channels"].get(cid, 0) + 1
-
         import re
         import emoji as emoji_lib
         
@@ -154,38 +159,12 @@ class WrappedCog(commands.Cog, name="Wrapped"):
                 all_emojis.append(f"unicode:{ue}")
         except Exception:
             pass  # Falls emoji-Bibliothek fehlt oder Fehler
-        
-        # Server-Stats aktualisieren
-        for emoji_key in all_emojis:
-            server_stats["top_emojis"][emoji_key] = server_stats["top_emojis"].get(emoji_key, 0) + 1
-
-        # 2. User Stats
-        user_stats = data.setdefault("users", {})
-        uid = str(message.author.id)
-        u_data = user_stats.setdefault(uid, {
-            "total_messages": 0,
-            "top_channel": {},
-            "top_emojis": {},
-            "voice_minutes": 0,
-            "top_voice_channel": {}
-        })
-        u_data.setdefault("total_messages", 0)
-        u_data.setdefault("top_channel", {})
-        u_data.setdefault("top_emojis", {})
-        u_data.setdefault("voice_minutes", 0)
-        u_data.setdefault("top_voice_channel", {})
-
-        u_data["total_messages"] += 1
-        u_data["top_channel"][cid] = u_data["top_channel"].get(cid, 0) + 1
 
-        # User-Emoji-Stats aktualisieren
-        for emoji_key in all_emojis:
-            u_data["top_emojis"][emoji_key] = u_data["top_emojis"].get(emoji_key, 0) + 1
+        # Server- und User-Stats (Nachrichten, Kanal, Emojis) in einem Schritt
+        year = datetime.datetime.now().year
+        self.store.add_message(message.guild.id, year, message.author.id, message.channel.id, all_emojis)
 
-        # 3. Interaction Tracking (für Best Buddy)
-        # Initialisiere interactions dict wenn nicht vorhanden
-        u_data.setdefault("interactions", {})
-        
+        # Interaction Tracking (für Best Buddy)
         # Wenn die Nachricht eine Antwort ist, tracke die Interaktion
         if message.reference and message.reference.message_id:
             try:
@@ -196,8 +175,6 @@ class WrappedCog(commands.Cog, name="Wrapped"):
                     self._track_interaction(message.guild.id, message.author.id, ref_message.author.id, weight=3)
             except Exception:
                 pass
-
-        self._save_live_data(message.guild.id, year, data)
     
     @commands.Cog.listener()
     async def on_reaction_add(self, reaction: discord.Reaction, user: discord.User):
@@ -244,21 +221,9 @@ class WrappedCog(commands.Cog, name="Wrapped"):
                 del self.voice_sessions[guild_id][member.id]
 
     def _track_interaction(self, guild_id: int, user_id: int, other_user_id: int, weight: int = 1):
-        """Helper to track interactions between two users."""
+        """Helper to track interactions between two users (Top-K-Sketch im WrappedStore)."""
         year = datetime.datetime.now().year
-        data = self._get_live_data(guild_id, year)
-        
-        user_stats = data.setdefault("users", {})
-        uid = str(user_id)
-        u_data = user_stats.setdefault(uid, {}) # Ensure dict exists
-
-        # Ensure all keys exist (safe init)
-        if "interactions" not in u_data: u_data["interactions"] = {}
-        
-        other_uid = str(other_user_id)
-        u_data["interactions"][other_uid] = u_data["interactions"].get(other_uid, 0) + weight
-        
-        self._save_live_data(guild_id, year, data)
+        self.store.add_interaction(guild_id, year, user_id, other_user_id, weight)
 
     def _finalize_voice_session(self, member: discord.Member, channel: discord.VoiceChannel, end_time: datetime.datetime):
         guild_id = member.guild.id
@@ -270,41 +235,12 @@ class WrappedCog(commands.Cog, name="Wrapped"):
             
             if duration_minutes > 0:
                 year = datetime.datetime.now().year
-                data = self._get_live_data(guild_id, year)
-                
-                server_stats = data.setdefault("server", {})
-                server_stats["total_voice_minutes"] = server_stats.get("total_voice_minutes", 0) + duration_minutes
-                
-                user_stats = data.setdefault("users", {})
-                uid = str(member.id)
-                u_data = user_stats.setdefault(uid, {
-                    "total_messages": 0, "top_channel": {}, "top_emojis": {}, 
-                    "voice_minutes": 0, "top_voice_channel": {}
-                })
-                
-                u_data["voice_minutes"] = u_data.get("voice_minutes", 0) + duration_minutes
-                
-                chan_id_str = str(channel.id)
-                u_data.setdefault("top_voice_channel", {})
-                u_data["top_voice_channel"][chan_id_str] = u_data["top_voice_channel"].get(chan_id_str, 0) + duration_minutes
-
-                self._save_live_data(guild_id, year, data)
+                self.store.add_voice(guild_id, year, member.id, channel.id, duration_minutes)
 
     def register_ticket_processed(self, guild_id: int, user_id: int):
         """Registriert ein bearbeitetes Ticket für den User (für Wrapped)."""
         year = datetime.datetime.now().year
-        data = self._get_live_data(guild_id, year)
-        
-        user_stats = data.setdefault("users", {})
-        uid = str(user_id)
-        u_data = user_stats.setdefault(uid, {
-            "total_messages": 0, "top_channel": {}, "top_emojis": {}, 
-            "voice_minutes": 0, "top_voice_channel": {}, "interactions": {},
-            "tickets_processed": 0
-        })
-        
-        u_data["tickets_processed"] = u_data.get("tickets_processed", 0) + 1
-        self._save_live_data(guild_id, year, data)
+        self.store.add_ticket(guild_id, year, user_id)
 
     # --- DISPLAY LOGIC (SNAPSHOT BASED) ---
 
@@ -505,20 +441,14 @@ class WrappedCog(commands.Cog, name="Wrapped"):
     async def web_get_live_stats(self, guild_id: int) -> dict:
         """Gibt aktuelle Live-Stats zurück."""
         year = datetime.datetime.now().year
-        data = self._get_live_data(guild_id, year)
-        return data.get("server", {}) if data else {}
+        return await asyncio.to_thread(self.store.server_stats, guild_id, year)
 
     async def web_create_snapshot(self, guild_id: int) -> tuple:
-        """Erstellt eine Kopie der Live-Daten als Snapshot."""
+        """Erstellt aus dem aktuellen Stand in wrapped.db einen Snapshot (bisheriges JSON-Format)."""
         year = datetime.datetime.now().year
-        live_data = self._get_live_data(guild_id, year)
-        
-        if not live_data:
-            # Init empty data if nothing exists yet
-            live_data = {"server": {}, "users": {}}
+        snapshot_data = await asyncio.to_thread(self.store.build_document, guild_id, year)
         
         # Add Snapshot Timestamp
-        snapshot_data = live_data.copy()
         snapshot_data["snapshot_date"] = datetime.datetime.now().strftime("%d.%m.%Y %H:%M")
         
         self._save_snapshot_data(guild_id, year, snapshot_data)
@@ -1,15 +1,16 @@
 import discord
 from discord.ext import commands, tasks
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, session
 from markupsafe import Markup
 import datetime
 from flask_discord import DiscordOAuth2Session, requires_authorization, Unauthorized
 import random
 from flask_cors import CORS
 import json
+import io
 import os
 import sys
-import asyncio
+import concurrent.futures
 import threading
 import subprocess
 from werkzeug.middleware.proxy_fix import ProxyFix
@@ -52,6 +53,15 @@ if not check_config_exists():
 
 
 from utils.data_manager import DataManager
+from utils.global_ban_registry import GlobalBanRegistry
+from utils.leaderboard_service import LeaderboardService, board_title
+from utils.session_cache import SessionCache, SESSION_CACHE_MIN_REFRESH
+from utils.async_bridge import AsyncBridge, BridgeBusyError
+from utils.guild_snapshot import SnapshotStore
+from utils import ticket_transcripts
+from utils.backup_engine import MANIFEST_FILENAME as BACKUP_MANIFEST_FILENAME, BACKUP_STORE_DIR_NAME
+from utils.log_storage import LogStorage, LOGS_DELTA_FILENAME
+from utils import restore_engine
 
 # --- BOT-SETUP ---
 # Initialisiere DataManager
@@ -73,6 +83,12 @@ bot = commands.Bot(command_prefix=get_prefix, intents=intents, help_command=None
 # Binde DataManager an den Bot
 bot.config = config
 bot.data = data_manager
+bot.global_bans = GlobalBanRegistry()
+bot.leaderboards = LeaderboardService(data_manager)
+# Versionierte Guild-Stände für lesende Dashboard-Routen (geschrieben vom State-Snapshot-Cog)
+bot.snapshots = SnapshotStore()
+# Alle Aufrufe aus dem Webserver in den Bot-Loop (Timeout + Backpressure)
+bot_bridge = AsyncBridge(lambda: bot.loop)
 
 # Bestimme Basis-URL für Bilder und Web-Links
 # Priorität: WEB_BASE_URL aus config.json > DISCORD_REDIRECT_URI > localhost
@@ -102,7 +118,18 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
 app.secret_key = config.get("SECRET_KEY", "dev_secret_key_123456789")
 
 # <-- HIER CORS HINZUFÜGEN:
-CORS(app, resources={r"/bot_status": {"origins": "*"}}) 
+CORS(app, resources={r"/bot_status": {"origins": "*"}, r"/health": {"origins": "*"}}) 
+
+# Produktiv-Webserver (optional): waitress mit Thread-Pool, sonst Flask-Entwicklungsserver
+try:
+    from waitress import serve as waitress_serve
+except ImportError:
+    waitress_serve = None
+
+DEFAULT_WEB_THREADS = 8
+WEB_PORT = 5000
+WEB_THREADS = int(config.get("WEB_THREADS") or DEFAULT_WEB_THREADS)
+WEB_SERVER_MODE = "waitress" if str(config.get("WEB_SERVER") or "waitress").lower() == "waitress" and waitress_serve else "flask"
 
 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "true"
 app.config["DISCORD_CLIENT_ID"] = config.get("DISCORD_CLIENT_ID")
@@ -139,16 +166,45 @@ print(f"DEBUG: Secret key length: {len(app.secret_key)} characters")
 # Ändere die Initialisierung, damit es keine Namenskollision gibt
 discord_session = DiscordOAuth2Session(app)
 
+# Profil und Serverliste werden pro Login serverseitig gecacht, statt bei jedem
+# Template und jeder Berechtigungsprüfung Discord zu fragen
+oauth_cache = SessionCache()
+OAUTH_CACHE_SESSION_KEY = "_oauth_cache_id"
+
+def get_oauth_entry(refresh=False):
+    """Gecachte OAuth-Daten des aktuellen Logins, bei Bedarf (TTL, refresh) neu von Discord geladen."""
+    if not discord_session.authorized:
+        return None
+    cache_id = session.get(OAUTH_CACHE_SESSION_KEY)
+    entry = None if refresh else oauth_cache.get(cache_id)
+    if entry is None:
+        if not cache_id:
+            cache_id = oauth_cache.new_id()
+            session[OAUTH_CACHE_SESSION_KEY] = cache_id
+        entry = oauth_cache.load(cache_id, discord_session.fetch_user, discord_session.fetch_guilds)
+    return entry
+
+def is_bot_owner():
+    """Ob der eingeloggte Discord-User Besitzer der Bot-Anwendung ist (für botweite Aktionen)."""
+    entry = get_oauth_entry()
+    if not entry:
+        return False
+    return bot_bridge.call(bot.is_owner(discord.Object(id=entry.user.id)))
+
+def reset_oauth_cache():
+    """Verwirft den Cache-Eintrag des aktuellen Logins (Login, Logout)."""
+    oauth_cache.discard(session.pop(OAUTH_CACHE_SESSION_KEY, None))
+
 @app.context_processor
 def inject_user_and_auth():
     user = None
-    if discord_session.authorized:
-        try: user = discord_session.fetch_user()
-        except Exception: pass
+    try:
+        entry = get_oauth_entry()
+        if entry: user = entry.user
+    except Exception: pass
     return dict(user=user, discord_auth=discord_session)
 
 # --- MAINTENANCE & DATA ROUTES ---
-import shutil
 import zipfile
 from utils.migrate import process_migration_data
 from flask import send_from_directory
@@ -171,7 +227,7 @@ def serve_guild_offline_image(guild_id, streamer_key):
 @requires_authorization
 def admin_maintenance():
     if not discord_session.authorized: return redirect(url_for('login'))
-    user_id = discord_session.fetch_user().id
+    user_id = get_oauth_entry().user.id
     # Prüfe, ob der User ein Bot-Owner ist (optional, hier prüfen wir erstmal ob er Admin auf IRGENDEINEM Server ist, oder man macht eine harte ID-Prüfung)
     # Für L8teBot nehmen wir an, wer Zugriff aufs Dashboard hat (Admins), darf evtl. seine eigenen Serverdaten nicht komplett kaputt machen.
     # ABER: Backup/Restore ist global für den Bot -> Das sollte NUR der BOt-Betreiber dürfen.
@@ -189,127 +245,106 @@ def download_backup():
         flash("Data-Verzeichnis existiert nicht!", "danger")
         return redirect(url_for('admin_maintenance'))
 
-    # Zip erstellen - packe den INHALT von data/, nicht data/ selbst
+    # Zip erstellen - packe den INHALT von data/, nicht data/ selbst. Der Blockspeicher der
+    # Server-Backups bleibt draußen, ebenso Reste abgebrochener Wiederherstellungen
     backup_path = 'backup_data'
-    shutil.make_archive(backup_path, 'zip', root_dir=data_dir, base_dir='.')
+    skip_dirs = {BACKUP_STORE_DIR_NAME}
+    with zipfile.ZipFile(f'{backup_path}.zip', 'w', zipfile.ZIP_DEFLATED) as archive:
+        for root, dirs, files in os.walk(data_dir):
+            if root == data_dir:
+                dirs[:] = [d for d in dirs if d not in skip_dirs
+                           and not d.startswith((restore_engine.STAGING_PREFIX, restore_engine.TRASH_PREFIX))]
+            for name in files:
+                path = os.path.join(root, name)
+                archive.write(path, os.path.relpath(path, data_dir))
     
     # Datei senden
     return send_file(f'{backup_path}.zip', as_attachment=True, download_name=f"L8teBot_Backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.zip")
 
+def _invalidate_cog_caches(guild_id=None):
+    """Verwirft die In-Memory-Zustände aller Cogs für eine Guild (None = alle)."""
+    bot.leaderboards.invalidate(guild_id)
+    for cog in bot.cogs.values():
+        if hasattr(cog, 'invalidate_guild_cache'):
+            try:
+                cog.invalidate_guild_cache(guild_id)
+            except Exception as e:
+                print(f"[BACKUP RESTORE] Fehler beim Neuladen von {cog.qualified_name}: {e}")
+
+async def _swap_restored_data(swap, guild_id=None):
+    """
+    Läuft im Bot-Loop, damit zwischen Verzeichnistausch und Cache-Reset kein Cog alte Daten zurückschreibt.
+    SQLite-Verbindungen werden vorher geschlossen und danach neu geöffnet.
+    """
+    logging_cog = bot.get_cog('Logging')
+    writer_paused = False
+
+    def close_log_connections():
+        if guild_id is None:
+            logging_cog.log_storage.close_all_connections()
+        else:
+            logging_cog.log_storage.close_connection(guild_id)
+
+    if logging_cog:
+        # Der Writer-Thread würde logs.db sonst vor dem Tausch wieder öffnen und in die alte Datei schreiben
+        writer_paused = logging_cog.log_writer.pause()
+        close_log_connections()
+    try:
+        wrapped_cog = bot.get_cog('Wrapped')
+        if wrapped_cog:
+            # Gepufferte Zähler noch in die alte wrapped.db schreiben, sonst landen sie in der wiederhergestellten
+            wrapped_cog.store.flush(guild_id)
+            wrapped_cog.store.close(guild_id)
+        if guild_id is None:
+            bot.global_bans.close()
+        return swap()
+    finally:
+        if logging_cog:
+            # Zwischendurch (z.B. von Flask) geöffnete Verbindungen zeigen noch auf die alte logs.db
+            close_log_connections()
+            if writer_paused:
+                logging_cog.log_writer.resume()
+        if guild_id is None:
+            bot.global_bans = GlobalBanRegistry()
+        _invalidate_cog_caches(guild_id)
+
 @app.route('/admin/backup/upload', methods=['POST'])
 @requires_authorization
 def upload_backup():
     if 'backup_file' not in request.files:
         flash('Keine Datei ausgewählt', 'danger')
         return redirect(url_for('admin_maintenance'))
-    
+
     file = request.files['backup_file']
     if file.filename == '':
         flash('Keine Datei ausgewählt', 'danger')
         return redirect(url_for('admin_maintenance'))
-
-    if file and file.filename.endswith('.zip'):
-        # Speichern und entpacken
-        zip_path = os.path.join(os.getcwd(), 'uploaded_backup.zip')
-        file.save(zip_path)
-        
-        data_dir = os.path.join(os.getcwd(), DATA_DIR_NAME)
-        temp_extract_dir = os.path.join(os.getcwd(), 'temp_backup_extract')
-        
-        try:
-            print(f"[BACKUP RESTORE] Starting restore process...")
-            print(f"[BACKUP RESTORE] Data directory: {data_dir}")
-            
-            # Erstelle temporäres Verzeichnis
-            os.makedirs(temp_extract_dir, exist_ok=True)
-            
-            # Entpacke in temporäres Verzeichnis
-            print(f"[BACKUP RESTORE] Extracting backup...")
-            shutil.unpack_archive(zip_path, temp_extract_dir)
-            
-            # Prüfe ob ein 'data' Unterordner existiert (vom Backup-Tool)
-            extracted_data_dir = os.path.join(temp_extract_dir, 'data')
-            if os.path.exists(extracted_data_dir):
-                # Backup enthält 'data/' Ordner - kopiere Inhalt
-                source_dir = extracted_data_dir
-                print(f"[BACKUP RESTORE] Backup contains 'data' folder")
-            else:
-                # Backup ist direkt der Inhalt - nutze temp Verzeichnis
-                source_dir = temp_extract_dir
-                print(f"[BACKUP RESTORE] Backup is direct content")
-            
-            # Lösche alten Inhalt (außer config.json zur Sicherheit)
-            print(f"[BACKUP RESTORE] Removing old data...")
-            for item in os.listdir(data_dir):
-                if item == 'config.json':
-                    print(f"[BACKUP RESTORE] Keeping config.json")
-                    continue
-                item_path = os.path.join(data_dir, item)
-                try:
-                    if os.path.isdir(item_path):
-                        print(f"[BACKUP RESTORE] Removing directory: {item}")
-                        shutil.rmtree(item_path)
-                    else:
-                        print(f"[BACKUP RESTORE] Removing file: {item}")
-                        os.remove(item_path)
-                except Exception as e:
-                    print(f"[BACKUP RESTORE] Error removing {item}: {e}")
-            
-            # Kopiere neue Daten
-            print(f"[BACKUP RESTORE] Copying new data from {source_dir}...")
-            items_copied = 0
-            for item in os.listdir(source_dir):
-                s = os.path.join(source_dir, item)
-                d = os.path.join(data_dir, item)
-                try:
-                    if os.path.isdir(s):
-                        print(f"[BACKUP RESTORE] Copying directory: {item}")
-                        if os.path.exists(d):
-                            shutil.rmtree(d)
-                        shutil.copytree(s, d)
-                    else:
-                        if item == 'config.json':
-                            print(f"[BACKUP RESTORE] Skipping config.json from backup")
-                            continue
-                        print(f"[BACKUP RESTORE] Copying file: {item}")
-                        shutil.copy2(s, d)
-                    items_copied += 1
-                except Exception as e:
-                    print(f"[BACKUP RESTORE] Error copying {item}: {e}")
-            
-            print(f"[BACKUP RESTORE] Copied {items_copied} items")
-            
-            # Force filesystem sync
-            print(f"[BACKUP RESTORE] Syncing filesystem...")
-            try:
-                if hasattr(os, 'sync'):
-                    os.sync()
-            except:
-                pass
-            
-            flash(f'Backup erfolgreich wiederhergestellt! ({items_copied} Elemente kopiert) Der Bot wird neu gestartet...', 'success')
-            
-            # Trigger restart nach kurzer Verzögerung
-            def restart_bot():
-                time.sleep(3)  # Längere Wartezeit für Filesystem-Sync
-                print("[BACKUP RESTORE] Restarting bot...")
-                os._exit(0)
-            threading.Thread(target=restart_bot).start()
-            
-        except Exception as e:
-            print(f"[BACKUP RESTORE] ERROR: {e}")
-            import traceback
-            traceback.print_exc()
-            flash(f'Fehler beim Entpacken: {e}', 'danger')
-        finally:
-            # Aufräumen
-            print(f"[BACKUP RESTORE] Cleaning up...")
-            if os.path.exists(zip_path):
-                os.remove(zip_path)
-            if os.path.exists(temp_extract_dir):
-                shutil.rmtree(temp_extract_dir)
-    else:
+    if not file.filename.endswith('.zip'):
         flash('Bitte eine .zip Datei hochladen', 'danger')
+        return redirect(url_for('admin_maintenance'))
+
+    staging_dir = None
+    old_data_dir = None
+    try:
+        print("[BACKUP RESTORE] Starting restore process...")
+        # Direkt aus dem Upload-Stream neben die Live-Daten entpacken (config.json bleibt immer erhalten)
+        staging_dir = restore_engine.new_staging_dir(DATA_DIR, "data")
+        # Der Blockspeicher der Server-Backups ist nicht Teil des Downloads und bleibt beim Restore erhalten
+        keep = {'config.json', BACKUP_STORE_DIR_NAME}
+        restored = restore_engine.stage_archive(file.stream, staging_dir, skip=keep)
+
+        # data/ ist ein Volume und kann nicht umbenannt werden: Einträge einzeln austauschen
+        old_data_dir = bot_bridge.call(_swap_restored_data(
+            lambda: restore_engine.swap_children(staging_dir, DATA_DIR, keep=keep)
+        ))
+        print(f"[BACKUP RESTORE] Restored {len(restored)} files")
+        flash(f'Backup erfolgreich wiederhergestellt! ({len(restored)} Dateien übernommen)', 'success')
+    except (restore_engine.RestoreError, OSError) as e:
+        print(f"[BACKUP RESTORE] ERROR: {e}")
+        flash(f'Fehler bei der Wiederherstellung: {e}', 'danger')
+    finally:
+        restore_engine.remove_tree(staging_dir)
+        restore_engine.remove_tree(old_data_dir)
 
     return redirect(url_for('admin_maintenance'))
 
@@ -331,6 +366,8 @@ def import_legacy_data():
         try:
             content = json.load(file)
             count = process_migration_data(module_name, content, save_callback=bot.data.save_guild_data)
+            # Importierte Daten sofort sichtbar machen
+            bot.loop.call_soon_threadsafe(_invalidate_cog_caches)
             flash(f'Import erfolgreich! {count} Einträge verarbeitet für Modul {module_name}.', 'success')
         except Exception as e:
             flash(f'Fehler beim Import: {e}', 'danger')
@@ -338,6 +375,52 @@ def import_legacy_data():
     return redirect(url_for('admin_maintenance'))
 
 
+@app.route('/admin/global_bans/export')
+@requires_authorization
+def export_global_bans():
+    if not is_bot_owner():
+        flash('Nur der Bot-Betreiber darf die globale Bannliste exportieren.', 'danger')
+        return redirect(url_for('admin_maintenance'))
+    entries = bot.global_bans.export()
+    payload = json.dumps(entries, ensure_ascii=False, indent=2).encode('utf-8')
+    return send_file(
+        io.BytesIO(payload),
+        mimetype='application/json',
+        as_attachment=True,
+        download_name=f"L8teBot_GlobalBans_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+
+@app.route('/admin/global_bans/import', methods=['POST'])
+@requires_authorization
+def import_global_bans():
+    if not is_bot_owner():
+        flash('Nur der Bot-Betreiber darf die globale Bannliste importieren.', 'danger')
+        return redirect(url_for('admin_maintenance'))
+    file = request.files.get('global_bans_file')
+    if not file or file.filename == '':
+        flash('Keine Datei ausgewählt', 'danger')
+        return redirect(url_for('admin_maintenance'))
+
+    try:
+        content = json.load(file)
+        if isinstance(content, dict):
+            content = content.get('bans', [])
+        entries = [{'user_id': e} if not isinstance(e, dict) else e for e in content]
+        # Herkunft nicht aus der Datei übernehmen, sonst ließe sich die Unban-Beschränkung
+        # auf Quell-Server umgehen: Importe gehören dem Bot-Betreiber
+        owner = get_oauth_entry().user
+        for entry in entries:
+            entry['source_guild_id'] = None
+            entry['source_guild_name'] = 'Import'
+            entry['banned_by'] = owner.name
+        count = bot.global_bans.bulk_import(entries)
+        flash(f'{count} Einträge in die globale Bannliste importiert.', 'success')
+    except Exception as e:
+        flash(f'Fehler beim Import: {e}', 'danger')
+
+    return redirect(url_for('admin_maintenance'))
+
+
 MANAGEABLE_COGS = ["Geburtstage", "Zählen", "Level-System", "Moderation", "Twitch", "Twitch-Live-Alert", "Ticket-System", "Temp-Channel", "Twitch-Clips", "Streak", "Gatekeeper", "Guard", "Global-Ban", "Wrapped", "LFG", "Mitspieler-Suche", "Wordle", "Contexto", "Backup", "Onboarding", "Logging", "Dashboard"]
 
 # (Existing get_admin_guilds and check_guild_permissions are slightly below)
@@ -345,23 +428,37 @@ MANAGEABLE_COGS = ["Geburtstage", "Zählen", "Level-System", "Moderation", "Twit
 # (Existing get_admin_guilds and check_guild_permissions are slightly below)
 
 def get_admin_guilds():
-    if not discord_session.authorized: return []
     try:
-        user_guilds = discord_session.fetch_guilds()
-        return sorted([g for g in user_guilds if g.permissions.administrator and bot.get_guild(g.id)], key=lambda g: g.name)
+        entry = get_oauth_entry()
+        if not entry: return []
+        return sorted([g for g in entry.guilds if g.id in entry.admin_guild_ids and bot.get_guild(g.id)], key=lambda g: g.name)
     except Exception:
         return []
 
 def check_guild_permissions(guild_id):
     try:
-        user_guilds = discord_session.fetch_guilds()
-        guild = next((g for g in user_guilds if g.id == guild_id), None)
-        if not guild or not guild.permissions.administrator: return False
         if not bot.get_guild(guild_id): return False
-        return True
+        entry = get_oauth_entry()
+        if not entry: return False
+        if guild_id not in entry.admin_guild_ids and entry.age() > SESSION_CACHE_MIN_REFRESH:
+            # Evtl. erst nach dem Login Admin geworden: einmal frisch von Discord laden
+            entry = get_oauth_entry(refresh=True)
+        return guild_id in entry.admin_guild_ids
     except Exception:
         return False
 
+def get_guild_view(guild_id):
+    """
+    Veröffentlichter Guild-Stand für lesende Routen, ohne das Live-Bot-Objekt anzufassen.
+    Fallback auf bot.get_guild, solange für die Guild noch kein Stand existiert.
+    """
+    return bot.snapshots.load(guild_id) or bot.get_guild(guild_id)
+
+def mark_snapshot_dirty(guild_id):
+    snapshot_cog = bot.get_cog('State-Snapshot')
+    if snapshot_cog:
+        bot.loop.call_soon_threadsafe(snapshot_cog.mark_dirty, guild_id)
+
 # --- AUTH & GENERAL ROUTES ---
 @app.route("/")
 def index():
@@ -384,6 +481,7 @@ def login():
         return redirect(url_for("index"))
     
     # Clear the entire session to start fresh
+    reset_oauth_cache()
     session.clear()
     
     # Set session as permanent
@@ -409,9 +507,18 @@ def login():
 
 @app.route("/logout", strict_slashes=False)
 def logout():
+    reset_oauth_cache()
     discord_session.revoke()
     return redirect(url_for("index"))
 
+def _prefetch_oauth_cache():
+    """Lädt Profil und Serverliste direkt nach dem Login neu."""
+    reset_oauth_cache()
+    try:
+        get_oauth_entry(refresh=True)
+    except Exception as e:
+        print(f"Fehler beim Laden der Discord-Daten nach dem Login: {e}")
+
 @app.route("/callback", strict_slashes=False)
 def callback():
     from flask import session
@@ -427,6 +534,7 @@ def callback():
         session.modified = True
         discord_session.callback()
         print("DEBUG CALLBACK: OAuth callback successful!")
+        _prefetch_oauth_cache()
         return redirect(url_for("dashboard"))
     except Exception as e:
         error_str = str(e)
@@ -450,6 +558,7 @@ def callback():
             time.sleep(1)
             try:
                 discord_session.callback()
+                _prefetch_oauth_cache()
                 return redirect(url_for("dashboard"))
             except Exception as retry_error:
                 print(f"Wiederholungsversuch fehlgeschlagen: {retry_error}")
@@ -463,6 +572,15 @@ def callback():
 def redirect_unauthorized(e):
     return redirect(url_for("login"))
 
+# Routen lassen BridgeBusyError und TimeoutError durchlaufen (nicht in 'except Exception' schlucken)
+@app.errorhandler(BridgeBusyError)
+def bridge_busy(e):
+    return jsonify({"success": False, "error": str(e)}), 503
+
+@app.errorhandler(concurrent.futures.TimeoutError)
+def bridge_timeout(e):
+    return jsonify({"success": False, "error": "Zeitüberschreitung bei der Anfrage an den Bot. Die Aktion läuft im Hintergrund weiter, bitte die Seite gleich neu laden."}), 504
+
 @app.route("/bot_status")
 def bot_status():
     """
@@ -474,6 +592,29 @@ def bot_status():
     
     return jsonify(status="online", total_users=total_users, total_guilds=total_guilds)
 
+@app.route("/health")
+def health():
+    """Health-Check für Docker/Monitoring: Gateway-Verbindung, Loop-Latenz und Bridge-Auslastung."""
+    ready = bot.is_ready() and not bot.is_closed()
+    loop_lag_ms = None
+    if ready:
+        try:
+            loop_lag_ms = round(bot_bridge.measure_loop_lag(), 1)
+        except Exception:
+            ready = False
+
+    latency = bot.latency
+    payload = {
+        "status": "ok" if ready else "unavailable",
+        "bot_ready": ready,
+        "gateway_latency_ms": round(latency * 1000, 1) if ready and latency == latency and latency != float('inf') else None,
+        "loop_lag_ms": loop_lag_ms,
+        "bridge": bot_bridge.stats(),
+        "web_server": WEB_SERVER_MODE,
+        "web_threads": WEB_THREADS,
+    }
+    return jsonify(payload), 200 if ready else 503
+
 # --- PROTECTED ROUTES ---
 @app.route('/dashboard/')
 @requires_authorization
@@ -487,7 +628,6 @@ def guild_settings(guild_id):
         flash("Du hast keine Berechtigung für diesen Server.", "danger")
         return redirect(url_for('dashboard'))
     
-    guild = bot.get_guild(guild_id)
     if request.method == 'POST':
         # Laden der aktuellen Konfiguration
         guild_config = bot.data.get_server_config(guild_id)
@@ -501,7 +641,7 @@ def guild_settings(guild_id):
         return redirect(url_for('guild_settings', guild_id=guild_id))
 
     guild_data = bot.data.get_server_config(guild_id)
-    return render_template('guild.html', guild=guild, settings=guild_data, admin_guilds=get_admin_guilds(), manageable_cogs=MANAGEABLE_COGS)
+    return render_template('guild.html', guild=get_guild_view(guild_id), settings=guild_data, admin_guilds=get_admin_guilds(), manageable_cogs=MANAGEABLE_COGS)
 
 @app.route('/guild/<int:guild_id>/modules')
 @requires_authorization
@@ -510,11 +650,29 @@ def manage_modules(guild_id):
         flash("Du hast keine Berechtigung für diesen Server.", "danger")
         return redirect(url_for('dashboard'))
     
-    guild = bot.get_guild(guild_id)
     guild_data = bot.data.get_server_config(guild_id)
-    return render_template('modules.html', guild=guild, settings=guild_data, manageable_cogs=MANAGEABLE_COGS, admin_guilds=get_admin_guilds())
+    return render_template('modules.html', guild=get_guild_view(guild_id), settings=guild_data, manageable_cogs=MANAGEABLE_COGS, admin_guilds=get_admin_guilds())
 
 
+@app.route('/guild/<int:guild_id>/state')
+@requires_authorization
+def guild_state(guild_id):
+    """Read-only Guild-Stand als JSON; mit If-None-Match wird bei gleicher Version 304 geliefert."""
+    if not check_guild_permissions(guild_id):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    snapshot = bot.snapshots.load(guild_id)
+    if not snapshot:
+        return jsonify({"error": "Noch kein Stand veröffentlicht"}), 503
+
+    etag = f'"{guild_id}-{snapshot.version}"'
+    if request.headers.get('If-None-Match') == etag:
+        return '', 304
+    data = {k: v for k, v in snapshot.data.items() if k != 'content_hash'}
+    response = jsonify(data)
+    response.headers['ETag'] = etag
+    return response
+
 @app.route('/guild/<int:guild_id>/roles', methods=['GET', 'POST'])
 @requires_authorization
 def manage_roles(guild_id):
@@ -547,7 +705,7 @@ def manage_roles(guild_id):
                 except Exception as e:
                     return False, f"Fehler beim Erstellen der Rolle: {str(e)}"
                     
-            future = asyncio.run_coroutine_threadsafe(create_task(), bot.loop)
+            future = bot_bridge.submit(create_task())
             
         elif action == 'edit':
             role_id = int(request.form.get('role_id'))
@@ -574,7 +732,7 @@ def manage_roles(guild_id):
                 except Exception as e:
                     return False, f"Fehler beim Aktualisieren: {str(e)}"
                     
-            future = asyncio.run_coroutine_threadsafe(edit_task(), bot.loop)
+            future = bot_bridge.submit(edit_task())
             
         elif action == 'delete':
             role_id = int(request.form.get('role_id'))
@@ -591,7 +749,7 @@ def manage_roles(guild_id):
                 except Exception as e:
                     return False, f"Fehler beim Löschen: {str(e)}"
                     
-            future = asyncio.run_coroutine_threadsafe(delete_task(), bot.loop)
+            future = bot_bridge.submit(delete_task())
             
         elif action == 'move':
             role_id = int(request.form.get('role_id'))
@@ -632,21 +790,13 @@ def manage_roles(guild_id):
                 except Exception as e:
                     return False, f"Fehler beim Verschieben: {str(e)}"
                     
-            future = asyncio.run_coroutine_threadsafe(move_task(), bot.loop)
+            future = bot_bridge.submit(move_task())
             
         elif action == 'mass_assign':
             target_role_id = int(request.form.get('target_role_id'))
             source_role_id = int(request.form.get('source_role_id')) if request.form.get('source_role_id') else None
             
-            async def mass_assign_task():
-                target_role = guild.get_role(target_role_id)
-                if not target_role:
-                    return False, "Zielrolle nicht gefunden."
-                if target_role >= guild.me.top_role:
-                    return False, "Hierarchie-Konflikt: Zielrolle liegt über der Rolle des Bots."
-                    
-                source_role = guild.get_role(source_role_id) if source_role_id else None
-                
+            async def bg_mass_assign(target_role, source_role):
                 count = 0
                 try:
                     for member in guild.members:
@@ -657,11 +807,23 @@ def manage_roles(guild_id):
                         if target_role not in member.roles:
                             await member.add_roles(target_role, reason="Massen-Zuweisung über Web-Dashboard")
                             count += 1
-                    return True, f"Rolle '{target_role.name}' wurde erfolgreich an {count} Mitglieder zugewiesen."
+                    print(f"[Rollen] Rolle '{target_role.name}' wurde an {count} Mitglieder in {guild.name} zugewiesen.")
                 except Exception as e:
-                    return False, f"Fehler bei Massen-Zuweisung: {str(e)}"
+                    print(f"[Rollen] Fehler bei Massen-Zuweisung in {guild.name} nach {count} Mitgliedern: {e}")
+
+            async def mass_assign_task():
+                target_role = guild.get_role(target_role_id)
+                if not target_role:
+                    return False, "Zielrolle nicht gefunden."
+                if target_role >= guild.me.top_role:
+                    return False, "Hierarchie-Konflikt: Zielrolle liegt über der Rolle des Bots."
                     
-            future = asyncio.run_coroutine_threadsafe(mass_assign_task(), bot.loop)
+                source_role = guild.get_role(source_role_id) if source_role_id else None
+                # Läuft im Hintergrund, damit große Server nicht am Timeout der Web-Anfrage scheitern
+                bot.loop.create_task(bg_mass_assign(target_role, source_role))
+                return True, f"Die Zuweisung von '{target_role.name}' wurde im Hintergrund gestartet. Dies kann bei vielen Mitgliedern einige Minuten dauern."
+                    
+            future = bot_bridge.submit(mass_assign_task())
             
         elif action == 'create_group':
             group_name = request.form.get('group_name')
@@ -764,7 +926,7 @@ def manage_roles(guild_id):
                     except Exception as e:
                         return False, f"Fehler beim Aktualisieren der Positionen: {str(e)}"
                         
-                future = asyncio.run_coroutine_threadsafe(update_positions_task(), bot.loop)
+                future = bot_bridge.submit(update_positions_task())
                 success, msg = future.result()
                 return jsonify({'success': success, 'message': msg})
                 
@@ -793,7 +955,10 @@ def manage_roles(guild_id):
                         print(f"Failed to migrate role {r.name}: {e}")
 
     try:
-        asyncio.run_coroutine_threadsafe(migrate_separators(), bot.loop).result()
+        # Bei vielen Trennrollen dauert das wegen Rate-Limits länger als der Standard-Timeout
+        bot_bridge.submit(migrate_separators()).result(timeout=None)
+    except (BridgeBusyError, concurrent.futures.TimeoutError):
+        raise
     except Exception as e:
         print(f"Error during separator migration: {e}")
         
@@ -884,19 +1049,32 @@ def toggle_module(guild_id):
             if cog_name == 'Dashboard':
                 dash_cog = bot.get_cog('Dashboard')
                 if dash_cog:
-                    asyncio.run_coroutine_threadsafe(dash_cog.web_on_enable(guild_id), bot.loop)
+                    bot_bridge.submit(dash_cog.web_on_enable(guild_id))
         else:
             if cog_name in enabled_cogs: enabled_cogs.remove(cog_name)
             if cog_name == 'Geburtstage':
                 bday_cog = bot.get_cog('Geburtstage')
                 if bday_cog:
-                    asyncio.run_coroutine_threadsafe(bday_cog.web_cleanup(guild_id), bot.loop)
+                    bot_bridge.submit(bday_cog.web_cleanup(guild_id))
             elif cog_name == 'Dashboard':
                 dash_cog = bot.get_cog('Dashboard')
                 if dash_cog:
-                    asyncio.run_coroutine_threadsafe(dash_cog.web_on_disable(guild_id), bot.loop)
+                    bot_bridge.submit(dash_cog.web_on_disable(guild_id))
         
         bot.data.save_server_config(guild_id, guild_config)
+        mark_snapshot_dirty(guild_id)
+        if cog_name == 'Global-Ban':
+            gb_cog = bot.get_cog('Global-Ban')
+            if gb_cog:
+                bot_bridge.submit(gb_cog.web_on_toggle(guild_id))
+        elif cog_name == 'Backup':
+            backup_cog = bot.get_cog('Backup')
+            if backup_cog:
+                bot_bridge.submit(backup_cog.web_on_toggle(guild_id))
+        elif cog_name == 'Logging':
+            logging_cog = bot.get_cog('Logging')
+            if logging_cog:
+                bot.loop.call_soon_threadsafe(logging_cog.invalidate_guild_cache, guild_id)
         msg = f"Modul '{cog_name}' wurde {'aktiviert' if is_enabled else 'deaktiviert'}."
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return jsonify({'success': True, 'message': msg})
@@ -922,16 +1100,16 @@ def manage_birthdays(guild_id):
             list_ch_id = int(request.form['list_channel']) if request.form.get('list_channel') else None
             ann_ch_id = int(request.form['announcement_channel']) if request.form.get('announcement_channel') else None
             role_id = int(request.form['birthday_role']) if request.form.get('birthday_role') else None
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_config(guild.id, list_ch_id, ann_ch_id, role_id), bot.loop)
+            future = bot_bridge.submit(cog.web_set_config(guild.id, list_ch_id, ann_ch_id, role_id))
         elif action == 'add_bday':
             user_id = int(request.form['user'])
             day = int(request.form['day'])
             month = int(request.form['month'])
             year = int(request.form.get('year')) if request.form.get('year') else None
-            future = asyncio.run_coroutine_threadsafe(cog.web_add_birthday(guild.id, user_id, day, month, year), bot.loop)
+            future = bot_bridge.submit(cog.web_add_birthday(guild.id, user_id, day, month, year))
         elif action == 'remove_bday':
             user_id = int(request.form['user_to_remove'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_remove_birthday(guild.id, user_id), bot.loop)
+            future = bot_bridge.submit(cog.web_remove_birthday(guild.id, user_id))
         if future:
             success, message = future.result()
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -960,28 +1138,28 @@ def manage_counting(guild_id):
         future = None
         if action == 'set_channel':
             channel_id = int(request.form['channel'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_channel(guild.id, channel_id), bot.loop)
+            future = bot_bridge.submit(cog.web_set_channel(guild.id, channel_id))
         elif action == 'remove_channel':
             channel_id = int(request.form['channel_to_remove'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_remove_channel(guild_id, channel_id), bot.loop)
+            future = bot_bridge.submit(cog.web_remove_channel(guild_id, channel_id))
         elif action == 'set_count':
             channel_id = int(request.form['channel_to_set'])
             number = int(request.form['number'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_count(guild.id, channel_id, number), bot.loop) # Changed sig
+            future = bot_bridge.submit(cog.web_set_count(guild.id, channel_id, number)) # Changed sig
         elif action == 'set_slowmode':
             channel_id = int(request.form['channel_to_set_slowmode'])
             seconds = int(request.form['seconds'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_slowmode(guild.id, channel_id, seconds), bot.loop)
+            future = bot_bridge.submit(cog.web_set_slowmode(guild.id, channel_id, seconds))
         elif action == 'add_milestone':
             number = int(request.form['milestone_number'])
             message = request.form['milestone_message']
-            future = asyncio.run_coroutine_threadsafe(cog.web_add_milestone(guild.id, number, message), bot.loop)
+            future = bot_bridge.submit(cog.web_add_milestone(guild.id, number, message))
         elif action == 'remove_milestone':
             number = int(request.form['milestone_to_remove'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_remove_milestone(guild.id, number), bot.loop)
+            future = bot_bridge.submit(cog.web_remove_milestone(guild.id, number))
         elif action == 'toggle_default_milestone':
             number = int(request.form['milestone_to_toggle'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_toggle_default_milestone(guild.id, number), bot.loop)
+            future = bot_bridge.submit(cog.web_toggle_default_milestone(guild.id, number))
         if future:
             success, message = future.result()
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -1041,9 +1219,8 @@ def manage_leveling(guild_id):
 
         if action == 'toggle_command':
             command_name = request.form.get('command_name')
-            future = asyncio.run_coroutine_threadsafe(
-                cog.web_toggle_command(guild.id, command_name),
-                bot.loop
+            future = bot_bridge.submit(
+                cog.web_toggle_command(guild.id, command_name)
             )
         elif action == 'set_config':
             xp_per_message = int(request.form.get('xp_per_message', 10))
@@ -1053,36 +1230,36 @@ def manage_leveling(guild_id):
             boost_role_tier1_id = int(request.form.get('boost_role1')) if request.form.get('boost_role1') else None
             boost_role_tier2_id = int(request.form.get('boost_role2')) if request.form.get('boost_role2') else None
             boost_role_tier3_id = int(request.form.get('boost_role3')) if request.form.get('boost_role3') else None
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_config(guild.id, xp_per_message=xp_per_message, cooldown=xp_cooldown, daily_xp_amount=daily_xp_amount, log_channel_id=log_channel_id, boost_role_tier1_id=boost_role_tier1_id, boost_role_tier2_id=boost_role_tier2_id, boost_role_tier3_id=boost_role_tier3_id), bot.loop)
+            future = bot_bridge.submit(cog.web_set_config(guild.id, xp_per_message=xp_per_message, cooldown=xp_cooldown, daily_xp_amount=daily_xp_amount, log_channel_id=log_channel_id, boost_role_tier1_id=boost_role_tier1_id, boost_role_tier2_id=boost_role_tier2_id, boost_role_tier3_id=boost_role_tier3_id))
         elif action == 'add_level_role':
             level = int(request.form['level'])
             role_id = int(request.form['role_id'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_manage_level_roles(guild.id, "add", level, role_id), bot.loop)
+            future = bot_bridge.submit(cog.web_manage_level_roles(guild.id, "add", level, role_id))
         elif action == 'remove_level_role':
             level = int(request.form['level_to_remove'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_manage_level_roles(guild.id, "remove", level), bot.loop)
+            future = bot_bridge.submit(cog.web_manage_level_roles(guild.id, "remove", level))
         elif action == 'add_no_xp_role':
             role_id = int(request.form['no_xp_role_id'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_manage_role_list(guild.id, "no_xp_roles", "add", role_id), bot.loop)
+            future = bot_bridge.submit(cog.web_manage_role_list(guild.id, "no_xp_roles", "add", role_id))
         elif action == 'remove_no_xp_role':
             role_id = int(request.form['role_to_remove'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_manage_role_list(guild.id, "no_xp_roles", "remove", role_id), bot.loop)
+            future = bot_bridge.submit(cog.web_manage_role_list(guild.id, "no_xp_roles", "remove", role_id))
         elif action == 'add_custom_xp':
             level = int(request.form['custom_level'])
             xp = int(request.form['custom_xp'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_manage_custom_xp(guild.id, "add", level, xp), bot.loop)
+            future = bot_bridge.submit(cog.web_manage_custom_xp(guild.id, "add", level, xp))
         elif action == 'remove_custom_xp':
             level = int(request.form['level_to_remove'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_manage_custom_xp(guild.id, "remove", level), bot.loop)
+            future = bot_bridge.submit(cog.web_manage_custom_xp(guild.id, "remove", level))
         elif action == 'trigger_sync':
             max_msgs = int(request.form['max_msgs']) if request.form.get('max_msgs') else None
             force = 'force_recalc' in request.form
-            future = asyncio.run_coroutine_threadsafe(cog.web_trigger_sync(guild.id, force, max_msgs), bot.loop)
+            future = bot_bridge.submit(cog.web_trigger_sync(guild.id, force, max_msgs))
         elif action == 'set_user_xp':
             user_id = int(request.form['user_id'])
             xp = int(request.form['xp'])
             level = int(request.form['level'])
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_user_xp(guild.id, user_id, xp, level), bot.loop)
+            future = bot_bridge.submit(cog.web_set_user_xp(guild.id, user_id, xp, level))
         if future:
             success, message = future.result()
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -1149,16 +1326,16 @@ def get_leveling_leaderboard(guild_id):
     per_page = request.args.get('per_page', 50, type=int)
     if per_page > 100: per_page = 100 # Limit per_page
 
-    future = asyncio.run_coroutine_threadsafe(
+    future = bot_bridge.submit(
         cog.web_get_paginated_leaderboard(guild.id, page, per_page),
-        bot.loop
+        cancel_on_timeout=True
     )
     
     try:
         # Ein Timeout stellt sicher, dass die Anfrage nicht ewig hängt.
         leaderboard_data = future.result(timeout=20)
         return jsonify(leaderboard_data)
-    except asyncio.TimeoutError:
+    except concurrent.futures.TimeoutError:
         return jsonify({"error": "Timeout bei der Erstellung des Leaderboards."}), 504
     except Exception as e:
         print(f"Fehler beim Abrufen des paginierten Leaderboards: {e}")
@@ -1184,15 +1361,15 @@ def manage_tickets(guild_id):
             ticket_kategorie_id = int(request.form['ticket_category']) if request.form.get('ticket_category') else None
             log_channel_id = int(request.form.get('log_channel')) if request.form.get('log_channel') else None
             max_tickets_per_user = int(request.form.get('max_tickets_per_user', 1))
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_config(guild_id, ticket_channel_id, ticket_kategorie_id, log_channel_id, max_tickets_per_user), bot.loop)
+            future = bot_bridge.submit(cog.web_set_config(guild_id, ticket_channel_id, ticket_kategorie_id, log_channel_id, max_tickets_per_user))
         
         elif action == 'add_support_role':
             role_id = int(request.form.get('role_id'))
-            future = asyncio.run_coroutine_threadsafe(cog.web_add_support_role(guild_id, role_id), bot.loop)
+            future = bot_bridge.submit(cog.web_add_support_role(guild_id, role_id))
 
         elif action == 'remove_support_role':
             role_id_to_remove = int(request.form.get('role_id_to_remove'))
-            future = asyncio.run_coroutine_threadsafe(cog.web_remove_support_role(guild_id, role_id_to_remove), bot.loop)
+            future = bot_bridge.submit(cog.web_remove_support_role(guild_id, role_id_to_remove))
 
         elif action == 'add_reason':
             name = request.form.get('reason_name')
@@ -1200,21 +1377,21 @@ def manage_tickets(guild_id):
             emoji = request.form.get('reason_emoji')
             role_ids = request.form.getlist('reason_roles')  # Get multiple selected roles
             role_ids = [int(rid) for rid in role_ids if rid]  # Convert to integers
-            future = asyncio.run_coroutine_threadsafe(cog.web_add_reason(guild_id, name, desc, emoji, role_ids), bot.loop)
+            future = bot_bridge.submit(cog.web_add_reason(guild_id, name, desc, emoji, role_ids))
 
         elif action == 'remove_reason':
             name_to_remove = request.form.get('reason_name_to_remove')
-            future = asyncio.run_coroutine_threadsafe(cog.web_remove_reason(guild_id, name_to_remove), bot.loop)
+            future = bot_bridge.submit(cog.web_remove_reason(guild_id, name_to_remove))
 
         elif action == 'add_reason_role':
             reason_name = request.form.get('reason_name')
             role_id = int(request.form.get('role_id'))
-            future = asyncio.run_coroutine_threadsafe(cog.web_add_reason_role(guild_id, reason_name, role_id), bot.loop)
+            future = bot_bridge.submit(cog.web_add_reason_role(guild_id, reason_name, role_id))
         
         elif action == 'remove_reason_role':
             reason_name = request.form.get('reason_name')
             role_id_to_remove = int(request.form.get('role_id_to_remove'))
-            future = asyncio.run_coroutine_threadsafe(cog.web_remove_reason_role(guild_id, reason_name, role_id_to_remove), bot.loop)
+            future = bot_bridge.submit(cog.web_remove_reason_role(guild_id, reason_name, role_id_to_remove))
 
         if future:
             success, message = future.result()
@@ -1228,7 +1405,19 @@ def manage_tickets(guild_id):
     # Fix: ensure support_roles is always a list
     if "support_roles" in guild_ticket_config and not isinstance(guild_ticket_config["support_roles"], list):
         guild_ticket_config["support_roles"] = [guild_ticket_config["support_roles"]]
-    return render_template('tickets.html', guild=guild, settings=guild_ticket_config, is_enabled=is_enabled, admin_guilds=get_admin_guilds())
+    transcripts = ticket_transcripts.search_index(bot.data, guild_id, request.args.get('q', ''))
+    return render_template('tickets.html', guild=guild, settings=guild_ticket_config, is_enabled=is_enabled, admin_guilds=get_admin_guilds(), transcripts=transcripts, transcript_query=request.args.get('q', ''))
+
+@app.route('/guild/<int:guild_id>/tickets/transcripts/<int:ticket_id>')
+@requires_authorization
+def download_ticket_transcript(guild_id, ticket_id):
+    if not check_guild_permissions(guild_id):
+        return "Forbidden", 403
+    kind = 'jsonl' if request.args.get('format') == 'jsonl' else 'html'
+    path = ticket_transcripts.get_transcript_path(guild_id, ticket_id, kind)
+    if not path:
+        return "Not Found", 404
+    return send_file(path, as_attachment=(kind == 'jsonl'))
 
 
 @app.route('/guild/<int:guild_id>/twitch', methods=['GET', 'POST'])
@@ -1257,29 +1446,29 @@ def manage_twitch(guild_id):
             display_mode = request.form.get('display_mode', 'channel')
             auto_assign = request.form.get('auto_assign') == 'on'
             send_offline_message = request.form.get('send_offline_message') == 'on'
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_feed_config(guild_id, channel_id, display_mode, auto_assign, send_offline_message), bot.loop)
+            future = bot_bridge.submit(cog.web_set_feed_config(guild_id, channel_id, display_mode, auto_assign, send_offline_message))
         elif action == 'set_streamer_command_config':
             role_id_str = request.form.get('streamer_role_id')
             role_id = int(role_id_str) if role_id_str else None
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_streamer_command_role(guild_id, role_id), bot.loop)
+            future = bot_bridge.submit(cog.web_set_streamer_command_role(guild_id, role_id))
         elif action == 'add_streamer':
             streamer_name = request.form.get('streamer_name')
-            future = asyncio.run_coroutine_threadsafe(cog.web_add_streamer(guild_id, streamer_name), bot.loop)
+            future = bot_bridge.submit(cog.web_add_streamer(guild_id, streamer_name))
         elif action == 'remove_streamer':
             streamer_name = request.form.get('streamer_name')
-            future = asyncio.run_coroutine_threadsafe(cog.web_remove_streamer(guild_id, streamer_name), bot.loop)
+            future = bot_bridge.submit(cog.web_remove_streamer(guild_id, streamer_name))
         elif action == 'set_settings_trigger_role':
             role_id_str = request.form.get('trigger_role_id')
             role_id = int(role_id_str) if role_id_str else None
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_settings_trigger_role(guild_id, role_id), bot.loop)
+            future = bot_bridge.submit(cog.web_set_settings_trigger_role(guild_id, role_id))
         elif action == 'create_settings_trigger_role':
-            future = asyncio.run_coroutine_threadsafe(cog.web_create_settings_trigger_role(guild_id), bot.loop)
+            future = bot_bridge.submit(cog.web_create_settings_trigger_role(guild_id))
         elif action == 'bulk_assign_roles':
-            future = asyncio.run_coroutine_threadsafe(cog.web_bulk_assign_streamer_roles(guild_id), bot.loop)
+            future = bot_bridge.submit(cog.web_bulk_assign_streamer_roles(guild_id))
         elif action == 'bulk_remove_roles':
-            future = asyncio.run_coroutine_threadsafe(cog.web_bulk_remove_streamer_roles(guild_id), bot.loop)
+            future = bot_bridge.submit(cog.web_bulk_remove_streamer_roles(guild_id))
         elif action == 'sync_streamer_roles':
-            future = asyncio.run_coroutine_threadsafe(cog.web_sync_streamer_roles(guild_id), bot.loop)
+            future = bot_bridge.submit(cog.web_sync_streamer_roles(guild_id))
         
         if future:
             success, message = future.result()
@@ -1336,32 +1525,27 @@ def manage_temp_channel(guild_id):
     guild_config = bot.data.get_server_config(guild_id)
     is_enabled = 'Temp-Channel' in guild_config.get('enabled_cogs', [])
 
-    temp_data = bot.data.get_guild_data(guild_id, "temp_channel")
-    temp_data.setdefault('config', {})
-    temp_data.setdefault('active_channels', {})
+    cog = bot.get_cog('Temp-Channel')
 
-    if request.method == 'POST' and is_enabled:
+    if request.method == 'POST' and is_enabled and cog:
         # Daten aus dem Formular holen
         trigger_channel_id_str = request.form.get('trigger_channel_id')
         trigger_channel_id = int(trigger_channel_id_str) if trigger_channel_id_str else None
         channel_name_format = request.form.get('channel_name_format', '🔊 {user}\'s Raum')
 
-        # 1. Daten direkt im Speicher des Bots aktualisieren
-        config = temp_data['config']
-        config['trigger_channel_id'] = trigger_channel_id
-        config['channel_name_format'] = channel_name_format
-
-        # 2. Speicher
-        bot.data.save_guild_data(guild_id, "temp_channel", temp_data)
-        
-        msg = "Temp-Channel Einstellungen erfolgreich gespeichert!"
+        # Der Cog hält den Zustand im Speicher und speichert selbst
+        future = bot_bridge.submit(cog.web_set_config(guild_id, trigger_channel_id, channel_name_format))
+        success, msg = future.result()
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            return jsonify({'success': True, 'message': msg})
-        flash(msg, "success")
+            return jsonify({'success': success, 'message': msg})
+        flash(msg, "success" if success else "danger")
         return redirect(url_for('manage_temp_channel', guild_id=guild_id))
 
     # Konfiguration für das Template laden
-    config_for_template = temp_data.get('config', {})
+    if cog:
+        config_for_template = cog.get_state(guild_id).config
+    else:
+        config_for_template = bot.data.get_guild_data(guild_id, "temp_channel").get('config', {})
     return render_template('temp_channel.html', guild=guild, config=config_for_template, is_enabled=is_enabled, admin_guilds=get_admin_guilds())
 
 
@@ -1401,7 +1585,7 @@ def manage_backup(guild_id):
             else:
                 cog = bot.get_cog('Backup')
                 if cog:
-                    asyncio.run_coroutine_threadsafe(cog._perform_backup(guild, backup_config), bot.loop)
+                    bot_bridge.submit(cog._perform_backup(guild, backup_config))
                     msg = "Manuelles Backup wird erstellt und in das gewählte Ziel gesendet."
                     success = True
                 else:
@@ -1432,7 +1616,7 @@ def manage_backup(guild_id):
 
         cog = bot.get_cog('Backup')
         if cog and hasattr(cog, 'web_set_config'):
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_config(guild_id, config_data), bot.loop)
+            future = bot_bridge.submit(cog.web_set_config(guild_id, config_data))
             success, msg = future.result()
         else:
             backup_config.update(config_data)
@@ -1452,6 +1636,9 @@ def manage_backup(guild_id):
                          admin_guilds=get_admin_guilds())
 
 
+def _guild_restore_staging_dir(guild_id, restore_id):
+    return os.path.join(GUILDS_DATA_DIR, f"{restore_engine.STAGING_PREFIX}{guild_id}_{restore_id}")
+
 @app.route('/guild/<int:guild_id>/backup/upload', methods=['POST'])
 @requires_authorization
 def upload_server_backup(guild_id):
@@ -1464,15 +1651,16 @@ def upload_server_backup(guild_id):
         flash("Keine Dateien ausgewählt.", "danger")
         return redirect(url_for('manage_backup', guild_id=guild_id))
 
+    staging_dir = None
     try:
         import uuid
-        temp_base_dir = os.path.join(BASE_DIR, 'temp_backup_restore', str(guild_id))
-        if os.path.exists(temp_base_dir):
-            shutil.rmtree(temp_base_dir)
+        # Alte, nicht bestätigte Wiederherstellungen dieser Guild verwerfen
+        stale_prefix = f"{restore_engine.STAGING_PREFIX}{guild_id}_"
+        for entry in os.listdir(GUILDS_DATA_DIR):
+            if entry.startswith(stale_prefix):
+                restore_engine.remove_tree(os.path.join(GUILDS_DATA_DIR, entry))
             
         restore_id = str(uuid.uuid4())
-        temp_dir = os.path.join(temp_base_dir, restore_id)
-        os.makedirs(temp_dir, exist_ok=True)
         
         # Determine sorting keys (natural sort to ensure .part10 comes after .part9, not .part1)
         import re
@@ -1484,20 +1672,15 @@ def upload_server_backup(guild_id):
             return f.filename
         files.sort(key=sort_key)
         
-        combined_zip_path = os.path.join(temp_dir, 'combined_backup.zip')
-        
-        with open(combined_zip_path, 'wb') as outfile:
-            for file in files:
-                outfile.write(file.read())
-
-        # Extract it
-        extract_dir = os.path.join(temp_dir, 'extracted')
-        os.makedirs(extract_dir, exist_ok=True)
-        shutil.unpack_archive(combined_zip_path, extract_dir)
+        # Teile direkt aus den Upload-Streams zusammensetzen und neben den Live-Daten entpacken
+        staging_dir = restore_engine.new_staging_dir(GUILDS_DATA_DIR, f"{guild_id}_{restore_id}")
+        restore_engine.stage_multipart_archive((f.stream for f in files), staging_dir)
         
         # Find json and db files to offer
         modules = []
-        for f in os.listdir(extract_dir):
+        for f in os.listdir(staging_dir):
+            if f == BACKUP_MANIFEST_FILENAME:
+                continue
             if f.endswith('.json') or f.endswith('.db'):
                 modules.append(f)
                 
@@ -1508,6 +1691,7 @@ def upload_server_backup(guild_id):
         
     except Exception as e:
         print(f"[Backup Restore] Error: {e}")
+        restore_engine.remove_tree(staging_dir)
         flash(f"Fehler: {e}. Lade alle Teile des ZIP-Archivs gleichzeitig hoch.", "danger")
         return redirect(url_for('manage_backup', guild_id=guild_id))
 
@@ -1522,43 +1706,70 @@ def confirm_server_backup(guild_id, restore_id):
     if not selected_modules:
         flash("Keine Module zur Wiederherstellung ausgewählt.", "warning")
         return redirect(url_for('manage_backup', guild_id=guild_id))
+    
+    import uuid
+    try:
+        restore_id = str(uuid.UUID(restore_id))
+    except ValueError:
+        flash("Ungültige Wiederherstellung.", "danger")
+        return redirect(url_for('manage_backup', guild_id=guild_id))
         
-    extract_dir = os.path.join(BASE_DIR, 'temp_backup_restore', str(guild_id), restore_id, 'extracted')
-    if not os.path.exists(extract_dir):
+    staging_dir = _guild_restore_staging_dir(guild_id, restore_id)
+    if not os.path.exists(staging_dir):
         flash("Sitzung abgelaufen oder Backup nicht gefunden. Bitte lade die Datei(en) erneut hoch.", "danger")
         return redirect(url_for('manage_backup', guild_id=guild_id))
         
     guild_data_dir = os.path.join(GUILDS_DATA_DIR, str(guild_id))
-    os.makedirs(guild_data_dir, exist_ok=True)
+    
+    manifest = None
+    manifest_path = os.path.join(staging_dir, BACKUP_MANIFEST_FILENAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        os.remove(manifest_path)
     
     restored_count = 0
+    old_guild_dir = None
     try:
-        if 'ALL_DATA' in selected_modules:
-            # Overwrite entire folder
-            if os.path.exists(guild_data_dir):
-                shutil.rmtree(guild_data_dir)
-            shutil.copytree(extract_dir, guild_data_dir)
-            restored_count = len([f for f in os.listdir(extract_dir) if f.endswith('.json') or f.endswith('.db')])
+        if 'ALL_DATA' in selected_modules and not (manifest and not manifest.get('full')):
+            # Vollständiges Archiv: Guild-Ordner per Umbenennung komplett austauschen
+            restored_count = len([f for f in os.listdir(staging_dir) if f.endswith('.json') or f.endswith('.db')])
+            swap = lambda: restore_engine.swap_directory(staging_dir, guild_data_dir)
         else:
-            for mod in selected_modules:
-                if not '.' in mod:
-                    mod = f"{mod}.json"
-                src_file = os.path.join(extract_dir, mod)
-                dst_file = os.path.join(guild_data_dir, mod)
-                if os.path.exists(src_file):
-                    shutil.copy2(src_file, dst_file)
-                    restored_count += 1
-                    
-        # Cleanup
-        temp_base_dir = os.path.join(BASE_DIR, 'temp_backup_restore', str(guild_id))
-        if os.path.exists(temp_base_dir):
-            shutil.rmtree(temp_base_dir)
-            
-        bot.data.get_server_config(guild_id) # reload
+            if 'ALL_DATA' in selected_modules:
+                # Inkrementelles Archiv: nur geänderte Dateien überschreiben, gelöschte entfernen
+                files = [os.path.relpath(os.path.join(root, name), staging_dir).replace(os.sep, '/')
+                         for root, _dirs, names in os.walk(staging_dir) for name in names]
+                deleted = manifest.get('deleted', [])
+            else:
+                files = [mod if '.' in mod else f"{mod}.json" for mod in selected_modules]
+                deleted = []
+            swap = lambda: restore_engine.overlay_directory(staging_dir, guild_data_dir, files, deleted)
+
+        future = bot_bridge.submit(_swap_restored_data(swap, guild_id))
+        result = future.result()
+        if isinstance(result, int):
+            restored_count = result
+        else:
+            old_guild_dir = result
+
+        # Delta der Audit-Logs in die bestehende logs.db einspielen
+        delta_path = os.path.join(guild_data_dir, LOGS_DELTA_FILENAME)
+        if os.path.exists(delta_path):
+            logging_cog = bot.get_cog('Logging')
+            log_storage = logging_cog.log_storage if logging_cog else LogStorage()
+            log_storage.import_delta(guild_id, delta_path)
+            os.remove(delta_path)
         
         flash(f"{restored_count} Modul(e) erfolgreich wiederhergestellt!", "success")
+    except (BridgeBusyError, concurrent.futures.TimeoutError):
+        raise
     except Exception as e:
         flash(f"Fehler bei der Wiederherstellung: {e}", "danger")
+    finally:
+        # Cleanup
+        restore_engine.remove_tree(staging_dir)
+        restore_engine.remove_tree(old_guild_dir)
         
     return redirect(url_for('manage_backup', guild_id=guild_id))
 
@@ -1587,13 +1798,13 @@ def manage_twitch_clips(guild_id):
         channel_id_str = request.form.get('channel_id')
         channel_id = int(channel_id_str) if channel_id_str else None
         streamer_name = request.form.get('streamer_name')
-        future = asyncio.run_coroutine_threadsafe(cog.web_set_config(guild_id, streamer_name, channel_id), bot.loop)
+        future = bot_bridge.submit(cog.web_set_config(guild_id, streamer_name, channel_id))
     elif action == 'add_channel':
         streamer_name = request.form.get('streamer_name')
-        future = asyncio.run_coroutine_threadsafe(cog.web_add_channel(guild_id, streamer_name), bot.loop)
+        future = bot_bridge.submit(cog.web_add_channel(guild_id, streamer_name))
     elif action == 'remove_channel':
         streamer_name = request.form.get('streamer_name')
-        future = asyncio.run_coroutine_threadsafe(cog.web_remove_channel(guild_id, streamer_name), bot.loop)
+        future = bot_bridge.submit(cog.web_remove_channel(guild_id, streamer_name))
 
     if future:
         success, message = future.result()
@@ -1618,7 +1829,7 @@ def manage_streak(guild_id):
 
     streaks_for_template = []
     if is_enabled and cog:
-        future = asyncio.run_coroutine_threadsafe(cog.web_get_streaks(guild_id), bot.loop)
+        future = bot_bridge.submit(cog.web_get_streaks(guild_id))
         streaks_for_template = future.result()
 
     return render_template('streak.html',
@@ -1655,37 +1866,37 @@ def manage_twitch_status(guild_id):
         role_id_str = request.form.get('role_id')
         role_id = int(role_id_str) if role_id_str else None
         event_mode = request.form.get('event_mode', 'channel_only')
-        future = asyncio.run_coroutine_threadsafe(cog.web_set_config(guild_id, twitch_user, role_id, event_mode), bot.loop)
+        future = bot_bridge.submit(cog.web_set_config(guild_id, twitch_user, role_id, event_mode))
     elif action == 'add_planned':
         twitch_user = request.form.get('twitch_user')
         start_time = request.form.get('start_time')
         title = request.form.get('title')
-        future = asyncio.run_coroutine_threadsafe(cog.web_add_planned_stream(guild_id, twitch_user, start_time, title), bot.loop)
+        future = bot_bridge.submit(cog.web_add_planned_stream(guild_id, twitch_user, start_time, title))
     elif action == 'edit_planned':
         uid = request.form.get('uid')
         start_time = request.form.get('start_time')
         title = request.form.get('title')
-        future = asyncio.run_coroutine_threadsafe(cog.web_edit_planned_stream(guild_id, uid, start_time, title), bot.loop)
+        future = bot_bridge.submit(cog.web_edit_planned_stream(guild_id, uid, start_time, title))
     elif action == 'remove_planned':
         streamer_key = request.form.get('streamer_key')
-        future = asyncio.run_coroutine_threadsafe(cog.web_remove_planned_stream(guild_id, streamer_key), bot.loop)
+        future = bot_bridge.submit(cog.web_remove_planned_stream(guild_id, streamer_key))
     elif action == 'reset':
-        future = asyncio.run_coroutine_threadsafe(cog.web_reset_config(guild_id), bot.loop)
+        future = bot_bridge.submit(cog.web_reset_config(guild_id))
     elif action == 'remove_streamer':
         streamer_key = request.form.get('streamer_key')
-        future = asyncio.run_coroutine_threadsafe(cog.web_remove_streamer(guild_id, streamer_key), bot.loop)
+        future = bot_bridge.submit(cog.web_remove_streamer(guild_id, streamer_key))
     elif action == 'upload_offline_image':
         streamer_key = request.form.get('streamer_key')
         file = request.files.get('offline_image')
         if file and streamer_key:
             file_bytes = file.read()
-            future = asyncio.run_coroutine_threadsafe(cog.web_upload_offline_image(guild_id, streamer_key, file_bytes), bot.loop)
+            future = bot_bridge.submit(cog.web_upload_offline_image(guild_id, streamer_key, file_bytes))
         else:
             flash("Bitte Streamer-Namen und ein Bild angeben.", "danger")
     elif action == 'remove_offline_image':
         streamer_key = request.form.get('streamer_key')
         if streamer_key:
-            future = asyncio.run_coroutine_threadsafe(cog.web_remove_offline_image(guild_id, streamer_key), bot.loop)
+            future = bot_bridge.submit(cog.web_remove_offline_image(guild_id, streamer_key))
         else:
             flash("Bitte einen Streamer-Namen zum Löschen angeben.", "danger")
 
@@ -1710,7 +1921,8 @@ def manage_wordle(guild_id):
     cog = bot.get_cog('Wordle')
     is_enabled = 'Wordle' in guild_config.get('enabled_cogs', [])
     
-    wordle_config = bot.data.get_guild_data(guild_id, "wordle_game") or {}
+    # Laufender Spielstand liegt im Cog (Write-Behind), sonst direkt aus den Daten
+    wordle_config = cog.get_wordle_config(guild_id) if cog else (bot.data.get_guild_data(guild_id, "wordle_game") or {})
 
     if request.method == 'POST':
         # Erlaube das Speichern auch wenn der Cog noch nicht geladen ist (nach Neustart)
@@ -1731,7 +1943,7 @@ def manage_wordle(guild_id):
                 bot.data.save_guild_data(guild_id, "wordle_game", wordle_config)
                 flash("Kanal gespeichert. Hinweis: Starte den Bot neu, damit das Spiel aktiv wird.", "warning")
             else:
-                future = asyncio.run_coroutine_threadsafe(cog.web_set_config(guild_id, channel_id), bot.loop)
+                future = bot_bridge.submit(cog.web_set_config(guild_id, channel_id))
         
         if future:
             success, message = future.result()
@@ -1777,7 +1989,7 @@ def manage_contexto(guild_id):
                 bot.data.save_guild_data(guild_id, "contexto_game", contexto_config)
                 flash("Kanal gespeichert. Hinweis: Starte den Bot neu, damit das Spiel aktiv wird.", "warning")
             else:
-                future = asyncio.run_coroutine_threadsafe(cog.web_set_config(guild_id, channel_id), bot.loop)
+                future = bot_bridge.submit(cog.web_set_config(guild_id, channel_id))
         
         if future:
             success, message = future.result()
@@ -1818,13 +2030,13 @@ def manage_gatekeeper(guild_id):
     future = None
 
     if action == 'reset':
-        future = asyncio.run_coroutine_threadsafe(cog.web_reset_config(guild_id), bot.loop)
+        future = bot_bridge.submit(cog.web_reset_config(guild_id))
     elif action == 'set_config':
         role_id_str = request.form.get('required_role_id')
         role_id = int(role_id_str) if role_id_str else None
         time_limit = int(request.form.get('time_limit_minutes', 5))
         kick_message = request.form.get('kick_message', "Du wurdest vom Server entfernt, da du die Verifizierung nicht innerhalb der vorgegebenen Zeit abgeschlossen hast.")
-        future = asyncio.run_coroutine_threadsafe(cog.web_set_config(guild_id, role_id, time_limit, kick_message), bot.loop)
+        future = bot_bridge.submit(cog.web_set_config(guild_id, role_id, time_limit, kick_message))
     
     if future:
         success, message = future.result()
@@ -1861,17 +2073,20 @@ def manage_guard(guild_id):
         role_id = int(role_id_str) if role_id_str else None
         log_channel_id_str = request.form.get('log_channel_id')
         log_channel_id = int(log_channel_id_str) if log_channel_id_str else None
+        raid_join_threshold = request.form.get('raid_join_threshold', 10, type=int)
+        raid_window_seconds = request.form.get('raid_window_seconds', 15, type=int)
 
-        future = asyncio.run_coroutine_threadsafe(
+        future = bot_bridge.submit(
             guard_cog.web_set_config(
                 guild_id, 
                 action_type, 
                 account_age_days, 
                 kick_message, 
                 role_id, 
-                log_channel_id
-            ), 
-            bot.loop
+                log_channel_id,
+                raid_join_threshold,
+                raid_window_seconds
+            )
         )
         success, message = future.result()
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -1900,7 +2115,7 @@ def manage_guard(guild_id):
     if gatekeeper_is_enabled:
         gatekeeper_cog = bot.get_cog('Gatekeeper')
         if gatekeeper_cog:
-            future = asyncio.run_coroutine_threadsafe(gatekeeper_cog.web_get_pending_members(guild_id), bot.loop)
+            future = bot_bridge.submit(gatekeeper_cog.web_get_pending_members(guild_id))
             pending_members = future.result()
 
     return render_template('guard.html', guild=guild, admin_guilds=get_admin_guilds(),
@@ -1933,10 +2148,10 @@ def manage_global_ban(guild_id):
 
         log_channel_id_str = request.form.get('log_channel_id')
         log_channel_id = int(log_channel_id_str) if log_channel_id_str else None
+        auto_enforce = 'auto_enforce' in request.form
         
-        future = asyncio.run_coroutine_threadsafe(
-            cog.web_set_config(guild_id, log_channel_id),
-            bot.loop
+        future = bot_bridge.submit(
+            cog.web_set_config(guild_id, log_channel_id, auto_enforce)
         )
         success, message = future.result()
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -1982,9 +2197,8 @@ def manage_onboarding(guild_id):
         log_channel_id = int(log_channel_id_str) if log_channel_id_str else None
 
         # Call cog method
-        future = asyncio.run_coroutine_threadsafe(
-            cog.web_set_config(guild_id, join_role_ids, verified_role_ids, auto_twitch_on_join, auto_twitch_on_verify, log_channel_id),
-            bot.loop
+        future = bot_bridge.submit(
+            cog.web_set_config(guild_id, join_role_ids, verified_role_ids, auto_twitch_on_join, auto_twitch_on_verify, log_channel_id)
         )
         success, message = future.result()
 
@@ -2034,9 +2248,11 @@ def manage_logging(guild_id):
                     pass
 
         retention_days = int(request.form.get('retention_days', 30))
+        archive_enabled = request.form.get('archive_enabled') == 'on'
+        archive_months = int(request.form.get('archive_months', 12))
 
         # Call cog method
-        future = asyncio.run_coroutine_threadsafe(
+        future = bot_bridge.submit(
             cog.web_set_config(guild_id, {
                 'destination_type': destination_type,
                 'use_dashboard_forum': use_dashboard_forum,
@@ -2044,9 +2260,10 @@ def manage_logging(guild_id):
                 'enabled_events': enabled_events,
                 'ignored_channels': ignored_channels,
                 'ignored_users': ignored_users,
-                'retention_days': retention_days
-            }),
-            bot.loop
+                'retention_days': retention_days,
+                'archive_enabled': archive_enabled,
+                'archive_months': archive_months
+            })
         )
         success, message = future.result()
 
@@ -2058,10 +2275,18 @@ def manage_logging(guild_id):
 
     # GET request
     logging_config = bot.data.get_guild_data(guild_id, "logging")
+    storage_info = None
+    if cog:
+        storage_info = {
+            'db_size_mb': round(cog.log_storage.get_db_size(guild_id) / (1024 * 1024), 2),
+            'archive_size_mb': round(cog.log_archive.get_size(guild_id) / (1024 * 1024), 2),
+            'archive_months': cog.log_archive.months(guild_id),
+        }
     return render_template('logging.html',
                          guild=guild,
                          logging_is_enabled=is_enabled,
-                         logging_config=logging_config)
+                         logging_config=logging_config,
+                         storage_info=storage_info)
 
 @app.route('/guild/<int:guild_id>/dashboard_cog', methods=['GET', 'POST'])
 @requires_authorization
@@ -2085,7 +2310,7 @@ def manage_dashboard_cog(guild_id):
         future = None
 
         if action == 'sync_forum':
-            future = asyncio.run_coroutine_threadsafe(cog.web_on_enable(guild_id), bot.loop)
+            future = bot_bridge.submit(cog.web_on_enable(guild_id))
         elif action == 'set_config':
             mod_role_ids = [int(rid) for rid in request.form.getlist('mod_role_ids') if rid.isdigit()]
             log_channel_id_str = request.form.get('log_channel_id')
@@ -2094,7 +2319,7 @@ def manage_dashboard_cog(guild_id):
             category_id = int(category_id_str) if category_id_str and category_id_str.isdigit() else None
             streamer_role_id_str = request.form.get('streamer_role_id')
             streamer_role_id = int(streamer_role_id_str) if streamer_role_id_str and streamer_role_id_str.isdigit() else None
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_config(guild_id, mod_role_ids, log_channel_id, category_id, streamer_role_id), bot.loop)
+            future = bot_bridge.submit(cog.web_set_config(guild_id, mod_role_ids, log_channel_id, category_id, streamer_role_id))
 
         if future:
             success, message = future.result()
@@ -2150,15 +2375,18 @@ def view_logs(guild_id):
     if event_type:
         filters['event_type'] = event_type
 
-    # User search filter
+    # User search filter (ID exakt, Namen über den Volltextindex in SQL)
     user_search = request.args.get('user_search', '').strip()
     if user_search:
-        try:
-            user_id = int(user_search)
-            filters['user_id'] = str(user_id)
-        except ValueError:
-            # Try searching by name (will need to search all logs and filter)
-            pass
+        if user_search.isdigit():
+            filters['user_id'] = user_search
+        else:
+            filters['name_search'] = user_search
+
+    # Freitextsuche über Namen und Werte (vorher/nachher)
+    text_search = request.args.get('q', '').strip()
+    if text_search:
+        filters['search'] = text_search
 
     # Days filter
     days = request.args.get('days')
@@ -2174,29 +2402,43 @@ def view_logs(guild_id):
         limit = int(limit)
     except ValueError:
         limit = 25
+    limit = max(1, min(limit, 100))
 
-    # Get logs from storage
-    logs = logging_cog.log_storage.get_logs(guild_id, filters=filters, limit=limit)
+    # Keyset-Pagination: nur Logs älter als die zuletzt angezeigte ID
+    before_id = request.args.get('before_id', type=int)
 
-    # If user search was by name, filter in Python
-    if user_search:
-        try:
-            int(user_search)
-        except ValueError:
-            # Filter by name
-            logs = [log for log in logs if user_search.lower() in (log.get('user_name', '') or '').lower()]
+    # Monatsarchiv statt Datenbank durchsuchen (abgelaufene Logs)
+    archive_months = logging_cog.log_archive.months(guild_id)
+    archive_month = request.args.get('archive', '')
+    if archive_month not in archive_months:
+        archive_month = ''
 
-    # Convert sqlite3.Row to dict if needed
-    logs_list = [dict(log) for log in logs]
+    # Einen Eintrag mehr holen, um zu wissen, ob es eine weitere Seite gibt
+    if archive_month:
+        filters.pop('days', None)
+        logs = logging_cog.log_archive.query(guild_id, archive_month, filters=filters, limit=limit + 1, before_id=before_id)
+    else:
+        logs = logging_cog.log_storage.get_logs(guild_id, filters=filters, limit=limit + 1, before_id=before_id)
+    next_before_id = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_before_id = logs[-1]['id']
 
-    # Get total count
-    stats = logging_cog.log_storage.get_stats(guild_id)
-    total_logs = stats.get('total_logs', 0)
+    # Get total count (aus den gepflegten Zählern, ohne Tabellenscan)
+    total_logs = logging_cog.log_storage.count_logs(guild_id, event_type or None)
+
+    # Query-Parameter für die Seitenlinks (ohne Cursor)
+    page_args = {k: v for k, v in request.args.items() if k != 'before_id' and v}
 
     return render_template('logs_viewer.html',
                          guild=guild,
-                         logs=logs_list,
-                         total_logs=total_logs)
+                         logs=logs,
+                         total_logs=total_logs,
+                         next_before_id=next_before_id,
+                         is_paged=before_id is not None,
+                         page_args=page_args,
+                         archive_months=archive_months,
+                         archive_month=archive_month)
 
 @app.route('/guild/<int:guild_id>/wrapped', methods=['GET', 'POST'])
 @requires_authorization
@@ -2220,27 +2462,27 @@ def manage_wrapped(guild_id):
         
         if action == 'toggle_commands':
             enabled = request.form.get('enabled') == 'True'
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_command_status(guild_id, enabled), bot.loop)
+            future = bot_bridge.submit(cog.web_set_command_status(guild_id, enabled))
         
         elif action == 'send_button':
             channel_id_str = request.form.get('channel_id')
             custom_text = request.form.get('custom_text', 'Schau dir jetzt deinen persönlichen Jahresrückblick an!')
             if channel_id_str:
-                future = asyncio.run_coroutine_threadsafe(cog.web_send_wrapped_button(guild_id, int(channel_id_str), custom_text), bot.loop)
+                future = bot_bridge.submit(cog.web_send_wrapped_button(guild_id, int(channel_id_str), custom_text))
             else:
                 flash("Kein Kanal ausgewählt.", "danger")
                 return redirect(url_for('manage_wrapped', guild_id=guild_id))
 
         elif action == 'create_snapshot':
-            future = asyncio.run_coroutine_threadsafe(cog.web_create_snapshot(guild_id), bot.loop)
+            future = bot_bridge.submit(cog.web_create_snapshot(guild_id))
         
         elif action == 'toggle_web_links':
             enabled = request.form.get('enabled') == 'True'
-            future = asyncio.run_coroutine_threadsafe(cog.web_toggle_web_links(guild_id, enabled), bot.loop)
+            future = bot_bridge.submit(cog.web_toggle_web_links(guild_id, enabled))
 
         elif action == 'set_web_base_url':
             url = request.form.get('web_base_url')
-            future = asyncio.run_coroutine_threadsafe(cog.web_set_base_url(guild_id, url), bot.loop)
+            future = bot_bridge.submit(cog.web_set_base_url(guild_id, url))
 
         if future:
             success, message = future.result()
@@ -2255,15 +2497,15 @@ def manage_wrapped(guild_id):
 
     if cog:
         # Config laden
-        future_cfg = asyncio.run_coroutine_threadsafe(cog.web_get_config(guild_id), bot.loop)
+        future_cfg = bot_bridge.submit(cog.web_get_config(guild_id))
         wrapped_config = future_cfg.result()
 
         # Live Stats laden
-        future_live = asyncio.run_coroutine_threadsafe(cog.web_get_live_stats(guild_id), bot.loop)
+        future_live = bot_bridge.submit(cog.web_get_live_stats(guild_id))
         server_stats = future_live.result()
 
         # Snapshot Info laden
-        future_snap = asyncio.run_coroutine_threadsafe(cog.web_get_snapshot_info(guild_id), bot.loop)
+        future_snap = bot_bridge.submit(cog.web_get_snapshot_info(guild_id))
         snapshot_info = future_snap.result()
 
     return render_template('wrapped.html', 
@@ -2420,9 +2662,8 @@ def manage_moderation(guild_id):
         if action == 'toggle_command':
             command_name = request.form.get('command_name')
             
-            future = asyncio.run_coroutine_threadsafe(
-                cog.web_toggle_command(guild.id, command_name),
-                bot.loop
+            future = bot_bridge.submit(
+                cog.web_toggle_command(guild.id, command_name)
             )
             success, message = future.result()
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -2498,7 +2739,8 @@ async def on_ready():
         'cogs.twitch_live_alert', 'cogs.temp_channel', 'cogs.twitch_clips', 'cogs.streak',
         'cogs.gatekeeper', 'cogs.guard', 'cogs.global_ban', 'cogs.maintenance', 'cogs.wrapped',
         'cogs.lfg', 'cogs.monthly_stats', 'cogs.leaderboard_display', 'cogs.wordle', 'cogs.contexto', 'cogs.info',
-        'cogs.twitch_chat_bot', 'cogs.backup', 'cogs.onboarding', 'cogs.logging', 'cogs.dashboard'
+        'cogs.twitch_chat_bot', 'cogs.backup', 'cogs.onboarding', 'cogs.logging', 'cogs.dashboard',
+        'cogs.state_snapshot'
     ]
     
     print(f" 📦 Lade {len(cogs_to_load)} Erweiterungen...")
@@ -2563,9 +2805,8 @@ def manage_lfg(guild_id):
             display_mode = request.form.get('display_mode', 'classic')
             lfg_forum_id = int(request.form.get('lfg_forum_id')) if request.form.get('lfg_forum_id') else None
             
-            future = asyncio.run_coroutine_threadsafe(
-                cog.web_set_config(guild_id, start_channel_id, lobby_channel_id, participation_role_id, max_searches, display_mode, lfg_forum_id),
-                bot.loop
+            future = bot_bridge.submit(
+                cog.web_set_config(guild_id, start_channel_id, lobby_channel_id, participation_role_id, max_searches, display_mode, lfg_forum_id)
             )
 
         if future:
@@ -2639,9 +2880,8 @@ def manage_leaderboard_settings(guild_id):
                 flash(msg, "danger")
                 return redirect(url_for('manage_leaderboard_settings', guild_id=guild_id))
             
-            future = asyncio.run_coroutine_threadsafe(
-                cog.web_setup_leaderboard(guild_id, channel_id),
-                bot.loop
+            future = bot_bridge.submit(
+                cog.web_setup_leaderboard(guild_id, channel_id)
             )
             
             try:
@@ -2649,6 +2889,8 @@ def manage_leaderboard_settings(guild_id):
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                     return jsonify({'success': success, 'message': message})
                 flash(message, "success" if success else "danger")
+            except (BridgeBusyError, concurrent.futures.TimeoutError):
+                raise
             except Exception as e:
                 msg = f"Fehler: {str(e)}"
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -2691,81 +2933,11 @@ def manage_leaderboard_settings(guild_id):
             leaderboard_type = request.form.get('leaderboard_type', 'messages')
             
             try:
-                # Get leaderboard data
                 import datetime
                 now = datetime.datetime.now()
-                current_month = now.strftime('%Y-%m')
-                
-                leaderboard = []
-                title = ""
+                title = board_title(leaderboard_type)
                 description = "Alle Channels"
-
-                if leaderboard_type == 'messages':
-                    title = "🗨️ Meiste Nachrichten - Monatlich"
-                    monthly_stats = bot.data.get_guild_data(guild_id, "monthly_stats")
-                    month_data = monthly_stats.get(current_month, {})
-                    
-                    for user_id_str, user_data in month_data.items():
-                        if not user_id_str.isdigit():
-                            continue
-                        member = guild.get_member(int(user_id_str))
-                        if not member:
-                            continue
-                        
-                        msg_count = user_data.get('total_messages', 0)
-                        if msg_count > 0:
-                            leaderboard.append({'member': member, 'value': msg_count})
-
-                elif leaderboard_type == 'level':
-                    title = "⭐ Höchstes Level - Allzeit"
-                    users_data = bot.data.get_guild_data(guild_id, "level_users")
-                    
-                    for user_id_str, user_data in users_data.items():
-                        if not user_id_str.isdigit():
-                            continue
-                        member = guild.get_member(int(user_id_str))
-                        if not member:
-                            continue
-                        
-                        leaderboard.append({
-                            'member': member,
-                            'value': user_data.get('level', 0),
-                            'xp': user_data.get('xp', 0)
-                        })
-
-                elif leaderboard_type == 'streak_current':
-                    title = "🔥 Längste aktive Streak"
-                    guild_streaks = bot.data.get_guild_data(guild_id, "streaks")
-                    
-                    for user_id_str, data in guild_streaks.items():
-                        if not user_id_str.isdigit():
-                            continue
-                        member = guild.get_member(int(user_id_str))
-                        if not member:
-                            continue
-                        
-                        current_streak = data.get('current_streak', 0)
-                        if current_streak > 0:
-                            leaderboard.append({'member': member, 'value': current_streak})
-
-                elif leaderboard_type == 'streak_alltime':
-                    title = "🏆 Längste Streak (Allzeit)"
-                    guild_streaks = bot.data.get_guild_data(guild_id, "streaks")
-                    
-                    for user_id_str, data in guild_streaks.items():
-                        if not user_id_str.isdigit():
-                            continue
-                        member = guild.get_member(int(user_id_str))
-                        if not member:
-                            continue
-                        
-                        max_streak = data.get('max_streak_ever', 0)
-                        if max_streak > 0:
-                            leaderboard.append({'member': member, 'value': max_streak})
-
-                # Sort and limit
-                leaderboard.sort(key=lambda x: x['value'], reverse=True)
-                leaderboard = leaderboard[:20]
+                leaderboard = bot.leaderboards.get_top(guild, leaderboard_type, 20)
 
                 if not leaderboard:
                     msg = "Keine Daten für dieses Leaderboard verfügbar!"
@@ -2789,11 +2961,11 @@ def manage_leaderboard_settings(guild_id):
                     medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"{idx}."
                     
                     if leaderboard_type == 'messages':
-                        leaderboard_text += f"{medal} **{entry['member'].display_name}** - {entry['value']:,} Nachrichten\n"
+                        leaderboard_text += f"{medal} **{entry.member.display_name}** - {entry.value:,} Nachrichten\n"
                     elif leaderboard_type == 'level':
-                        leaderboard_text += f"{medal} **{entry['member'].display_name}** - Level {entry['value']} ({entry['xp']:,} XP)\n"
+                        leaderboard_text += f"{medal} **{entry.member.display_name}** - Level {entry.value} ({entry.xp:,} XP)\n"
                     elif leaderboard_type == 'streak_current' or leaderboard_type == 'streak_alltime':
-                        leaderboard_text += f"{medal} **{entry['member'].display_name}** - {entry['value']} Tage\n"
+                        leaderboard_text += f"{medal} **{entry.member.display_name}** - {entry.value} Tage\n"
 
                 embed.add_field(name="Rangliste", value=leaderboard_text or "Keine Einträge", inline=False)
                 embed.set_footer(text=f"{guild.name} • {now.strftime('%d.%m.%Y %H:%M')}")
@@ -2802,7 +2974,7 @@ def manage_leaderboard_settings(guild_id):
                 async def send_embed():
                     await channel.send(embed=embed)
 
-                future = asyncio.run_coroutine_threadsafe(send_embed(), bot.loop)
+                future = bot_bridge.submit(send_embed())
                 future.result(timeout=10)
 
                 msg = f"✅ Leaderboard wurde in #{channel.name} gepostet!"
@@ -2810,6 +2982,8 @@ def manage_leaderboard_settings(guild_id):
                     return jsonify({'success': True, 'message': msg})
                 flash(msg, "success")
 
+            except (BridgeBusyError, concurrent.futures.TimeoutError):
+                raise
             except Exception as e:
                 print(f"Error posting leaderboard: {e}")
                 import traceback
@@ -2835,7 +3009,7 @@ def view_leaderboards(guild_id):
         flash("Du hast keine Berechtigung für diesen Server.", "danger")
         return redirect(url_for('dashboard'))
 
-    guild = bot.get_guild(guild_id)
+    guild = get_guild_view(guild_id)
     if not guild:
         flash("Server nicht gefunden.", "danger")
         return redirect(url_for('dashboard'))
@@ -2867,102 +3041,19 @@ def get_leaderboards_data(guild_id):
     leaderboard_type = request.args.get('type', 'messages')
 
     try:
-        import datetime
-        now = datetime.datetime.now()
-        current_month = now.strftime('%Y-%m')
-        
+        # Nachrichten immer monatlich, Level und Streaks allzeit
+        board_type = 'channel_messages' if leaderboard_type == 'messages' and channel_id else leaderboard_type
         leaderboard = []
-
-        if leaderboard_type == 'messages':
-            # Message count leaderboard (ALWAYS monthly)
-            monthly_stats = bot.data.get_guild_data(guild_id, "monthly_stats")
-            month_data = monthly_stats.get(current_month, {})
-            
-            for user_id_str, user_data in month_data.items():
-                if not user_id_str.isdigit():
-                    continue
-                
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                # Filter by channel if specified
-                if channel_id:
-                    msg_count = user_data.get('channels', {}).get(str(channel_id), 0)
-                else:
-                    msg_count = user_data.get('total_messages', 0)
-                
-                if msg_count > 0:
-                    leaderboard.append({
-                        'name': member.display_name,
-                        'avatar_url': str(member.display_avatar.url),
-                        'value': msg_count
-                    })
-
-        elif leaderboard_type == 'level':
-            # Level leaderboard (ALWAYS all-time from level system)
-            users_data = bot.data.get_guild_data(guild_id, "level_users")
-            
-            for user_id_str, user_data in users_data.items():
-                if not user_id_str.isdigit():
-                    continue
-                
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                leaderboard.append({
-                    'name': member.display_name,
-                    'avatar_url': str(member.display_avatar.url),
-                    'level': user_data.get('level', 0),
-                    'xp': user_data.get('xp', 0),
-                    'value': user_data.get('level', 0)
-                })
-
-        elif leaderboard_type == 'streak_current':
-            # Current active streak leaderboard
-            guild_streaks = bot.data.get_guild_data(guild_id, "streaks")
-            for user_id_str, data in guild_streaks.items():
-                if not user_id_str.isdigit():
-                    continue
-                
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                current_streak = data.get('current_streak', 0)
-                if current_streak > 0:
-                    leaderboard.append({
-                        'name': member.display_name,
-                        'avatar_url': str(member.display_avatar.url),
-                        'value': current_streak
-                    })
-
-        elif leaderboard_type == 'streak_alltime':
-            # All-time longest streak leaderboard (includes past streaks)
-            guild_streaks = bot.data.get_guild_data(guild_id, "streaks")
-            for user_id_str, data in guild_streaks.items():
-                if not user_id_str.isdigit():
-                    continue
-                
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                max_streak = data.get('max_streak_ever', 0)
-                if max_streak > 0:
-                    leaderboard.append({
-                        'name': member.display_name,
-                        'avatar_url': str(member.display_avatar.url),
-                        'value': max_streak
-                    })
-
-
-        # Sort leaderboard by value (descending)
-        leaderboard.sort(key=lambda x: x['value'], reverse=True)
-        
-        # Limit to top 50
-        leaderboard = leaderboard[:50]
+        for entry in bot.leaderboards.get_top(guild, board_type, 50, channel_id=channel_id):
+            item = {
+                'name': entry.member.display_name,
+                'avatar_url': str(entry.member.display_avatar.url),
+                'value': entry.value
+            }
+            if board_type == 'level':
+                item['level'] = entry.value
+                item['xp'] = entry.xp
+            leaderboard.append(item)
 
         return jsonify({
             'leaderboard': leaderboard,
@@ -3000,100 +3091,22 @@ def post_leaderboard_to_channel(guild_id):
         if not channel:
             return jsonify({"error": "Channel not found"}), 404
 
-        # Get leaderboard data
         import datetime
         now = datetime.datetime.now()
-        current_month = now.strftime('%Y-%m')
-        
-        leaderboard = []
-        title = ""
+        title = board_title(leaderboard_type)
         description = ""
+        board_type = leaderboard_type
 
         if leaderboard_type == 'messages':
-            title = "🗨️ Meiste Nachrichten - Monatlich"
-            monthly_stats = bot.data.get_guild_data(guild_id, "monthly_stats")
-            month_data = monthly_stats.get(current_month, {})
-            
-            for user_id_str, user_data in month_data.items():
-                if not user_id_str.isdigit():
-                    continue
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                if filter_channel_id:
-                    msg_count = user_data.get('channels', {}).get(str(filter_channel_id), 0)
-                else:
-                    msg_count = user_data.get('total_messages', 0)
-                
-                if msg_count > 0:
-                    leaderboard.append({
-                        'member': member,
-                        'value': msg_count
-                    })
-            
             if filter_channel_id:
+                board_type = 'channel_messages'
                 filter_ch = guild.get_channel(filter_channel_id)
                 description = f"Nachrichten in #{filter_ch.name if filter_ch else 'unbekannt'}"
             else:
                 description = "Alle Channels"
 
-        elif leaderboard_type == 'level':
-            title = "⭐ Höchstes Level - Allzeit"
-            users_data = bot.data.get_guild_data(guild_id, "level_users")
-            
-            for user_id_str, user_data in users_data.items():
-                if not user_id_str.isdigit():
-                    continue
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                leaderboard.append({
-                    'member': member,
-                    'value': user_data.get('level', 0),
-                    'xp': user_data.get('xp', 0)
-                })
-
-        elif leaderboard_type == 'streak_current':
-            title = "🔥 Längste aktive Streak"
-            guild_streaks = bot.data.get_guild_data(guild_id, "streaks")
-            
-            for user_id_str, data in guild_streaks.items():
-                if not user_id_str.isdigit():
-                    continue
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                current_streak = data.get('current_streak', 0)
-                if current_streak > 0:
-                    leaderboard.append({
-                        'member': member,
-                        'value': current_streak
-                    })
-
-        elif leaderboard_type == 'streak_alltime':
-            title = "🏆 Längste Streak (Allzeit)"
-            guild_streaks = bot.data.get_guild_data(guild_id, "streaks")
-            
-            for user_id_str, data in guild_streaks.items():
-                if not user_id_str.isdigit():
-                    continue
-                member = guild.get_member(int(user_id_str))
-                if not member:
-                    continue
-                
-                max_streak = data.get('max_streak_ever', 0)
-                if max_streak > 0:
-                    leaderboard.append({
-                        'member': member,
-                        'value': max_streak
-                    })
-
-        # Sort and limit
-        leaderboard.sort(key=lambda x: x['value'], reverse=True)
-        leaderboard = leaderboard[:20]  # Top 20 for Discord message
+        # Top 20 for Discord message
+        leaderboard = bot.leaderboards.get_top(guild, board_type, 20, channel_id=filter_channel_id)
 
         if not leaderboard:
             return jsonify({"error": "Keine Daten verfügbar"}), 400
@@ -3113,11 +3126,11 @@ def post_leaderboard_to_channel(guild_id):
             medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"{idx}."
             
             if leaderboard_type == 'messages':
-                leaderboard_text += f"{medal} **{entry['member'].display_name}** - {entry['value']:,} Nachrichten\n"
+                leaderboard_text += f"{medal} **{entry.member.display_name}** - {entry.value:,} Nachrichten\n"
             elif leaderboard_type == 'level':
-                leaderboard_text += f"{medal} **{entry['member'].display_name}** - Level {entry['value']} ({entry['xp']:,} XP)\n"
+                leaderboard_text += f"{medal} **{entry.member.display_name}** - Level {entry.value} ({entry.xp:,} XP)\n"
             elif leaderboard_type == 'streak_current' or leaderboard_type == 'streak_alltime':
-                leaderboard_text += f"{medal} **{entry['member'].display_name}** - {entry['value']} Tage\n"
+                leaderboard_text += f"{medal} **{entry.member.display_name}** - {entry.value} Tage\n"
 
         embed.add_field(name="Rangliste", value=leaderboard_text or "Keine Einträge", inline=False)
         embed.set_footer(text=f"{guild.name} • {now.strftime('%d.%m.%Y %H:%M')}")
@@ -3126,11 +3139,13 @@ def post_leaderboard_to_channel(guild_id):
         async def send_embed():
             await channel.send(embed=embed)
 
-        future = asyncio.run_coroutine_threadsafe(send_embed(), bot.loop)
+        future = bot_bridge.submit(send_embed())
         future.result(timeout=10)
 
         return jsonify({"success": True})
 
+    except (BridgeBusyError, concurrent.futures.TimeoutError):
+        raise
     except Exception as e:
         print(f"Error posting leaderboard: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -3421,10 +3436,16 @@ if __name__ == "__main__":
         # Apply ProxyFix to handle Cloudflare headers correctly
         app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
         
-        port = 5000
-        print(f"Flask startet auf Port {port}...")
+        port = WEB_PORT
         try:
-            app.run(port=port, host="0.0.0.0", debug=False, use_reloader=False)
+            if WEB_SERVER_MODE == "waitress":
+                print(f"Webserver (waitress, {WEB_THREADS} Threads) startet auf Port {port}...")
+                waitress_serve(app, host="0.0.0.0", port=port, threads=WEB_THREADS, ident="L8teBot")
+            else:
+                if str(config.get("WEB_SERVER") or "waitress").lower() == "waitress":
+                    print("⚠️ waitress ist nicht installiert, nutze den Flask-Entwicklungsserver.")
+                print(f"Flask startet auf Port {port}...")
+                app.run(port=port, host="0.0.0.0", debug=False, use_reloader=False, threaded=True)
         except Exception as e:
             print(f"⚠️ Webserver konnte nicht starten (evtl. Port belegt): {e}")
 
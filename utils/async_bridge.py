@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+# Standard-Timeout, wenn ein Request-Thread auf das Ergebnis wartet (Sekunden)
+BRIDGE_DEFAULT_TIMEOUT = 60
+# Maximale Anzahl gleichzeitig offener Aufrufe aus dem Webserver in den Bot-Loop
+BRIDGE_MAX_PENDING = 32
+# So lange wartet ein Request auf einen freien Platz, bevor er abgewiesen wird (Sekunden)
+BRIDGE_ACQUIRE_TIMEOUT = 5
+
+
+class BridgeBusyError(Exception):
+    """Der Bot-Loop hat zu viele offene Aufrufe aus dem Webserver."""
+
+
+class BridgeFuture:
+    """
+    Hülle um concurrent.futures.Future mit Standard-Timeout.
+    Läuft der Timeout ab, hört der Request auf zu warten; die Coroutine läuft im Bot-Loop
+    zu Ende, damit schreibende web_*-Aufrufe nicht mitten in einer Änderung abbrechen.
+    Nur rein lesende Aufrufe (cancel_on_timeout) werden abgebrochen.
+    """
+    __slots__ = ('_future', '_bridge', '_cancel_on_timeout')
+
+    def __init__(self, future: concurrent.futures.Future, bridge: "AsyncBridge", cancel_on_timeout: bool = False):
+        self._future = future
+        self._bridge = bridge
+        self._cancel_on_timeout = cancel_on_timeout
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        try:
+            return self._future.result(timeout=timeout if timeout is not None else self._bridge.default_timeout)
+        except concurrent.futures.TimeoutError:
+            if self._cancel_on_timeout:
+                self._future.cancel()
+            self._bridge._count('timeouts')
+            raise
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancel(self) -> bool:
+        return self._future.cancel()
+
+
+class AsyncBridge:
+    """
+    Einziger Weg vom Webserver in den Bot-Loop.
+
+    Begrenzt die Zahl gleichzeitig offener Coroutines (Backpressure): Ist der Loop
+    ausgelastet, warten neue Requests kurz und werden dann mit BridgeBusyError abgewiesen,
+    statt sich unbegrenzt im Loop zu stapeln und den Gateway-Heartbeat zu verzögern.
+    """
+
+    def __init__(self, get_loop: Callable[[], asyncio.AbstractEventLoop],
+                 max_pending: int = BRIDGE_MAX_PENDING, default_timeout: float = BRIDGE_DEFAULT_TIMEOUT):
+        self._get_loop = get_loop
+        self.max_pending = max_pending
+        self.default_timeout = default_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._stats = {'pending': 0, 'submitted': 0, 'rejected': 0, 'timeouts': 0}
+
+    def _count(self, key: str, delta: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += delta
+
+    def _release(self, _future) -> None:
+        self._count('pending', -1)
+        self._slots.release()
+
+    def submit(self, coro: Coroutine, cancel_on_timeout: bool = False) -> BridgeFuture:
+        """
+        Plant die Coroutine im Bot-Loop ein; .result() wartet mit Timeout.
+        cancel_on_timeout nur für Aufrufe setzen, die nichts verändern.
+        """
+        if not self._slots.acquire(timeout=BRIDGE_ACQUIRE_TIMEOUT):
+            coro.close()
+            self._count('rejected')
+            raise BridgeBusyError("Der Bot ist gerade ausgelastet. Bitte versuche es gleich erneut.")
+        try:
+            future = asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+        except Exception:
+            coro.close()
+            self._slots.release()
+            raise
+        self._count('pending')
+        self._count('submitted')
+        future.add_done_callback(self._release)
+        return BridgeFuture(future, self, cancel_on_timeout)
+
+    def call(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        return self.submit(coro).result(timeout)
+
+    def measure_loop_lag(self, timeout: float = 2.0) -> float:
+        """Rundlaufzeit eines leeren Aufrufs in Millisekunden (umgeht die Backpressure)."""
+        start = time.monotonic()
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), self._get_loop()).result(timeout=timeout)
+        return (time.monotonic() - start) * 1000
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, max_pending=self.max_pending)
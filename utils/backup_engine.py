@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import io
+import json
+import os
+import threading
+import zipfile
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Any
+from utils.config import DATA_DIR
+
+# Liegt im Daten-Volume, damit er Neustarts übersteht. Der Admin-Download/-Restore von data/
+# lässt ihn deshalb aus bzw. unangetastet.
+BACKUP_STORE_DIR_NAME = "backup_store"
+BACKUP_STORE_DIR = os.path.join(DATA_DIR, BACKUP_STORE_DIR_NAME)
+MANIFEST_FILENAME = "backup_manifest.json"
+
+# Dateien werden in Blöcke dieser Größe zerlegt und einzeln per SHA-256 abgelegt
+CHUNK_SIZE = 1024 * 1024
+# Anzahl der Manifeste, die pro Guild lokal aufbewahrt werden
+MANIFESTS_TO_KEEP = 30
+# So lange wartet collect_garbage auf noch nicht übernommene Backup-Stände, sonst wird es verschoben (Sekunden)
+GC_WAIT_TIMEOUT = 300
+
+
+class Snapshot:
+    """Ergebnis eines Backup-Laufs: Manifest plus ZIP (nur geänderte Dateien) im Speicher."""
+    __slots__ = ('manifest', 'archive', 'changed_files', 'total_files', 'new_chunks', 'open')
+
+    def __init__(self, manifest: Dict[str, Any], archive: bytes, changed_files: List[str], new_chunks: int):
+        self.manifest = manifest
+        self.archive = archive
+        self.changed_files = changed_files
+        self.total_files = len(manifest['files'])
+        self.new_chunks = new_chunks
+        # Bis commit()/discard() hält der Stand Blöcke, die noch kein Manifest referenziert
+        self.open = True
+
+    @property
+    def is_full(self) -> bool:
+        return self.manifest['full']
+
+
+class BackupEngine:
+    """
+    Inkrementelle, deduplizierte Backups.
+
+    Jede Datei wird in Blöcke zerlegt, die unter ihrem SHA-256 komprimiert im lokalen
+    Speicher (data/backup_store/chunks) liegen. Ein Backup-Lauf erzeugt nur ein kleines
+    Manifest; neue Blöcke entstehen nur für tatsächlich geänderte Daten. Unveränderte
+    Dateien (gleiche Größe und mtime) werden gar nicht erst gelesen.
+
+    Alle Methoden sind blockierend und sollten per asyncio.to_thread aufgerufen werden.
+    collect_garbage läuft nur, solange kein Backup-Stand zwischen create_snapshot und
+    commit/discard offen ist, und blockiert währenddessen neue Läufe.
+    """
+
+    def __init__(self, store_dir: str = BACKUP_STORE_DIR):
+        self.store_dir = store_dir
+        self.chunks_dir = os.path.join(store_dir, "chunks")
+        self.manifests_dir = os.path.join(store_dir, "manifests")
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        self._gc_condition = threading.Condition()
+        self._open_snapshots = 0
+        self._collecting = False
+
+    # --- Blockspeicher ---
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+    def has_chunk(self, digest: str) -> bool:
+        return os.path.exists(self._chunk_path(digest))
+
+    def _store_chunk(self, digest: str, data: bytes) -> bool:
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(zlib.compress(data, 6))
+        os.replace(temp_path, path)
+        return True
+
+    def read_chunk(self, digest: str) -> bytes:
+        with open(self._chunk_path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    def iter_file(self, file_entry: Dict[str, Any]) -> Iterator[bytes]:
+        """Setzt eine Datei aus dem Manifest blockweise wieder zusammen."""
+        for digest in file_entry['chunks']:
+            yield self.read_chunk(digest)
+
+    # --- Manifeste ---
+
+    def _guild_manifest_dir(self, guild_id: int) -> str:
+        path = os.path.join(self.manifests_dir, str(guild_id))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def list_manifests(self, guild_id: int) -> List[str]:
+        """Manifest-IDs der Guild, älteste zuerst."""
+        return sorted(f[:-5] for f in os.listdir(self._guild_manifest_dir(guild_id)) if f.endswith('.json'))
+
+    def load_manifest(self, guild_id: int, manifest_id: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self._guild_manifest_dir(guild_id), f"{manifest_id}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def latest_manifest(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        """Letztes Manifest, dessen Blöcke noch vollständig vorhanden sind."""
+        for manifest_id in reversed(self.list_manifests(guild_id)):
+            manifest = self.load_manifest(guild_id, manifest_id)
+            if manifest and all(self.has_chunk(d) for entry in manifest['files'].values() for d in entry['chunks']):
+                return manifest
+        return None
+
+    def _save_manifest(self, guild_id: int, manifest: Dict[str, Any]) -> None:
+        path = os.path.join(self._guild_manifest_dir(guild_id), f"{manifest['id']}.json")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, path)
+
+    # --- Backup ---
+
+    def _hash_file(self, path: str) -> Tuple[List[str], str, int]:
+        """Zerlegt eine Datei in Blöcke. Gibt Block-Hashes, Datei-Hash und Anzahl neuer Blöcke zurück."""
+        chunks = []
+        file_hash = hashlib.sha256()
+        new_chunks = 0
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(CHUNK_SIZE)
+                if not data:
+                    break
+                digest = hashlib.sha256(data).hexdigest()
+                if self._store_chunk(digest, data):
+                    new_chunks += 1
+                chunks.append(digest)
+                file_hash.update(data)
+        return chunks, file_hash.hexdigest(), new_chunks
+
+    def create_snapshot(self, guild_id: int, source_dir: str, full: bool = False,
+                        extra_files: Optional[Dict[str, str]] = None,
+                        exclude: Optional[Set[str]] = None) -> Snapshot:
+        """
+        Erstellt einen Backup-Stand der Guild.
+
+        Args:
+            guild_id: Discord Guild ID
+            source_dir: Datenverzeichnis der Guild
+            full: Alle Dateien ins Archiv packen, nicht nur geänderte
+            extra_files: {Archivpfad: Dateipfad}, ersetzt bzw. ergänzt Dateien aus source_dir
+                         (z.B. ein konsistenter Snapshot von logs.db)
+            exclude: Archivpfade, die in diesem Lauf übersprungen, aber nicht als gelöscht gelten
+        """
+        with self._gc_condition:
+            self._gc_condition.wait_for(lambda: not self._collecting)
+            self._open_snapshots += 1
+        try:
+            return self._create_snapshot(guild_id, source_dir, full, extra_files, exclude)
+        except BaseException:
+            self._release()
+            raise
+
+    def _create_snapshot(self, guild_id: int, source_dir: str, full: bool,
+                         extra_files: Optional[Dict[str, str]], exclude: Optional[Set[str]]) -> Snapshot:
+        previous = self.latest_manifest(guild_id)
+        previous_files = previous['files'] if previous else {}
+        full = full or previous is None
+        exclude = exclude or set()
+
+        sources: Dict[str, str] = {}
+        for root, _dirs, files in os.walk(source_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                rel_path = os.path.relpath(path, source_dir).replace(os.sep, '/')
+                if rel_path not in exclude:
+                    sources[rel_path] = path
+        if extra_files:
+            sources.update(extra_files)
+
+        files: Dict[str, Dict[str, Any]] = {}
+        changed: List[str] = []
+        new_chunks = 0
+        for rel_path in sorted(sources):
+            path = sources[rel_path]
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            old = previous_files.get(rel_path)
+            if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                files[rel_path] = old
+                if full:
+                    changed.append(rel_path)
+                continue
+
+            chunks, file_hash, added = self._hash_file(path)
+            new_chunks += added
+            files[rel_path] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': file_hash,
+                'chunks': chunks,
+            }
+            if full or not old or old['sha256'] != file_hash:
+                changed.append(rel_path)
+
+        created_at = datetime.utcnow()
+        manifest = {
+            'id': created_at.strftime('%Y%m%d_%H%M%S_%f'),
+            'guild_id': guild_id,
+            'created_at': created_at.isoformat(),
+            'parent': previous['id'] if previous else None,
+            'full': full,
+            'changed': changed,
+            'deleted': sorted(set(previous_files) - set(files) - exclude),
+            'files': files,
+        }
+
+        archive = self._build_archive(manifest, changed) if changed or manifest['deleted'] else b""
+        return Snapshot(manifest, archive, changed, new_chunks)
+
+    def commit(self, guild_id: int, snapshot: Snapshot) -> None:
+        """
+        Speichert das Manifest als neuen Basisstand. Erst nach erfolgreichem Upload aufrufen,
+        sonst fehlen die geänderten Dateien im nächsten inkrementellen Archiv.
+        """
+        try:
+            self._save_manifest(guild_id, snapshot.manifest)
+        finally:
+            self.discard(snapshot)
+
+    def discard(self, snapshot: Snapshot) -> None:
+        """Gibt einen nicht übernommenen Stand frei (z.B. nach fehlgeschlagenem Upload); mehrfach aufrufbar."""
+        if snapshot.open:
+            snapshot.open = False
+            self._release()
+
+    def _release(self) -> None:
+        with self._gc_condition:
+            self._open_snapshots -= 1
+            self._gc_condition.notify_all()
+
+    def _build_archive(self, manifest: Dict[str, Any], paths: List[str]) -> bytes:
+        """
+        Packt die geänderten Dateien aus dem Blockspeicher in ein ZIP im Speicher.
+        Gelesen wird aus dem Blockspeicher, damit Archiv und Manifest garantiert übereinstimmen.
+        """
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+            for rel_path in paths:
+                with archive.open(rel_path, 'w', force_zip64=True) as target:
+                    for data in self.iter_file(manifest['files'][rel_path]):
+                        target.write(data)
+            summary = {k: v for k, v in manifest.items() if k != 'files'}
+            summary['files'] = {p: {'size': e['size'], 'sha256': e['sha256']} for p, e in manifest['files'].items()}
+            archive.writestr(MANIFEST_FILENAME, json.dumps(summary, indent=2))
+        return buffer.getvalue()
+
+    # --- Aufräumen ---
+
+    def prune(self, guild_id: int, keep: int = MANIFESTS_TO_KEEP) -> int:
+        """Löscht alte Manifeste der Guild. Blöcke werden erst durch collect_garbage entfernt."""
+        manifest_ids = self.list_manifests(guild_id)
+        removed = 0
+        for manifest_id in manifest_ids[:-keep] if keep > 0 else manifest_ids:
+            os.remove(os.path.join(self._guild_manifest_dir(guild_id), f"{manifest_id}.json"))
+            removed += 1
+        return removed
+
+    def collect_garbage(self, timeout: float = GC_WAIT_TIMEOUT) -> Optional[int]:
+        """
+        Entfernt Blöcke, die von keinem Manifest (irgendeiner Guild) mehr referenziert werden.
+
+        Returns:
+            Anzahl entfernter Blöcke oder None, wenn innerhalb von timeout offene Backup-Stände
+            nicht übernommen wurden (dann beim nächsten Mal erneut versuchen)
+        """
+        with self._gc_condition:
+            if not self._gc_condition.wait_for(lambda: self._open_snapshots == 0 and not self._collecting, timeout):
+                return None
+            self._collecting = True
+        try:
+            return self._collect_garbage()
+        finally:
+            with self._gc_condition:
+                self._collecting = False
+                self._gc_condition.notify_all()
+
+    def _collect_garbage(self) -> int:
+        referenced = set()
+        for guild_dir in os.listdir(self.manifests_dir):
+            path = os.path.join(self.manifests_dir, guild_dir)
+            if not os.path.isdir(path):
+                continue
+            for name in os.listdir(path):
+                if not name.endswith('.json'):
+                    continue
+                with open(os.path.join(path, name), 'r', encoding='utf-8') as f:
+                    for entry in json.load(f)['files'].values():
+                        referenced.update(entry['chunks'])
+
+        removed = 0
+        for prefix in os.listdir(self.chunks_dir):
+            prefix_dir = os.path.join(self.chunks_dir, prefix)
+            for digest in os.listdir(prefix_dir):
+                if digest not in referenced:
+                    os.remove(os.path.join(prefix_dir, digest))
+                    removed += 1
+        return removed
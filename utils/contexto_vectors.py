@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Wortvektoren für Contexto.
+
+Die Vektoren liegen als normalisierte float32-Matrix in data/contexto/vectors.npy
+und werden per Memory-Mapping geladen, die Wörter stehen zeilengleich in vocab.txt.
+Pro Tageswort wird einmalig eine komplette Rangliste über das ganze Vokabular
+berechnet, danach ist jeder Rateversuch nur noch ein Dictionary-Zugriff.
+
+Offline-Werkzeuge:
+    python -m utils.contexto_vectors build --vectors cc.de.300.vec --limit 50000
+    python -m utils.contexto_vectors benchmark
+"""
+import argparse
+import os
+import time
+import random
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List
+from utils.config import DATA_DIR
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CONTEXTO_DIR = os.path.join(DATA_DIR, "contexto")
+VECTORS_FILE = os.path.join(CONTEXTO_DIR, "vectors.npy")
+VOCAB_FILE = os.path.join(CONTEXTO_DIR, "vocab.txt")
+TARGETS_FILE = os.path.join(CONTEXTO_DIR, "targets.txt")
+
+# Anzahl der Ranglisten, die gleichzeitig im Speicher bleiben (heute + gestern)
+RANK_TABLE_CACHE_SIZE = 2
+
+
+def _read_word_list(path: str) -> List[str]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def normalize_word(word: str) -> str:
+    return word.strip().upper()
+
+
+class WordVectorStore:
+    """Read-only Zugriff auf die Vektormatrix mit gecachten Ranglisten pro Zielwort."""
+
+    def __init__(self, base_dir: str = CONTEXTO_DIR):
+        self.vectors_path = os.path.join(base_dir, os.path.basename(VECTORS_FILE))
+        self.vocab_path = os.path.join(base_dir, os.path.basename(VOCAB_FILE))
+        self.targets_path = os.path.join(base_dir, os.path.basename(TARGETS_FILE))
+        self.vectors = None
+        self.vocab: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.targets: List[str] = []
+        self._rank_tables: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+    @property
+    def available(self) -> bool:
+        return self.vectors is not None
+
+    def load(self) -> bool:
+        """Lädt Vokabular und Matrix. Gibt False zurück, wenn NumPy oder die Dateien fehlen."""
+        if np is None or not os.path.exists(self.vectors_path) or not os.path.exists(self.vocab_path):
+            return False
+
+        vectors = np.load(self.vectors_path, mmap_mode='r')
+        vocab = _read_word_list(self.vocab_path)
+        if vectors.ndim != 2 or vectors.shape[0] != len(vocab):
+            print(f"Contexto: {self.vectors_path} passt nicht zu {self.vocab_path} ({vectors.shape[0]} != {len(vocab)})")
+            return False
+
+        self.vectors = vectors
+        self.vocab = vocab
+        self.index = {word: i for i, word in enumerate(vocab)}
+        if os.path.exists(self.targets_path):
+            self.targets = [w for w in (normalize_word(t) for t in _read_word_list(self.targets_path)) if w in self.index]
+        if not self.targets:
+            self.targets = vocab[:2000]
+        return True
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.index
+
+    def daily_target(self, date_str: str) -> str:
+        """Deterministisches Tageswort, ohne den globalen Zufallsgenerator anzufassen."""
+        digest = hashlib.sha256(date_str.encode('utf-8')).digest()
+        return self.targets[int.from_bytes(digest[:8], 'big') % len(self.targets)]
+
+    def rank_table(self, target: str) -> Dict[str, int]:
+        """
+        Rangliste aller Wörter zum Zielwort (1 = Zielwort selbst).
+        Wird in einem einzigen vektorisierten Durchlauf berechnet und gecacht.
+        """
+        table = self._rank_tables.get(target)
+        if table is not None:
+            self._rank_tables.move_to_end(target)
+            return table
+
+        target_idx = self.index[target]
+        # Zeilen sind normalisiert, das Skalarprodukt ist also die Kosinus-Ähnlichkeit
+        similarities = self.vectors @ np.asarray(self.vectors[target_idx], dtype=np.float32)
+        similarities[target_idx] = np.inf
+        order = np.argsort(-similarities, kind='stable')
+        vocab = self.vocab
+        table = {vocab[i]: rank for rank, i in enumerate(order.tolist(), start=1)}
+
+        self._rank_tables[target] = table
+        while len(self._rank_tables) > RANK_TABLE_CACHE_SIZE:
+            self._rank_tables.popitem(last=False)
+        return table
+
+
+# --- Offline-Werkzeuge ---
+
+def build_vocabulary(vectors_path: str, output_dir: str = CONTEXTO_DIR, limit: int = 50000,
+                     target_count: int = 2000, min_length: int = 2) -> int:
+    """
+    Erzeugt vectors.npy, vocab.txt und targets.txt aus einer Wortvektor-Datei im
+    word2vec/fastText-Textformat (z.B. cc.de.300.vec). Die Datei ist nach Häufigkeit
+    sortiert, daher bleiben bei Duplikaten (Groß-/Kleinschreibung) die häufigsten Formen.
+    Als Tageswörter werden die häufigsten großgeschriebenen Wörter (Substantive) verwendet.
+    """
+    if np is None:
+        raise RuntimeError("Für den Vokabular-Builder wird NumPy benötigt.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    words: List[str] = []
+    seen = set()
+    targets: List[str] = []
+    rows = []
+
+    with open(vectors_path, 'r', encoding='utf-8', errors='ignore') as f:
+        first = f.readline().split()
+        dim = int(first[1]) if len(first) == 2 else len(first) - 1
+        if len(first) != 2:
+            f.seek(0)
+
+        for line in f:
+            parts = line.rstrip().split(' ')
+            if len(parts) != dim + 1:
+                continue
+            raw = parts[0]
+            if not raw.isalpha() or len(raw) < min_length:
+                continue
+            word = normalize_word(raw)
+            if word in seen:
+                continue
+            seen.add(word)
+            words.append(word)
+            rows.append(np.asarray(parts[1:], dtype=np.float32))
+            if len(targets) < target_count and raw[0].isupper() and len(raw) >= 4:
+                targets.append(word)
+            if len(words) >= limit:
+                break
+
+    matrix = np.vstack(rows)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+
+    np.save(os.path.join(output_dir, os.path.basename(VECTORS_FILE)), matrix.astype(np.float32))
+    with open(os.path.join(output_dir, os.path.basename(VOCAB_FILE)), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(words) + '\n')
+    with open(os.path.join(output_dir, os.path.basename(TARGETS_FILE)), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(targets) + '\n')
+    return len(words)
+
+
+def run_benchmark(base_dir: str = CONTEXTO_DIR, tables: int = 5, guesses: int = 100000) -> None:
+    store = WordVectorStore(base_dir)
+    start = time.perf_counter()
+    if not store.load():
+        print("Keine Wortvektoren gefunden (oder NumPy fehlt). Zuerst 'build' ausführen.")
+        return
+    print(f"Laden: {(time.perf_counter() - start) * 1000:.1f} ms für {len(store.vocab)} Wörter")
+
+    rng = random.Random(0)
+    durations = []
+    table = {}
+    for target in rng.sample(store.targets, min(tables, len(store.targets))):
+        store._rank_tables.clear()
+        start = time.perf_counter()
+        table = store.rank_table(target)
+        durations.append(time.perf_counter() - start)
+    print(f"Rangliste: {sum(durations) / len(durations) * 1000:.1f} ms im Schnitt ({len(durations)} Zielwörter)")
+
+    sample = [rng.choice(store.vocab) for _ in range(guesses)]
+    start = time.perf_counter()
+    for word in sample:
+        table.get(word)
+    elapsed = time.perf_counter() - start
+    print(f"Rateversuche: {guesses / elapsed:,.0f} pro Sekunde ({elapsed / guesses * 1e6:.2f} µs pro Versuch)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Contexto-Wortvektoren bauen und messen")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = sub.add_parser("build", help="Vokabular aus einer .vec-Datei erzeugen")
+    build_parser.add_argument("--vectors", required=True, help="Pfad zur Wortvektor-Datei (Textformat)")
+    build_parser.add_argument("--output", default=CONTEXTO_DIR)
+    build_parser.add_argument("--limit", type=int, default=50000)
+    build_parser.add_argument("--targets", type=int, default=2000)
+
+    bench_parser = sub.add_parser("benchmark", help="Laden, Ranglisten und Rateversuche messen")
+    bench_parser.add_argument("--dir", default=CONTEXTO_DIR)
+    bench_parser.add_argument("--tables", type=int, default=5)
+    bench_parser.add_argument("--guesses", type=int, default=100000)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        count = build_vocabulary(args.vectors, args.output, args.limit, args.targets)
+        print(f"{count} Wörter nach {args.output} geschrieben.")
+    else:
+        run_benchmark(args.dir, args.tables, args.guesses)
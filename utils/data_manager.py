@@ -1,11 +1,16 @@
 import json
 import os
 import shutil
+import threading
 from utils.config import GUILDS_DATA_DIR
 
 class DataManager:
     def __init__(self):
         self._ensure_directory(GUILDS_DATA_DIR)
+        # Schreibzähler pro (Guild, Modul) für get_data_version; mtime/Größe allein übersehen
+        # zwei gleich große Schreibvorgänge innerhalb eines Zeitstempel-Ticks
+        self._write_counts = {}
+        self._write_counts_lock = threading.Lock()
         # Cache could be implemented here if performance becomes an issue
         # self._cache = {}
 
@@ -53,6 +58,23 @@ class DataManager:
         """
         path = self._get_file_path(guild_id, module_name)
         self.save_json(path, data)
+        # Erst nach dem Schreiben erhöhen, sonst könnte ein Leser alte Daten unter der neuen Version cachen
+        key = (str(guild_id), module_name)
+        with self._write_counts_lock:
+            self._write_counts[key] = self._write_counts.get(key, 0) + 1
+
+    def get_data_version(self, guild_id, module_name):
+        """
+        Günstige Versionskennung einer Modul-Datei (Schreibzähler + mtime + Größe), ohne sie zu laden.
+        Gibt None zurück, wenn die Datei nicht existiert.
+        """
+        try:
+            stat = os.stat(self._get_file_path(guild_id, module_name))
+        except OSError:
+            return None
+        with self._write_counts_lock:
+            writes = self._write_counts.get((str(guild_id), module_name), 0)
+        return (writes, stat.st_mtime_ns, stat.st_size)
 
     # --- Configuration Wrappers ---
 
@@ -79,7 +101,8 @@ class DataManager:
         keys = [
             "token", "DISCORD_CLIENT_ID", "DISCORD_CLIENT_SECRET", "DISCORD_REDIRECT_URI",
             "SECRET_KEY", "WEB_BASE_URL", "TWITCH_CLIENT_ID", "TWITCH_CLIENT_SECRET",
-            "TWITCH_BOT_USERNAME", "TWITCH_BOT_TOKEN", "TWITCH_REDIRECT_URI", "ADMIN_TWITCH_NAMES"
+            "TWITCH_BOT_USERNAME", "TWITCH_BOT_TOKEN", "TWITCH_REDIRECT_URI", "ADMIN_TWITCH_NAMES",
+            "WEB_SERVER", "WEB_THREADS"
         ]
         
         for key in keys:
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterable
+from utils.config import DATA_DIR
+
+
+class GlobalBanRegistry:
+    """
+    Serverübergreifende Bannliste.
+
+    Alle gebannten User-IDs liegen zusätzlich als Set im Speicher, damit der
+    Join-Pfad ohne Datenbankzugriff in O(1) prüfen kann. SQLite ist die
+    persistente Quelle und wird beim Start einmalig eingelesen.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(DATA_DIR, "global_bans.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_db()
+        self._banned_ids = set(self._load_ids())
+
+    def _init_db(self) -> None:
+        """Initialize the database schema if it doesn't exist."""
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS global_bans (
+                    user_id INTEGER PRIMARY KEY,
+                    user_name TEXT,
+                    reason TEXT,
+                    source_guild_id INTEGER,
+                    source_guild_name TEXT,
+                    banned_by TEXT,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            self._conn.commit()
+
+    def _load_ids(self) -> List[int]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT user_id FROM global_bans")]
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._banned_ids
+
+    def __len__(self) -> int:
+        return len(self._banned_ids)
+
+    def is_banned(self, user_id: int) -> bool:
+        """O(1)-Prüfung gegen das Set im Speicher."""
+        return user_id in self._banned_ids
+
+    def add(self, user_id: int, user_name: str = None, reason: str = None,
+            source_guild_id: int = None, source_guild_name: str = None, banned_by: str = None) -> None:
+        """Fügt einen User hinzu oder aktualisiert einen bestehenden Eintrag."""
+        self.bulk_import([{
+            'user_id': user_id,
+            'user_name': user_name,
+            'reason': reason,
+            'source_guild_id': source_guild_id,
+            'source_guild_name': source_guild_name,
+            'banned_by': banned_by,
+        }])
+
+    def remove(self, user_id: int) -> bool:
+        """Entfernt einen User aus der Liste. Gibt True zurück, falls er eingetragen war."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM global_bans WHERE user_id = ?", (user_id,))
+            self._conn.commit()
+        self._banned_ids.discard(user_id)
+        return cursor.rowcount > 0
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if user_id not in self._banned_ids:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM global_bans WHERE user_id = ?", (user_id,)).fetchone()
+        return dict(row) if row else None
+
+    def bulk_import(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """
+        Importiert viele Einträge in einer einzigen Transaktion.
+
+        Args:
+            entries: Dictionaries mit mindestens 'user_id'
+
+        Returns:
+            Anzahl der importierten Einträge
+        """
+        now = datetime.utcnow().isoformat()
+        rows = []
+        for entry in entries:
+            try:
+                user_id = int(entry['user_id'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            rows.append((
+                user_id,
+                entry.get('user_name'),
+                entry.get('reason'),
+                entry.get('source_guild_id'),
+                entry.get('source_guild_name'),
+                entry.get('banned_by'),
+                entry.get('created_at') or now,
+            ))
+
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO global_bans (
+                    user_id, user_name, reason, source_guild_id,
+                    source_guild_name, banned_by, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self._conn.commit()
+        self._banned_ids.update(row[0] for row in rows)
+        return len(rows)
+
+    def export(self) -> List[Dict[str, Any]]:
+        """Gibt alle Einträge für den Export zurück."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM global_bans ORDER BY created_at").fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
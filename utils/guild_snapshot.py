@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from utils.config import DATA_DIR
+
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+
+# Kanaltypen, die discord.py unter guild.text_channels führt
+TEXT_CHANNEL_TYPES = ("text", "news")
+VOICE_CHANNEL_TYPES = ("voice", "stage_voice")
+
+
+def build_guild_snapshot(guild, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Kompakter, JSON-fähiger Stand einer Guild (läuft im Bot-Loop)."""
+    bot_count = sum(1 for m in guild.members if m.bot)
+    return {
+        'id': guild.id,
+        'name': guild.name,
+        'icon': guild.icon.key if guild.icon else None,
+        'icon_url': str(guild.icon.url) if guild.icon else None,
+        'member_count': guild.member_count or 0,
+        'bot_count': bot_count,
+        'premium_tier': guild.premium_tier,
+        'channels': [
+            {
+                'id': c.id,
+                'name': c.name,
+                'type': str(c.type),
+                'position': c.position,
+                'category_id': c.category_id,
+            }
+            for c in guild.channels
+        ],
+        'roles': [
+            {
+                'id': r.id,
+                'name': r.name,
+                'color': r.color.value,
+                'position': r.position,
+                'managed': r.managed,
+            }
+            for r in guild.roles
+        ],
+        'enabled_cogs': list(settings.get('enabled_cogs', [])),
+    }
+
+
+class SnapshotChannel:
+    __slots__ = ('id', 'name', 'type', 'position', 'category_id')
+
+    def __init__(self, data: Dict[str, Any]):
+        self.id = data['id']
+        self.name = data['name']
+        self.type = data['type']
+        self.position = data['position']
+        self.category_id = data.get('category_id')
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+
+class SnapshotRole:
+    __slots__ = ('id', 'name', 'color', 'position', 'managed')
+
+    def __init__(self, data: Dict[str, Any]):
+        self.id = data['id']
+        self.name = data['name']
+        self.color = data['color']
+        self.position = data['position']
+        self.managed = data['managed']
+
+    @property
+    def mention(self) -> str:
+        return f"<@&{self.id}>"
+
+
+class GuildSnapshot:
+    """
+    Read-only Sicht auf einen veröffentlichten Guild-Stand. Bietet die Attribute,
+    die die Templates von discord.Guild nutzen (name, text_channels, roles, ...).
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.id: int = data['id']
+        self.name: str = data['name']
+        # Icon-Hash wie bei discord.Guild.icon im Template (cdn.discordapp.com/icons/<id>/<hash>.png)
+        self.icon: Optional[str] = data.get('icon')
+        self.icon_url: Optional[str] = data.get('icon_url')
+        self.member_count: int = data.get('member_count', 0)
+        self.bot_count: int = data.get('bot_count', 0)
+        self.premium_tier: int = data.get('premium_tier', 0)
+        self.enabled_cogs: List[str] = data.get('enabled_cogs', [])
+        self.version: int = data.get('version', 0)
+        self.generated_at: Optional[str] = data.get('generated_at')
+        self.channels = [SnapshotChannel(c) for c in data.get('channels', [])]
+        self.roles = sorted((SnapshotRole(r) for r in data.get('roles', [])), key=lambda r: r.position)
+        self._channels_by_id = {c.id: c for c in self.channels}
+        self._roles_by_id = {r.id: r for r in self.roles}
+
+    @property
+    def human_count(self) -> int:
+        return max(self.member_count - self.bot_count, 0)
+
+    @property
+    def text_channels(self) -> List[SnapshotChannel]:
+        return [c for c in self.channels if c.type in TEXT_CHANNEL_TYPES]
+
+    @property
+    def voice_channels(self) -> List[SnapshotChannel]:
+        return [c for c in self.channels if c.type in VOICE_CHANNEL_TYPES]
+
+    @property
+    def categories(self) -> List[SnapshotChannel]:
+        return [c for c in self.channels if c.type == "category"]
+
+    @property
+    def forums(self) -> List[SnapshotChannel]:
+        return [c for c in self.channels if c.type == "forum"]
+
+    def get_channel(self, channel_id: int) -> Optional[SnapshotChannel]:
+        return self._channels_by_id.get(channel_id)
+
+    def get_role(self, role_id: int) -> Optional[SnapshotRole]:
+        return self._roles_by_id.get(role_id)
+
+
+def _content_hash(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class SnapshotStore:
+    """
+    Versionierte Guild-Stände als eine JSON-Datei pro Guild (data/snapshots/<id>.json).
+
+    Der Bot schreibt (publish), das Dashboard liest (load) – auch aus einem anderen
+    Prozess, da nur atomar ersetzte Dateien geteilt werden. Die Version steigt nur,
+    wenn sich der Inhalt tatsächlich geändert hat; Leser cachen nach mtime/Größe.
+    """
+
+    def __init__(self, snapshot_dir: str = SNAPSHOT_DIR):
+        self.snapshot_dir = snapshot_dir
+        os.makedirs(snapshot_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # guild_id -> (Inhalts-Hash, Version) des zuletzt geschriebenen Stands
+        self._published: Dict[int, Tuple[str, int]] = {}
+        # guild_id -> ((mtime_ns, size), GuildSnapshot) für Leser
+        self._loaded: Dict[int, Tuple[Tuple[int, int], GuildSnapshot]] = {}
+
+    def _path(self, guild_id: int) -> str:
+        return os.path.join(self.snapshot_dir, f"{guild_id}.json")
+
+    def _read_file(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(guild_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def publish(self, guild_id: int, payload: Dict[str, Any]) -> Optional[int]:
+        """Schreibt den Stand, wenn er sich geändert hat. Gibt die neue Version zurück, sonst None."""
+        content_hash = _content_hash(payload)
+        with self._lock:
+            previous = self._published.get(guild_id)
+        if previous is None:
+            # Nach einem Neustart an die Version auf der Platte anknüpfen
+            existing = self._read_file(guild_id)
+            previous = (existing.get('content_hash', ''), existing.get('version', 0)) if existing else ('', 0)
+        if previous[0] == content_hash:
+            with self._lock:
+                self._published[guild_id] = previous
+            return None
+
+        version = previous[1] + 1
+        document = dict(payload, version=version, content_hash=content_hash,
+                        generated_at=datetime.now(timezone.utc).isoformat())
+        path = self._path(guild_id)
+        # Das Verzeichnis kann inzwischen verschwunden sein, z.B. nach einer Admin-Wiederherstellung von data/
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, path)
+        with self._lock:
+            self._published[guild_id] = (content_hash, version)
+        return version
+
+    def load(self, guild_id: int) -> Optional[GuildSnapshot]:
+        try:
+            stat = os.stat(self._path(guild_id))
+        except OSError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._loaded.get(guild_id)
+        if cached and cached[0] == key:
+            return cached[1]
+        data = self._read_file(guild_id)
+        if data is None:
+            return None
+        snapshot = GuildSnapshot(data)
+        with self._lock:
+            self._loaded[guild_id] = (key, snapshot)
+        return snapshot
+
+    def forget(self, guild_id: Optional[int] = None) -> None:
+        """Vergisst die zuletzt geschriebenen Hashes, z.B. wenn data/ wiederhergestellt wurde."""
+        with self._lock:
+            if guild_id is None:
+                self._published.clear()
+            else:
+                self._published.pop(guild_id, None)
+
+    def remove(self, guild_id: int) -> None:
+        with self._lock:
+            self._published.pop(guild_id, None)
+            self._loaded.pop(guild_id, None)
+        try:
+            os.remove(self._path(guild_id))
+        except OSError:
+            pass
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+import heapq
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Bei Top-K-Abfragen wird mehr als K vorselektiert, weil ehemalige Mitglieder übersprungen werden
+TOP_K_OVERSAMPLE = 2
+TOP_K_MIN_EXTRA = 10
+
+# (sort_key, user_id, value, extra)
+RankedRow = Tuple[tuple, int, int, Optional[Dict[str, Any]]]
+
+
+def _user_items(data: Dict[str, Any]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    for user_id_str, user_data in data.items():
+        if user_id_str.isdigit() and isinstance(user_data, dict):
+            yield int(user_id_str), user_data
+
+
+def _current_month() -> str:
+    return datetime.now().strftime('%Y-%m')
+
+
+def _rows_messages(data: Dict[str, Any], channel_id: Optional[int]) -> Iterator[RankedRow]:
+    month_data = data.get(_current_month(), {})
+    for user_id, user_data in _user_items(month_data):
+        value = user_data.get('total_messages', 0)
+        if value > 0:
+            yield (value, -user_id), user_id, value, None
+
+
+def _rows_channel_messages(data: Dict[str, Any], channel_id: Optional[int]) -> Iterator[RankedRow]:
+    month_data = data.get(_current_month(), {})
+    channel_key = str(channel_id)
+    for user_id, user_data in _user_items(month_data):
+        value = user_data.get('channels', {}).get(channel_key, 0)
+        if value > 0:
+            yield (value, -user_id), user_id, value, None
+
+
+def _rows_level(data: Dict[str, Any], channel_id: Optional[int]) -> Iterator[RankedRow]:
+    for user_id, user_data in _user_items(data):
+        level = user_data.get('level', 0)
+        xp = user_data.get('xp', 0)
+        yield (level, xp, -user_id), user_id, level, {'xp': xp}
+
+
+def _rows_streak_current(data: Dict[str, Any], channel_id: Optional[int]) -> Iterator[RankedRow]:
+    for user_id, user_data in _user_items(data):
+        value = user_data.get('current_streak', 0)
+        if value > 0:
+            yield (value, -user_id), user_id, value, None
+
+
+def _rows_streak_alltime(data: Dict[str, Any], channel_id: Optional[int]) -> Iterator[RankedRow]:
+    for user_id, user_data in _user_items(data):
+        value = user_data.get('max_streak_ever', 0)
+        if value > 0:
+            current = user_data.get('current_streak', 0)
+            # Die Rekord-Streak läuft noch, wenn sie der aktuellen entspricht
+            yield (value, -user_id), user_id, value, {'is_active': current == value and current > 0}
+
+
+class BoardType:
+    """Definition eines Leaderboards: Quelldatei, Titel und Funktion, die die Zeilen daraus erzeugt."""
+    __slots__ = ('key', 'module', 'title', 'rows', 'monthly')
+
+    def __init__(self, key: str, module: str, title: str,
+                 rows: Callable[[Dict[str, Any], Optional[int]], Iterator[RankedRow]], monthly: bool = False):
+        self.key = key
+        self.module = module
+        self.title = title
+        self.rows = rows
+        self.monthly = monthly
+
+
+BOARD_TYPES: Dict[str, BoardType] = {
+    'messages': BoardType('messages', 'monthly_stats', "🗨️ Meiste Nachrichten - Monatlich", _rows_messages, monthly=True),
+    'channel_messages': BoardType('channel_messages', 'monthly_stats', "🗨️ Meiste Nachrichten - Monatlich",
+                                  _rows_channel_messages, monthly=True),
+    'level': BoardType('level', 'level_users', "⭐ Höchstes Level - Allzeit", _rows_level),
+    'streak_current': BoardType('streak_current', 'streaks', "🔥 Längste aktive Streak", _rows_streak_current),
+    'streak_alltime': BoardType('streak_alltime', 'streaks', "🏆 Längste Streak (Allzeit)", _rows_streak_alltime),
+}
+
+
+def board_title(board_type: str) -> str:
+    board = BOARD_TYPES.get(board_type)
+    return board.title if board else ""
+
+
+class LeaderboardEntry:
+    """Ein Platz im Leaderboard. member ist None, wenn der User den Server verlassen hat."""
+    __slots__ = ('rank', 'user_id', 'member', 'value', 'extra')
+
+    def __init__(self, rank: int, user_id: int, member, value: int, extra: Optional[Dict[str, Any]]):
+        self.rank = rank
+        self.user_id = user_id
+        self.member = member
+        self.value = value
+        self.extra = extra or {}
+
+    @property
+    def xp(self) -> int:
+        return self.extra.get('xp', 0)
+
+    @property
+    def is_active(self) -> bool:
+        return self.extra.get('is_active', False)
+
+
+class _CachedBoard:
+    __slots__ = ('version', 'rows', 'prefix', 'ranking', 'positions')
+
+    def __init__(self, version, rows: List[RankedRow]):
+        self.version = version
+        self.rows = rows
+        # Bereits vorselektierte Top-Zeilen (absteigend), bis die volle Sortierung gebraucht wird
+        self.prefix: List[RankedRow] = []
+        self.ranking: Optional[List[RankedRow]] = None
+        self.positions: Optional[Dict[int, int]] = None
+
+    def top_rows(self, limit: int) -> List[RankedRow]:
+        if self.ranking is not None:
+            return self.ranking[:limit]
+        if len(self.prefix) < limit and len(self.prefix) < len(self.rows):
+            self.prefix = heapq.nlargest(limit, self.rows, key=lambda row: row[0])
+        return self.prefix[:limit]
+
+    def full_ranking(self) -> List[RankedRow]:
+        if self.ranking is None:
+            self.ranking = sorted(self.rows, key=lambda row: row[0], reverse=True)
+            self.positions = {row[1]: i for i, row in enumerate(self.ranking)}
+            self.prefix = []
+        return self.ranking
+
+
+class LeaderboardService:
+    """
+    Gemeinsame Leaderboard-Abfragen für Discord-Embeds, Forum-Threads und das Dashboard.
+
+    Pro Guild, Board-Typ und Channel wird die Rangliste gecacht. Die Version ist die
+    mtime/Größe der Quelldatei (bei Monats-Boards zusätzlich der Monat); solange sie sich
+    nicht ändert, werden weder JSON geladen noch neu sortiert. Top-K-Abfragen nutzen
+    heapq.nlargest statt einer vollen Sortierung, Mitglieder werden nur für die
+    zurückgegebenen Plätze aufgelöst.
+
+    Wird aus dem Bot-Loop und aus Flask-Threads aufgerufen.
+    """
+
+    def __init__(self, data_manager):
+        self.data = data_manager
+        self._lock = threading.Lock()
+        self._boards: Dict[Tuple[int, str, Optional[int]], _CachedBoard] = {}
+
+    def _get_board(self, guild_id: int, board_type: str, channel_id: Optional[int]) -> _CachedBoard:
+        board = BOARD_TYPES.get(board_type)
+        if board is None:
+            raise ValueError(f"Unbekannter Leaderboard-Typ: {board_type}")
+        if board.key != 'channel_messages':
+            channel_id = None
+
+        version = self.data.get_data_version(guild_id, board.module)
+        if board.monthly:
+            version = (version, _current_month())
+        cache_key = (guild_id, board.key, channel_id)
+
+        with self._lock:
+            cached = self._boards.get(cache_key)
+            if cached is not None and cached.version == version:
+                return cached
+
+        data = self.data.get_guild_data(guild_id, board.module)
+        cached = _CachedBoard(version, list(board.rows(data, channel_id)))
+        with self._lock:
+            self._boards[cache_key] = cached
+        return cached
+
+    def get_top(self, guild, board_type: str, limit: int, channel_id: Optional[int] = None,
+                members_only: bool = True) -> List[LeaderboardEntry]:
+        """
+        Die besten `limit` Plätze. Mit members_only werden ehemalige Mitglieder übersprungen,
+        die Ränge zählen dann nur aktuelle Mitglieder.
+        """
+        board = self._get_board(guild.id, board_type, channel_id)
+        fetch = limit * TOP_K_OVERSAMPLE + TOP_K_MIN_EXTRA if members_only else limit
+
+        while True:
+            with self._lock:
+                rows = board.top_rows(fetch)
+            entries = self._resolve(guild, rows, limit, members_only)
+            if len(entries) >= limit or len(rows) < fetch:
+                return entries
+            # Zu viele ehemalige Mitglieder unter den Vorselektierten
+            fetch *= 2
+
+    def get_page(self, guild, board_type: str, page: int, per_page: int,
+                 channel_id: Optional[int] = None) -> Tuple[List[LeaderboardEntry], int]:
+        """Eine Seite der vollständigen Rangliste (inklusive ehemaliger Mitglieder) plus Gesamtzahl."""
+        board = self._get_board(guild.id, board_type, channel_id)
+        with self._lock:
+            ranking = board.full_ranking()
+        start = max(page - 1, 0) * per_page
+        rows = ranking[start:start + per_page]
+        entries = [
+            LeaderboardEntry(start + offset + 1, user_id, guild.get_member(user_id), value, extra)
+            for offset, (_key, user_id, value, extra) in enumerate(rows)
+        ]
+        return entries, len(ranking)
+
+    def get_rank(self, guild_id: int, board_type: str, user_id: int,
+                 channel_id: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """Platz des Users und Gesamtzahl der Einträge, oder None, wenn er nicht gelistet ist."""
+        board = self._get_board(guild_id, board_type, channel_id)
+        with self._lock:
+            ranking = board.full_ranking()
+            position = board.positions.get(user_id)
+        if position is None:
+            return None
+        return position + 1, len(ranking)
+
+    def _resolve(self, guild, rows: List[RankedRow], limit: int, members_only: bool) -> List[LeaderboardEntry]:
+        entries = []
+        for _key, user_id, value, extra in rows:
+            member = guild.get_member(user_id)
+            if member is None and members_only:
+                continue
+            entries.append(LeaderboardEntry(len(entries) + 1, user_id, member, value, extra))
+            if len(entries) >= limit:
+                break
+        return entries
+
+    def invalidate(self, guild_id: Optional[int] = None) -> None:
+        with self._lock:
+            if guild_id is None:
+                self._boards.clear()
+            else:
+                for key in [k for k in self._boards if k[0] == guild_id]:
+                    del self._boards[key]
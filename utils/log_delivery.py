@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+import discord
+from discord import Color, Embed
+
+# Discord erlaubt bis zu 10 Embeds und insgesamt 6000 Zeichen pro Nachricht
+EMBEDS_PER_MESSAGE = 10
+EMBED_CHARS_PER_MESSAGE = 6000
+# Nach dem ersten Embed kurz sammeln, damit Event-Stürme gebündelt werden (Sekunden)
+DELIVERY_WINDOW = 1.5
+# Mindestabstand zwischen zwei Nachrichten an dasselbe Ziel (Sekunden)
+DELIVERY_MIN_SPACING = 1.2
+# Pause nach einem 429 für dieses Ziel (Sekunden)
+DELIVERY_RATE_LIMIT_BACKOFF = 10
+# Maximal wartende Embeds pro Ziel; alles darüber wird nur noch gezählt und zusammengefasst
+DELIVERY_MAX_QUEUE = 200
+# So viele Event-Arten listet die Überlauf-Zusammenfassung einzeln auf
+OVERFLOW_SUMMARY_FIELDS = 10
+
+
+class _Destination:
+    __slots__ = ('queue', 'overflow', 'task', 'next_send')
+
+    def __init__(self):
+        self.queue: Deque[Embed] = deque()
+        # Embed-Titel -> Anzahl der wegen Überlauf nicht einzeln gesendeten Logs
+        self.overflow: Counter = Counter()
+        self.task: Optional[asyncio.Task] = None
+        self.next_send = 0.0
+
+
+class LogDelivery:
+    """
+    Gebündelte Zustellung von Log-Embeds an Discord, eine Warteschlange pro Ziel.
+
+    Pro Ziel läuft höchstens ein Task, der nur existiert, solange etwas ansteht. Er sammelt
+    kurz, packt bis zu 10 Embeds in eine Nachricht und hält einen Mindestabstand zwischen
+    den Nachrichten ein. Bei Überlast werden überzählige Logs gezählt und als eine
+    Zusammenfassung gesendet; in der Datenbank stehen sie trotzdem vollständig.
+
+    resolve(key) liefert das Ziel (Kanal/Thread, gern gecacht) oder None,
+    forget(key) verwirft ein ungültig gewordenes Ziel.
+    """
+
+    def __init__(self, resolve: Callable[[Hashable], Awaitable[Optional[discord.abc.Messageable]]],
+                 forget: Callable[[Hashable], None], window: float = DELIVERY_WINDOW,
+                 min_spacing: float = DELIVERY_MIN_SPACING, max_queue: int = DELIVERY_MAX_QUEUE):
+        self.resolve = resolve
+        self.forget = forget
+        self.window = window
+        self.min_spacing = min_spacing
+        self.max_queue = max_queue
+        self._destinations: Dict[Hashable, _Destination] = {}
+        self._stats = Counter()
+
+    def enqueue(self, key: Hashable, embed: Embed) -> None:
+        dest = self._destinations.get(key)
+        if dest is None:
+            dest = self._destinations[key] = _Destination()
+        if len(dest.queue) >= self.max_queue:
+            dest.overflow[embed.title or "Sonstige"] += 1
+            self._stats['overflowed'] += 1
+        else:
+            dest.queue.append(embed)
+        if dest.task is None:
+            dest.task = asyncio.get_running_loop().create_task(self._run(key, dest))
+
+    def stop(self) -> None:
+        for dest in self._destinations.values():
+            if dest.task:
+                dest.task.cancel()
+        self._destinations.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, destinations=len(self._destinations),
+                    pending=sum(len(d.queue) for d in self._destinations.values()))
+
+    @staticmethod
+    def _overflow_embed(overflow: Counter) -> Embed:
+        total = sum(overflow.values())
+        embed = Embed(
+            title="⚠️ Log-Überlauf",
+            description=(
+                f"**{total}** Ereignisse wurden wegen hohen Aufkommens nicht einzeln gesendet.\n"
+                "Sie sind vollständig im Log-Viewer des Dashboards gespeichert."
+            ),
+            color=Color.orange(),
+        )
+        for title, count in overflow.most_common(OVERFLOW_SUMMARY_FIELDS):
+            embed.add_field(name=title[:256], value=f"{count}×", inline=True)
+        rest = len(overflow) - OVERFLOW_SUMMARY_FIELDS
+        if rest > 0:
+            embed.set_footer(text=f"… und {rest} weitere Event-Arten")
+        return embed
+
+    def _take_batch(self, dest: _Destination) -> List[Embed]:
+        batch: List[Embed] = []
+        size = 0
+        while dest.queue and len(batch) < EMBEDS_PER_MESSAGE:
+            embed_size = len(dest.queue[0])
+            if batch and size + embed_size > EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append(dest.queue.popleft())
+            size += embed_size
+        if dest.overflow and not dest.queue and len(batch) < EMBEDS_PER_MESSAGE:
+            summary = self._overflow_embed(dest.overflow)
+            if size + len(summary) <= EMBED_CHARS_PER_MESSAGE:
+                batch.append(summary)
+                dest.overflow.clear()
+        return batch
+
+    async def _run(self, key: Hashable, dest: _Destination) -> None:
+        loop = asyncio.get_running_loop()
+        retried = False
+        try:
+            while dest.queue or dest.overflow:
+                if len(dest.queue) < EMBEDS_PER_MESSAGE:
+                    await asyncio.sleep(self.window)
+                wait = dest.next_send - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                channel = await self.resolve(key)
+                if channel is None:
+                    # Kein gültiges Ziel konfiguriert
+                    self._stats['discarded'] += len(dest.queue)
+                    dest.queue.clear()
+                    dest.overflow.clear()
+                    break
+
+                batch = self._take_batch(dest)
+                if not batch:
+                    continue
+                try:
+                    await channel.send(embeds=batch)
+                    self._stats['messages'] += 1
+                    self._stats['embeds'] += len(batch)
+                    retried = False
+                except discord.NotFound:
+                    # Kanal oder Thread gelöscht: Ziel neu auflösen und einmal erneut versuchen
+                    self.forget(key)
+                    if not retried:
+                        dest.queue.extendleft(reversed(batch))
+                        retried = True
+                    else:
+                        self._stats['discarded'] += len(batch)
+                        retried = False
+                except discord.Forbidden:
+                    self.forget(key)
+                    self._stats['discarded'] += len(batch)
+                except discord.HTTPException as e:
+                    if e.status == 429:
+                        dest.queue.extendleft(reversed(batch))
+                        dest.next_send = loop.time() + DELIVERY_RATE_LIMIT_BACKOFF
+                        self._stats['rate_limited'] += 1
+                        continue
+                    self._stats['discarded'] += len(batch)
+                    print(f"[Logging] Fehler beim Senden von {len(batch)} Log-Embeds: {e}")
+                dest.next_send = loop.time() + self.min_spacing
+        finally:
+            dest.task = None
+            if not dest.queue and not dest.overflow and self._destinations.get(key) is dest:
+                del self._destinations[key]
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import gzip
+import heapq
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+from utils.config import GUILDS_DATA_DIR
+from utils.log_storage import FTS_COLUMNS, FTS_NAME_COLUMNS
+
+# Standard-Aufbewahrung in der Datenbank, wenn die Guild nichts eingestellt hat (Tage)
+DEFAULT_RETENTION_DAYS = 30
+# Standard-Aufbewahrung der Monatsarchive
+DEFAULT_ARCHIVE_MONTHS = 12
+# Zeilen pro Lösch-Transaktion; dazwischen kommt der LogWriter zum Zug
+RETENTION_BATCH_SIZE = 2000
+RETENTION_BATCH_PAUSE = 0.05
+# Ab so vielen gelöschten Zeilen wird der Volltextindex zusätzlich optimiert
+RETENTION_OPTIMIZE_MIN_DELETED = 10000
+
+ARCHIVE_DIR_NAME = "logs_archive"
+ARCHIVE_FILE_RE = re.compile(r"^(\d{4}-\d{2})\.jsonl\.gz$")
+ARCHIVE_MONTH_RE = re.compile(r"^\d{4}-\d{2}$")
+
+
+class LogArchive:
+    """
+    Komprimierte Monatsarchive abgelaufener Audit-Logs (data/guilds/<id>/logs_archive/YYYY-MM.jsonl.gz).
+
+    Eine JSON-Zeile pro Log. Neue Zeilen werden als weiteres gzip-Member angehängt, daher
+    muss eine Datei nie neu geschrieben werden. Abfragen lesen die Monatsdatei gestreamt
+    und halten nur die besten `limit` Treffer im Speicher.
+    """
+
+    def __init__(self, guilds_dir: str = GUILDS_DATA_DIR):
+        self.guilds_dir = guilds_dir
+
+    def _dir(self, guild_id: int) -> str:
+        return os.path.join(self.guilds_dir, str(guild_id), ARCHIVE_DIR_NAME)
+
+    def _path(self, guild_id: int, month: str) -> str:
+        return os.path.join(self._dir(guild_id), f"{month}.jsonl.gz")
+
+    def months(self, guild_id: int) -> List[str]:
+        """Vorhandene Archiv-Monate, neueste zuerst."""
+        try:
+            names = os.listdir(self._dir(guild_id))
+        except OSError:
+            return []
+        return sorted((m.group(1) for m in map(ARCHIVE_FILE_RE.match, names) if m), reverse=True)
+
+    def append(self, guild_id: int, rows: List[Dict[str, Any]]) -> int:
+        """Hängt Logs an die Archive ihrer Monate an (Monat aus dem Zeitstempel)."""
+        by_month: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        # Zeilen ohne lesbaren Zeitstempel landen im aktuellen Monat, sonst fänden
+        # months() und prune() ihre Datei nie
+        current_month = datetime.utcnow().strftime('%Y-%m')
+        for row in rows:
+            month = str(row.get('timestamp') or '')[:7]
+            by_month[month if ARCHIVE_MONTH_RE.match(month) else current_month].append(row)
+
+        os.makedirs(self._dir(guild_id), exist_ok=True)
+        for month, month_rows in by_month.items():
+            with gzip.open(self._path(guild_id, month), 'at', encoding='utf-8') as f:
+                for row in month_rows:
+                    f.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')))
+                    f.write('\n')
+        return len(rows)
+
+    def prune(self, guild_id: int, keep_months: int) -> List[str]:
+        """Löscht Archive, die älter als keep_months Monate sind."""
+        now = datetime.utcnow()
+        index = now.year * 12 + now.month - 1 - keep_months
+        oldest = f"{index // 12:04d}-{index % 12 + 1:02d}"
+        removed = []
+        for month in self.months(guild_id):
+            if month < oldest:
+                try:
+                    os.remove(self._path(guild_id, month))
+                    removed.append(month)
+                except OSError:
+                    pass
+        return removed
+
+    def _read(self, guild_id: int, month: str) -> Iterator[Dict[str, Any]]:
+        path = self._path(guild_id, month)
+        if not os.path.exists(path):
+            return
+        seen = set()
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                # Nach einem Abbruch zwischen Archivieren und Löschen kann ein Log doppelt vorkommen
+                if row.get('id') in seen:
+                    continue
+                seen.add(row.get('id'))
+                yield row
+
+    @staticmethod
+    def _matches(row: Dict[str, Any], filters: Dict[str, Any], before_id: Optional[int]) -> bool:
+        if before_id is not None and (row.get('id') or 0) >= before_id:
+            return False
+        event_type = filters.get('event_type')
+        if isinstance(event_type, str) and row.get('event_type') != event_type:
+            return False
+        if isinstance(event_type, list) and row.get('event_type') not in event_type:
+            return False
+        for key in ('user_id', 'channel_id'):
+            if key in filters and row.get(key) != filters[key]:
+                return False
+        for key, columns in (('name_search', FTS_NAME_COLUMNS), ('search', FTS_COLUMNS)):
+            terms = (filters.get(key) or '').casefold().split()
+            if terms:
+                haystack = ' '.join((row.get(c) or '') for c in columns).casefold()
+                if not all(term in haystack for term in terms):
+                    return False
+        return True
+
+    def query(self, guild_id: int, month: str, filters: Optional[Dict[str, Any]] = None,
+              limit: int = 100, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Logs eines Archiv-Monats mit denselben Filtern wie LogStorage.get_logs, neueste zuerst."""
+        filters = filters or {}
+        matches = (row for row in self._read(guild_id, month) if self._matches(row, filters, before_id))
+        return heapq.nlargest(limit, matches, key=lambda row: row.get('id') or 0)
+
+    def get_size(self, guild_id: int) -> int:
+        return sum(os.path.getsize(self._path(guild_id, m)) for m in self.months(guild_id))
+
+
+class RetentionService:
+    """
+    Setzt die Aufbewahrungsrichtlinie einer Guild durch (blockierend, läuft im Worker-Thread).
+
+    Abgelaufene Logs werden in kurzen Transaktionen über ID-Bereiche gelöscht, optional
+    vorher in die Monatsarchive geschrieben. Danach gibt compact() den Platz frei.
+    """
+
+    def __init__(self, storage, archive: Optional[LogArchive] = None,
+                 batch_size: int = RETENTION_BATCH_SIZE, batch_pause: float = RETENTION_BATCH_PAUSE):
+        self.storage = storage
+        self.archive = archive or LogArchive()
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+
+    @staticmethod
+    def policy_from_config(config: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'retention_days': int(config.get('retention_days') or DEFAULT_RETENTION_DAYS),
+            'archive_enabled': bool(config.get('archive_enabled', False)),
+            'archive_months': int(config.get('archive_months') or DEFAULT_ARCHIVE_MONTHS),
+        }
+
+    def run(self, guild_id: int, policy: Dict[str, Any]) -> Dict[str, Any]:
+        cutoff = (datetime.utcnow() - timedelta(days=policy['retention_days'])).isoformat()
+        result = {'deleted': 0, 'archived': 0, 'compacted': '', 'archives_removed': []}
+
+        max_id = self.storage.get_expired_max_id(guild_id, cutoff)
+        last_id = 0
+        while max_id:
+            rows = self.storage.get_expired_batch(guild_id, cutoff, last_id, max_id, self.batch_size)
+            if not rows:
+                break
+            if policy['archive_enabled']:
+                result['archived'] += self.archive.append(guild_id, rows)
+            first_id, last_id = rows[0]['id'], rows[-1]['id']
+            result['deleted'] += self.storage.delete_expired_range(guild_id, first_id, last_id, cutoff)
+            time.sleep(self.batch_pause)
+
+        result['compacted'] = self.storage.compact(
+            guild_id, optimize_fts=result['deleted'] >= RETENTION_OPTIMIZE_MIN_DELETED
+        )
+        result['archives_removed'] = self.archive.prune(guild_id, policy['archive_months'])
+        return result
@@ -2,35 +2,69 @@
 import sqlite3
 import os
 import json
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from utils.config import GUILDS_DATA_DIR
+from utils.sqlite_pool import SQLitePool
+
+# Dateiname für Delta-Exporte (nur neue Einträge seit dem letzten Backup)
+LOGS_DELTA_FILENAME = "logs_delta.db"
+
+# Spalten im Volltextindex; Namenssuche nutzt nur die ersten beiden
+FTS_COLUMNS = ("user_name", "target_name", "before_value", "after_value")
+FTS_NAME_COLUMNS = ("user_name", "target_name")
+INSERT_COLUMNS = (
+    "timestamp", "event_type", "user_id", "user_name", "channel_id",
+    "channel_name", "target_id", "target_name", "action", "before_value",
+    "after_value", "reason", "extra_data",
+)
+INSERT_SQL = (
+    f"INSERT INTO audit_logs ({', '.join(INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(INSERT_COLUMNS))})"
+)
+
+# Trigram erlaubt Teilstring-Suche, braucht aber SQLite >= 3.34 und mindestens 3 Zeichen
+FTS_TRIGRAM_MIN_LENGTH = 3
+
+def _db_path(guild_id: int) -> str:
+    guild_dir = os.path.join(GUILDS_DATA_DIR, str(guild_id))
+    os.makedirs(guild_dir, exist_ok=True)
+    return os.path.join(guild_dir, "logs.db")
+
+
+_pool: Optional[SQLitePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_log_pool() -> SQLitePool:
+    """Gemeinsamer Verbindungspool aller LogStorage-Instanzen des Prozesses (ein Writer pro logs.db)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SQLitePool(_db_path, init=lambda guild_id, conn: LogStorage._init_schema(conn))
+        return _pool
+
 
 class LogStorage:
     """Handles persistent audit log storage using SQLite."""
 
-    def __init__(self):
-        self.db_connections = {}
+    def __init__(self, pool: Optional[SQLitePool] = None):
+        # Writes go through the pool's writer connection, reads (e.g. from Flask threads) through its reader
+        self.pool = pool or get_log_pool()
 
     def _get_db_path(self, guild_id: int) -> str:
         """Get the database file path for a guild."""
-        guild_dir = os.path.join(GUILDS_DATA_DIR, str(guild_id))
-        os.makedirs(guild_dir, exist_ok=True)
-        return os.path.join(guild_dir, "logs.db")
-
-    def _get_connection(self, guild_id: int) -> sqlite3.Connection:
-        """Get or create a database connection for a guild."""
-        db_path = self._get_db_path(guild_id)
-
-        if guild_id not in self.db_connections:
-            conn = sqlite3.connect(db_path, check_same_thread=False)
-            conn.row_factory = sqlite3.Row
-            self.db_connections[guild_id] = conn
-            self._init_db(conn)
+        return _db_path(guild_id)
 
-        return self.db_connections[guild_id]
+    @staticmethod
+    def _init_schema(conn: sqlite3.Connection) -> Optional[str]:
+        """Create/migrate the schema on a freshly opened connection. Returns the FTS tokenizer (conn.meta)."""
+        LogStorage._init_db(conn)
+        return LogStorage._init_fts(conn)
 
-    def _init_db(self, conn: sqlite3.Connection) -> None:
+    @staticmethod
+    def _init_db(conn: sqlite3.Connection) -> None:
         """Initialize the database schema if it doesn't exist."""
         cursor = conn.cursor()
         cursor.execute("""
@@ -52,50 +86,123 @@ class LogStorage:
             )
         """)
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON audit_logs(timestamp)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_type ON audit_logs(event_type)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_id ON audit_logs(user_id)")
+        # Zusammengesetzte Indizes passend zu den Filtern plus Keyset-Pagination über die ID
+        cursor.execute("DROP INDEX IF EXISTS idx_event_type")
+        cursor.execute("DROP INDEX IF EXISTS idx_user_id")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_type_id ON audit_logs(event_type, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_id_id ON audit_logs(user_id, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_channel_id_id ON audit_logs(channel_id, id)")
+
+        # Zähler pro Event-Typ, per Trigger gepflegt (statt COUNT(*) über die ganze Tabelle)
+        has_counts = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'audit_log_counts'"
+        ).fetchone()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS audit_log_counts (
+                event_type TEXT PRIMARY KEY,
+                count INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS audit_log_counts_ai AFTER INSERT ON audit_logs BEGIN
+                INSERT INTO audit_log_counts(event_type, count) VALUES (new.event_type, 1)
+                ON CONFLICT(event_type) DO UPDATE SET count = count + 1;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS audit_log_counts_ad AFTER DELETE ON audit_logs BEGIN
+                UPDATE audit_log_counts SET count = count - 1 WHERE event_type = old.event_type;
+            END
+        """)
+        if not has_counts:
+            cursor.execute("""
+                INSERT INTO audit_log_counts(event_type, count)
+                SELECT event_type, COUNT(*) FROM audit_logs GROUP BY event_type
+            """)
         conn.commit()
 
-    def save_log(self, guild_id: int, event_data: Dict[str, Any]) -> int:
+    @staticmethod
+    def _init_fts(conn: sqlite3.Connection) -> Optional[str]:
         """
-        Save a log entry to the database.
-
-        Args:
-            guild_id: The guild ID
-            event_data: Dictionary containing log data:
-                - event_type: str (required)
-                - user_id: str
-                - user_name: str
-                - channel_id: str
-                - channel_name: str
-                - target_id: str
-                - target_name: str
-                - action: str
-                - before_value: str
-                - after_value: str
-                - reason: str
-                - extra_data: dict (will be JSON-serialized)
+        Create the FTS5 index over names and values (external content, kept in sync by triggers).
+        Existing databases are indexed once on first open.
 
         Returns:
-            The ID of the inserted log entry
+            The tokenizer in use ('trigram' or 'unicode61'), or None if FTS5 is unavailable
+        """
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'audit_logs_fts'").fetchone()
+        if row is None:
+            columns = ", ".join(FTS_COLUMNS)
+            for tokenizer in ("trigram", "unicode61"):
+                try:
+                    conn.execute(f"""
+                        CREATE VIRTUAL TABLE audit_logs_fts USING fts5(
+                            {columns}, content='audit_logs', content_rowid='id', tokenize='{tokenizer}'
+                        )
+                    """)
+                    break
+                except sqlite3.OperationalError:
+                    continue
+            else:
+                return None
+            conn.execute("INSERT INTO audit_logs_fts(audit_logs_fts) VALUES ('rebuild')")
+            row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'audit_logs_fts'").fetchone()
+
+        new_values = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+        old_values = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+        columns = ", ".join(FTS_COLUMNS)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS audit_logs_fts_ai AFTER INSERT ON audit_logs BEGIN
+                INSERT INTO audit_logs_fts(rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS audit_logs_fts_ad AFTER DELETE ON audit_logs BEGIN
+                INSERT INTO audit_logs_fts(audit_logs_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS audit_logs_fts_au AFTER UPDATE ON audit_logs BEGIN
+                INSERT INTO audit_logs_fts(audit_logs_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO audit_logs_fts(rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        """)
+        conn.commit()
+        return "trigram" if "trigram" in row['sql'] else "unicode61"
+
+    @staticmethod
+    def _fts_query(text: str, columns: tuple, mode: str) -> Optional[str]:
+        """Build a safe FTS5 MATCH expression (all terms must match) or None if unusable."""
+        terms = text.split()
+        if not terms:
+            return None
+        if mode == "trigram" and any(len(t) < FTS_TRIGRAM_MIN_LENGTH for t in terms):
+            return None
+        quoted = []
+        for term in terms:
+            phrase = '"' + term.replace('"', '""') + '"'
+            # unicode61 kennt keine Teilstrings, daher Präfixsuche
+            quoted.append(phrase if mode == "trigram" else phrase + "*")
+        return "{" + " ".join(columns) + "} : (" + " AND ".join(quoted) + ")"
+
+    @staticmethod
+    def build_row(event_data: Dict[str, Any]) -> tuple:
+        """
+        Convert an event dictionary into an insert row (see INSERT_COLUMNS).
+
+        event_data keys:
+            - event_type: str (required)
+            - user_id, user_name, channel_id, channel_name: str
+            - target_id, target_name, action, before_value, after_value, reason: str
+            - extra_data: dict (will be JSON-serialized)
+            - timestamp: str (defaults to now)
         """
-        conn = self._get_connection(guild_id)
-        cursor = conn.cursor()
-
-        # Prepare data
-        timestamp = event_data.get('timestamp', datetime.utcnow().isoformat())
         extra_data = event_data.get('extra_data')
         if extra_data and isinstance(extra_data, dict):
             extra_data = json.dumps(extra_data)
 
-        cursor.execute("""
-            INSERT INTO audit_logs (
-                timestamp, event_type, user_id, user_name, channel_id,
-                channel_name, target_id, target_name, action, before_value,
-                after_value, reason, extra_data
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            timestamp,
+        return (
+            event_data.get('timestamp', datetime.utcnow().isoformat()),
             event_data.get('event_type'),
             event_data.get('user_id'),
             event_data.get('user_name'),
@@ -107,15 +214,40 @@ class LogStorage:
             event_data.get('before_value'),
             event_data.get('after_value'),
             event_data.get('reason'),
-            extra_data
-        ))
+            extra_data,
+        )
 
-        conn.commit()
+    def save_log(self, guild_id: int, event_data: Dict[str, Any]) -> int:
+        """
+        Save a single log entry immediately (one transaction).
+        The logging cog goes through the batched LogWriter instead.
+
+        Returns:
+            The ID of the inserted log entry
+        """
+        with self.pool.writer(guild_id) as conn:
+            cursor = conn.execute(INSERT_SQL, self.build_row(event_data))
+            conn.commit()
         return cursor.lastrowid
 
-    def get_logs(self, guild_id: int, filters: Optional[Dict[str, Any]] = None, limit: int = 100) -> List[Dict]:
+    def save_rows(self, guild_id: int, rows: List[tuple]) -> int:
         """
-        Retrieve logs with optional filters.
+        Insert prepared rows (see build_row) in a single transaction.
+
+        Returns:
+            Number of inserted rows
+        """
+        if not rows:
+            return 0
+        with self.pool.writer(guild_id) as conn:
+            conn.executemany(INSERT_SQL, rows)
+            conn.commit()
+        return len(rows)
+
+    def get_logs(self, guild_id: int, filters: Optional[Dict[str, Any]] = None, limit: int = 100,
+                 before_id: Optional[int] = None) -> List[Dict]:
+        """
+        Retrieve logs with optional filters, newest first.
 
         Args:
             guild_id: The guild ID
@@ -124,47 +256,74 @@ class LogStorage:
                 - user_id: str
                 - channel_id: str
                 - days: int (last N days)
+                - name_search: str (user/target name, full-text)
+                - search: str (names and before/after values, full-text)
             limit: Maximum number of logs to return
+            before_id: Keyset cursor, only return logs with a smaller ID (next page)
 
         Returns:
             List of log dictionaries
         """
-        conn = self._get_connection(guild_id)
-        cursor = conn.cursor()
+        with self.pool.reader(guild_id) as conn:
+            fts_mode = conn.meta
+
+            query = "SELECT a.* FROM audit_logs a"
+            where = []
+            params: List[Any] = []
+            filters = filters or {}
+
+            match_parts = []
+            for key, columns in (('name_search', FTS_NAME_COLUMNS), ('search', FTS_COLUMNS)):
+                text = (filters.get(key) or '').strip()
+                if not text:
+                    continue
+                match = self._fts_query(text, columns, fts_mode) if fts_mode else None
+                if match:
+                    match_parts.append(match)
+                else:
+                    # Fallback ohne passenden Volltextindex (z.B. sehr kurze Begriffe)
+                    like_clauses = " OR ".join(f"a.{c} LIKE ?" for c in columns)
+                    where.append(f"({like_clauses})")
+                    params.extend([f"%{text}%"] * len(columns))
+            if match_parts:
+                query += " JOIN audit_logs_fts ON audit_logs_fts.rowid = a.id"
+                where.append("audit_logs_fts MATCH ?")
+                params.append(" AND ".join(match_parts))
 
-        query = "SELECT * FROM audit_logs WHERE 1=1"
-        params = []
-
-        if filters:
             if 'event_type' in filters:
                 event_types = filters['event_type']
                 if isinstance(event_types, str):
-                    query += " AND event_type = ?"
+                    where.append("a.event_type = ?")
                     params.append(event_types)
                 elif isinstance(event_types, list):
                     placeholders = ','.join('?' * len(event_types))
-                    query += f" AND event_type IN ({placeholders})"
+                    where.append(f"a.event_type IN ({placeholders})")
                     params.extend(event_types)
 
             if 'user_id' in filters:
-                query += " AND user_id = ?"
+                where.append("a.user_id = ?")
                 params.append(filters['user_id'])
 
             if 'channel_id' in filters:
-                query += " AND channel_id = ?"
+                where.append("a.channel_id = ?")
                 params.append(filters['channel_id'])
 
             if 'days' in filters:
                 cutoff_date = (datetime.utcnow() - timedelta(days=filters['days'])).isoformat()
-                query += " AND timestamp > ?"
+                where.append("a.timestamp > ?")
                 params.append(cutoff_date)
 
-        query += " ORDER BY timestamp DESC LIMIT ?"
-        params.append(limit)
+            if before_id is not None:
+                where.append("a.id < ?")
+                params.append(before_id)
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+            if where:
+                query += " WHERE " + " AND ".join(where)
+            # Die ID steigt mit jedem Eintrag, ORDER BY id nutzt die (filter, id)-Indizes
+            query += " ORDER BY a.id DESC LIMIT ?"
+            params.append(limit)
 
+            rows = conn.execute(query, params).fetchall()
         return [dict(row) for row in rows]
 
     def delete_old_logs(self, guild_id: int, days: int) -> int:
@@ -178,38 +337,162 @@ class LogStorage:
         Returns:
             Number of deleted rows
         """
-        conn = self._get_connection(guild_id)
-        cursor = conn.cursor()
-
         cutoff_date = (datetime.utcnow() - timedelta(days=days)).isoformat()
-        cursor.execute("DELETE FROM audit_logs WHERE timestamp < ?", (cutoff_date,))
-        conn.commit()
+        with self.pool.writer(guild_id) as conn:
+            cursor = conn.execute("DELETE FROM audit_logs WHERE timestamp < ?", (cutoff_date,))
+            conn.commit()
 
         return cursor.rowcount
 
-    def get_stats(self, guild_id: int) -> Dict[str, Any]:
-        """Get statistics about the logs for a guild."""
-        conn = self._get_connection(guild_id)
-        cursor = conn.cursor()
+    def get_expired_batch(self, guild_id: int, cutoff: str, after_id: int, max_id: int, limit: int) -> List[Dict]:
+        """
+        Next batch of logs older than cutoff, in ID order (for batched retention).
+        Scans the primary key between after_id and max_id, so every batch is a short range read.
+        """
+        with self.pool.reader(guild_id) as conn:
+            rows = conn.execute(
+                "SELECT * FROM audit_logs WHERE id > ? AND id <= ? AND timestamp < ? ORDER BY id LIMIT ?",
+                (after_id, max_id, cutoff, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_expired_max_id(self, guild_id: int, cutoff: str) -> int:
+        """Highest ID of a log older than cutoff (0 if none), via the timestamp index."""
+        with self.pool.reader(guild_id) as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM audit_logs WHERE timestamp < ?", (cutoff,)).fetchone()[0]
+
+    def delete_expired_range(self, guild_id: int, first_id: int, last_id: int, cutoff: str) -> int:
+        """Delete the logs older than cutoff within an ID range in one short transaction."""
+        with self.pool.writer(guild_id) as conn:
+            cursor = conn.execute(
+                "DELETE FROM audit_logs WHERE id BETWEEN ? AND ? AND timestamp < ?",
+                (first_id, last_id, cutoff)
+            )
+            conn.commit()
+        return cursor.rowcount
 
-        cursor.execute("SELECT COUNT(*) as total FROM audit_logs")
-        total = cursor.fetchone()['total']
+    def compact(self, guild_id: int, optimize_fts: bool = False) -> str:
+        """
+        Return free pages to the file system after deletions.
 
-        cursor.execute("""
-            SELECT event_type, COUNT(*) as count
-            FROM audit_logs
-            GROUP BY event_type
-            ORDER BY count DESC
-        """)
-        by_type = {row['event_type']: row['count'] for row in cursor.fetchall()}
+        The first run converts the database to auto_vacuum=INCREMENTAL (needs one full VACUUM),
+        afterwards incremental_vacuum only releases the free pages. The WAL is truncated at the end.
+
+        Returns:
+            'vacuum', 'incremental' or '' if nothing had to be done
+        """
+        with self.pool.writer(guild_id) as conn:
+            if optimize_fts and conn.meta:
+                conn.execute("INSERT INTO audit_logs_fts(audit_logs_fts) VALUES ('optimize')")
+                conn.commit()
+
+            mode = ''
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+                mode = 'vacuum'
+            elif conn.execute("PRAGMA freelist_count").fetchone()[0] > 0:
+                conn.execute("PRAGMA incremental_vacuum")
+                conn.commit()
+                mode = 'incremental'
+            if mode:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return mode
+
+    def get_db_size(self, guild_id: int) -> int:
+        """Size of the guild's log database in bytes (including the WAL file)."""
+        path = self._get_db_path(guild_id)
+        return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+    def get_stats(self, guild_id: int) -> Dict[str, Any]:
+        """Get statistics about the logs for a guild (from the incrementally maintained counters)."""
+        with self.pool.reader(guild_id) as conn:
+            rows = conn.execute("SELECT event_type, count FROM audit_log_counts WHERE count > 0 ORDER BY count DESC").fetchall()
+        by_type = {row['event_type']: row['count'] for row in rows}
 
         return {
-            'total_logs': total,
+            'total_logs': sum(by_type.values()),
             'by_event_type': by_type
         }
 
+    def count_logs(self, guild_id: int, event_type: Optional[str] = None) -> int:
+        """Number of logs in total or of a single event type, without scanning the table."""
+        with self.pool.reader(guild_id) as conn:
+            if event_type:
+                row = conn.execute("SELECT count FROM audit_log_counts WHERE event_type = ?", (event_type,)).fetchone()
+                return row[0] if row else 0
+            return conn.execute("SELECT COALESCE(SUM(count), 0) FROM audit_log_counts").fetchone()[0]
+
+    def get_max_id(self, guild_id: int) -> int:
+        """Get the highest log ID of a guild (0 if empty)."""
+        with self.pool.reader(guild_id) as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM audit_logs").fetchone()[0]
+
+    def create_snapshot(self, guild_id: int, dest_path: str) -> int:
+        """
+        Create a consistent copy of the guild's log database via the SQLite online backup API.
+        A separate read connection is used, so logging continues while the copy runs.
+        The copy is vacuumed afterwards to keep it compact.
+
+        Returns:
+            The highest log ID contained in the snapshot
+        """
+        source = sqlite3.connect(self._get_db_path(guild_id))
+        dest = sqlite3.connect(dest_path)
+        try:
+            source.backup(dest)
+            # Die Kopie soll ohne -wal-Datei vollständig sein
+            dest.execute("PRAGMA journal_mode=DELETE")
+            dest.execute("VACUUM")
+            return dest.execute("SELECT COALESCE(MAX(id), 0) FROM audit_logs").fetchone()[0]
+        finally:
+            dest.close()
+            source.close()
+
+    def export_delta(self, guild_id: int, since_id: int, dest_path: str) -> Dict[str, int]:
+        """
+        Export all log entries with id > since_id into a separate SQLite file.
+        The copy happens in a single statement and therefore sees a consistent state.
+
+        Returns:
+            Dict with 'rows' (exported rows) and 'max_id' (highest exported ID, or since_id)
+        """
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        source = sqlite3.connect(self._get_db_path(guild_id))
+        try:
+            source.execute("ATTACH DATABASE ? AS delta", (dest_path,))
+            source.execute("CREATE TABLE delta.audit_logs AS SELECT * FROM main.audit_logs WHERE id > ? ORDER BY id", (since_id,))
+            source.commit()
+            rows, max_id = source.execute("SELECT COUNT(*), COALESCE(MAX(id), ?) FROM delta.audit_logs", (since_id,)).fetchone()
+            source.execute("DETACH DATABASE delta")
+            return {'rows': rows, 'max_id': max_id}
+        finally:
+            source.close()
+
+    def import_delta(self, guild_id: int, delta_path: str) -> int:
+        """
+        Merge a delta export (see export_delta) into the guild's log database.
+        Entries that already exist (same ID) are skipped.
+
+        Returns:
+            Number of imported rows
+        """
+        with self.pool.writer(guild_id) as conn:
+            conn.execute("ATTACH DATABASE ? AS delta", (delta_path,))
+            try:
+                # rowcount statt total_changes, da die Index-/Zähler-Trigger mitgezählt würden
+                cursor = conn.execute("INSERT OR IGNORE INTO main.audit_logs SELECT * FROM delta.audit_logs")
+                imported = cursor.rowcount
+                conn.commit()
+            finally:
+                conn.execute("DETACH DATABASE delta")
+        return imported
+
+    def close_connection(self, guild_id: int) -> None:
+        """Close the database connections of a single guild (reopened on next access)."""
+        self.pool.close(guild_id)
+
     def close_all_connections(self) -> None:
-        """Close all database connections."""
-        for conn in self.db_connections.values():
-            conn.close()
-        self.db_connections.clear()
+        """Close all database connections (e.g. on shutdown or before a restore)."""
+        self.pool.close_all()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Maximale Anzahl Logs pro Transaktion
+LOG_WRITER_MAX_BATCH = 500
+# Nach dem ersten Eintrag kurz warten, damit Event-Stürme in einer Transaktion landen (Sekunden)
+LOG_WRITER_LINGER = 0.05
+# Obergrenze der Warteschlange; darüber werden Logs verworfen statt den Bot auszubremsen
+LOG_WRITER_MAX_QUEUE = 50000
+# So lange wartet stop() auf das Leeren der Warteschlange (Sekunden)
+LOG_WRITER_STOP_TIMEOUT = 10
+
+_STOP = object()
+
+
+class LogWriter:
+    """
+    Schreibt Audit-Logs gebündelt aus einem eigenen Thread in die LogStorage.
+
+    Der Bot-Loop legt nur fertig aufbereitete Zeilen in die Warteschlange (enqueue),
+    der Writer-Thread fasst alles, was gerade ansteht, pro Guild zu einer Transaktion
+    zusammen. Bei Bulk-Deletes oder Voice-Stürmen wird so aus tausenden Commits eine
+    Handvoll, und der Loop wartet nie auf die Festplatte.
+    """
+
+    def __init__(self, storage, max_batch: int = LOG_WRITER_MAX_BATCH,
+                 linger: float = LOG_WRITER_LINGER, max_queue: int = LOG_WRITER_MAX_QUEUE):
+        self.storage = storage
+        self.max_batch = max_batch
+        self.linger = linger
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Wird während eines Batches gehalten; pause() nimmt ihn, damit nichts in die Datenbank schreibt
+        self._write_lock = threading.Lock()
+        self._stats = {'written': 0, 'batches': 0, 'dropped': 0, 'failed': 0}
+
+    def _count(self, key: str, delta: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += delta
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = LOG_WRITER_STOP_TIMEOUT) -> None:
+        """Schreibt alle wartenden Logs und beendet den Thread."""
+        if not self._thread:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def pause(self, timeout: float = LOG_WRITER_STOP_TIMEOUT) -> bool:
+        """
+        Hält das Schreiben an, z.B. während logs.db bei einer Wiederherstellung ersetzt wird.
+        Wartet auf den laufenden Batch; neue Logs sammeln sich bis resume() in der Warteschlange.
+
+        Returns:
+            False, wenn der laufende Batch nicht innerhalb von timeout fertig wurde
+        """
+        return self._write_lock.acquire(timeout=timeout)
+
+    def resume(self) -> None:
+        self._write_lock.release()
+
+    def enqueue(self, guild_id: int, event_data: Dict[str, Any]) -> bool:
+        """Nimmt einen Log-Eintrag an (nicht blockierend). False, wenn die Warteschlange voll ist."""
+        row = self.storage.build_row(event_data)
+        try:
+            self._queue.put_nowait((guild_id, row))
+        except queue.Full:
+            self._count('dropped')
+            return False
+        return True
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, pending=self._queue.qsize())
+
+    def _collect(self, first) -> Tuple[List[Tuple[int, tuple]], bool]:
+        """Sammelt ab dem ersten Eintrag alles Anstehende (max. max_batch)."""
+        batch = [first]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, batch: List[Tuple[int, tuple]]) -> None:
+        by_guild: Dict[int, List[tuple]] = defaultdict(list)
+        for guild_id, row in batch:
+            by_guild[guild_id].append(row)
+        with self._write_lock:
+            for guild_id, rows in by_guild.items():
+                try:
+                    self.storage.save_rows(guild_id, rows)
+                    self._count('written', len(rows))
+                except Exception as e:
+                    self._count('failed', len(rows))
+                    print(f"[Logging] Fehler beim Schreiben von {len(rows)} Logs für Guild {guild_id}: {e}")
+        self._count('batches')
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stopping = self._collect(item)
+            self._write(batch)
+        # Nach dem Stop-Signal eingereihte Logs nicht verlieren
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftovers.append(item)
+        if leftovers:
+            self._write(leftovers)
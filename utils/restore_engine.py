@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import posixpath
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import BinaryIO, Iterable, List, Optional, Set
+
+# Vorbereitete und ersetzte Verzeichnisse liegen neben den Live-Daten (gleiches Dateisystem,
+# damit os.rename atomar ist) und beginnen mit einem Punkt.
+STAGING_PREFIX = ".restore_staging_"
+TRASH_PREFIX = ".restore_old_"
+
+COPY_BUFFER_SIZE = 1024 * 1024
+# Mehrteilige Uploads werden bis zu dieser Größe im Speicher zusammengesetzt, darüber in einer Temp-Datei
+SPOOL_MAX_MEMORY = 32 * 1024 * 1024
+
+
+class RestoreError(Exception):
+    """Das Backup-Archiv ist ungültig oder konnte nicht wiederhergestellt werden."""
+
+
+def _safe_relative_path(name: str) -> Optional[str]:
+    """Normalisiert einen Pfad aus dem ZIP und verwirft absolute Pfade und '..'."""
+    name = name.replace('\\', '/')
+    normalized = posixpath.normpath(name)
+    if normalized.startswith('/') or normalized == '.' or normalized.startswith('../') or normalized == '..':
+        return None
+    return normalized
+
+
+def _detect_prefix(names: List[str]) -> str:
+    """Backups vom Backup-Tool enthalten einen 'data/'-Ordner, Dashboard-Backups direkt den Inhalt."""
+    if names and all(n.startswith('data/') for n in names):
+        return 'data/'
+    return ''
+
+
+def stage_archive(fileobj: BinaryIO, staging_dir: str, skip: Optional[Set[str]] = None) -> List[str]:
+    """
+    Entpackt ein ZIP Eintrag für Eintrag direkt in das Staging-Verzeichnis.
+    JSON-Dateien werden dabei auf Gültigkeit geprüft.
+
+    Args:
+        fileobj: Lesbares, seekbares Dateiobjekt (z.B. der Upload-Stream von Flask)
+        staging_dir: Zielverzeichnis (wird angelegt)
+        skip: Relative Pfade, die nicht übernommen werden (ein Verzeichnisname überspringt den ganzen Ordner)
+
+    Returns:
+        Liste der übernommenen relativen Pfade
+    """
+    skip = skip or set()
+    os.makedirs(staging_dir, exist_ok=True)
+    restored = []
+
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as e:
+        raise RestoreError(f"Keine gültige ZIP-Datei: {e}")
+
+    with archive:
+        entries = [info for info in archive.infolist() if not info.is_dir()]
+        prefix = _detect_prefix([info.filename for info in entries])
+
+        for info in entries:
+            rel_path = _safe_relative_path(info.filename[len(prefix):])
+            if rel_path is None:
+                raise RestoreError(f"Ungültiger Pfad im Archiv: {info.filename}")
+            if rel_path in skip or rel_path.split('/', 1)[0] in skip:
+                continue
+
+            target = os.path.join(staging_dir, *rel_path.split('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with archive.open(info) as src, open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+
+            if rel_path.endswith('.json'):
+                try:
+                    with open(target, 'r', encoding='utf-8') as f:
+                        json.load(f)
+                except (ValueError, UnicodeDecodeError) as e:
+                    raise RestoreError(f"Beschädigte JSON-Datei im Archiv: {rel_path} ({e})")
+
+            restored.append(rel_path)
+
+    return restored
+
+
+def stage_multipart_archive(parts: Iterable[BinaryIO], staging_dir: str, skip: Optional[Set[str]] = None) -> List[str]:
+    """Setzt ein in Teile gesplittetes ZIP (.part1, .part2, ...) zusammen und entpackt es."""
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as combined:
+        for part in parts:
+            shutil.copyfileobj(part, combined, COPY_BUFFER_SIZE)
+        combined.seek(0)
+        return stage_archive(combined, staging_dir, skip)
+
+
+def new_staging_dir(parent_dir: str, name: str) -> str:
+    path = os.path.join(parent_dir, f"{STAGING_PREFIX}{name}")
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    return path
+
+
+def _trash_dir(parent_dir: str, name: str) -> str:
+    return os.path.join(parent_dir, f"{TRASH_PREFIX}{name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
+
+
+def swap_directory(staging_dir: str, live_dir: str) -> Optional[str]:
+    """
+    Ersetzt live_dir durch staging_dir mit zwei Umbenennungen.
+
+    Returns:
+        Pfad des alten Verzeichnisses (zum späteren Löschen) oder None
+    """
+    trash = None
+    if os.path.exists(live_dir):
+        trash = _trash_dir(os.path.dirname(live_dir), os.path.basename(live_dir))
+        os.rename(live_dir, trash)
+    try:
+        os.rename(staging_dir, live_dir)
+    except OSError:
+        if trash:
+            os.rename(trash, live_dir)
+        raise
+    return trash
+
+
+def swap_children(staging_dir: str, live_dir: str, keep: Optional[Set[str]] = None) -> str:
+    """
+    Ersetzt den Inhalt von live_dir Eintrag für Eintrag durch den von staging_dir.
+    Wird verwendet, wenn live_dir selbst nicht umbenannt werden kann (z.B. Docker-Volume).
+
+    Args:
+        keep: Einträge in live_dir, die erhalten bleiben (z.B. config.json)
+
+    Returns:
+        Pfad des Verzeichnisses mit den alten Einträgen
+    """
+    keep = keep or set()
+    trash = _trash_dir(live_dir, "data")
+    os.makedirs(trash)
+
+    for name in os.listdir(live_dir):
+        if name in keep or name.startswith(STAGING_PREFIX) or name.startswith(TRASH_PREFIX):
+            continue
+        os.rename(os.path.join(live_dir, name), os.path.join(trash, name))
+
+    for name in os.listdir(staging_dir):
+        if name in keep:
+            continue
+        os.rename(os.path.join(staging_dir, name), os.path.join(live_dir, name))
+
+    return trash
+
+
+def overlay_directory(staging_dir: str, live_dir: str, files: Iterable[str], deleted: Iterable[str] = ()) -> int:
+    """
+    Verschiebt einzelne Dateien aus dem Staging-Verzeichnis in live_dir (os.replace pro Datei)
+    und entfernt gelöschte Dateien. Für Teil-Wiederherstellungen und inkrementelle Archive.
+
+    Returns:
+        Anzahl der übernommenen Dateien
+
+    Raises:
+        RestoreError: Ein Pfad (z.B. aus der 'deleted'-Liste des Manifests) zeigt aus live_dir heraus.
+            Geprüft wird vor jeder Änderung, ein ungültiges Archiv verändert also nichts.
+    """
+    live_root = os.path.realpath(live_dir)
+
+    def resolve(rel_path: str) -> str:
+        safe = _safe_relative_path(rel_path) if isinstance(rel_path, str) else None
+        if safe is None:
+            raise RestoreError(f"Ungültiger Pfad im Archiv: {rel_path}")
+        path = os.path.join(live_dir, *safe.split('/'))
+        real = os.path.realpath(path)
+        if os.path.commonpath([live_root, real]) != live_root or real == live_root:
+            raise RestoreError(f"Pfad außerhalb des Zielverzeichnisses: {rel_path}")
+        return path
+
+    files = [(rel_path, resolve(rel_path)) for rel_path in files]
+    deleted = [resolve(rel_path) for rel_path in deleted]
+
+    count = 0
+    for rel_path, dst in files:
+        src = os.path.join(staging_dir, *rel_path.split('/'))
+        if not os.path.exists(src):
+            continue
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        os.replace(src, dst)
+        count += 1
+    for path in deleted:
+        if os.path.isfile(path):
+            os.remove(path)
+    return count
+
+
+def remove_tree(path: Optional[str]) -> None:
+    if path and os.path.exists(path):
+        shutil.rmtree(path, ignore_errors=True)
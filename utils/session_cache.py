@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Set
+
+# Wie lange Profil und Serverliste eines Dashboard-Logins gültig bleiben (Sekunden)
+SESSION_CACHE_TTL = 300
+# Fehlt ein Server in der Liste, wird frühestens nach dieser Zeit neu bei Discord nachgefragt
+SESSION_CACHE_MIN_REFRESH = 30
+# Maximale Anzahl gleichzeitig gecachter Logins (älteste fliegen zuerst raus)
+SESSION_CACHE_MAX_ENTRIES = 1000
+
+
+class SessionEntry:
+    """Gecachte OAuth-Daten eines Logins: Profil, Serverliste und Admin-Server als Set."""
+    __slots__ = ('user', 'guilds', 'admin_guild_ids', 'fetched_at')
+
+    def __init__(self, user, guilds: List[Any]):
+        self.user = user
+        self.guilds = guilds
+        self.admin_guild_ids: Set[int] = {g.id for g in guilds if g.permissions.administrator}
+        self.fetched_at = time.monotonic()
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class SessionCache:
+    """
+    Serverseitiger Cache für Discord-OAuth-Daten, getrennt nach Dashboard-Login.
+
+    Im Flask-Cookie steht nur eine zufällige Cache-ID; Profil und Serverliste bleiben
+    im Prozess. Flask bedient Anfragen aus mehreren Threads, daher das Lock.
+    """
+
+    def __init__(self, ttl: float = SESSION_CACHE_TTL, max_entries: int = SESSION_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, SessionEntry]" = OrderedDict()
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def get(self, cache_id: Optional[str]) -> Optional[SessionEntry]:
+        """Gültiger Eintrag oder None, wenn keiner existiert oder die TTL abgelaufen ist."""
+        if not cache_id:
+            return None
+        with self._lock:
+            entry = self._entries.get(cache_id)
+            if entry is None:
+                return None
+            if entry.age() > self.ttl:
+                del self._entries[cache_id]
+                return None
+            self._entries.move_to_end(cache_id)
+            return entry
+
+    def load(self, cache_id: str, fetch_user: Callable[[], Any], fetch_guilds: Callable[[], List[Any]]) -> SessionEntry:
+        """Holt Profil und Serverliste von Discord (blockierend) und legt sie ab."""
+        entry = SessionEntry(fetch_user(), fetch_guilds())
+        with self._lock:
+            self._entries[cache_id] = entry
+            self._entries.move_to_end(cache_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def discard(self, cache_id: Optional[str]) -> None:
+        if not cache_id:
+            return
+        with self._lock:
+            self._entries.pop(cache_id, None)
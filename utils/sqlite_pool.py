@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+# Maximal gleichzeitig geöffnete Datenbanken (je eine Schreib- und eine Leseverbindung)
+SQLITE_POOL_MAX_OPEN = 50
+# Vorbereitete Statements pro Verbindung (sqlite3 cached sie nach SQL-Text)
+SQLITE_STATEMENT_CACHE = 256
+# So lange wartet eine Verbindung auf eine Sperre eines anderen Prozesses (Sekunden)
+SQLITE_BUSY_TIMEOUT = 10.0
+# WAL: Leser blockieren den Writer nicht; NORMAL verzichtet auf fsync pro Commit (nur beim Checkpoint)
+SQLITE_WAL_PRAGMAS = ("PRAGMA journal_mode=WAL", "PRAGMA synchronous=NORMAL")
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3-Verbindung mit `meta` für das Ergebnis der Initialisierung (z.B. Schema-Features)."""
+    meta: Any = None
+
+
+class _PooledDatabase:
+    __slots__ = ('path', 'write_lock', 'read_lock', 'writer', 'reader', 'meta', 'users', 'closed')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.write_lock = threading.Lock()
+        self.read_lock = threading.Lock()
+        self.writer: Optional[PooledConnection] = None
+        self.reader: Optional[PooledConnection] = None
+        self.meta: Any = None
+        # Anzahl laufender Zugriffe; nur unbenutzte Datenbanken werden geschlossen
+        self.users = 0
+        self.closed = False
+
+
+class SQLitePool:
+    """
+    Begrenzter Pool von SQLite-Datenbanken (z.B. eine pro Guild), threadsicher.
+
+    Pro Datenbank gibt es genau eine Schreibverbindung und eine Leseverbindung
+    (query_only), jeweils durch ein eigenes Lock geschützt. Dank WAL blockieren Leser
+    aus Flask-Threads den Writer nicht. Werden mehr als max_open Datenbanken benutzt,
+    schließt der Pool die am längsten unbenutzte (LRU).
+
+    init(key, conn) läuft einmal beim Öffnen auf der Schreibverbindung (Schema,
+    Migrationen); der Rückgabewert steht danach als conn.meta auf beiden Verbindungen.
+    """
+
+    def __init__(self, path_for: Callable[[Hashable], str],
+                 init: Optional[Callable[[Hashable, sqlite3.Connection], Any]] = None,
+                 max_open: int = SQLITE_POOL_MAX_OPEN, pragmas: Tuple[str, ...] = SQLITE_WAL_PRAGMAS):
+        self._path_for = path_for
+        self._init = init
+        self.max_open = max_open
+        self.pragmas = pragmas
+        self._lock = threading.Lock()
+        self._open: "OrderedDict[Hashable, _PooledDatabase]" = OrderedDict()
+        self._stats = {'opened': 0, 'evicted': 0}
+
+    def _connect(self, path: str, read_only: bool = False) -> PooledConnection:
+        conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False,
+                               cached_statements=SQLITE_STATEMENT_CACHE, factory=PooledConnection)
+        conn.row_factory = sqlite3.Row
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _checkout(self, key: Hashable) -> _PooledDatabase:
+        with self._lock:
+            db = self._open.get(key)
+            if db is None:
+                db = self._open[key] = _PooledDatabase(self._path_for(key))
+            self._open.move_to_end(key)
+            db.users += 1
+            self._evict_locked()
+        return db
+
+    def _checkin(self, db: _PooledDatabase) -> None:
+        with self._lock:
+            db.users -= 1
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        if len(self._open) <= self.max_open:
+            return
+        for key in list(self._open):
+            if len(self._open) <= self.max_open:
+                break
+            db = self._open[key]
+            if db.users == 0:
+                del self._open[key]
+                self._close_db(db)
+                self._stats['evicted'] += 1
+
+    @staticmethod
+    def _close_db(db: _PooledDatabase) -> None:
+        with db.write_lock, db.read_lock:
+            db.closed = True
+            for conn in (db.reader, db.writer):
+                if conn is not None:
+                    conn.close()
+            db.reader = db.writer = None
+
+    def _ensure_writer(self, key: Hashable, db: _PooledDatabase) -> None:
+        # Aufruf mit gehaltenem write_lock
+        if db.writer is None:
+            conn = self._connect(db.path)
+            try:
+                db.meta = self._init(key, conn) if self._init else None
+            except Exception:
+                conn.close()
+                raise
+            conn.meta = db.meta
+            db.writer = conn
+            with self._lock:
+                self._stats['opened'] += 1
+
+    @contextmanager
+    def writer(self, key: Hashable) -> Iterator[PooledConnection]:
+        """Exklusive Schreibverbindung; bei einer Exception wird die offene Transaktion zurückgerollt."""
+        while True:
+            db = self._checkout(key)
+            try:
+                with db.write_lock:
+                    if db.closed:
+                        # Zwischen Checkout und Lock geschlossen (z.B. Wiederherstellung): neu öffnen
+                        continue
+                    self._ensure_writer(key, db)
+                    conn = db.writer
+                    try:
+                        yield conn
+                    except BaseException:
+                        if conn.in_transaction:
+                            conn.rollback()
+                        raise
+                    return
+            finally:
+                self._checkin(db)
+
+    @contextmanager
+    def reader(self, key: Hashable) -> Iterator[PooledConnection]:
+        """Leseverbindung (query_only); sieht alles, was der Writer committet hat."""
+        while True:
+            db = self._checkout(key)
+            try:
+                if db.writer is None:
+                    # Schema anlegen/migrieren, bevor zum ersten Mal gelesen wird
+                    with db.write_lock:
+                        if not db.closed:
+                            self._ensure_writer(key, db)
+                with db.read_lock:
+                    if db.closed:
+                        continue
+                    if db.reader is None:
+                        db.reader = self._connect(db.path, read_only=True)
+                        db.reader.meta = db.meta
+                    yield db.reader
+                    return
+            finally:
+                self._checkin(db)
+
+    def close(self, key: Hashable) -> None:
+        """Schließt eine Datenbank (wartet auf laufende Zugriffe); wird bei Bedarf neu geöffnet."""
+        with self._lock:
+            db = self._open.pop(key, None)
+        if db is not None:
+            self._close_db(db)
+
+    def close_all(self) -> None:
+        with self._lock:
+            dbs = list(self._open.values())
+            self._open.clear()
+        for db in dbs:
+            self._close_db(db)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, open=len(self._open), max_open=self.max_open)
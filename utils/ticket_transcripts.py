@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+import gzip
+import html
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+from utils.config import GUILDS_DATA_DIR
+
+TRANSCRIPTS_DIR_NAME = "transcripts"
+INDEX_MODULE_NAME = "transcripts_index"
+# Obergrenze für Einträge im durchsuchbaren Index; die Transkript-Dateien selbst bleiben erhalten
+INDEX_MAX_ENTRIES = 1000
+# Nachrichten pro Schreibvorgang im Thread (die Dateizugriffe laufen nicht im Bot-Loop)
+WRITE_BATCH_SIZE = 100
+
+HTML_HEADER = """<!DOCTYPE html>
+<html lang="de">
+<head>
+<meta charset="utf-8">
+<title>Transkript - {title}</title>
+<style>
+body {{ background: #1e1f22; color: #dbdee1; font-family: sans-serif; margin: 0; padding: 20px; }}
+h1 {{ color: #fff; font-size: 20px; }}
+.msg {{ display: flex; gap: 12px; padding: 6px 0; border-bottom: 1px solid #2b2d31; }}
+.avatar {{ width: 36px; height: 36px; border-radius: 50%; }}
+.author {{ color: #fff; font-weight: bold; }}
+.time {{ color: #949ba4; font-size: 12px; margin-left: 6px; }}
+.edited {{ color: #949ba4; font-size: 11px; }}
+.content {{ white-space: pre-wrap; word-break: break-word; }}
+.embed {{ border-left: 4px solid #5865f2; background: #2b2d31; padding: 6px 10px; margin-top: 4px; border-radius: 4px; }}
+.attachment img {{ max-width: 400px; max-height: 300px; margin-top: 4px; }}
+a {{ color: #00a8fc; }}
+</style>
+</head>
+<body>
+<h1>Transkript: {title}</h1>
+"""
+
+HTML_FOOTER = """<p class="time">{count} Nachrichten, {attachments} Anhänge</p>
+</body>
+</html>
+"""
+
+
+def get_transcripts_dir(guild_id: int) -> str:
+    path = os.path.join(GUILDS_DATA_DIR, str(guild_id), TRANSCRIPTS_DIR_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def serialize_message(message) -> Dict[str, Any]:
+    """Wandelt eine discord.Message in einen kompakten, JSON-fähigen Eintrag um."""
+    return {
+        'id': message.id,
+        'author_id': message.author.id,
+        'author_name': message.author.name,
+        'author_avatar': message.author.display_avatar.url,
+        'created_at': message.created_at.isoformat(),
+        'edited_at': message.edited_at.isoformat() if message.edited_at else None,
+        'content': message.content,
+        'reference_id': message.reference.message_id if message.reference else None,
+        'attachments': [
+            {
+                'filename': a.filename,
+                'url': a.url,
+                'size': a.size,
+                'content_type': a.content_type,
+            }
+            for a in message.attachments
+        ],
+        'embeds': [e.to_dict() for e in message.embeds],
+    }
+
+
+def _render_message_html(entry: Dict[str, Any]) -> str:
+    esc = html.escape
+    created = entry['created_at'][:19].replace('T', ' ')
+    parts = [
+        '<div class="msg">',
+        f'<img class="avatar" src="{esc(entry["author_avatar"])}" alt="">',
+        '<div>',
+        f'<span class="author">{esc(entry["author_name"])}</span><span class="time">{created}</span>',
+    ]
+    if entry['edited_at']:
+        parts.append('<span class="edited"> (bearbeitet)</span>')
+    if entry['content']:
+        parts.append(f'<div class="content">{esc(entry["content"])}</div>')
+    for embed in entry['embeds']:
+        title = esc(embed.get('title', ''))
+        description = esc(embed.get('description', ''))
+        parts.append(f'<div class="embed"><b>{title}</b><div class="content">{description}</div>')
+        for field in embed.get('fields', []):
+            parts.append(f'<div><b>{esc(field.get("name", ""))}</b><div class="content">{esc(field.get("value", ""))}</div></div>')
+        parts.append('</div>')
+    for attachment in entry['attachments']:
+        url = esc(attachment['url'])
+        name = esc(attachment['filename'])
+        if (attachment.get('content_type') or '').startswith('image/'):
+            parts.append(f'<div class="attachment"><a href="{url}"><img src="{url}" alt="{name}"></a></div>')
+        else:
+            parts.append(f'<div class="attachment">📎 <a href="{url}">{name}</a> ({attachment["size"]} B)</div>')
+    parts.append('</div></div>\n')
+    return ''.join(parts)
+
+
+class TranscriptWriter:
+    """
+    Schreibt ein Transkript inkrementell: gzip-komprimiertes JSONL plus gerendertes HTML.
+    Es wird immer nur die aktuelle Nachricht im Speicher gehalten.
+    """
+
+    def __init__(self, guild_id: int, ticket_id: int, title: str):
+        self.guild_id = guild_id
+        self.ticket_id = ticket_id
+        self.title = title
+        base_dir = get_transcripts_dir(guild_id)
+        self.jsonl_path = os.path.join(base_dir, f"{ticket_id}.jsonl.gz")
+        self.html_path = os.path.join(base_dir, f"{ticket_id}.html")
+        self.message_count = 0
+        self.attachments: List[Dict[str, Any]] = []
+        self.participants: Dict[str, str] = {}
+        self.first_message_at: Optional[str] = None
+        self.last_message_at: Optional[str] = None
+        self._jsonl = gzip.open(self.jsonl_path, 'wt', encoding='utf-8')
+        self._html = open(self.html_path, 'w', encoding='utf-8')
+        self._html.write(HTML_HEADER.format(title=html.escape(title)))
+
+    def write_entries(self, entries: List[Dict[str, Any]]) -> None:
+        """Schreibt mit serialize_message aufbereitete Nachrichten (blockierend, für asyncio.to_thread)."""
+        for entry in entries:
+            self._jsonl.write(json.dumps(entry, ensure_ascii=False))
+            self._jsonl.write('\n')
+            self._html.write(_render_message_html(entry))
+
+            self.message_count += 1
+            self.participants[str(entry['author_id'])] = entry['author_name']
+            if self.first_message_at is None:
+                self.first_message_at = entry['created_at']
+            self.last_message_at = entry['created_at']
+            for attachment in entry['attachments']:
+                self.attachments.append({'message_id': entry['id'], 'filename': attachment['filename'], 'url': attachment['url']})
+
+    def close(self) -> None:
+        self._html.write(HTML_FOOTER.format(count=self.message_count, attachments=len(self.attachments)))
+        self._html.close()
+        self._jsonl.close()
+
+    def abort(self) -> None:
+        """Schließt und entfernt unvollständige Dateien."""
+        for handle in (self._html, self._jsonl):
+            try:
+                handle.close()
+            except Exception:
+                pass
+        for path in (self.html_path, self.jsonl_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def index_entry(self, **extra) -> Dict[str, Any]:
+        entry = {
+            'ticket_id': self.ticket_id,
+            'title': self.title,
+            'closed_at': datetime.now(timezone.utc).isoformat(),
+            'message_count': self.message_count,
+            'first_message_at': self.first_message_at,
+            'last_message_at': self.last_message_at,
+            'participants': self.participants,
+            'attachments': self.attachments,
+            'html_file': os.path.basename(self.html_path),
+            'jsonl_file': os.path.basename(self.jsonl_path),
+        }
+        entry.update(extra)
+        return entry
+
+
+def add_to_index(data_manager, guild_id: int, entry: Dict[str, Any]) -> None:
+    index = data_manager.get_guild_data(guild_id, INDEX_MODULE_NAME, {"transcripts": []})
+    transcripts = index.setdefault("transcripts", [])
+    transcripts[:] = [t for t in transcripts if t.get('ticket_id') != entry['ticket_id']]
+    transcripts.append(entry)
+    del transcripts[:-INDEX_MAX_ENTRIES]
+    data_manager.save_guild_data(guild_id, INDEX_MODULE_NAME, index)
+
+
+def search_index(data_manager, guild_id: int, query: str = "", limit: int = 50) -> List[Dict[str, Any]]:
+    """Durchsucht Titel, Ticket-IDs, Teilnehmer und Dateinamen der Anhänge (neueste zuerst)."""
+    index = data_manager.get_guild_data(guild_id, INDEX_MODULE_NAME, {"transcripts": []})
+    query = (query or "").strip().lower()
+    results = []
+    for entry in reversed(index.get("transcripts", [])):
+        if query:
+            haystack = " ".join([
+                str(entry.get('ticket_id', '')),
+                str(entry.get('custom_ticket_id', '')),
+                entry.get('title', ''),
+                entry.get('reason', '') or '',
+                " ".join(entry.get('participants', {}).values()),
+                " ".join(entry.get('participants', {}).keys()),
+                " ".join(a.get('filename', '') for a in entry.get('attachments', [])),
+            ]).lower()
+            if query not in haystack:
+                continue
+        results.append(entry)
+        if len(results) >= limit:
+            break
+    return results
+
+
+def get_transcript_path(guild_id: int, ticket_id: int, kind: str = "html") -> Optional[str]:
+    filename = f"{ticket_id}.html" if kind == "html" else f"{ticket_id}.jsonl.gz"
+    path = os.path.join(get_transcripts_dir(guild_id), filename)
+    return path if os.path.exists(path) else None
+
+
+def iter_file_chunks(path: str, chunk_size: int) -> Iterator[Tuple[int, bytes]]:
+    """Liest eine Datei stückweise, damit nie die ganze Datei im Speicher liegt."""
+    with open(path, 'rb') as f:
+        part = 1
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield part, chunk
+            part += 1
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+from collections import Counter
+from typing import Dict, FrozenSet, Tuple
+from utils.config import DATA_DIR
+
+WORDLE_DIR = os.path.join(DATA_DIR, "wordle")
+# Alle erlaubten Rateversuche (ein Wort pro Zeile)
+GUESSES_FILE = os.path.join(WORDLE_DIR, "guesses.txt")
+# Mögliche Tageswörter (ein Wort pro Zeile), sonst die eingebaute Liste
+ANSWERS_FILE = os.path.join(WORDLE_DIR, "answers.txt")
+
+WORD_LENGTH = 5
+
+# Eingebaute Auswahl an deutschen 5-Buchstaben-Wörtern
+DEFAULT_ANSWERS = (
+    "APFEL", "BIRNE", "STERN", "STURM", "RADIO", "TISCH", "STUHL", "LAMPE", "FEUER", "KATZE",
+    "PFUND", "STADT", "INSEL", "TRAUM", "GLÜCK", "ABEND", "MUSIK", "SPORT", "WAGEN", "BLUME",
+    "REISE", "PREIS", "STROM", "DRAHT", "KRAFT", "KLEID", "GLANZ", "BLATT", "WOLKE", "REGEN",
+    "SONNE", "MONAT", "JAHRE", "GRUSS", "BRIEF", "MARKT", "KUNST", "SPIEL", "ZEBRA", "VOGEL",
+)
+
+GREEN = "🟩"
+YELLOW = "🟨"
+GREY = "⬛"
+
+
+def _is_valid_word(word: str) -> bool:
+    return len(word) == WORD_LENGTH and word.isalpha()
+
+
+def _load_words(path: str) -> FrozenSet[str]:
+    if not os.path.exists(path):
+        return frozenset()
+    with open(path, 'r', encoding='utf-8') as f:
+        return frozenset(w for w in (line.strip().upper() for line in f) if _is_valid_word(w))
+
+
+class WordleDictionary:
+    """
+    Wortliste für Wordle. Wird einmal beim Laden des Cogs eingelesen.
+
+    Rateversuche werden gegen ein frozenset geprüft. Ohne guesses.txt wird jedes
+    Wort mit 5 Buchstaben akzeptiert (bisheriges Verhalten).
+    """
+
+    def __init__(self, guesses_path: str = GUESSES_FILE, answers_path: str = ANSWERS_FILE):
+        answers = _load_words(answers_path) or frozenset(DEFAULT_ANSWERS)
+        # Sortiert, damit das Tageswort nicht von der Set-Reihenfolge abhängt
+        self.answers: Tuple[str, ...] = tuple(sorted(answers))
+        self.guesses: FrozenSet[str] = _load_words(guesses_path) | answers
+        self.strict = os.path.exists(guesses_path)
+        self._target_counts: Dict[str, Dict[str, int]] = {}
+
+    def is_allowed(self, word: str) -> bool:
+        if not _is_valid_word(word):
+            return False
+        return word in self.guesses if self.strict else True
+
+    def daily_word(self, date_str: str) -> str:
+        """Deterministisches Tageswort, ohne den globalen Zufallsgenerator neu zu seeden."""
+        digest = hashlib.sha256(date_str.encode('utf-8')).digest()
+        return self.answers[int.from_bytes(digest[:8], 'big') % len(self.answers)]
+
+    def _letter_counts(self, target: str) -> Dict[str, int]:
+        counts = self._target_counts.get(target)
+        if counts is None:
+            if len(self._target_counts) > 8:
+                self._target_counts.clear()
+            counts = dict(Counter(target))
+            self._target_counts[target] = counts
+        return counts
+
+    def score(self, guess: str, target: str) -> str:
+        """Bewertet einen Rateversuch mit der vorberechneten Buchstabenzählung des Zielworts."""
+        remaining = self._letter_counts(target).copy()
+        result = [GREY] * WORD_LENGTH
+
+        # Erst volle Treffer (Grün)
+        for i in range(WORD_LENGTH):
+            if guess[i] == target[i]:
+                result[i] = GREEN
+                remaining[guess[i]] -= 1
+
+        # Dann Teil-Treffer (Gelb)
+        for i in range(WORD_LENGTH):
+            if result[i] == GREY:
+                letter = guess[i]
+                if remaining.get(letter, 0) > 0:
+                    result[i] = YELLOW
+                    remaining[letter] -= 1
+
+        return "".join(result)
+
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+import heapq
+import os
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from utils.config import GUILDS_DATA_DIR
+from utils.sqlite_pool import SQLitePool
+
+WRAPPED_DB_FILENAME = "wrapped.db"
+# Best Buddy: so viele Kandidaten hält der Space-Saving-Sketch pro User und Jahr
+BUDDY_SKETCH_SIZE = 16
+
+# Metriken der Zähler-Tabelle (key: 0, Kanal-ID oder interne Emoji-ID)
+METRIC_MESSAGES = 1
+METRIC_CHANNEL = 2
+METRIC_EMOJI = 3
+METRIC_VOICE_MINUTES = 4
+METRIC_VOICE_CHANNEL = 5
+METRIC_TICKETS = 6
+# Server-weite Zähler stehen unter user_id 0
+SERVER_USER_ID = 0
+
+# (year, user_id, metric, key)
+CounterKey = Tuple[int, int, int, int]
+
+
+def _db_path(guild_id: int) -> str:
+    guild_dir = os.path.join(GUILDS_DATA_DIR, str(guild_id))
+    os.makedirs(guild_dir, exist_ok=True)
+    return os.path.join(guild_dir, WRAPPED_DB_FILENAME)
+
+
+def _init_schema(guild_id: int, conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS counters (
+            year INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            metric INTEGER NOT NULL,
+            key INTEGER NOT NULL,
+            value INTEGER NOT NULL,
+            PRIMARY KEY (year, user_id, metric, key)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS emojis (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS buddies (
+            year INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            other_id INTEGER NOT NULL,
+            weight INTEGER NOT NULL,
+            error INTEGER NOT NULL,
+            PRIMARY KEY (year, user_id, other_id)
+        ) WITHOUT ROWID
+    """)
+    conn.commit()
+
+
+def update_buddy_sketch(sketch: Dict[int, List[int]], deltas: Dict[int, int], size: int = BUDDY_SKETCH_SIZE) -> None:
+    """
+    Space-Saving: hält höchstens `size` Kandidaten mit [Gewicht, Fehler].
+    Ein neuer Kandidat verdrängt den schwächsten und erbt dessen Gewicht als Fehlerschranke,
+    so bleibt jeder User mit einem Anteil > 1/size garantiert im Sketch.
+    Die Deltas eines Flushes werden kleinste zuerst angewendet, damit der lange Schwanz
+    die großen Kandidaten nicht nachträglich wieder verdrängt. Gesichert ist nur
+    Gewicht - Fehler; danach wird gerankt und angezeigt.
+    """
+    for other_id, weight in sorted(deltas.items(), key=lambda item: item[1]):
+        entry = sketch.get(other_id)
+        if entry is not None:
+            entry[0] += weight
+        elif len(sketch) < size:
+            sketch[other_id] = [weight, 0]
+        else:
+            victim = min(sketch, key=lambda o: sketch[o][0])
+            floor = sketch.pop(victim)[0]
+            sketch[other_id] = [floor + weight, floor]
+
+
+def _legacy_count(value: Any) -> int:
+    """Zählerwert aus einer alten JSON-Datei; alles Nicht-Numerische (null, Text, bool) zählt als 0."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+        return int(value)
+    return 0
+
+
+def _legacy_items(data: Any, key: str) -> List[Tuple[str, Any]]:
+    value = data.get(key) if isinstance(data, dict) else None
+    return list(value.items()) if isinstance(value, dict) else []
+
+
+def _new_user() -> Dict[str, Any]:
+    return {
+        "total_messages": 0, "top_channel": {}, "top_emojis": {},
+        "voice_minutes": 0, "top_voice_channel": {}, "interactions": {},
+        "tickets_processed": 0
+    }
+
+
+class _PendingGuild:
+    __slots__ = ('counters', 'emojis', 'buddies', 'years')
+
+    def __init__(self):
+        self.counters: Counter = Counter()
+        # (year, user_id, emoji_name) -> Anzahl; Namen werden erst beim Schreiben interniert
+        self.emojis: Counter = Counter()
+        # (year, user_id, other_id) -> Gewicht
+        self.buddies: Counter = Counter()
+        self.years: Set[int] = set()
+
+    def merge(self, other: "_PendingGuild") -> None:
+        self.counters.update(other.counters)
+        self.emojis.update(other.emojis)
+        self.buddies.update(other.buddies)
+        self.years |= other.years
+
+
+class WrappedStore:
+    """
+    Kompakter Speicher für die Wrapped-Statistiken (data/guilds/<id>/wrapped.db).
+
+    Listener zählen nur in einem Puffer im Speicher hoch; flush() schreibt alle Änderungen
+    einer Guild gesammelt als Upserts (ein Zähler pro Jahr/User/Metrik/Schlüssel, Emojis
+    als interne IDs). Best Buddy nutzt pro User einen Top-K-Sketch statt einer Liste
+    aller Kontakte, der Speicher wächst damit linear mit der Zahl der User.
+
+    Alte wrapped_<jahr>.json werden beim ersten Zugriff übernommen und danach geleert.
+    """
+
+    def __init__(self, data_manager, pool: Optional[SQLitePool] = None):
+        self.data = data_manager
+        self.pool = pool or SQLitePool(_db_path, init=_init_schema)
+        self._lock = threading.Lock()
+        # Reihenfolge der Schreibvorgänge sichern (Flush-Loop und Snapshot können parallel laufen)
+        self._flush_lock = threading.Lock()
+        # Übernahme alter JSON-Dateien nur einmal gleichzeitig (Flush und Dashboard-Lesezugriffe)
+        self._migrate_lock = threading.Lock()
+        self._pending: Dict[int, _PendingGuild] = {}
+        self._migrated: Set[Tuple[int, int]] = set()
+
+    # --- Erfassen (Bot-Loop, nicht blockierend) ---
+
+    def _guild(self, guild_id: int, year: int) -> _PendingGuild:
+        pending = self._pending.get(guild_id)
+        if pending is None:
+            pending = self._pending[guild_id] = _PendingGuild()
+        pending.years.add(year)
+        return pending
+
+    def add_message(self, guild_id: int, year: int, user_id: int, channel_id: int, emojis: Iterable[str] = ()) -> None:
+        with self._lock:
+            pending = self._guild(guild_id, year)
+            for uid in (user_id, SERVER_USER_ID):
+                pending.counters[(year, uid, METRIC_MESSAGES, 0)] += 1
+                pending.counters[(year, uid, METRIC_CHANNEL, channel_id)] += 1
+                for name in emojis:
+                    pending.emojis[(year, uid, name)] += 1
+
+    def add_voice(self, guild_id: int, year: int, user_id: int, channel_id: int, minutes: int) -> None:
+        with self._lock:
+            pending = self._guild(guild_id, year)
+            pending.counters[(year, SERVER_USER_ID, METRIC_VOICE_MINUTES, 0)] += minutes
+            pending.counters[(year, user_id, METRIC_VOICE_MINUTES, 0)] += minutes
+            pending.counters[(year, user_id, METRIC_VOICE_CHANNEL, channel_id)] += minutes
+
+    def add_ticket(self, guild_id: int, year: int, user_id: int) -> None:
+        with self._lock:
+            self._guild(guild_id, year).counters[(year, user_id, METRIC_TICKETS, 0)] += 1
+
+    def add_interaction(self, guild_id: int, year: int, user_id: int, other_id: int, weight: int = 1) -> None:
+        with self._lock:
+            self._guild(guild_id, year).buddies[(year, user_id, other_id)] += weight
+
+    # --- Schreiben (Worker-Thread) ---
+
+    def flush(self, guild_id: Optional[int] = None) -> int:
+        """Schreibt gepufferte Zähler (einer oder aller Guilds). Gibt die Anzahl geschriebener Zeilen zurück."""
+        with self._flush_lock:
+            with self._lock:
+                if guild_id is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    pending = self._pending.pop(guild_id, None)
+                    batch = {guild_id: pending} if pending else {}
+            written = 0
+            for gid, pending in batch.items():
+                try:
+                    for year in pending.years:
+                        self._ensure_migrated(gid, year)
+                    written += self._write(gid, pending)
+                except Exception as e:
+                    # Zähler zurück in den Puffer, der nächste Flush versucht es erneut (z.B. Datenbank gesperrt)
+                    self._requeue(gid, pending)
+                    print(f"[Wrapped] Fehler beim Speichern der Statistiken für Guild {gid}: {e}")
+            return written
+
+    def _requeue(self, guild_id: int, pending: _PendingGuild) -> None:
+        with self._lock:
+            current = self._pending.get(guild_id)
+            if current is None:
+                self._pending[guild_id] = pending
+            else:
+                current.merge(pending)
+
+    def _intern_emojis(self, conn: sqlite3.Connection, names: Set[str]) -> Dict[str, int]:
+        conn.executemany("INSERT OR IGNORE INTO emojis (name) VALUES (?)", [(n,) for n in names])
+        ids = {}
+        for name in names:
+            ids[name] = conn.execute("SELECT id FROM emojis WHERE name = ?", (name,)).fetchone()[0]
+        return ids
+
+    def _write(self, guild_id: int, pending: _PendingGuild) -> int:
+        counters = Counter(pending.counters)
+        buddies: Dict[Tuple[int, int], Dict[int, int]] = defaultdict(dict)
+        for (year, user_id, other_id), weight in pending.buddies.items():
+            buddies[(year, user_id)][other_id] = weight
+
+        with self.pool.writer(guild_id) as conn:
+            if pending.emojis:
+                emoji_ids = self._intern_emojis(conn, {name for _, _, name in pending.emojis})
+                for (year, user_id, name), count in pending.emojis.items():
+                    counters[(year, user_id, METRIC_EMOJI, emoji_ids[name])] += count
+
+            conn.executemany("""
+                INSERT INTO counters (year, user_id, metric, key, value) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(year, user_id, metric, key) DO UPDATE SET value = value + excluded.value
+            """, [(*key, value) for key, value in counters.items()])
+
+            for (year, user_id), deltas in buddies.items():
+                rows = conn.execute(
+                    "SELECT other_id, weight, error FROM buddies WHERE year = ? AND user_id = ?", (year, user_id)
+                ).fetchall()
+                sketch = {row['other_id']: [row['weight'], row['error']] for row in rows}
+                update_buddy_sketch(sketch, deltas)
+                conn.execute("DELETE FROM buddies WHERE year = ? AND user_id = ?", (year, user_id))
+                conn.executemany(
+                    "INSERT INTO buddies (year, user_id, other_id, weight, error) VALUES (?, ?, ?, ?, ?)",
+                    [(year, user_id, other_id, w, e) for other_id, (w, e) in sketch.items()]
+                )
+            conn.commit()
+        return len(counters) + len(pending.buddies)
+
+    # --- Lesen ---
+
+    def build_document(self, guild_id: int, year: int) -> Dict[str, Any]:
+        """Jahresstand im bisherigen JSON-Format ({"server": ..., "users": ...}) für Snapshots."""
+        self.flush(guild_id)
+        self._ensure_migrated(guild_id, year)
+        server = {"total_messages": 0, "top_emojis": {}, "active_channels": {}, "total_voice_minutes": 0}
+        users: Dict[str, Dict[str, Any]] = {}
+
+        with self.pool.reader(guild_id) as conn:
+            emoji_names = {row['id']: row['name'] for row in conn.execute("SELECT id, name FROM emojis")}
+            counter_rows = conn.execute(
+                "SELECT user_id, metric, key, value FROM counters WHERE year = ?", (year,)
+            ).fetchall()
+            buddy_rows = conn.execute(
+                "SELECT user_id, other_id, weight - error FROM buddies WHERE year = ? AND weight > error", (year,)
+            ).fetchall()
+
+        for user_id, metric, key, value in counter_rows:
+            if user_id == SERVER_USER_ID:
+                if metric == METRIC_MESSAGES:
+                    server["total_messages"] = value
+                elif metric == METRIC_CHANNEL:
+                    server["active_channels"][str(key)] = value
+                elif metric == METRIC_EMOJI:
+                    server["top_emojis"][emoji_names.get(key, "")] = value
+                elif metric == METRIC_VOICE_MINUTES:
+                    server["total_voice_minutes"] = value
+                continue
+
+            u_data = users.get(str(user_id))
+            if u_data is None:
+                u_data = users[str(user_id)] = _new_user()
+            if metric == METRIC_MESSAGES:
+                u_data["total_messages"] = value
+            elif metric == METRIC_CHANNEL:
+                u_data["top_channel"][str(key)] = value
+            elif metric == METRIC_EMOJI:
+                u_data["top_emojis"][emoji_names.get(key, "")] = value
+            elif metric == METRIC_VOICE_MINUTES:
+                u_data["voice_minutes"] = value
+            elif metric == METRIC_VOICE_CHANNEL:
+                u_data["top_voice_channel"][str(key)] = value
+            elif metric == METRIC_TICKETS:
+                u_data["tickets_processed"] = value
+
+        for user_id, other_id, weight in buddy_rows:
+            u_data = users.get(str(user_id))
+            if u_data is None:
+                u_data = users[str(user_id)] = _new_user()
+            u_data["interactions"][str(other_id)] = weight
+
+        return {"server": server, "users": users}
+
+    def server_stats(self, guild_id: int, year: int) -> Dict[str, Any]:
+        """Server-Zähler für das Dashboard (ohne User-Daten zu laden)."""
+        self.flush(guild_id)
+        self._ensure_migrated(guild_id, year)
+        server = {"total_messages": 0, "top_emojis": {}, "active_channels": {}, "total_voice_minutes": 0}
+        with self.pool.reader(guild_id) as conn:
+            emoji_names = {row['id']: row['name'] for row in conn.execute("SELECT id, name FROM emojis")}
+            rows = conn.execute(
+                "SELECT metric, key, value FROM counters WHERE year = ? AND user_id = ?", (year, SERVER_USER_ID)
+            ).fetchall()
+        for metric, key, value in rows:
+            if metric == METRIC_MESSAGES:
+                server["total_messages"] = value
+            elif metric == METRIC_CHANNEL:
+                server["active_channels"][str(key)] = value
+            elif metric == METRIC_EMOJI:
+                server["top_emojis"][emoji_names.get(key, "")] = value
+            elif metric == METRIC_VOICE_MINUTES:
+                server["total_voice_minutes"] = value
+        return server
+
+    # --- Übernahme alter JSON-Dateien ---
+
+    def _has_year(self, guild_id: int, year: int) -> bool:
+        with self.pool.reader(guild_id) as conn:
+            return conn.execute("SELECT 1 FROM counters WHERE year = ? LIMIT 1", (year,)).fetchone() is not None
+
+    def _ensure_migrated(self, guild_id: int, year: int) -> None:
+        """Übernimmt wrapped_<jahr>.json; als erledigt gilt sie erst nach Import und Umschreiben der Datei."""
+        key = (guild_id, year)
+        if key in self._migrated:
+            return
+        with self._migrate_lock:
+            if key in self._migrated:
+                return
+            module = f"wrapped_{year}"
+            # get_guild_data würde fehlende Dateien anlegen, daher erst die Version prüfen
+            if self.data.get_data_version(guild_id, module) is not None:
+                legacy = self.data.get_guild_data(guild_id, module)
+                if legacy.get("users") or legacy.get("server"):
+                    # Ist das Jahr schon in der Datenbank, scheiterte zuletzt nur das Umschreiben der Datei
+                    if not self._has_year(guild_id, year):
+                        self.import_legacy(guild_id, year, legacy)
+                    # Nur die Konfiguration behalten, die Zähler liegen jetzt in wrapped.db
+                    self.data.save_guild_data(guild_id, module, {"config": legacy.get("config", {}), "migrated_to": WRAPPED_DB_FILENAME})
+                    print(f"[Wrapped] wrapped_{year}.json für Guild {guild_id} nach {WRAPPED_DB_FILENAME} übernommen")
+            with self._lock:
+                self._migrated.add(key)
+
+    def import_legacy(self, guild_id: int, year: int, legacy: Dict[str, Any]) -> None:
+        """Übernimmt einen Jahresstand im alten JSON-Format (Interaktionen werden auf den Sketch gekürzt)."""
+        pending = _PendingGuild()
+        pending.years.add(year)
+        server = legacy.get("server")
+        server = server if isinstance(server, dict) else {}
+        sid = SERVER_USER_ID
+
+        def add(user_id: int, metric: int, key: int, value) -> None:
+            count = _legacy_count(value)
+            if count:
+                pending.counters[(year, user_id, metric, key)] += count
+
+        def add_emojis(user_id: int, data: Any) -> None:
+            for name, value in _legacy_items(data, "top_emojis"):
+                count = _legacy_count(value)
+                if count:
+                    pending.emojis[(year, user_id, str(name))] += count
+
+        add(sid, METRIC_MESSAGES, 0, server.get("total_messages", 0))
+        add(sid, METRIC_VOICE_MINUTES, 0, server.get("total_voice_minutes", 0))
+        for cid, count in _legacy_items(server, "active_channels"):
+            if str(cid).isdigit():
+                add(sid, METRIC_CHANNEL, int(cid), count)
+        add_emojis(sid, server)
+
+        for uid_str, u_data in _legacy_items(legacy, "users"):
+            if not str(uid_str).isdigit() or not isinstance(u_data, dict):
+                continue
+            uid = int(uid_str)
+            add(uid, METRIC_MESSAGES, 0, u_data.get("total_messages", 0))
+            add(uid, METRIC_VOICE_MINUTES, 0, u_data.get("voice_minutes", 0))
+            add(uid, METRIC_TICKETS, 0, u_data.get("tickets_processed", 0))
+            for cid, count in _legacy_items(u_data, "top_channel"):
+                if str(cid).isdigit():
+                    add(uid, METRIC_CHANNEL, int(cid), count)
+            for cid, minutes in _legacy_items(u_data, "top_voice_channel"):
+                if str(cid).isdigit():
+                    add(uid, METRIC_VOICE_CHANNEL, int(cid), minutes)
+            add_emojis(uid, u_data)
+            # Altdaten sind exakt: die größten Kandidaten direkt übernehmen (Fehler 0)
+            interactions = {}
+            for other, weight in _legacy_items(u_data, "interactions"):
+                count = _legacy_count(weight)
+                if str(other).isdigit() and count:
+                    interactions[int(other)] = interactions.get(int(other), 0) + count
+            for other_id, count in heapq.nlargest(BUDDY_SKETCH_SIZE, interactions.items(), key=lambda item: item[1]):
+                pending.buddies[(year, uid, other_id)] += count
+
+        self._write(guild_id, pending)
+
+    def create_snapshot(self, guild_id: int, dest_path: str) -> None:
+        """Konsistente Kopie von wrapped.db über die SQLite-Backup-API (für Server-Backups)."""
+        self.flush(guild_id)
+        with self.pool.reader(guild_id) as source:
+            dest = sqlite3.connect(dest_path)
+            try:
+                source.backup(dest)
+                # Die Kopie soll ohne -wal-Datei vollständig sein
+                dest.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                dest.close()
+
+    def close(self, guild_id: Optional[int] = None) -> None:
+        """Schließt die Datenbanken (z.B. vor/nach einer Wiederherstellung) und prüft Altdaten erneut."""
+        with self._lock:
+            if guild_id is None:
+                self._migrated.clear()
+            else:
+                self._migrated = {key for key in self._migrated if key[0] != guild_id}
+        if guild_id is None:
+            self.pool.close_all()
+        else:
+            self.pool.close(guild_id)